@@ -1,8 +1,8 @@
 """
 This is a simargs library for configuring an O3 CPU, allowing 
 command-line customization of various of the CPU params
-(It supports only branch predictor customization for now, but
-could be expanded)
+(It supports the branch predictor and the ROB, load queue and store
+queue sizes for now, but could be expanded)
 """
 from typing import Dict, Any
 import inspect
@@ -15,6 +15,9 @@ parser.add_argument(
     "--bpred", type=str, choices=["tage", "perceptron", "tournament"], default="tage",
     help="The CPU's branch predictor (default: tage)"
 )
+parser.add_argument("--rob_size", type=int, help="The CPU's reorder buffer entries")
+parser.add_argument("--lq_size", type=int, help="The CPU's load queue entries")
+parser.add_argument("--sq_size", type=int, help="The CPU's store queue entries")
 ###
 
 def get_cpu_params() -> Dict[str, Any]:
@@ -27,4 +30,13 @@ def get_cpu_params() -> Dict[str, Any]:
     elif (simarglib.get("bpred") == "tournament"):
         params["bpred_type"] = "Tournament"
 
+    if (simarglib.get("rob_size")):
+        params["numROBEntries"] = simarglib.get("rob_size")
+
+    if (simarglib.get("lq_size")):
+        params["LQEntries"] = simarglib.get("lq_size")
+
+    if (simarglib.get("sq_size")):
+        params["SQEntries"] = simarglib.get("sq_size")
+
     return params
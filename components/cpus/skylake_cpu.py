@@ -234,8 +234,9 @@ class SkylakeCPU(O3CPU):
         # Hint: These override the inherited class variables, which is
         # fine if you don't plan to change a parameter value often
         #
-        # We don't provide any command-line arguments for configuring
-        # the CPU, so you'll have to hardcode your values here.
+        # The ROB and load/store queue sizes can be overridden with
+        # --rob_size, --lq_size and --sq_size (e.g. to screen or sweep
+        # them), but you'll have to hardcode their defaults here.
         self.numROBEntries = FIXME
         self.numIQEntries = 97
         self.LQEntries = FIXME
@@ -243,6 +244,11 @@ class SkylakeCPU(O3CPU):
         self.numPhysIntRegs = 180
         self.numPhysFloatRegs = 168
 
+        # ROB and load/store queue sizes: from O3 command line args, if given
+        for param in ["numROBEntries", "LQEntries", "SQEntries"]:
+            if param in cpu_params:
+                setattr(self, param, cpu_params[param])
+
         # TLBs
         self.mmu = SkylakeMMU()
         
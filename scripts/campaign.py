@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+
+"""Expand a declarative sweep campaign into a command file.
+
+The campaign spec (see util/campaign.py for its format) lists the
+benchmarks, config script, fixed arguments and swept dimensions, and
+how to sample the design space (full-factorial, random or Latin
+hypercube). Each job is written as one line, annotated with its stable
+ID and the campaign's annotations, so the file can be run with
+
+    ./run-cmds-host.py <command-file>
+
+or turned into job arrays with job-array.py generate --command-file.
+A manifest, <command-file>.manifest.json, records each job's benchmark,
+swept arguments and outdir for the analysis afterwards.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Final, List
+
+from util.campaign import Campaign, CampaignJob
+
+
+def get_args() -> argparse.Namespace:
+    """Get the arguments to this script.
+
+    :return The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(
+        "Expand a declarative sweep campaign into a command file."
+    )
+    parser.add_argument(
+        "spec",
+        type=Path,
+        help="The campaign spec (.toml, or .yaml with PyYAML installed)",
+    )
+    parser.add_argument(
+        "-o",
+        "--command-file",
+        type=Path,
+        default=None,
+        help="The command file to write (default: the spec's path, ending in .txt)",
+    )
+    parser.add_argument(
+        "--no-manifest",
+        action="store_true",
+        help="Don't write <command-file>.manifest.json.",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only print how many jobs the campaign expands to.",
+    )
+    return parser.parse_args()
+
+
+def main():
+    """Run this script."""
+    args = get_args()
+    try:
+        campaign = Campaign.load(args.spec)
+        num_points: int = len(campaign.points())
+        jobs: List[CampaignJob] = campaign.jobs()
+    except (OSError, ValueError) as e:
+        print(f"Invalid campaign {args.spec}: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    num_benchmarks: Final[int] = max(len(campaign.benchmarks), 1)
+    num_duplicates: Final[int] = num_points * num_benchmarks - len(jobs)
+    print(
+        f"Campaign {campaign.name}: {num_points} {campaign.method} point(s) x "
+        f"{num_benchmarks} benchmark(s) = {len(jobs)} job(s)"
+        + (f" ({num_duplicates} duplicate(s) dropped)" if num_duplicates else "")
+    )
+    if args.dry_run:
+        return
+
+    command_file: Final[Path] = args.command_file or args.spec.with_suffix(".txt")
+    command_file.write_text(
+        f"# Campaign {campaign.name}, expanded from {args.spec}\n"
+        + "".join(f"{job.line(campaign.annotations)}\n" for job in jobs)
+    )
+    print(f"Wrote {len(jobs)} command(s) to {command_file}.")
+
+    if not args.no_manifest:
+        manifest: Final[Path] = command_file.with_name(
+            f"{command_file.name}.manifest.json"
+        )
+        manifest.write_text(
+            json.dumps(
+                {
+                    "campaign": campaign.name,
+                    "spec": str(args.spec.absolute()),
+                    "jobs": [job.manifest_entry() for job in jobs],
+                },
+                indent=2,
+            )
+        )
+        print(f"Wrote the manifest to {manifest}.")
+
+
+if __name__ == "__main__":
+    main()
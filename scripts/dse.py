@@ -0,0 +1,486 @@
+#!/usr/bin/env python3
+
+"""Explore the design space of a sweep campaign with fewer simulations.
+
+"halving" runs successive halving over the configurations of a campaign
+spec (see util/campaign.py): every configuration is simulated on the
+campaign's benchmarks with a small PeriodicROIManager budget, ranked by
+a metric (e.g. IPC or LLC MPKI), and only the best fraction is promoted
+to the next, longer budget. For example,
+
+    ./dse.py halving cache-bpred.toml --metric ipc \\
+        --rungs 2x50,4x200,10x800 --keep 0.33 --num-workers 32
+
+simulates all configurations with 2 ROIs of 50M instructions, the best
+third of them with 4 ROIs of 200M, and the best third of those with 10
+ROIs of 800M. The ranking of each rung is printed and written to a JSON
+report (by default, <campaign outdir>/halving.json).
+
+"surrogate" instead simulates the configurations with the campaign's own
+budget, but only some of them: after a few random ones (and any that
+were simulated before, e.g. by running the campaign's command file), it
+fits a Gaussian-process surrogate of the metric to the results, and
+simulates the batch of configurations with the highest expected
+improvement next. It stops once the expected improvement falls below
+--threshold of the best value, usually long before it has simulated a
+sizable fraction of the design space:
+
+    ./dse.py surrogate cache-bpred.toml --metric ipc --num-workers 16
+
+Before either, "screen" finds which of the dimensions matter: it
+simulates a Plackett-Burman design over them, each between its first
+and last level (e.g. 11 dimensions in 12 runs), and ranks their main
+effects on the metric of each benchmark, so that the sweep can leave out
+the ones that barely move it:
+
+    ./dse.py screen knobs.toml --metric ipc --num-workers 12
+
+Simulations run on this host, as with run-cmds-host.py. With --cache-dir,
+simulations run before (e.g. by an earlier exploration) are not run
+again (see util/result_cache.py).
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, Final, List, Optional, Tuple
+
+from util.campaign import Campaign
+from util.dse import (
+    DEFAULT_IMPROVEMENT_THRESHOLD,
+    DEFAULT_INITIAL_SAMPLES,
+    DEFAULT_KEEP,
+    DEFAULT_RUNGS,
+    Evaluation,
+    Rung,
+    parse_rungs,
+    screen_dimensions,
+    successive_halving,
+    surrogate_search,
+    sweep_cost,
+    unique_points,
+)
+from util.gem5_command import parse_size
+from util.metrics import METRICS, Metric
+from util.result_cache import DEFAULT_CACHE_DIR, DEFAULT_CACHE_SIZE, ResultCache
+from util.runner import DEFAULT_MAX_RETRIES
+from util.screening import Factor, main_effects, standard_error
+from util.simulation import SimulationPool
+
+# How many configurations of each rung to print
+DEFAULT_TOP: Final[int] = 10
+
+
+def format_point(point: Dict[str, Any]) -> str:
+    """Format a configuration's swept arguments.
+
+    :param point The arguments
+    :return The formatted arguments
+    """
+    return " ".join(f"{name}={value}" for name, value in point.items()) or "(fixed)"
+
+
+def print_ranking(
+    index: int, rung: Rung, ranked: List[Evaluation], metric: Metric, top: int
+) -> None:
+    """Print the best configurations of a rung.
+
+    :param index The rung's index
+    :param rung The rung
+    :param ranked The rung's ranked evaluations
+    :param metric The metric they were ranked by
+    :param top How many configurations to print
+    """
+    print(f"Rung {index} ({rung}), best {metric.name} first:")
+    for position, evaluation in enumerate(ranked[:top], 1):
+        value: str = f"{evaluation.score:.4f}" if evaluation.score is not None else "-"
+        print(f"  {position:>4}. {value:>10}  {format_point(evaluation.point)}")
+    failed: Final[int] = sum(1 for e in ranked if e.errors)
+    if failed:
+        print(f"  {failed} configuration(s) failed on some benchmark(s).")
+
+
+async def halving(args: argparse.Namespace, campaign: Campaign) -> None:
+    """Run successive halving over a campaign's configurations.
+
+    :param args The arguments of the halving command
+    :param campaign The campaign
+    """
+    metric: Final[Metric] = METRICS[args.metric]
+    rungs: Final[List[Rung]] = args.rungs
+    cache: Final[Optional[ResultCache]] = (
+        ResultCache(args.cache_dir, args.cache_size)
+        if args.cache_dir is not None
+        else None
+    )
+    outdir: Final[Path] = campaign.outdir / "halving"
+
+    async with SimulationPool(
+        num_workers=args.num_workers,
+        gem5_binary=campaign.gem5_binary,
+        spec_dir=campaign.spec_dir,
+        log_dir=outdir / "logs",
+        max_retries=args.max_retries,
+        cache=cache,
+    ) as pool:
+        history: List[List[Evaluation]] = await successive_halving(
+            pool, campaign, metric, rungs, args.keep, outdir
+        )
+
+    for index, (rung, ranked) in enumerate(zip(rungs, history)):
+        print_ranking(index, rung, ranked, metric, args.top)
+    print(
+        f"Simulated {100 * sweep_cost(history, rungs):.1f}% of the detailed "
+        "instructions of a full sweep with the last rung's budget."
+    )
+
+    report: Final[Path] = args.report or campaign.outdir / "halving.json"
+    report.parent.mkdir(parents=True, exist_ok=True)
+    report.write_text(
+        json.dumps(
+            {
+                "campaign": campaign.name,
+                "metric": metric.name,
+                "rungs": [
+                    {
+                        "num_rois": rung.num_rois,
+                        "roi_interval": rung.roi_interval,
+                        "evaluations": [e.record() for e in ranked],
+                    }
+                    for rung, ranked in zip(rungs, history)
+                ],
+            },
+            indent=2,
+        )
+    )
+    print(f"Wrote the report to {report}.")
+
+
+async def surrogate(args: argparse.Namespace, campaign: Campaign) -> None:
+    """Search a campaign's configurations guided by a surrogate model.
+
+    :param args The arguments of the surrogate command
+    :param campaign The campaign
+    """
+    metric: Final[Metric] = METRICS[args.metric]
+    cache: Final[Optional[ResultCache]] = (
+        ResultCache(args.cache_dir, args.cache_size)
+        if args.cache_dir is not None
+        else None
+    )
+    outdir: Final[Path] = campaign.outdir / "surrogate"
+
+    async with SimulationPool(
+        num_workers=args.num_workers,
+        gem5_binary=campaign.gem5_binary,
+        spec_dir=campaign.spec_dir,
+        log_dir=outdir / "logs",
+        max_retries=args.max_retries,
+        cache=cache,
+    ) as pool:
+        ranked, reason = await surrogate_search(
+            pool,
+            campaign,
+            metric,
+            args.batch_size or args.num_workers,
+            args.initial_samples,
+            args.threshold,
+            args.max_simulations,
+            outdir,
+        )
+
+    print(f"Stopped because {reason}.")
+    print(
+        f"Simulated {len(ranked)} of {len(unique_points(campaign))} "
+        f"configuration(s), best {metric.name} first:"
+    )
+    for position, evaluation in enumerate(ranked[: args.top], 1):
+        value: str = f"{evaluation.score:.4f}" if evaluation.score is not None else "-"
+        print(f"  {position:>4}. {value:>10}  {format_point(evaluation.point)}")
+
+    report: Final[Path] = args.report or campaign.outdir / "surrogate.json"
+    report.parent.mkdir(parents=True, exist_ok=True)
+    report.write_text(
+        json.dumps(
+            {
+                "campaign": campaign.name,
+                "metric": metric.name,
+                "stopped": reason,
+                "evaluations": [e.record() for e in ranked],
+            },
+            indent=2,
+        )
+    )
+    print(f"Wrote the report to {report}.")
+
+
+async def screen(args: argparse.Namespace, campaign: Campaign) -> None:
+    """Screen a campaign's dimensions for the ones that affect a metric.
+
+    :param args The arguments of the screen command
+    :param campaign The campaign
+    """
+    metric: Final[Metric] = METRICS[args.metric]
+    cache: Final[Optional[ResultCache]] = (
+        ResultCache(args.cache_dir, args.cache_size)
+        if args.cache_dir is not None
+        else None
+    )
+    outdir: Final[Path] = campaign.outdir / "screening"
+
+    async with SimulationPool(
+        num_workers=args.num_workers,
+        gem5_binary=campaign.gem5_binary,
+        spec_dir=campaign.spec_dir,
+        log_dir=outdir / "logs",
+        max_retries=args.max_retries,
+        cache=cache,
+    ) as pool:
+        factors, design, evaluations = await screen_dimensions(
+            pool, campaign, metric, args.foldover, outdir
+        )
+
+    failed: Final[int] = sum(1 for e in evaluations if e.errors)
+    if failed:
+        print(f"{failed} of {len(design)} run(s) failed on some benchmark(s).")
+
+    # The main effects on each benchmark, then on the runs' scores
+    responses: Dict[str, List[Optional[float]]] = {
+        benchmark: [e.values.get(benchmark) for e in evaluations]
+        for benchmark in campaign.benchmarks or [""]
+    }
+    if len(responses) > 1:
+        responses["all"] = [e.score for e in evaluations]
+    effects: Dict[str, Any] = {}
+    for benchmark, values in responses.items():
+        subject: str = {"": "the binary", "all": "all benchmarks"}.get(
+            benchmark, benchmark
+        )
+        scored: List[float] = [value for value in values if value is not None]
+        try:
+            column_effects: List[float] = main_effects(design, values)
+        except ValueError as e:
+            print(f"Can't compute the main effects on {subject}: {e}")
+            continue
+        mean: float = sum(scored) / len(scored)
+        error: Optional[float] = standard_error(column_effects, len(factors))
+        ranked: List[Tuple[Factor, float]] = sorted(
+            zip(factors, column_effects), key=lambda item: -abs(item[1])
+        )
+
+        print(
+            f"Main effects on the {metric.name} of {subject} "
+            f"(mean {mean:.4f}"
+            + (f", standard error {error:.4f}" if error is not None else "")
+            + "):"
+        )
+        for position, (factor, effect) in enumerate(ranked, 1):
+            significant: bool = error is not None and abs(effect) > 2 * error
+            print(
+                f"  {position:>4}. {factor.name:<20} {factor.low} -> {factor.high}: "
+                f"{effect:+.4f}"
+                + (f" ({100 * effect / mean:+.1f}%)" if mean != 0 else "")
+                + (" *" if significant else "")
+            )
+        effects[benchmark] = {
+            "mean": mean,
+            "standard_error": error,
+            "effects": {factor.name: effect for factor, effect in ranked},
+        }
+    print("* larger than twice the standard error")
+
+    report: Final[Path] = args.report or campaign.outdir / "screening.json"
+    report.parent.mkdir(parents=True, exist_ok=True)
+    report.write_text(
+        json.dumps(
+            {
+                "campaign": campaign.name,
+                "metric": metric.name,
+                "factors": {
+                    factor.name: [factor.low, factor.high] for factor in factors
+                },
+                "runs": [e.record() for e in evaluations],
+                "main_effects": effects,
+            },
+            indent=2,
+        )
+    )
+    print(f"Wrote the report to {report}.")
+
+
+def get_args() -> argparse.Namespace:
+    """Get the arguments to this script.
+
+    :return The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(
+        "Explore the design space of a sweep campaign with fewer simulations."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    # Arguments of every exploration
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument(
+        "spec",
+        type=Path,
+        help="The campaign spec whose configurations to explore",
+    )
+    common.add_argument(
+        "--metric",
+        choices=list(METRICS),
+        default="ipc",
+        help="The metric to rank configurations by (default: ipc)",
+    )
+    common.add_argument(
+        "-n",
+        "--num-workers",
+        type=int,
+        default=1,
+        help="The number of simulations to run at once (default: 1)",
+    )
+    common.add_argument(
+        "--max-retries",
+        type=int,
+        default=DEFAULT_MAX_RETRIES,
+        help=(
+            "How many times to retry a simulation that failed transiently "
+            f"(default: {DEFAULT_MAX_RETRIES})"
+        ),
+    )
+    common.add_argument(
+        "--cache-dir",
+        type=Path,
+        nargs="?",
+        const=DEFAULT_CACHE_DIR,
+        default=None,
+        help=(
+            "Reuse the results of simulations run before from this result "
+            f"cache (default: {DEFAULT_CACHE_DIR}, if given without a directory)"
+        ),
+    )
+    common.add_argument(
+        "--cache-size",
+        type=parse_size,
+        default=DEFAULT_CACHE_SIZE,
+        help="The size of the result cache, e.g. 20GiB",
+    )
+    common.add_argument(
+        "--top",
+        type=int,
+        default=DEFAULT_TOP,
+        help=f"How many of the best configurations to print (default: {DEFAULT_TOP})",
+    )
+    common.add_argument(
+        "--report",
+        type=Path,
+        default=None,
+        help="The JSON report to write (default: under the campaign's outdir)",
+    )
+
+    # halving
+    halving_parser = subparsers.add_parser(
+        "halving",
+        parents=[common],
+        help="Successive halving over ROI budgets.",
+    )
+    halving_parser.set_defaults(func=halving)
+    halving_parser.add_argument(
+        "--rungs",
+        type=parse_rungs,
+        default=parse_rungs(DEFAULT_RUNGS),
+        help=(
+            "The budget of each rung as <num-rois>x<roi-interval in M "
+            f"instructions>, smallest first (default: {DEFAULT_RUNGS})"
+        ),
+    )
+    halving_parser.add_argument(
+        "--keep",
+        type=float,
+        default=DEFAULT_KEEP,
+        help=(
+            "The fraction of configurations promoted to the next rung "
+            f"(default: {DEFAULT_KEEP:.2f})"
+        ),
+    )
+
+    # surrogate
+    surrogate_parser = subparsers.add_parser(
+        "surrogate",
+        parents=[common],
+        help="Search guided by a Gaussian-process surrogate of the metric.",
+    )
+    surrogate_parser.set_defaults(func=surrogate)
+    surrogate_parser.add_argument(
+        "--initial-samples",
+        type=int,
+        default=DEFAULT_INITIAL_SAMPLES,
+        help=(
+            "How many configurations to simulate (including ones simulated "
+            "before) before fitting the first surrogate (default: "
+            f"{DEFAULT_INITIAL_SAMPLES})"
+        ),
+    )
+    surrogate_parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=None,
+        help=("The most configurations to simulate per round (default: --num-workers)"),
+    )
+    surrogate_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_IMPROVEMENT_THRESHOLD,
+        help=(
+            "Stop once no configuration is expected to improve on the best "
+            "by more than this fraction of it (default: "
+            f"{DEFAULT_IMPROVEMENT_THRESHOLD})"
+        ),
+    )
+    surrogate_parser.add_argument(
+        "--max-simulations",
+        type=int,
+        default=None,
+        help="The most configurations to simulate (default: no limit)",
+    )
+
+    # screen
+    screen_parser = subparsers.add_parser(
+        "screen",
+        parents=[common],
+        help="Rank the main effects of the campaign's dimensions.",
+    )
+    screen_parser.set_defaults(func=screen)
+    screen_parser.add_argument(
+        "--foldover",
+        action="store_true",
+        help=(
+            "Fold the design over (twice the runs), so that main effects "
+            "aren't aliased with two-factor interactions"
+        ),
+    )
+    return parser.parse_args()
+
+
+def main():
+    """Run this script."""
+    args = get_args()
+    try:
+        campaign = Campaign.load(args.spec)
+    except (OSError, ValueError) as e:
+        print(f"Invalid campaign {args.spec}: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        asyncio.run(args.func(args, campaign))
+    except KeyboardInterrupt:
+        print()
+        print("Interrupted, all running simulations were stopped.")
+    except ValueError as e:
+        print(f"Can't explore {args.spec}: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
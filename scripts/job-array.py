@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+
+"""Run a campaign as SLURM or HTCondor job arrays, one task per command.
+
+"generate" writes a job array directory from a command file (the same
+format as for run-cmds-host.py), or from a sweep of SPEC '06 benchmarks
+and se_custom_binary_periodic.py arguments. Each task requests 1 CPU (or
+its "cpus" annotation) and memory sized from its "mem" annotation, its
+history, or the memory its gem5 config script simulates. Submit it with
+
+    <array-dir>/submit-slurm.sh           # SLURM
+    condor_submit <array-dir>/condor.sub  # HTCondor
+
+or run a task locally with
+
+    <array-dir>/task.sh <array-dir>/tasks/<class>.txt <line>
+
+"collect" then reports the exit code of each task, and can write the
+tasks that failed or never finished to a command file to run again.
+
+An example, sweeping the ROI interval of two benchmarks:
+
+    ./job-array.py generate spec-array --benchmarks 429.mcf 470.lbm \\
+        --sweep roi-interval=100,1000 --sweep num-rois=10
+"""
+
+import argparse
+import itertools
+import sys
+from pathlib import Path
+from typing import Dict, Final, List, Optional, Tuple
+
+from util.batch import DEFAULT_MAX_ARRAY_SIZE, JobArray, make_tasks
+from util.gem5_command import parse_size
+from util.history import DEFAULT_HISTORY_FILE, JobHistory
+from util.runner import read_command_file
+from util.spec import (
+    DEFAULT_GEM5_BINARY,
+    DEFAULT_SPEC06_DIR,
+    SPEC06_BENCHMARKS,
+    SpecCommand,
+)
+
+DEFAULT_GEM5_SCRIPT: Final[Path] = Path("se_custom_binary_periodic.py")
+DEFAULT_OUTDIR: Final[Path] = Path("m5out")
+
+
+def parse_sweep(sweep: str) -> Tuple[str, List[str]]:
+    """Parse a --sweep argument, e.g. "roi-interval=100,1000".
+
+    :param sweep The argument
+    :return The option name and its values
+    :raise argparse.ArgumentTypeError If the argument is malformed
+    """
+    name, sep, values = sweep.partition("=")
+    if not sep or not name or not values:
+        raise argparse.ArgumentTypeError(
+            f"Invalid sweep '{sweep}', expected <option>=<value>[,<value>...]"
+        )
+    return name.lstrip("-"), values.split(",")
+
+
+def spec_sweep_commands(
+    benchmarks: List[str],
+    sweeps: List[Tuple[str, List[str]]],
+    spec_dir: Path,
+    gem5_binary: Path,
+    gem5_script: Path,
+    outdir: Path,
+) -> List[str]:
+    """Make the commands of a sweep over SPEC benchmarks and config script
+    arguments.
+
+    Each command writes to <outdir>/<benchmark>/<option>-<value>_...
+
+    :param benchmarks The benchmarks
+    :param sweeps The values of each config script option to sweep over
+    :param spec_dir The directory containing the SPEC '06 benchmarks
+    :param gem5_binary The gem5 binary
+    :param gem5_script The gem5 config script
+    :param outdir The directory to save gem5 outputs under
+    :return One command per benchmark and combination of values
+    """
+    names: Final[List[str]] = [name for name, _ in sweeps]
+    commands: List[str] = []
+    for benchmark in benchmarks:
+        spec_command = SpecCommand(benchmark, spec_dir)
+        for values in itertools.product(*(values for _, values in sweeps)):
+            label: str = "_".join(f"{n}-{v}" for n, v in zip(names, values))
+            run_outdir: Path = outdir.absolute() / benchmark
+            if label:
+                run_outdir = run_outdir / label
+
+            commands.append(
+                spec_command.shell_command(
+                    gem5_binary,
+                    [f"--outdir={run_outdir}"],
+                    gem5_script,
+                    spec_command.script_args()
+                    + [f"--{n}={v}" for n, v in zip(names, values)],
+                )
+            )
+    return commands
+
+
+def generate(args: argparse.Namespace) -> None:
+    """Write a job array directory.
+
+    :param args The arguments of the generate command
+    """
+    if args.command_file is not None:
+        lines: List[str] = read_command_file(args.command_file)
+    else:
+        benchmarks: List[str] = (
+            SPEC06_BENCHMARKS if "all" in args.benchmarks else args.benchmarks
+        )
+        lines = spec_sweep_commands(
+            benchmarks,
+            args.sweep,
+            args.spec06_dir.absolute(),
+            args.gem5_binary,
+            args.gem5_script,
+            args.outdir,
+        )
+
+    history: Optional[JobHistory] = None
+    if not args.no_history:
+        history = JobHistory(args.history)
+
+    tasks = make_tasks(lines, history, args.default_mem)
+    job_array = JobArray(args.array_dir)
+    sbatch_files: Final[List[Path]] = job_array.generate(
+        tasks,
+        cwd=Path.cwd(),
+        name=args.name,
+        max_array_size=args.max_array_size,
+        throttle=args.throttle,
+    )
+
+    classes: Dict[str, int] = {}
+    for task in tasks:
+        classes[task.class_name] = classes.get(task.class_name, 0) + 1
+
+    print(f"Wrote {len(tasks)} task(s) to {job_array.path}:")
+    for class_name, count in classes.items():
+        print(f"  {class_name}: {count} task(s)")
+    print(
+        f"SLURM:    {job_array.path / 'submit-slurm.sh'} ({len(sbatch_files)} array(s))"
+    )
+    print(f"HTCondor: condor_submit {job_array.path / 'condor.sub'}")
+
+
+def collect(args: argparse.Namespace) -> None:
+    """Report the exit codes of a job array's tasks.
+
+    :param args The arguments of the collect command
+    """
+    job_array = JobArray(args.array_dir)
+    codes: Final[Dict[int, Optional[int]]] = job_array.exit_codes()
+
+    failed: Dict[int, int] = {
+        task_id: code for task_id, code in codes.items() if code not in [0, None]
+    }
+    unfinished: List[int] = [task_id for task_id, code in codes.items() if code is None]
+    succeeded: int = len(codes) - len(failed) - len(unfinished)
+
+    for task_id, code in failed.items():
+        print(
+            f"Task {task_id} failed (error code {code}), see "
+            f"{job_array.path / 'logs' / f'{task_id}.err'}"
+        )
+    if unfinished:
+        print(f"Unfinished tasks: {', '.join(str(t) for t in unfinished)}")
+    print(
+        f"{succeeded} / {len(codes)} tasks succeeded, {len(failed)} failed, "
+        f"{len(unfinished)} unfinished."
+    )
+
+    if args.rerun_file is not None:
+        rerun_lines: List[str] = job_array.unfinished_lines()
+        args.rerun_file.write_text("".join(f"{line}\n" for line in rerun_lines))
+        print(f"Wrote {len(rerun_lines)} command(s) to {args.rerun_file}.")
+
+
+def get_args() -> argparse.Namespace:
+    """Get the arguments to this script.
+
+    :return The parsed arguments.
+    """
+    parser = argparse.ArgumentParser("Run a campaign as SLURM or HTCondor job arrays.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    # generate
+    gen_parser = subparsers.add_parser("generate", help="Write a job array directory.")
+    gen_parser.set_defaults(func=generate)
+    gen_parser.add_argument(
+        "array_dir",
+        metavar="array-dir",
+        type=Path,
+        help="The job array directory to write.",
+    )
+    source = gen_parser.add_mutually_exclusive_group(required=True)
+    source.add_argument(
+        "--command-file",
+        type=Path,
+        default=None,
+        help="Make one task per command of this command file.",
+    )
+    source.add_argument(
+        "--benchmarks",
+        nargs="+",
+        choices=SPEC06_BENCHMARKS + ["all"],
+        default=None,
+        help="Make one task per SPEC '06 benchmark and --sweep combination.",
+    )
+    gen_parser.add_argument(
+        "--sweep",
+        type=parse_sweep,
+        action="append",
+        default=[],
+        help=(
+            "With --benchmarks, values of a config script option to sweep "
+            "over, e.g. roi-interval=100,1000. Can be repeated."
+        ),
+    )
+    gen_parser.add_argument(
+        "-g",
+        "--gem5-binary",
+        type=Path,
+        default=DEFAULT_GEM5_BINARY,
+        help=f"With --benchmarks, the gem5 binary (default: {DEFAULT_GEM5_BINARY})",
+    )
+    gen_parser.add_argument(
+        "--gem5-script",
+        type=Path,
+        default=DEFAULT_GEM5_SCRIPT,
+        help=(
+            "With --benchmarks, the gem5 config script (default: "
+            f"{DEFAULT_GEM5_SCRIPT})"
+        ),
+    )
+    gen_parser.add_argument(
+        "-o",
+        "--outdir",
+        type=Path,
+        default=DEFAULT_OUTDIR,
+        help=(
+            "With --benchmarks, the directory to save gem5 output files under "
+            f"(default: {DEFAULT_OUTDIR})"
+        ),
+    )
+    gen_parser.add_argument(
+        "-s",
+        "--spec06-dir",
+        type=Path,
+        default=DEFAULT_SPEC06_DIR,
+        help=(
+            "The directory containing your copy of the SPEC '06 benchmarks "
+            f"(default: {DEFAULT_SPEC06_DIR})"
+        ),
+    )
+    gen_parser.add_argument(
+        "--name",
+        default="gem5",
+        help="The name of the job arrays (default: gem5)",
+    )
+    gen_parser.add_argument(
+        "--max-array-size",
+        type=int,
+        default=DEFAULT_MAX_ARRAY_SIZE,
+        help=(
+            "The largest number of tasks in one SLURM array (default: "
+            f"{DEFAULT_MAX_ARRAY_SIZE})"
+        ),
+    )
+    gen_parser.add_argument(
+        "--throttle",
+        type=int,
+        default=None,
+        help="The most tasks of one SLURM array to run at once",
+    )
+    gen_parser.add_argument(
+        "--default-mem",
+        type=parse_size,
+        default=None,
+        help=(
+            "The memory to request for tasks that are not annotated, not seen "
+            "before, and not gem5 commands"
+        ),
+    )
+    gen_parser.add_argument(
+        "--history",
+        type=Path,
+        default=DEFAULT_HISTORY_FILE,
+        help=(
+            "The history of earlier runs to size memory requests from "
+            f"(default: {DEFAULT_HISTORY_FILE})"
+        ),
+    )
+    gen_parser.add_argument(
+        "--no-history",
+        action="store_true",
+        help="Don't size memory requests from the history of earlier runs.",
+    )
+
+    # collect
+    collect_parser = subparsers.add_parser(
+        "collect", help="Report the exit codes of a job array's tasks."
+    )
+    collect_parser.set_defaults(func=collect)
+    collect_parser.add_argument(
+        "array_dir",
+        metavar="array-dir",
+        type=Path,
+        help="The job array directory.",
+    )
+    collect_parser.add_argument(
+        "--rerun-file",
+        type=Path,
+        default=None,
+        help="Write the commands that failed or never finished to this file.",
+    )
+
+    args = parser.parse_args()
+    if args.command == "generate" and args.sweep and args.benchmarks is None:
+        parser.error("--sweep requires --benchmarks")
+    return args
+
+
+def main():
+    args = get_args()
+    try:
+        args.func(args)
+    except (OSError, ValueError) as e:
+        print(f"Can't {args.command}: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+
+"""Estimate a benchmark's metrics from a run sampled by phase.
+
+se_custom_binary_phases.py fast-forwards a benchmark on an atomic core,
+classifies each window of it into a phase by its instruction mix, and
+simulates an ROI of each phase the first time it appears:
+
+    gem5.opt --outdir=m5out se_custom_binary_phases.py \\
+        --window-interval 100 --input-bin ...
+
+Then
+
+    ./phases.py m5out
+
+prints each phase's share of the run and the metrics of its ROI(s), and
+the benchmark's metrics with each ROI weighted by its phase's share.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, Final, List, Optional
+
+from util.metrics import METRICS
+from util.phases import load_phases, phase_samples
+from util.stats import StatsBlock, load_roi_blocks
+
+# The metrics shown for each phase
+PHASE_METRICS: Final[List[str]] = ["ipc", "l1d_mpki", "l2_mpki", "branch_mpki"]
+
+
+def format_value(value: Optional[float]) -> str:
+    return f"{value:.4f}" if value is not None else "-"
+
+
+def get_args() -> argparse.Namespace:
+    """Get the arguments to this script.
+
+    :return The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(
+        "Estimate a benchmark's metrics from a run sampled by phase."
+    )
+    parser.add_argument(
+        "outdir",
+        type=Path,
+        help="The gem5 output directory of se_custom_binary_phases.py",
+    )
+    parser.add_argument(
+        "--report",
+        type=Path,
+        default=None,
+        help="Write the estimates to this JSON file",
+    )
+    return parser.parse_args()
+
+
+def main():
+    """Run this script."""
+    args = get_args()
+    try:
+        summary: Dict[str, Any] = load_phases(args.outdir)
+    except (OSError, ValueError) as e:
+        print(f"Can't read the phases of {args.outdir}: {e}", file=sys.stderr)
+        sys.exit(1)
+    phases: Final[List[Dict[str, Any]]] = summary["phases"]
+    blocks: Final[List[StatsBlock]] = load_roi_blocks(args.outdir)
+
+    print(
+        f"{'phase':>5}{'windows':>9}{'weight':>9}{'rois':>6}"
+        + "".join(f"{name:>13}" for name in PHASE_METRICS)
+    )
+    for phase in sorted(phases, key=lambda p: -p["weight"]):
+        rois: List[StatsBlock] = [blocks[i] for i in phase["rois"] if i < len(blocks)]
+        print(
+            f"{phase['phase']:>5}{phase['windows']:>9}{phase['weight']:>9.4f}"
+            f"{len(rois):>6}"
+            + "".join(
+                f"{format_value(METRICS[name].value(rois) if rois else None):>13}"
+                for name in PHASE_METRICS
+            )
+        )
+
+    samples, weights = phase_samples(phases, blocks)
+    if not samples:
+        print(f"No ROI stats in {args.outdir}", file=sys.stderr)
+        sys.exit(1)
+    print()
+    print(
+        f"{len(phases)} phase(s) over {summary['instructions']:,} instructions; "
+        f"{len(samples)} ROI(s) cover {100 * sum(weights):.1f}% of the run"
+        + ("." if sum(weights) > 0.9999 else "; the others' weights are scaled up.")
+    )
+
+    estimates: Dict[str, Optional[float]] = {
+        name: metric.weighted_value(samples, weights)
+        for name, metric in METRICS.items()
+    }
+    for name, value in estimates.items():
+        print(f"  {name:<12} {format_value(value)}")
+
+    if args.report is not None:
+        args.report.write_text(
+            json.dumps({"estimates": estimates, "phases": phases}, indent=2)
+        )
+        print(f"Wrote the report to {args.report}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+
+"""Plan how many ROIs to simulate of each benchmark of a suite.
+
+Reads a pilot run of each benchmark (as written by
+run-spec06-se-periodic.py, under <pilot-dir>/<benchmark>), estimates how
+much the metric varies between the ROIs of each, and splits a total
+budget of detailed instructions across the benchmarks by Neyman
+allocation (see util/roi_budget.py). For example, after a pilot with the
+default intervals and no --num-rois,
+
+    ./plan-rois.py m5out --budget 200000 --outdir planned -o plan.txt
+
+prints each benchmark's share of the ROIs, with the --num-rois and
+--ff-interval that spread them over its run, and writes the matching
+run-spec06-se-periodic.py commands to plan.txt for run-cmds-host.py.
+They write to <outdir>/<benchmark>, which must not be the pilot's
+directory, so that the pilot is kept.
+The pilot's intervals must be given if they weren't the defaults; the
+plan keeps its warmup, ROI and initial fast-forward intervals.
+"""
+
+import argparse
+import shlex
+import sys
+from pathlib import Path
+from typing import Final, List, Optional
+
+from util.metrics import METRICS, Metric
+from util.roi_budget import (
+    DEFAULT_FF_INTERVAL,
+    DEFAULT_INIT_FF_INTERVAL,
+    DEFAULT_MIN_ROIS,
+    DEFAULT_ROI_INTERVAL,
+    DEFAULT_WARMUP_INTERVAL,
+    OBJECTIVES,
+    Pilot,
+    Schedule,
+    neyman_allocation,
+    predicted_error,
+)
+from util.spec import SPEC06_BENCHMARKS
+
+RUN_SCRIPT: Final[Path] = Path(__file__).parent / "run-spec06-se-periodic.py"
+
+
+def load_pilots(
+    pilot_dir: Path, benchmarks: Optional[List[str]], metric: Metric, schedule: Schedule
+) -> List[Pilot]:
+    """Load the pilots of a suite's benchmarks.
+
+    :param pilot_dir The directory containing a pilot outdir per benchmark
+    :param benchmarks The benchmarks, or None for every outdir with stats
+    :param metric The metric
+    :param schedule The pilots' schedule
+    :return The pilots
+    :raise ValueError If a pilot has fewer than two ROIs
+    """
+    names: Final[List[str]] = benchmarks or sorted(
+        path.parent.name for path in pilot_dir.glob("*/stats.txt*")
+    )
+    return [
+        Pilot.load(benchmark, pilot_dir / benchmark, metric, schedule)
+        for benchmark in names
+    ]
+
+
+def get_args() -> argparse.Namespace:
+    """Get the arguments to this script.
+
+    :return The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(
+        "Plan how many ROIs to simulate of each benchmark of a suite."
+    )
+    parser.add_argument(
+        "pilot_dir",
+        metavar="pilot-dir",
+        type=Path,
+        help="The directory containing the pilot's <benchmark> outdirs",
+    )
+    parser.add_argument(
+        "--budget",
+        type=float,
+        required=True,
+        help=(
+            "The detailed instructions (warmup and ROIs) to simulate over "
+            "the suite, in M instructions"
+        ),
+    )
+    parser.add_argument(
+        "--benchmarks",
+        type=str,
+        nargs="+",
+        default=None,
+        help="The benchmarks to plan for (default: all in the pilot directory)",
+    )
+    parser.add_argument(
+        "--metric",
+        choices=list(METRICS),
+        default="ipc",
+        help="The metric whose suite mean to estimate (default: ipc)",
+    )
+    parser.add_argument(
+        "--objective",
+        choices=OBJECTIVES,
+        default="mean",
+        help=(
+            "Minimize the error of the suite's arithmetic or geometric mean "
+            "(default: mean)"
+        ),
+    )
+    parser.add_argument(
+        "--min-rois",
+        type=int,
+        default=DEFAULT_MIN_ROIS,
+        help=f"The fewest ROIs of a benchmark (default: {DEFAULT_MIN_ROIS})",
+    )
+    parser.add_argument(
+        "-o",
+        "--command-file",
+        type=Path,
+        default=None,
+        help="Write the planned run-spec06-se-periodic.py commands here",
+    )
+    parser.add_argument(
+        "--outdir",
+        type=Path,
+        required=True,
+        help=(
+            "The outdir of the planned commands, which write to "
+            "<outdir>/<benchmark> (not the pilot directory, or the pilot is "
+            "overwritten)"
+        ),
+    )
+
+    # The pilot's se_custom_binary_periodic.py arguments
+    parser.add_argument(
+        "--ff-interval",
+        type=float,
+        default=DEFAULT_FF_INTERVAL,
+        help=f"The pilot's fast-forward interval (default: {DEFAULT_FF_INTERVAL})",
+    )
+    parser.add_argument(
+        "--warmup-interval",
+        type=float,
+        default=DEFAULT_WARMUP_INTERVAL,
+        help=f"The pilot's warmup interval (default: {DEFAULT_WARMUP_INTERVAL})",
+    )
+    parser.add_argument(
+        "--roi-interval",
+        type=float,
+        default=DEFAULT_ROI_INTERVAL,
+        help=f"The pilot's ROI interval (default: {DEFAULT_ROI_INTERVAL})",
+    )
+    parser.add_argument(
+        "--init-ff-interval",
+        type=float,
+        default=DEFAULT_INIT_FF_INTERVAL,
+        help=(
+            "The pilot's initial fast-forward interval (default: "
+            f"{DEFAULT_INIT_FF_INTERVAL})"
+        ),
+    )
+    args = parser.parse_args()
+    if args.min_rois < 1:
+        parser.error("--min-rois must be at least 1")
+    if args.outdir.resolve() == args.pilot_dir.resolve():
+        parser.error("--outdir must not be the pilot directory")
+    return args
+
+
+def main():
+    """Run this script."""
+    args = get_args()
+    metric: Final[Metric] = METRICS[args.metric]
+    schedule: Final[Schedule] = Schedule(
+        args.ff_interval,
+        args.warmup_interval,
+        args.roi_interval,
+        args.init_ff_interval,
+    )
+
+    try:
+        pilots: List[Pilot] = load_pilots(
+            args.pilot_dir, args.benchmarks, metric, schedule
+        )
+    except ValueError as e:
+        print(f"Can't plan: {e}", file=sys.stderr)
+        sys.exit(1)
+    if not pilots:
+        print(f"No pilot outdirs found in {args.pilot_dir}", file=sys.stderr)
+        sys.exit(1)
+
+    total: Final[int] = int(args.budget // schedule.detailed)
+    capacities: Final[List[int]] = [pilot.capacity(schedule) for pilot in pilots]
+    try:
+        counts: List[int] = neyman_allocation(
+            [pilot.spread(args.objective) for pilot in pilots],
+            total,
+            [min(args.min_rois, capacity) for capacity in capacities],
+            capacities,
+        )
+    except ValueError as e:
+        print(f"Can't plan with a budget of {total} ROI(s): {e}", file=sys.stderr)
+        sys.exit(1)
+
+    width: Final[int] = max(len(pilot.benchmark) for pilot in pilots) + 2
+    print(
+        "benchmark".ljust(width)
+        + f"{'rois':>6}{metric.name + ' mean':>14}{'std':>10}{'pilot rois':>12}"
+        + f"{'num-rois':>10}{'ff-interval':>13}"
+    )
+    commands: List[str] = []
+    for pilot, count in zip(pilots, counts):
+        planned: Schedule = pilot.schedule_for(count, schedule)
+        print(
+            pilot.benchmark.ljust(width)
+            + f"{100 * count / max(sum(counts), 1):>5.1f}%"
+            + f"{pilot.mean:>14.4f}{pilot.std:>10.4f}{len(pilot.values):>12}"
+            + f"{count:>10}{planned.ff_interval:>13g}"
+        )
+        if pilot.benchmark in SPEC06_BENCHMARKS:
+            commands.append(
+                " ".join(
+                    shlex.quote(token)
+                    for token in [
+                        str(RUN_SCRIPT.absolute()),
+                        pilot.benchmark,
+                        f"--outdir={args.outdir.absolute()}",
+                        *planned.args(count),
+                    ]
+                )
+            )
+
+    equal: Final[List[int]] = neyman_allocation(
+        [1.0] * len(pilots),
+        sum(counts),
+        [min(args.min_rois, capacity) for capacity in capacities],
+        capacities,
+    )
+    print()
+    print(
+        f"{sum(counts)} ROI(s), {sum(counts) * schedule.detailed:g}M detailed "
+        f"instructions of the {args.budget:g}M budget."
+    )
+    print(
+        f"Predicted standard error of the suite's {args.objective} "
+        f"{metric.name}: {100 * predicted_error(pilots, counts, schedule, args.objective):.2f}% "
+        f"(vs. {100 * predicted_error(pilots, equal, schedule, args.objective):.2f}% "
+        "with as many ROIs of each benchmark)."
+    )
+
+    if args.command_file is not None:
+        args.command_file.write_text("".join(f"{c}\n" for c in commands))
+        print(f"Wrote {len(commands)} command(s) to {args.command_file}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,69 +2,210 @@
 
 """Run a list of commands from a .txt file on this machine in parallel.
 
-They will not print to the terminal, so you'll have to redirect the
-stdout/stderr output yourself, either by adding the "--re" flag after
-the "--outdir" flag (for gem5) or adding a shell redirect (">", for
-other programs) to your command.
+They will not print to the terminal. Instead, each command's stdout and
+stderr are streamed to rotating log files under --log-dir (by default,
+<command-file>.logs/) while it runs. For gem5, you can still add the
+"--re" flag after the "--outdir" flag to keep its output in the outdir.
+
+Each line in the file represents one command. Blank lines and lines
+starting with "#" are ignored. A command may be followed by annotations
+after a "#@" marker, e.g.
+
+    <command>  #@ mem=4GiB cpus=1 timeout=12h
 
-Each line in the file represents one command.
 An example is provided in run-cmds-host-sample.txt.
+
+With --resource-aware, a command only starts once the host has enough
+free memory and CPUs for it. Its memory use is estimated from its "mem"
+annotation, else from earlier runs of the same configuration, else from
+the size of the memory simulated by its gem5 config script.
+
+A command that runs longer than its "timeout" annotation (or --timeout)
+is sent SIGINT, so gem5 can dump its current stats block, and SIGKILL if
+it is still running --kill-grace seconds later. It is recorded with the
+status "timeout". With --requeue-timeouts, it goes to the back of the
+queue instead, with its timeout multiplied by --timeout-scale.
+
+When a command fails, the reason is worked out from how it exited and
+the end of its logs: a gem5 panic, a gem5 fatal (configuration) error,
+an OOM kill, a transient host or NFS error (e.g. "Stale file handle"), a
+crash, or some other error. Transient failures and OOM kills are retried
+up to --max-retries times, after a --retry-backoff that doubles with
+every retry (an OOM-killed command also asks for twice the memory with
+--resource-aware). Once --fatal-threshold commands have failed with the
+same fatal error, commands sharing all of their config script options
+are not started, so one broken value of a sweep doesn't fail a whole
+campaign a command at a time. The failures are summarized by cause at
+the end.
+
+Commands can depend on each other, so that a whole pipeline runs in one
+pass. A command named with "id" only starts once the commands listed in
+its "after" annotation have succeeded, and is not run if one of them
+failed. A command with a "foreach" glob pattern is fanned out into one
+command per path it matches once its dependencies are done, with {item}
+replaced by the path and {name} by its last component. For example
+(with the gem5 options elided):
+
+    gem5.opt fs_post_boot_checkpoint.py ...  #@ id=boot
+    gem5.opt fs_gapparsec_take_checkpoints.py ...  #@ id=take after=boot
+    gem5.opt -d out/{name} fs_restore_checkpoint.py --start_from {item}  #@ after=take foreach=checkpoints/chkpt.*
+
+With --stage-dir, gem5 commands run on local scratch disk rather than
+on a shared filesystem: each command's input checkpoint (--start_from)
+is copied to the stage directory, its outdir is written there, and the
+outdir is moved back as one archive, <outdir>.tar.gz, when it exits.
+Staged commands are rewritten, so they should not rely on shell
+variables or globs.
+
+With --pin-cpus, each job is pinned to cores of its own, all on one
+NUMA node, so the OS doesn't migrate it between cores or sockets. Jobs
+are spread over the nodes, and avoid sharing a physical core while there
+are idle ones. A job waits while no node has enough free cores for it,
+rather than running unpinned over others. --numa-bind also binds each
+job's memory to its node (this needs numactl). The cores each job got
+are printed when it starts.
+
+Jobs start longest-expected-first, using the mean runtime of earlier runs
+of the same benchmark and configuration, so that long simulations do not
+end up in the tail of the campaign. Jobs never run before start first,
+in file order. Pass --schedule=file to start jobs in file order.
+
+While a command runs, its processes are sampled from /proc every few
+seconds. When it exits, its peak RSS, CPU time, I/O bytes and context
+switches are appended as one JSON line to a telemetry file (by default,
+<command-file>.telemetry.jsonl).
+
+The output of each gem5 command is followed for PeriodicROIManager's
+"***Instruction N:" phase lines, and a snapshot of every command's phase,
+instructions per second and ETA, and the campaign's, is written every
+--progress-interval seconds (by default, to <command-file>.progress.json).
+Watch it live with watch-progress.py.
+
+With --cache-dir, the stats.txt and config.json of every gem5 command
+that succeeds are kept in a result cache, keyed by a hash of the gem5
+binary, the config script and the sources it imports, its options, and
+its input binary, files and checkpoint. A command identical to one run
+before (even with another outdir) gets those files copied to its outdir
+instead of being run. The least recently used results are evicted once
+the cache outgrows --cache-size.
+
+The state of every command is kept in a ledger (by default,
+<command-file>.ledger.db). If a run is interrupted, running the same
+command file again skips the commands that already succeeded and re-runs
+the failed or interrupted ones.
+
+With --queue-dir, runners on several hosts share the work of one
+campaign through a queue directory on a shared filesystem. Start one
+runner per host with the same --queue-dir; the command file only needs
+to be given to one of them, to fill the queue. Each runner claims
+commands with a lease it keeps renewing, and the commands of a runner
+that dies go back to the queue once their leases expire.
 """
 
 import argparse
-import multiprocessing
-import subprocess
+import asyncio
+import socket
 from pathlib import Path
-from typing import List
+from typing import Any, Dict, List, Optional
+
+from util.affinity import CorePool, numactl_available
+from util.failures import FailureGroups
+from util.gem5_command import parse_size
+from util.history import DEFAULT_HISTORY_FILE, JobHistory
+from util.lease_queue import (
+    DEFAULT_HEARTBEAT_INTERVAL,
+    DEFAULT_LEASE_TIMEOUT,
+    LeaseQueue,
+)
+from util.ledger import JobLedger
+from util.progress import DEFAULT_PROGRESS_INTERVAL, ProgressTracker
+from util.resources import DEFAULT_MEM_HEADROOM, ResourceGate, cpu_count
+from util.result_cache import DEFAULT_CACHE_DIR, DEFAULT_CACHE_SIZE, ResultCache
+from util.runner import (
+    DEFAULT_FATAL_THRESHOLD,
+    DEFAULT_KILL_GRACE,
+    DEFAULT_LOG_BACKUPS,
+    DEFAULT_LOG_MAX_BYTES,
+    DEFAULT_MAX_RETRIES,
+    DEFAULT_RETRY_BACKOFF,
+    DEFAULT_TIMEOUT_SCALE,
+    Job,
+    JobResult,
+    JobStatus,
+    ParallelRunner,
+    parse_duration,
+    read_command_file,
+)
+from util.telemetry import TelemetryLog
 
 
-def run_command(cmd: str):
-    """Run a single command.
+def sidecar_path(command_file: Path, suffix: str) -> Path:
+    """Get the path of a file kept next to a command file.
 
-    :param cmd The command to run.
+    The suffix is appended rather than replacing the command file's own,
+    so that e.g. sweep.v2.txt and sweep.v2.csv don't share their logs.
+
+    :param command_file The command file
+    :param suffix The suffix, e.g. ".logs"
+    :return <command-file><suffix>
     """
-    print(f'Running command: "{cmd.rstrip()}"')
-    # Run command silently (except for errors)
-    res = subprocess.run(
-        cmd,
-        shell=True,
-        stdout=subprocess.DEVNULL,
-        stderr=subprocess.PIPE,
-    ).returncode
-
-    # Check for error
-    if res != 0:
-        print(f'Command failed: "{cmd.rstrip()}" (error code {res}).')
-    else:
-        print(f'Command completed: "{cmd.rstrip()}"')
-
-
-def run_commands_parallel(cmds: List[str], num_workers: int = 8):
+    return Path(f"{command_file}{suffix}")
+
+
+def run_commands_parallel(
+    cmds: List[str], num_workers: int = 8, **runner_options: Any
+) -> List[JobResult]:
     """Run a series of commands in parallel.
 
-    :param cmds The commands to run.
+    :param cmds The commands to run, optionally annotated.
+    :param num_workers The number of parallel workers to use
+    :param runner_options Further options for util.runner.ParallelRunner
+    :return The result of each command
+    """
+    jobs: List[Job] = [Job.from_line(cmd, index) for index, cmd in enumerate(cmds)]
+    runner = ParallelRunner(num_workers=num_workers, **runner_options)
+    return asyncio.run(runner.run(jobs))
+
+
+def run_commands_from_queue(
+    queue: LeaseQueue,
+    num_workers: int = 8,
+    heartbeat_interval: float = DEFAULT_HEARTBEAT_INTERVAL,
+    **runner_options: Any,
+) -> List[JobResult]:
+    """Run commands claimed from a shared queue until it drains.
+
+    :param queue The queue to claim commands from
     :param num_workers The number of parallel workers to use
+    :param heartbeat_interval Seconds between lease renewals
+    :param runner_options Further options for util.runner.ParallelRunner
+    :return The result of each command this host ran
     """
-    # Run the commands with a multiprocessing pool
-    with multiprocessing.Pool(num_workers) as pool:
-        pool.map(run_command, cmds)
+    runner = ParallelRunner(num_workers=num_workers, **runner_options)
+    return asyncio.run(runner.run_queue(queue, heartbeat_interval))
 
 
-def read_command_file(command_file: Path) -> List[str]:
-    """Read the commands from a command .txt file
+def print_summary(results: List[JobResult]) -> None:
+    """Print how many commands succeeded, and why the others failed.
 
-    :param command_file The path to the command file
-    :return The list of commands
-    :raise FileNotFoundError If the file does not exist
+    :param results The result of each command
     """
-    # Read the file
-    if not command_file.exists():
-        raise FileNotFoundError(f"Command file {command_file} does not exist.")
+    failures = FailureGroups()
+    for result in results:
+        if result.failure is not None:
+            failures.add(result.job.id, result.failure)
+    summary: List[str] = failures.summary()
+    if summary:
+        print("Failures by cause:")
+        for line in summary:
+            print(f"  {line}")
 
-    commands: List[str] = []
-    with command_file.open("rt") as f:
-        commands: List[str] = f.readlines()
-        return commands
+    num_failed: int = sum(1 for result in results if not result.succeeded)
+    num_cached: int = sum(1 for result in results if result.status == JobStatus.CACHED)
+    print(
+        f"{len(results) - num_failed} / {len(results)} commands succeeded"
+        + (f" ({num_cached} from the result cache)." if num_cached else ".")
+    )
 
 
 def get_args() -> argparse.Namespace:
@@ -76,26 +217,465 @@ def get_args() -> argparse.Namespace:
         "Run a list of commands from a .txt file on this machine in parallel."
     )
     parser.add_argument(
-        "command-file",
+        "command_file",
+        metavar="command-file",
         type=Path,
-        required=True,
-        help="Path to the file containing the commands.",
+        nargs="?",
+        default=None,
+        help=(
+            "Path to the file containing the commands. Optional with "
+            "--queue-dir, if another runner has already filled the queue."
+        ),
     )
     parser.add_argument(
         "--num-workers",
         type=int,
-        default=1,
-        help="The number of threads to run jobs in parallel.",
+        default=None,
+        help=(
+            "The maximum number of jobs to run in parallel (default: 1, or "
+            "the number of CPUs with --resource-aware or --pin-cpus)."
+        ),
+    )
+    parser.add_argument(
+        "--log-dir",
+        type=Path,
+        default=None,
+        help=(
+            "The directory to stream each job's stdout/stderr to "
+            "(default: <command-file>.logs)"
+        ),
+    )
+    parser.add_argument(
+        "--log-max-bytes",
+        type=int,
+        default=DEFAULT_LOG_MAX_BYTES,
+        help=(
+            "Rotate a job's log once it reaches this many bytes, 0 to "
+            f"never rotate (default: {DEFAULT_LOG_MAX_BYTES})"
+        ),
+    )
+    parser.add_argument(
+        "--log-backups",
+        type=int,
+        default=DEFAULT_LOG_BACKUPS,
+        help=(
+            "The number of rotated logs to keep per job "
+            f"(default: {DEFAULT_LOG_BACKUPS})"
+        ),
+    )
+    parser.add_argument(
+        "--kill-grace",
+        type=float,
+        default=DEFAULT_KILL_GRACE,
+        help=(
+            "On interrupt, seconds to wait after sending jobs SIGINT before "
+            f"killing them (default: {DEFAULT_KILL_GRACE})"
+        ),
+    )
+    parser.add_argument(
+        "--ledger",
+        type=Path,
+        default=None,
+        help=(
+            "The SQLite ledger to record command states in "
+            "(default: <command-file>.ledger.db)"
+        ),
+    )
+    parser.add_argument(
+        "--no-ledger",
+        action="store_true",
+        help="Don't keep a ledger (and so run every command).",
+    )
+    parser.add_argument(
+        "--rerun",
+        action="store_true",
+        help="Run every command, even those the ledger says already succeeded.",
+    )
+    parser.add_argument(
+        "--verify-stats",
+        action="store_true",
+        help=(
+            "Only count a gem5 command as succeeded if its outdir has a "
+            "stats.txt with at least one dumped ROI block."
+        ),
     )
-    return parser.parse_args()
+
+    # Timeouts
+    parser.add_argument(
+        "--timeout",
+        type=parse_duration,
+        default=None,
+        help=(
+            "The wall-clock limit of commands without a timeout annotation, "
+            "e.g. 90m or 12h (default: no limit)"
+        ),
+    )
+    parser.add_argument(
+        "--requeue-timeouts",
+        type=int,
+        default=0,
+        help=(
+            "How many times to requeue a command that times out, at the back "
+            "of the queue (default: 0)"
+        ),
+    )
+    parser.add_argument(
+        "--timeout-scale",
+        type=float,
+        default=DEFAULT_TIMEOUT_SCALE,
+        help=(
+            "What to multiply a requeued command's timeout by (default: "
+            f"{DEFAULT_TIMEOUT_SCALE})"
+        ),
+    )
+
+    # Failure handling
+    parser.add_argument(
+        "--max-retries",
+        type=int,
+        default=DEFAULT_MAX_RETRIES,
+        help=(
+            "How many times to retry a command that failed transiently, e.g. "
+            f"from an OOM kill or an NFS error (default: {DEFAULT_MAX_RETRIES})"
+        ),
+    )
+    parser.add_argument(
+        "--retry-backoff",
+        type=parse_duration,
+        default=DEFAULT_RETRY_BACKOFF,
+        help=(
+            "How long to wait before retrying a command, doubled for every "
+            f"further retry (default: {DEFAULT_RETRY_BACKOFF:g}s)"
+        ),
+    )
+    parser.add_argument(
+        "--fatal-threshold",
+        type=int,
+        default=DEFAULT_FATAL_THRESHOLD,
+        help=(
+            "Once this many commands have failed with the same gem5 fatal "
+            "error, don't start commands sharing all of their config script "
+            f"options, 0 to never stop (default: {DEFAULT_FATAL_THRESHOLD})"
+        ),
+    )
+
+    # Multi-host work sharing
+    parser.add_argument(
+        "--queue-dir",
+        type=Path,
+        default=None,
+        help=(
+            "Share the commands with runners on other hosts through this "
+            "queue directory on a shared filesystem."
+        ),
+    )
+    parser.add_argument(
+        "--lease-timeout",
+        type=float,
+        default=DEFAULT_LEASE_TIMEOUT,
+        help=(
+            "With --queue-dir, seconds without a heartbeat after which a "
+            "runner's command is requeued (default: "
+            f"{DEFAULT_LEASE_TIMEOUT})"
+        ),
+    )
+    parser.add_argument(
+        "--heartbeat-interval",
+        type=float,
+        default=DEFAULT_HEARTBEAT_INTERVAL,
+        help=(
+            "With --queue-dir, seconds between lease renewals (default: "
+            f"{DEFAULT_HEARTBEAT_INTERVAL})"
+        ),
+    )
+
+    # Resource-aware admission
+    parser.add_argument(
+        "--resource-aware",
+        action="store_true",
+        help=(
+            "Only start a job when the host's free memory (from /proc/meminfo) "
+            "and CPUs (from the load average) can fit it."
+        ),
+    )
+    parser.add_argument(
+        "--mem-headroom",
+        type=parse_size,
+        default=DEFAULT_MEM_HEADROOM,
+        help=(
+            "With --resource-aware, memory to always leave free, e.g. 4GiB "
+            f"(default: {DEFAULT_MEM_HEADROOM // 1024**3} GiB)"
+        ),
+    )
+    parser.add_argument(
+        "--default-mem",
+        type=parse_size,
+        default=None,
+        help=(
+            "With --resource-aware, the memory estimate for commands that are "
+            "not annotated, not seen before, and not gem5 commands"
+        ),
+    )
+
+    # CPU and NUMA affinity
+    parser.add_argument(
+        "--pin-cpus",
+        action="store_true",
+        help="Pin each job to cores of its own, all on one NUMA node.",
+    )
+    parser.add_argument(
+        "--numa-bind",
+        action="store_true",
+        help=(
+            "With --pin-cpus, also bind each job's memory to the NUMA node of "
+            "its cores (requires numactl)."
+        ),
+    )
+
+    # Local-scratch staging
+    parser.add_argument(
+        "--stage-dir",
+        type=Path,
+        default=None,
+        help=(
+            "Run gem5 commands with their input checkpoint and outdir in this "
+            "local scratch directory, and move each outdir back as "
+            "<outdir>.tar.gz."
+        ),
+    )
+
+    # Telemetry
+    parser.add_argument(
+        "--telemetry",
+        type=Path,
+        default=None,
+        help=(
+            "The JSONL file to append each command's resource use to "
+            "(default: <command-file>.telemetry.jsonl, or "
+            "<queue-dir>/telemetry/<host>.jsonl)"
+        ),
+    )
+    parser.add_argument(
+        "--no-telemetry",
+        action="store_true",
+        help="Don't record the resource use of commands.",
+    )
+
+    # Progress
+    parser.add_argument(
+        "--progress",
+        type=Path,
+        default=None,
+        help=(
+            "The JSON file to write progress snapshots to (default: "
+            "<command-file>.progress.json, or <queue-dir>/progress/<host>.json)"
+        ),
+    )
+    parser.add_argument(
+        "--progress-interval",
+        type=float,
+        default=DEFAULT_PROGRESS_INTERVAL,
+        help=(
+            "Seconds between progress snapshots (default: "
+            f"{DEFAULT_PROGRESS_INTERVAL})"
+        ),
+    )
+    parser.add_argument(
+        "--no-progress",
+        action="store_true",
+        help="Don't follow the progress of commands.",
+    )
+
+    # Result cache
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        nargs="?",
+        const=DEFAULT_CACHE_DIR,
+        default=None,
+        help=(
+            "Copy the results of gem5 commands run before from this result "
+            f"cache instead of running them (default: {DEFAULT_CACHE_DIR}, "
+            "if given without a directory)"
+        ),
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=parse_size,
+        default=DEFAULT_CACHE_SIZE,
+        help=(
+            "The size of the result cache, beyond which the least recently "
+            f"used results are evicted (default: {DEFAULT_CACHE_SIZE // 1024**3}GiB)"
+        ),
+    )
+
+    # Job history
+    parser.add_argument(
+        "--history",
+        type=Path,
+        default=DEFAULT_HISTORY_FILE,
+        help=(
+            "The file to learn jobs' runtime and memory use from, and record "
+            f"them to (default: {DEFAULT_HISTORY_FILE})"
+        ),
+    )
+    parser.add_argument(
+        "--no-history",
+        action="store_true",
+        help="Don't learn from or record to the job history.",
+    )
+    parser.add_argument(
+        "--schedule",
+        choices=["lpt", "file"],
+        default="lpt",
+        help=(
+            "The order to start jobs in: longest-expected-first from the "
+            "history, or file order (default: lpt)"
+        ),
+    )
+    args = parser.parse_args()
+    if args.command_file is None and args.queue_dir is None:
+        parser.error("the command-file argument is required without --queue-dir")
+    if args.num_workers is not None and args.num_workers < 1:
+        parser.error("--num-workers must be at least 1")
+    if args.numa_bind and not args.pin_cpus:
+        parser.error("--numa-bind requires --pin-cpus")
+    if args.numa_bind and not numactl_available():
+        parser.error("--numa-bind requires numactl, which was not found")
+    return args
 
 
 def main():
     """Run this script."""
     args = get_args()
 
+    history: Optional[JobHistory] = None
+    if not args.no_history:
+        history = JobHistory(args.history)
+
+    gate: Optional[ResourceGate] = None
+    num_workers: int = args.num_workers or 1
+    if args.resource_aware:
+        gate = ResourceGate(mem_headroom=args.mem_headroom)
+        num_workers = args.num_workers or cpu_count()
+
+    core_pool: Optional[CorePool] = None
+    if args.pin_cpus:
+        core_pool = CorePool()
+        num_workers = args.num_workers or core_pool.num_cpus
+        print(
+            f"Pinning jobs to {core_pool.num_cpus} CPU(s) on "
+            f"{core_pool.num_nodes} NUMA node(s)."
+        )
+
+    telemetry_log: Optional[TelemetryLog] = None
+    if not args.no_telemetry:
+        if args.telemetry is not None:
+            telemetry_path: Path = args.telemetry
+        elif args.queue_dir is not None:
+            # One file per host, since appends over NFS are not atomic
+            telemetry_path = (
+                args.queue_dir / "telemetry" / f"{socket.gethostname()}.jsonl"
+            )
+        else:
+            telemetry_path = sidecar_path(args.command_file, ".telemetry.jsonl")
+        telemetry_log = TelemetryLog(telemetry_path)
+
+    progress: Optional[ProgressTracker] = None
+    if not args.no_progress:
+        if args.progress is not None:
+            progress_path: Path = args.progress
+        elif args.queue_dir is not None:
+            progress_path = args.queue_dir / "progress" / f"{socket.gethostname()}.json"
+        else:
+            progress_path = sidecar_path(args.command_file, ".progress.json")
+        progress = ProgressTracker(progress_path)
+
+    cache: Optional[ResultCache] = None
+    if args.cache_dir is not None:
+        cache = ResultCache(args.cache_dir, args.cache_size)
+
+    runner_options: Dict[str, Any] = {
+        "log_max_bytes": args.log_max_bytes,
+        "log_backups": args.log_backups,
+        "kill_grace": args.kill_grace,
+        "gate": gate,
+        "history": history,
+        "default_mem": args.default_mem,
+        "verify_stats": args.verify_stats,
+        "core_pool": core_pool,
+        "numa_bind": args.numa_bind,
+        "stage_dir": args.stage_dir,
+        "telemetry_log": telemetry_log,
+        "default_timeout": args.timeout,
+        "requeue_timeouts": args.requeue_timeouts,
+        "timeout_scale": args.timeout_scale,
+        "max_retries": args.max_retries,
+        "retry_backoff": args.retry_backoff,
+        "fatal_threshold": args.fatal_threshold,
+        "progress": progress,
+        "progress_interval": args.progress_interval,
+        "cache": cache,
+    }
+
+    # Multi-host mode: the queue keeps the state of each command
+    if args.queue_dir is not None:
+        queue = LeaseQueue(args.queue_dir, lease_timeout=args.lease_timeout)
+        if args.command_file is not None:
+            lines: List[str] = read_command_file(args.command_file)
+            for index, line in enumerate(lines):
+                job: Job = Job.from_line(line, index)
+                if job.after or job.foreach is not None:
+                    print(
+                        f"Command {job.id} has dependencies, which --queue-dir "
+                        "does not support."
+                    )
+                    return
+            added: int = queue.enqueue(lines)
+            print(f"Added {added} command(s) to the queue in {args.queue_dir}.")
+        try:
+            results = run_commands_from_queue(
+                queue,
+                num_workers=num_workers,
+                heartbeat_interval=args.heartbeat_interval,
+                log_dir=args.log_dir or args.queue_dir / "logs",
+                **runner_options,
+            )
+        except KeyboardInterrupt:
+            print()
+            print("Interrupted, this host's commands were returned to the queue.")
+            return
+
+        print_summary(results)
+        print(f"Queue: {queue.counts()}")
+        return
+
+    ledger: Optional[JobLedger] = None
+    if not args.no_ledger:
+        ledger = JobLedger(args.ledger or sidecar_path(args.command_file, ".ledger.db"))
+
     commands = read_command_file(args.command_file)
-    run_commands_parallel(commands, args.num_workers)
+    try:
+        results = run_commands_parallel(
+            commands,
+            num_workers=num_workers,
+            log_dir=args.log_dir or sidecar_path(args.command_file, ".logs"),
+            ledger=ledger,
+            resume=not args.rerun,
+            longest_first=args.schedule == "lpt",
+            **runner_options,
+        )
+    except KeyboardInterrupt:
+        print()
+        print("Interrupted, all running commands were stopped.")
+        if ledger is not None:
+            print(f"Run this command file again to resume (ledger: {ledger.path}).")
+        return
+    finally:
+        if ledger is not None:
+            ledger.close()
+
+    print_summary(results)
 
 
 if __name__ == "__main__":
@@ -1,16 +1,47 @@
 #!/usr/bin/env python3
 
-"""Run a SPEC '06 benchmark in a gem5 SE-mode simulation with periodic ROIs."""
+"""Run a SPEC '06 benchmark in a gem5 SE-mode simulation with periodic ROIs.
+
+With --suite, run all of the benchmarks (or the ones listed) instead, at
+most --num-workers at once, with the same periodic-ROI arguments:
+
+    ./run-spec06-se-periodic.py --suite --num-workers 8 \\
+        --roi-interval 100 --num-rois 10
+
+Each benchmark's output goes to <outdir>/<benchmark> as usual, and its
+console output to <outdir>/logs. Once all are done, a table of each
+benchmark's IPC and MPKIs (over all of its ROIs) and of their geometric
+means over the suite is printed.
+"""
 
 import argparse
+import asyncio
+import os
+import sys
 from pathlib import Path
-from typing import Final, List
+from typing import Dict, Final, List, Optional
 
-from util.spec import DEFAULT_SPEC06_DIR, SPEC06_BENCHMARKS, SpecCommand
+from util.metrics import METRICS, geometric_mean
+from util.simulation import SimulationError, SimulationPool, SimulationResult
+from util.spec import (
+    DEFAULT_GEM5_BINARY,
+    DEFAULT_SPEC06_DIR,
+    SPEC06_BENCHMARKS,
+    SpecCommand,
+)
 
-DEFAULT_GEM5_BINARY: Final[Path] = Path("../") / "gem5" / "build" / "X86" / "gem5.opt"
 DEFAULT_OUTDIR: Final[Path] = Path("m5out")
 
+# The metrics of the suite summary
+SUITE_METRICS: Final[List[str]] = [
+    "ipc",
+    "l1d_mpki",
+    "l1i_mpki",
+    "l2_mpki",
+    "llc_mpki",
+    "branch_mpki",
+]
+
 
 def get_args() -> argparse.Namespace:
     """Get the arguments for this script."""
@@ -20,8 +51,32 @@ def get_args() -> argparse.Namespace:
     parser.add_argument(
         "benchmark",
         type=str,
+        nargs="?",
+        default=None,
         choices=SPEC06_BENCHMARKS,
-        help="The SPEC '06 benchmark to run",
+        help="The SPEC '06 benchmark to run (unless --suite is given)",
+    )
+    parser.add_argument(
+        "--suite",
+        type=str,
+        nargs="*",
+        default=None,
+        choices=SPEC06_BENCHMARKS,
+        metavar="BENCHMARK",
+        help=(
+            "Run these SPEC '06 benchmarks concurrently and summarize their "
+            "metrics (default: all of them, if given without benchmarks)"
+        ),
+    )
+    parser.add_argument(
+        "-n",
+        "--num-workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help=(
+            "With --suite, the maximum number of benchmarks to run at once "
+            "(default: the number of CPUs)"
+        ),
     )
     parser.add_argument(
         "-g",
@@ -97,7 +152,137 @@ def get_args() -> argparse.Namespace:
             "until the binary finishes."
         ),
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--fork-rois",
+        action="store_true",
+        help=(
+            "Simulate each ROI in a forked gem5 process while fast-forwarding "
+            "on to the next."
+        ),
+    )
+    parser.add_argument(
+        "--max-forks",
+        type=int,
+        default=None,
+        help=(
+            "With --fork-rois, the most ROIs to simulate at once. Each "
+            "simulation then keeps up to <max-forks> + 1 CPUs busy, and "
+            "--suite counts it so. (Default: as many as the CPUs gem5 may "
+            "run on)"
+        ),
+    )
+    args = parser.parse_args()
+    if (args.benchmark is None) == (args.suite is None):
+        parser.error("Give either a benchmark or --suite")
+    return args
+
+
+def periodic_args(args: argparse.Namespace) -> List[str]:
+    """Get the se_custom_binary_periodic.py arguments (other than the
+    benchmark's) to pass on.
+
+    :param args The arguments to this script
+    :return The config script arguments
+    """
+    gem5_script_args: List[str] = []
+    if args.ff_interval is not None:
+        gem5_script_args.append(f"--ff-interval={args.ff_interval}")
+    if args.warmup_interval is not None:
+        gem5_script_args.append(f"--warmup-interval={args.warmup_interval}")
+    if args.roi_interval is not None:
+        gem5_script_args.append(f"--roi-interval={args.roi_interval}")
+    if args.init_ff_interval is not None:
+        gem5_script_args.append(f"--init-ff-interval={args.init_ff_interval}")
+    if args.num_rois is not None:
+        gem5_script_args.append(f"--num-rois={args.num_rois}")
+    if args.continue_sim:
+        gem5_script_args.append("--continue-sim")
+    if args.fork_rois:
+        gem5_script_args.append("--fork-rois")
+    if args.max_forks is not None:
+        gem5_script_args.append(f"--max-forks={args.max_forks}")
+    return gem5_script_args
+
+
+def simulation_cpus(args: argparse.Namespace) -> Optional[int]:
+    """Get the number of CPUs each simulation keeps busy.
+
+    With --fork-rois, the parent fast-forwards while up to --max-forks
+    children simulate ROIs (by default, one per CPU gem5 may run on).
+
+    :param args The arguments to this script
+    :return The number of CPUs, or None for one
+    """
+    if not args.fork_rois:
+        return None
+    max_forks: Final[int] = (
+        args.max_forks if args.max_forks is not None else len(os.sched_getaffinity(0))
+    )
+    return max_forks + 1
+
+
+def print_suite_table(results: Dict[str, Optional[SimulationResult]]) -> None:
+    """Print each benchmark's metrics and their geometric means.
+
+    :param results The result of each benchmark, None if it failed
+    """
+    width: Final[int] = max(len(benchmark) for benchmark in results) + 2
+    print("benchmark".ljust(width) + "".join(f"{name:>13}" for name in SUITE_METRICS))
+    values: Dict[str, List[float]] = {name: [] for name in SUITE_METRICS}
+    for benchmark, result in results.items():
+        if result is None:
+            print(benchmark.ljust(width) + "failed".rjust(13))
+            continue
+        row: str = benchmark.ljust(width)
+        for name in SUITE_METRICS:
+            value: Optional[float] = METRICS[name].value(result.rois)
+            row += f"{value:>13.4f}" if value is not None else f"{'-':>13}"
+            if value is not None:
+                values[name].append(value)
+        print(row)
+
+    row = "geomean".ljust(width)
+    for name in SUITE_METRICS:
+        mean: Optional[float] = geometric_mean(values[name])
+        row += f"{mean:>13.4f}" if mean is not None else f"{'-':>13}"
+    print(row)
+
+
+async def run_suite(args: argparse.Namespace) -> Dict[str, Optional[SimulationResult]]:
+    """Run the suite's benchmarks concurrently.
+
+    :param args The arguments to this script
+    :return The result of each benchmark, None if it failed
+    """
+    benchmarks: Final[List[str]] = args.suite or SPEC06_BENCHMARKS
+    results: Dict[str, Optional[SimulationResult]] = {}
+    async with SimulationPool(
+        num_workers=args.num_workers,
+        gem5_binary=args.gem5_binary,
+        spec_dir=args.spec06_dir,
+        log_dir=args.outdir / "logs",
+    ) as pool:
+        futures: Dict[str, asyncio.Future] = {}
+        for benchmark in benchmarks:
+            try:
+                futures[benchmark] = pool.submit(
+                    Path("./se_custom_binary_periodic.py"),
+                    periodic_args(args),
+                    args.outdir / benchmark,
+                    benchmark=benchmark,
+                    binary_args=["-re"] if args.redirect else None,
+                    cpus=simulation_cpus(args),
+                )
+            except FileNotFoundError as e:
+                print(f"{benchmark}: {e}", file=sys.stderr)
+                results[benchmark] = None
+        for benchmark, future in futures.items():
+            try:
+                results[benchmark] = await future
+            except SimulationError as e:
+                print(f"{benchmark}: {e}", file=sys.stderr)
+                results[benchmark] = None
+    return {benchmark: results[benchmark] for benchmark in benchmarks}
 
 
 def main():
@@ -105,7 +290,11 @@ def main():
     args = get_args()
 
     print("run-spec06-se-periodic")
-    print(f"benchmark  : {args.benchmark}")
+    if args.suite is not None:
+        print(f"benchmarks : {' '.join(args.suite or SPEC06_BENCHMARKS)}")
+        print(f"num_workers: {args.num_workers}")
+    else:
+        print(f"benchmark  : {args.benchmark}")
     print(f"gem5_binary: {args.gem5_binary}")
     print(f"outdir     : {args.outdir}")
     print(f"spec06_dir : {args.spec06_dir}")
@@ -120,6 +309,19 @@ def main():
     print(f"continue_sim    : {args.continue_sim}")
     print()
 
+    if args.suite is not None:
+        try:
+            results = asyncio.run(run_suite(args))
+        except KeyboardInterrupt:
+            print()
+            print("Interrupted, all running simulations were stopped.")
+            sys.exit(1)
+        print()
+        print_suite_table(results)
+        if None in results.values():
+            sys.exit(1)
+        return
+
     spec_command: Final[SpecCommand] = SpecCommand(args.benchmark, args.spec06_dir)
 
     gem5_binary_args: List[str] = [
@@ -128,22 +330,9 @@ def main():
     if args.redirect:
         gem5_binary_args.append("-re")
 
-    gem5_script_args: List[str] = [
-        f"--input-bin={spec_command.bin}",
-        f"--input-args=\"{' '.join(spec_command.args)}\"",
-    ]
-    if args.ff_interval is not None:
-        gem5_script_args.append(f"--ff-interval={args.ff_interval}")
-    if args.warmup_interval is not None:
-        gem5_script_args.append(f"--warmup-interval={args.warmup_interval}")
-    if args.roi_interval is not None:
-        gem5_script_args.append(f"--roi-interval={args.roi_interval}")
-    if args.init_ff_interval is not None:
-        gem5_script_args.append(f"--init-ff-interval={args.init_ff_interval}")
-    if args.num_rois is not None:
-        gem5_script_args.append(f"--num-rois={args.num_rois}")
-    if args.continue_sim:
-        gem5_script_args.append("--continue-sim")
+    gem5_script_args: Final[List[str]] = spec_command.script_args() + periodic_args(
+        args
+    )
 
     spec_command.simulate(
         args.gem5_binary,
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+
+"""Simulate a benchmark at a handful of SimPoint simulation points.
+
+Rather than dozens of periodic ROIs, SimPoint simulates in detail one
+interval per phase of the benchmark, and weighs it by how much of the
+run the phase takes. The pipeline, for a benchmark's --input-bin and
+--input-args (e.g. from a SPEC '06 specrun.sh):
+
+1. Profile its basic-block vectors in one atomic pass:
+
+       gem5.opt --outdir=profile se_custom_binary_simpoint_profile.py \\
+           --core-type atomic --simpoint-interval 100 --input-bin ...
+
+2. Cluster them into simulation points and weights:
+
+       ./simpoint.py cluster profile/simpoint.bb.gz
+
+3. Checkpoint ahead of each simulation point in another atomic pass:
+
+       gem5.opt se_custom_binary_simpoint_checkpoints.py --core-type atomic \\
+           --simpoint-interval 100 --simpoints profile/simpoints \\
+           --weights profile/weights --checkpoints-dir ckpts --input-bin ...
+
+4. Restore each checkpoint in detail, in parallel:
+
+       ./simpoint.py restore-commands ckpts --benchmark 429.mcf \\
+           --outdir restored -o restore.txt
+       ./run-cmds-host.py restore.txt --num-workers 8
+
+5. Estimate the benchmark's metrics from the simulation points' stats:
+
+       ./simpoint.py aggregate ckpts restored
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, Final, List, Optional
+
+from util.metrics import METRICS
+from util.simpoint import (
+    DEFAULT_BIC_THRESHOLD,
+    DEFAULT_DIMENSIONS,
+    DEFAULT_MAX_K,
+    DEFAULT_MAX_SAMPLES,
+    DEFAULT_NUM_SEEDS,
+    load_manifest,
+    parse_bbvs,
+    pick_simpoints,
+    project,
+    write_simpoints,
+)
+from util.simulation import simulation_command
+from util.spec import (
+    DEFAULT_GEM5_BINARY,
+    DEFAULT_SPEC06_DIR,
+    SPEC06_BENCHMARKS,
+    SpecCommand,
+)
+from util.stats import StatsBlock, load_roi_blocks
+
+DEFAULT_RESTORE_SCRIPT: Final[Path] = (
+    Path(__file__).absolute().parent.parent / "se_custom_binary_restore_checkpoint.py"
+)
+
+
+def cluster(args: argparse.Namespace) -> None:
+    """Pick simulation points from a profile's BBVs.
+
+    :param args The arguments of the cluster command
+    """
+    bbvs = parse_bbvs(args.bbv_file)
+    if not bbvs:
+        print(f"No BBVs in {args.bbv_file}", file=sys.stderr)
+        sys.exit(1)
+    print(f"Clustering {len(bbvs)} interval(s).")
+    simpoints, scores = pick_simpoints(
+        project(bbvs, args.dimensions, args.seed),
+        args.max_k,
+        args.bic_threshold,
+        args.num_seeds,
+        args.max_samples,
+        args.seed,
+    )
+
+    print("BIC score of each k tried:")
+    for k, score in sorted(scores.items()):
+        print(f"  {k:>4}: {score:.1f}")
+    print(f"Picked {len(simpoints)} simulation point(s):")
+    for point in sorted(simpoints, key=lambda p: -p.weight):
+        print(
+            f"  cluster {point.cluster:>3}: interval {point.interval:>6}, "
+            f"weight {point.weight:.4f}"
+        )
+
+    outdir: Final[Path] = args.outdir or args.bbv_file.parent
+    outdir.mkdir(parents=True, exist_ok=True)
+    write_simpoints(simpoints, outdir / "simpoints", outdir / "weights")
+    print(f"Wrote {outdir / 'simpoints'} and {outdir / 'weights'}.")
+
+
+def restore_commands(args: argparse.Namespace) -> None:
+    """Write the commands that restore each simulation point's checkpoint.
+
+    :param args The arguments of the restore-commands command
+    """
+    script_args: Dict[str, Any] = {}
+    for arg in args.script_arg:
+        name, _, value = arg.partition("=")
+        script_args[name] = value if value else True
+
+    commands: List[str] = []
+    for point in load_manifest(args.checkpoints_dir):
+        checkpoint: str = point["checkpoint"]
+        commands.append(
+            simulation_command(
+                args.gem5_binary,
+                args.script,
+                {
+                    **script_args,
+                    "start_from": (args.checkpoints_dir / checkpoint).absolute(),
+                    "warmup-interval": f"{point['warmup'] / 1_000_000:g}",
+                    "roi-interval": f"{point['length'] / 1_000_000:g}",
+                },
+                args.outdir / checkpoint,
+                SpecCommand(args.benchmark, args.spec06_dir.absolute()),
+            )
+        )
+    args.command_file.write_text("".join(f"{command}\n" for command in commands))
+    print(f"Wrote {len(commands)} command(s) to {args.command_file}.")
+
+
+def aggregate(args: argparse.Namespace) -> None:
+    """Estimate a benchmark's metrics from its simulation points' stats.
+
+    :param args The arguments of the aggregate command
+    """
+    points: Final[List[Dict[str, Any]]] = load_manifest(args.checkpoints_dir)
+    blocks: List[StatsBlock] = []
+    weights: List[float] = []
+    missing: List[str] = []
+    for point in points:
+        rois: List[StatsBlock] = load_roi_blocks(args.restore_dir / point["checkpoint"])
+        if not rois:
+            missing.append(point["checkpoint"])
+            continue
+        blocks.append(rois[-1])
+        weights.append(point["weight"])
+
+    if not blocks:
+        print(f"No stats of simulation points in {args.restore_dir}", file=sys.stderr)
+        sys.exit(1)
+    if missing:
+        print(
+            f"No stats for {len(missing)} simulation point(s) ({', '.join(missing)}), "
+            f"covering {100 * (1 - sum(weights)):.1f}% of the run; the others' "
+            "weights are scaled up."
+        )
+
+    estimates: Dict[str, Optional[float]] = {
+        name: metric.weighted_value(blocks, weights) for name, metric in METRICS.items()
+    }
+    print(
+        f"Estimated from {len(blocks)} of {len(points)} simulation point(s) "
+        f"({sum(weights):.4f} of the weight):"
+    )
+    for name, value in estimates.items():
+        print(f"  {name:<12} " + (f"{value:.4f}" if value is not None else "-"))
+
+    if args.report is not None:
+        args.report.write_text(
+            json.dumps(
+                {"estimates": estimates, "missing": missing, "points": points},
+                indent=2,
+            )
+        )
+        print(f"Wrote the report to {args.report}.")
+
+
+def get_args() -> argparse.Namespace:
+    """Get the arguments to this script.
+
+    :return The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(
+        "Simulate a benchmark at a handful of SimPoint simulation points."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    # cluster
+    cluster_parser = subparsers.add_parser(
+        "cluster", help="Pick simulation points from a profile's BBVs."
+    )
+    cluster_parser.set_defaults(func=cluster)
+    cluster_parser.add_argument(
+        "bbv_file",
+        metavar="bbv-file",
+        type=Path,
+        help="The profile's BBVs (e.g. <outdir>/simpoint.bb.gz)",
+    )
+    cluster_parser.add_argument(
+        "-o",
+        "--outdir",
+        type=Path,
+        default=None,
+        help=(
+            "Where to write the simpoints and weights files (default: the "
+            "BBV file's directory)"
+        ),
+    )
+    cluster_parser.add_argument(
+        "--max-k",
+        type=int,
+        default=DEFAULT_MAX_K,
+        help=f"The most simulation points to pick (default: {DEFAULT_MAX_K})",
+    )
+    cluster_parser.add_argument(
+        "--bic-threshold",
+        type=float,
+        default=DEFAULT_BIC_THRESHOLD,
+        help=(
+            "Pick the fewest clusters whose BIC score is this fraction of "
+            f"the way to the best (default: {DEFAULT_BIC_THRESHOLD})"
+        ),
+    )
+    cluster_parser.add_argument(
+        "--dimensions",
+        type=int,
+        default=DEFAULT_DIMENSIONS,
+        help=(
+            "The dimensions to project BBVs down to (default: " f"{DEFAULT_DIMENSIONS})"
+        ),
+    )
+    cluster_parser.add_argument(
+        "--num-seeds",
+        type=int,
+        default=DEFAULT_NUM_SEEDS,
+        help=(
+            "How many seedings of k-means to try for each k (default: "
+            f"{DEFAULT_NUM_SEEDS})"
+        ),
+    )
+    cluster_parser.add_argument(
+        "--max-samples",
+        type=int,
+        default=DEFAULT_MAX_SAMPLES,
+        help=(
+            "The most intervals to cluster; the rest are assigned to the "
+            f"nearest cluster (default: {DEFAULT_MAX_SAMPLES})"
+        ),
+    )
+    cluster_parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="The seed of the projection and of k-means (default: 0)",
+    )
+
+    # restore-commands
+    restore_parser = subparsers.add_parser(
+        "restore-commands",
+        help="Write the commands that simulate each simulation point in detail.",
+    )
+    restore_parser.set_defaults(func=restore_commands)
+    restore_parser.add_argument(
+        "checkpoints_dir",
+        metavar="checkpoints-dir",
+        type=Path,
+        help="The directory of the simulation points' checkpoints",
+    )
+    restore_parser.add_argument(
+        "--benchmark",
+        type=str,
+        required=True,
+        choices=SPEC06_BENCHMARKS,
+        help="The SPEC '06 benchmark the checkpoints are of",
+    )
+    restore_parser.add_argument(
+        "--outdir",
+        type=Path,
+        required=True,
+        help="The directory to write each simulation point's outdir under",
+    )
+    restore_parser.add_argument(
+        "-o",
+        "--command-file",
+        type=Path,
+        required=True,
+        help="The command file to write, for run-cmds-host.py",
+    )
+    restore_parser.add_argument(
+        "--script",
+        type=Path,
+        default=DEFAULT_RESTORE_SCRIPT,
+        help=f"The config script to restore with (default: {DEFAULT_RESTORE_SCRIPT})",
+    )
+    restore_parser.add_argument(
+        "--script-arg",
+        type=str,
+        action="append",
+        default=[],
+        metavar="NAME=VALUE",
+        help=(
+            "A further argument to the config script, e.g. l1d_size=64KiB "
+            "(can be given more than once)"
+        ),
+    )
+    restore_parser.add_argument(
+        "-g",
+        "--gem5-binary",
+        type=Path,
+        default=DEFAULT_GEM5_BINARY,
+        help=f"The gem5 binary to use (default: {DEFAULT_GEM5_BINARY})",
+    )
+    restore_parser.add_argument(
+        "-s",
+        "--spec06-dir",
+        type=Path,
+        default=DEFAULT_SPEC06_DIR,
+        help=(
+            "The directory containing your copy of the SPEC '06 benchmarks "
+            f"(default: {DEFAULT_SPEC06_DIR})"
+        ),
+    )
+
+    # aggregate
+    aggregate_parser = subparsers.add_parser(
+        "aggregate",
+        help="Estimate a benchmark's metrics from its simulation points' stats.",
+    )
+    aggregate_parser.set_defaults(func=aggregate)
+    aggregate_parser.add_argument(
+        "checkpoints_dir",
+        metavar="checkpoints-dir",
+        type=Path,
+        help="The directory of the simulation points' checkpoints",
+    )
+    aggregate_parser.add_argument(
+        "restore_dir",
+        metavar="restore-dir",
+        type=Path,
+        help="The directory containing each simulation point's outdir",
+    )
+    aggregate_parser.add_argument(
+        "--report",
+        type=Path,
+        default=None,
+        help="Write the estimates to this JSON file",
+    )
+    return parser.parse_args()
+
+
+def main():
+    """Run this script."""
+    args = get_args()
+    try:
+        args.func(args)
+    except (OSError, ValueError) as e:
+        print(f"Can't {args.command}: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
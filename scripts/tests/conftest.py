@@ -0,0 +1,51 @@
+"""Make the scripts' util package importable, as when run from scripts/,
+and write gem5 outputs for the tests to read.
+
+The tests need neither gem5 nor a cluster. Run them from scripts/ with
+
+    python3 -m pytest tests
+"""
+
+import sys
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import pytest
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from util.stats import BEGIN_MARKER, END_MARKER, STATS_FILE_NAME  # noqa: E402
+
+
+def stats_text(blocks: List[Dict[str, float]]) -> str:
+    """Format stats blocks as gem5 dumps them to stats.txt."""
+    lines: List[str] = []
+    for block in blocks:
+        lines.append(BEGIN_MARKER)
+        lines.extend(
+            f"{name:<50} {value:<12} # A stat" for name, value in block.items()
+        )
+        lines.append(END_MARKER)
+        lines.append("")
+    return "\n".join(lines)
+
+
+def ipc_block(insts: float, ipc: float) -> Dict[str, float]:
+    """Make the stats block of an ROI with an IPC."""
+    return {
+        "simInsts": insts,
+        "board.processor.switch0.core.numCycles": insts / ipc,
+    }
+
+
+@pytest.fixture
+def write_stats() -> Callable[[Path, List[Dict[str, float]]], Path]:
+    """Write stats blocks to <outdir>/stats.txt."""
+
+    def write(outdir: Path, blocks: List[Dict[str, float]]) -> Path:
+        outdir.mkdir(parents=True, exist_ok=True)
+        (outdir / STATS_FILE_NAME).write_text(stats_text(blocks))
+        return outdir / STATS_FILE_NAME
+
+    return write
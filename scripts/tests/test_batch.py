@@ -0,0 +1,170 @@
+import json
+import subprocess
+import sys
+
+import pytest
+from conftest import SCRIPTS_DIR
+
+from util.batch import JobArray, format_slurm_time, make_tasks, memory_class
+
+LINES = [
+    "echo one  #@ mem=512M",
+    "echo two >&2; exit 3  #@ mem=3GiB cpus=2 timeout=1h",
+    "echo three  #@ mem=1GiB timeout=30m",
+]
+
+
+def test_memory_class():
+    assert memory_class(1) == 1024**3
+    assert memory_class(1024**3) == 1024**3
+    assert memory_class(1024**3 + 1) == 2 * 1024**3
+    assert memory_class(5 * 1024**3) == 8 * 1024**3
+
+
+def test_format_slurm_time():
+    assert format_slurm_time(59.5) == "0-00:01:00"
+    assert format_slurm_time(90 * 60) == "0-01:30:00"
+    assert format_slurm_time(26 * 3600 + 1) == "1-02:00:01"
+
+
+def test_make_tasks_rejects_dependencies():
+    with pytest.raises(ValueError):
+        make_tasks(["echo a  #@ after=b"])
+
+
+@pytest.fixture
+def job_array(tmp_path):
+    job_array = JobArray(tmp_path / "array")
+    sbatch_files = job_array.generate(
+        make_tasks(LINES), cwd=tmp_path, name="test", throttle=4
+    )
+    return job_array, sbatch_files
+
+
+def test_generate_slurm(job_array):
+    job_array, sbatch_files = job_array
+    assert [f.name for f in sbatch_files] == [
+        "mem1G-cpus1-0.sbatch",
+        "mem4G-cpus2-0.sbatch",
+    ]
+    small = sbatch_files[0].read_text()
+    assert "#SBATCH --job-name=test-mem1G-cpus1\n" in small
+    assert "#SBATCH --array=0-1%4\n" in small
+    assert "#SBATCH --cpus-per-task=1\n" in small
+    assert "#SBATCH --mem=1024M\n" in small
+    # Only one of the class' tasks has a time limit
+    assert "--time" not in small
+    assert "$((SLURM_ARRAY_TASK_ID + 0))" in small
+
+    large = sbatch_files[1].read_text()
+    assert "#SBATCH --array=0%4\n" in large
+    assert "#SBATCH --cpus-per-task=2\n" in large
+    assert "#SBATCH --mem=4096M\n" in large
+    assert "#SBATCH --time=0-01:00:00\n" in large
+
+    submit = (job_array.path / "submit-slurm.sh").read_text().splitlines()
+    assert submit[2:] == [f"sbatch {f}" for f in sbatch_files]
+
+
+def test_generate_splits_large_classes(tmp_path):
+    job_array = JobArray(tmp_path / "array")
+    sbatch_files = job_array.generate(
+        make_tasks([f"echo {i}" for i in range(5)]), cwd=tmp_path, max_array_size=2
+    )
+    assert len(sbatch_files) == 3
+    last = sbatch_files[-1].read_text()
+    assert "#SBATCH --array=0\n" in last
+    assert "$((SLURM_ARRAY_TASK_ID + 4))" in last
+
+
+def test_generate_condor(job_array):
+    job_array, _ = job_array
+    submit = (job_array.path / "condor.sub").read_text()
+    assert f"executable     = {job_array.task_script}\n" in submit
+    assert "request_cpus   = $(cpus)\n" in submit
+    # Not every task has a time limit
+    assert "allowed_execute_duration" not in submit
+    assert submit.endswith(
+        f"queue task_list, line, cpus, mem_mb from {job_array.path}/condor-queue.txt\n"
+    )
+    queue = (job_array.path / "condor-queue.txt").read_text().splitlines()
+    tasks = job_array.path / "tasks"
+    assert queue == [
+        f"{tasks}/mem1G-cpus1.txt 0 1 512",
+        f"{tasks}/mem1G-cpus1.txt 1 1 1024",
+        f"{tasks}/mem4G-cpus2.txt 0 2 3072",
+    ]
+
+
+def test_manifest(job_array):
+    job_array, _ = job_array
+    manifest = json.loads((job_array.path / "manifest.json").read_text())
+    assert manifest["name"] == "test"
+    assert [task["id"] for task in manifest["tasks"]] == [0, 1, 2]
+    assert manifest["tasks"][1]["task_list"] == "mem4G-cpus2.txt"
+    assert manifest["tasks"][1]["annotations"]["cpus"] == "2"
+
+
+def run_task(job_array, task_list, line):
+    return subprocess.run(
+        [str(job_array.task_script), str(job_array.path / "tasks" / task_list), line],
+        capture_output=True,
+        timeout=60,
+    )
+
+
+def test_tasks_run_locally(job_array):
+    job_array, _ = job_array
+    assert job_array.exit_codes() == {0: None, 1: None, 2: None}
+
+    assert run_task(job_array, "mem1G-cpus1.txt", "0").returncode == 0
+    assert run_task(job_array, "mem4G-cpus2.txt", "0").returncode == 3
+    assert (job_array.path / "logs" / "0.out").read_text() == "one\n"
+    assert (job_array.path / "logs" / "1.err").read_text() == "two\n"
+    assert job_array.exit_codes() == {0: 0, 1: 3, 2: None}
+    assert job_array.unfinished_lines() == [
+        "echo two >&2; exit 3  #@ mem=3GiB cpus=2 timeout=1h",
+        "echo three  #@ mem=1GiB timeout=30m",
+    ]
+
+
+def test_out_of_range_task_fails(job_array):
+    job_array, _ = job_array
+    assert run_task(job_array, "mem1G-cpus1.txt", "2").returncode == 2
+    assert not list((job_array.path / "exit").iterdir())
+
+
+def run_job_array(*args):
+    return subprocess.run(
+        [sys.executable, str(SCRIPTS_DIR / "job-array.py"), *args],
+        capture_output=True,
+        text=True,
+    )
+
+
+def test_generate_and_collect(tmp_path):
+    command_file = tmp_path / "cmds.txt"
+    command_file.write_text("true\nfalse\n")
+    array_dir = tmp_path / "array"
+    result = run_job_array(
+        "generate",
+        str(array_dir),
+        "--command-file",
+        str(command_file),
+        "--no-history",
+    )
+    assert result.returncode == 0, result.stderr
+    task_list = array_dir / "tasks" / "mem1G-cpus1.txt"
+    for line in ["0", "1"]:
+        subprocess.run([str(array_dir / "task.sh"), str(task_list), line])
+
+    rerun = tmp_path / "rerun.txt"
+    result = run_job_array("collect", str(array_dir), "--rerun-file", str(rerun))
+    assert "1 / 2 tasks succeeded, 1 failed, 0 unfinished." in result.stdout
+    assert rerun.read_text() == "false\n"
+
+
+def test_collect_not_an_array(tmp_path):
+    result = run_job_array("collect", str(tmp_path))
+    assert result.returncode == 1
+    assert "not a job array directory" in result.stderr
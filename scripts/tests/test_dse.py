@@ -0,0 +1,25 @@
+import pytest
+
+from util.dse import parse_rungs, score
+
+
+def test_parse_rungs():
+    rungs = parse_rungs("2x50, 4x200,10 x 800")
+    assert [(r.num_rois, r.roi_interval) for r in rungs] == [
+        (2, 50.0),
+        (4, 200.0),
+        (10, 800.0),
+    ]
+    assert rungs[1].budget == 800.0
+    assert rungs[1].args() == {"num-rois": 4, "roi-interval": 200.0}
+
+
+@pytest.mark.parametrize("rungs", ["", "2", "2x", "x50", "2x50,", "2*50"])
+def test_parse_rungs_rejects_malformed(rungs):
+    with pytest.raises(ValueError):
+        parse_rungs(rungs)
+
+
+def test_score():
+    assert score([1.0, 4.0]) == pytest.approx(2.0)
+    assert score([0.0, 4.0]) == pytest.approx(2.0)
@@ -0,0 +1,63 @@
+import signal
+
+from util.failures import Failure, FailureClass, classify, exit_signal
+
+FATAL_MMAP = (
+    "build/X86/sim/process.cc:185: fatal: Could not mmap 68719476736 bytes "
+    "for physical memory: Cannot allocate memory\n"
+)
+
+
+def write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text)
+    return path
+
+
+def test_fatal_before_oom(tmp_path):
+    stderr = write(tmp_path, "job.err", "warn: something\n" + FATAL_MMAP)
+    failure = classify(1, [stderr], [])
+    assert failure.failure_class == FailureClass.FATAL
+    assert not failure.failure_class.transient
+    assert failure.message.startswith("Could not mmap")
+
+
+def test_panic(tmp_path):
+    stderr = write(tmp_path, "simerr", "panic: Unrecognized opcode\n")
+    assert classify(134, [stderr], []).failure_class == FailureClass.PANIC
+
+
+def test_oom_in_stderr(tmp_path):
+    stderr = write(tmp_path, "job.err", "terminate called after std::bad_alloc\n")
+    failure = classify(134, [stderr], [])
+    assert failure.failure_class == FailureClass.OOM
+    assert failure.failure_class.transient
+
+
+def test_program_output_is_not_oom(tmp_path):
+    # The simulated program's own output mentions running out of memory
+    stdout = write(tmp_path, "simout", "malloc test: out of memory\n")
+    stderr = write(tmp_path, "simerr", "")
+    failure = classify(1, [stderr], [stdout])
+    assert failure.failure_class == FailureClass.ERROR
+    assert not failure.failure_class.transient
+
+
+def test_fatal_in_stdout(tmp_path):
+    stdout = write(tmp_path, "job.out", "fatal: Can't open the binary\n")
+    assert classify(1, [], [stdout]).failure_class == FailureClass.FATAL
+
+
+def test_signals():
+    assert exit_signal(-9) == signal.SIGKILL
+    assert exit_signal(128 + 11) == signal.SIGSEGV
+    assert exit_signal(1) is None
+    assert classify(-9, [], []).failure_class == FailureClass.OOM
+    assert classify(128 + 11, [], []).failure_class == FailureClass.CRASH
+    assert str(classify(3, [], [])) == "error: exited with error code 3"
+
+
+def test_group_ignores_numbers_and_paths():
+    first = Failure(FailureClass.FATAL, "Could not open /a/b/input.1 at 0x1f")
+    second = Failure(FailureClass.FATAL, "Could not open /c/input.2 at 0x20")
+    assert first.group == second.group
@@ -0,0 +1,74 @@
+from typing import List, Optional
+
+from util.progress import JobProgress, Phase, RoiPlan
+
+M = 1_000_000
+
+
+def make_job(plan: Optional[RoiPlan] = None) -> JobProgress:
+    return JobProgress("job", "cmd", "sig", [], plan)
+
+
+def feed(job: JobProgress, lines: List[str]) -> None:
+    for now, line in enumerate(lines):
+        job.parse(line, float(now))
+
+
+def test_periodic_transitions():
+    job = make_job()
+    feed(
+        job,
+        [
+            "***Instruction 1,000: End of fast-forward phase. Switching to timing",
+            "***Instruction 1,200: End of warmup phase. Entering ROI #1.",
+        ],
+    )
+    assert job.phase == Phase.ROI
+    feed(job, ["***Instruction 2,000: Exiting ROI #1. Switching to KVM."])
+    assert job.phase == Phase.FF
+    assert job.completed_rois == 1
+
+
+def test_colored_lines():
+    job = make_job()
+    job.parse(
+        "\x1b[1m\x1b[34m***Instruction 1,000:\x1b[0m \x1b[34mEnd of warmup "
+        "phase. Entering ROI #1.\x1b[0m",
+        0.0,
+    )
+    assert job.phase == Phase.ROI
+
+
+def test_forked_roi_stays_in_fast_forward():
+    for prefix in ["", "End of fast-forward phase. "]:
+        job = make_job()
+        feed(
+            job,
+            [
+                f"***Instruction 1,000: {prefix}Forked ROI #1 (pid 42); "
+                "fast-forwarding past it.",
+                f"***Instruction 2,000: {prefix}Forked ROI #2 (pid 43); "
+                "fast-forwarding past it.",
+            ],
+        )
+        assert job.phase == Phase.FF
+        assert job.completed_rois == 2
+        assert job.rate("detailed") is None
+
+
+def test_remaining():
+    plan = RoiPlan(3, 0, 10 * M, 2 * M, 8 * M)
+    assert plan.remaining(Phase.FF, False, 0, 4 * M) == {
+        "ff": 6 * M + 2 * 10 * M,
+        "detailed": 3 * 10 * M,
+    }
+    assert plan.remaining(Phase.ROI, False, 2, 3 * M) == {"ff": 0, "detailed": 5 * M}
+    assert plan.remaining(Phase.DONE, False, 3, 0) == {"ff": 0, "detailed": 0}
+
+
+def test_remaining_initial_fast_forward():
+    plan = RoiPlan(1, 5 * M, 10 * M, 2 * M, 8 * M)
+    assert plan.remaining(Phase.FF, True, 0, 0) == {
+        "ff": 15 * M,
+        "detailed": 10 * M,
+    }
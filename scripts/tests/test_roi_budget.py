@@ -0,0 +1,108 @@
+import math
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from conftest import SCRIPTS_DIR, ipc_block
+
+from util.roi_budget import Pilot, Schedule, neyman_allocation, predicted_error
+
+SCHEDULE = Schedule(ff_interval=100, warmup_interval=10, roi_interval=40)
+
+
+def test_neyman_allocation_proportional():
+    assert neyman_allocation([1, 3], 8, [0, 0], [100, 100]) == [2, 6]
+
+
+def test_neyman_allocation_bounds():
+    # The first stratum's share is capped, the rest goes to the others
+    assert neyman_allocation([8, 1, 1], 10, [0, 0, 0], [4, 100, 100]) == [4, 3, 3]
+    # A stratum with no spread still gets its minimum
+    assert neyman_allocation([0, 1], 5, [1, 1], [100, 100]) == [1, 4]
+
+
+def test_neyman_allocation_rounds_to_total():
+    counts = neyman_allocation([1, 1, 1], 10, [0, 0, 0], [100, 100, 100])
+    assert sum(counts) == 10
+    assert sorted(counts) == [3, 3, 4]
+
+
+def test_neyman_allocation_budget_below_minimum():
+    with pytest.raises(ValueError):
+        neyman_allocation([1, 1], 3, [2, 2], [10, 10])
+
+
+def test_pilot_needs_two_rois():
+    with pytest.raises(ValueError):
+        Pilot("a", [1.0], SCHEDULE)
+
+
+def test_pilot_schedule():
+    pilot = Pilot("a", [1.0, 2.0, 3.0, 4.0], SCHEDULE)
+    assert pilot.mean == 2.5
+    assert math.isclose(pilot.std, math.sqrt(5 / 3))
+    assert pilot.length == 4 * 150
+    assert pilot.capacity(SCHEDULE) == 12
+    # Two ROIs over the 600 M instructions, 300 M apart
+    assert pilot.schedule_for(2, SCHEDULE).ff_interval == 250
+
+
+def test_predicted_error():
+    pilots = [Pilot("a", [1.0, 3.0], SCHEDULE), Pilot("b", [2.0, 2.0], SCHEDULE)]
+    error = predicted_error(pilots, [1, 1], SCHEDULE, "mean")
+    # Only "a" varies: sqrt(2 / 1 * (1 - 1 / 6)) / 2, relative to 2
+    assert math.isclose(error, math.sqrt(2 * 5 / 6) / 2 / 2)
+
+
+def run_plan(pilot_dir: Path, *args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, str(SCRIPTS_DIR / "plan-rois.py"), str(pilot_dir), *args],
+        capture_output=True,
+        text=True,
+    )
+
+
+@pytest.fixture
+def pilot_dir(tmp_path, write_stats):
+    pilots = tmp_path / "m5out"
+    write_stats(pilots / "401.bzip2", [ipc_block(800e6, v) for v in [1.0, 1.0, 1.0]])
+    write_stats(pilots / "429.mcf", [ipc_block(800e6, v) for v in [0.2, 0.6, 0.4]])
+    return pilots
+
+
+def test_plan_keeps_pilots(tmp_path, pilot_dir):
+    plan = tmp_path / "plan.txt"
+    result = run_plan(
+        pilot_dir,
+        "--budget",
+        "5000",
+        "--outdir",
+        str(tmp_path / "planned"),
+        "-o",
+        str(plan),
+    )
+    assert result.returncode == 0, result.stderr
+    commands = plan.read_text().splitlines()
+    assert len(commands) == 2
+    for command in commands:
+        assert f"--outdir={tmp_path / 'planned'}" in command
+    # The benchmark whose ROIs don't vary still gets its minimum
+    assert "401.bzip2 --outdir" in commands[0] and "--num-rois=2" in commands[0]
+
+    result = run_plan(pilot_dir, "--budget", "5000", "--outdir", str(pilot_dir))
+    assert result.returncode == 2
+
+
+def test_plan_rejects_no_rois(tmp_path, pilot_dir):
+    result = run_plan(
+        pilot_dir,
+        "--budget",
+        "5000",
+        "--outdir",
+        str(tmp_path / "planned"),
+        "--min-rois",
+        "0",
+    )
+    assert result.returncode == 2
+    assert "--min-rois" in result.stderr
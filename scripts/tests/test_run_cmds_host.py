@@ -0,0 +1,40 @@
+import subprocess
+import sys
+
+from conftest import SCRIPTS_DIR
+
+
+def run_host(cwd, *args):
+    return subprocess.run(
+        [sys.executable, str(SCRIPTS_DIR / "run-cmds-host.py"), *args],
+        cwd=cwd,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+
+
+def test_sidecars_keep_the_command_file_suffix(tmp_path):
+    for name in ["sweep.v2.txt", "sweep.v2.csv"]:
+        (tmp_path / name).write_text(f"echo {name}\n")
+        result = run_host(tmp_path, name, "--num-workers", "1")
+        assert result.returncode == 0, result.stdout + result.stderr
+    for name in ["sweep.v2.txt", "sweep.v2.csv"]:
+        assert (tmp_path / f"{name}.logs").is_dir()
+        assert (tmp_path / f"{name}.ledger.db").is_file()
+        logs = list((tmp_path / f"{name}.logs").glob("*.out"))
+        assert [log.read_text() for log in logs] == [f"{name}\n"]
+    assert not (tmp_path / "sweep.v2.logs").exists()
+
+
+def test_failures_are_reported(tmp_path):
+    (tmp_path / "cmds.txt").write_text("true\nexit 3\n")
+    result = run_host(tmp_path, "cmds.txt", "--num-workers", "2")
+    assert "1 / 2 commands succeeded" in result.stdout
+    assert "error: exited with error code 3" in result.stdout
+
+
+def test_rejects_no_workers(tmp_path):
+    (tmp_path / "cmds.txt").write_text("true\n")
+    result = run_host(tmp_path, "cmds.txt", "--num-workers", "0")
+    assert result.returncode == 2
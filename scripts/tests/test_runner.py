@@ -0,0 +1,85 @@
+import pytest
+
+from util.affinity import format_cpu_list, parse_cpu_list
+from util.gem5_command import parse_size
+from util.runner import Job, estimate_memory, parse_duration, read_command_file
+
+
+def test_job_annotations():
+    job = Job.from_line(
+        "gem5.opt --outdir=m5out/a cfg.py  #@ mem=4GiB cpus=2 timeout=90m id=a_1",
+        3,
+    )
+    assert job.cmd == "gem5.opt --outdir=m5out/a cfg.py"
+    assert job.mem == 4 * 1024**3
+    assert job.cpus == 2
+    assert job.timeout == 90 * 60
+    assert job.id == "a_1"
+    assert estimate_memory(job) == job.mem
+
+
+def test_job_defaults():
+    job = Job.from_line("echo hi", 7)
+    assert job.cmd == "echo hi"
+    assert job.annotations == {}
+    assert job.id == "job0007"
+    assert job.cpus == 1
+    assert job.mem is None and job.timeout is None
+    assert estimate_memory(job, default_mem=123) == 123
+
+
+def test_job_dependencies():
+    job = Job.from_line("cat {item}  #@ after=a,b foreach=out/*/stats.txt", 0)
+    assert job.after == ["a", "b"]
+    assert job.foreach == "out/*/stats.txt"
+
+
+def test_shell_comments_are_not_annotations():
+    assert Job.from_line("echo '#@'#@ cpus=2", 0).annotations == {}
+
+
+@pytest.mark.parametrize(
+    "line",
+    [
+        "echo  #@ memory=4GiB",
+        "echo  #@ cpus",
+        "echo  #@ mem=lots",
+        "echo  #@ timeout=soon",
+        "echo  #@ id=a/b",
+    ],
+)
+def test_job_rejects_bad_annotations(line):
+    with pytest.raises(ValueError):
+        Job.from_line(line, 0)
+
+
+def test_parse_duration():
+    assert parse_duration("3600") == 3600
+    assert parse_duration("90m") == 5400
+    assert parse_duration("1.5h") == 5400
+    assert parse_duration("2d") == 2 * 24 * 3600
+    with pytest.raises(ValueError):
+        parse_duration("1w")
+
+
+def test_parse_size():
+    assert parse_size("512M") == 512 * 1024**2
+    assert parse_size("3GiB") == 3 * 1024**3
+    assert parse_size("2GB") == 2 * 1024**3
+    assert parse_size("100") == 100
+    with pytest.raises(ValueError):
+        parse_size("3 gallons")
+
+
+def test_cpu_lists():
+    assert format_cpu_list([8, 0, 1, 2, 3, 10, 11]) == "0-3,8,10-11"
+    assert parse_cpu_list("0-3,8,10-11\n") == [0, 1, 2, 3, 8, 10, 11]
+    assert format_cpu_list([]) == ""
+
+
+def test_read_command_file(tmp_path):
+    command_file = tmp_path / "cmds.txt"
+    command_file.write_text("# a comment\n\n  echo a  \necho b  #@ cpus=2\n")
+    assert read_command_file(command_file) == ["echo a", "echo b  #@ cpus=2"]
+    with pytest.raises(FileNotFoundError):
+        read_command_file(tmp_path / "missing.txt")
@@ -0,0 +1,55 @@
+import itertools
+
+import pytest
+
+from util.screening import fold_over, main_effects, plackett_burman, standard_error
+
+
+@pytest.mark.parametrize("num_factors", [1, 3, 7, 11, 12, 19, 23, 24, 40])
+def test_plackett_burman_is_orthogonal(num_factors):
+    design = plackett_burman(num_factors)
+    num_runs = len(design)
+    assert num_runs > num_factors and num_runs % 4 == 0 or num_runs == 2
+    assert all(len(row) == num_runs - 1 for row in design)
+    columns = list(zip(*design))
+    for column in columns:
+        assert sum(column) == 0
+    for a, b in itertools.combinations(columns, 2):
+        assert sum(x * y for x, y in zip(a, b)) == 0
+
+
+def test_plackett_burman_sizes():
+    assert len(plackett_burman(11)) == 12
+    assert len(plackett_burman(12)) == 16
+    assert len(plackett_burman(24)) == 32
+    with pytest.raises(ValueError):
+        plackett_burman(0)
+
+
+def test_main_effects_recovers_a_linear_response():
+    design = plackett_burman(5)
+    # Factor 0 adds 3 at its high level, factor 2 subtracts 1
+    responses = [10 + 1.5 * row[0] - 0.5 * row[2] for row in design]
+    effects = main_effects(design, responses)
+    assert effects[0] == pytest.approx(3.0)
+    assert effects[2] == pytest.approx(-1.0)
+    assert all(effect == pytest.approx(0.0) for effect in effects[5:])
+    assert standard_error(effects, 5) == pytest.approx(0.0)
+    assert standard_error(effects, len(effects)) is None
+
+
+def test_fold_over_frees_main_effects_of_interactions():
+    design = fold_over(plackett_burman(3))
+    assert len(design) == 8
+    # A two-factor interaction of factors 1 and 2 does not bias factor 0
+    responses = [row[0] + 2 * row[1] * row[2] for row in design]
+    assert main_effects(design, responses)[0] == pytest.approx(2.0)
+
+
+def test_main_effects_skip_missing_responses():
+    design = plackett_burman(3)
+    responses = [float(row[0]) for row in design]
+    responses[0] = None
+    assert main_effects(design, responses)[0] == pytest.approx(2.0)
+    with pytest.raises(ValueError):
+        main_effects(design, [None] * len(design))
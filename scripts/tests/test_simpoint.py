@@ -0,0 +1,47 @@
+import random
+
+import pytest
+
+from util.simpoint import kmeans, pick_simpoints
+
+CENTERS = [(0.0, 0.0), (10.0, 0.0), (0.0, 10.0)]
+
+
+def blobs(per_cluster=30, seed=1):
+    rng = random.Random(seed)
+    return [
+        [x + rng.gauss(0, 0.5), y + rng.gauss(0, 0.5)]
+        for x, y in CENTERS
+        for _ in range(per_cluster)
+    ]
+
+
+def test_kmeans_finds_separate_clusters():
+    vectors = blobs()
+    clustering = kmeans(vectors, 3, random.Random(0))
+    assert clustering.k == 3
+    for start in range(0, 90, 30):
+        assert len(set(clustering.labels[start : start + 30])) == 1
+    assert len(set(clustering.labels)) == 3
+
+
+def test_kmeans_with_more_clusters_than_points():
+    clustering = kmeans([[1.0, 1.0], [1.0, 1.0]], 5, random.Random(0))
+    assert clustering.k == 1
+    assert clustering.sse == 0
+
+
+def test_bic_prefers_the_true_number_of_clusters():
+    vectors = blobs()
+    scores = {k: kmeans(vectors, k, random.Random(0)).bic(vectors) for k in [1, 3]}
+    assert scores[3] > scores[1]
+
+
+def test_pick_simpoints():
+    vectors = blobs()
+    simpoints, scores = pick_simpoints(vectors, max_k=8, seed=0)
+    assert len(simpoints) == 3
+    assert sum(simpoint.weight for simpoint in simpoints) == pytest.approx(1.0)
+    # Each point represents its own cluster of the blobs
+    assert sorted(simpoint.interval // 30 for simpoint in simpoints) == [0, 1, 2]
+    assert 3 in scores
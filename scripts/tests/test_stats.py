@@ -0,0 +1,66 @@
+import json
+import shutil
+import tarfile
+
+import pytest
+from conftest import ipc_block, stats_text
+
+from util.metrics import METRICS, geometric_mean
+from util.staging import archive_path
+from util.stats import load_roi_blocks, parse_stats_text
+
+
+def test_parse_stats_text():
+    text = stats_text([{"simInsts": 10, "a::total": 2}, {"simInsts": 0}])
+    text += "simInsts 5 # outside of any block\n"
+    assert parse_stats_text(text) == [{"simInsts": 10, "a::total": 2}, {"simInsts": 0}]
+
+
+def test_load_roi_blocks_skips_empty_blocks(tmp_path, write_stats):
+    write_stats(tmp_path, [ipc_block(100, 1.0), {"simInsts": 0}])
+    assert load_roi_blocks(tmp_path) == [ipc_block(100, 1.0)]
+    assert load_roi_blocks(tmp_path / "missing") == []
+
+
+def test_load_forked_rois_in_order(tmp_path, write_stats):
+    write_stats(tmp_path, [{"simInsts": 0}])
+    for roi in [10, 2, 1]:
+        write_stats(tmp_path / f"roi{roi:03d}", [ipc_block(roi, 1.0)])
+    assert [b["simInsts"] for b in load_roi_blocks(tmp_path)] == [1, 2, 10]
+
+
+def test_load_staged_forked_rois(tmp_path, write_stats):
+    outdir = tmp_path / "m5out"
+    write_stats(outdir, [ipc_block(5, 1.0)])
+    write_stats(outdir / "roi002", [ipc_block(7, 1.0)])
+    write_stats(outdir / "roi001", [ipc_block(6, 1.0)])
+    with tarfile.open(archive_path(outdir), "w:gz") as archive:
+        archive.add(outdir, arcname=outdir.name)
+    shutil.rmtree(outdir)
+    assert [b["simInsts"] for b in load_roi_blocks(outdir)] == [5, 6, 7]
+
+
+def test_load_smarts_units(tmp_path, write_stats):
+    write_stats(tmp_path, [{"simInsts": 0}])
+    (tmp_path / "smarts.json").write_text(
+        json.dumps({"cpi": 1.5, "stats": ipc_block(2000, 0.5)})
+    )
+    blocks = load_roi_blocks(tmp_path)
+    assert blocks == [ipc_block(2000, 0.5)]
+    assert METRICS["ipc"].value(blocks) == pytest.approx(0.5)
+
+
+def test_metrics_weigh_rois_by_length():
+    blocks = [ipc_block(100, 1.0), ipc_block(300, 3.0)]
+    # 400 instructions in 200 cycles
+    assert METRICS["ipc"].value(blocks) == pytest.approx(2.0)
+    # Equal weights: the harmonic mean of the IPCs
+    assert METRICS["ipc"].weighted_value(blocks, [0.5, 0.5]) == pytest.approx(1.5)
+    assert METRICS["ipc"].value([{"simInsts": 10}]) is None
+    assert METRICS["ipc"].roi_values(blocks) == pytest.approx([1.0, 3.0])
+
+
+def test_geometric_mean():
+    assert geometric_mean([1.0, 4.0]) == pytest.approx(2.0)
+    assert geometric_mean([]) is None
+    assert geometric_mean([0.0, 1.0]) is None
@@ -0,0 +1,228 @@
+"""Pin jobs to dedicated cores and NUMA nodes.
+
+gem5 is single-threaded and sensitive to its caches, so jobs that the OS
+migrates between cores (or sockets) run noticeably slower and less
+predictably. A CorePool hands each job its own cores, all on one NUMA
+node, read from the host's topology in /sys. The job is then pinned to
+them with os.sched_setaffinity(), and optionally has its memory bound to
+the same node with numactl. A job waits for cores while every node is
+too busy for it, so pinned jobs never share cores.
+"""
+
+import asyncio
+import os
+import shlex
+import shutil
+from pathlib import Path
+from typing import Dict, Final, List, Optional, Set
+
+NODE_DIR: Final[Path] = Path("/sys/devices/system/node")
+CPU_DIR: Final[Path] = Path("/sys/devices/system/cpu")
+
+
+def parse_cpu_list(cpu_list: str) -> List[int]:
+    """Parse a kernel CPU list, e.g. "0-3,8-11".
+
+    :param cpu_list The CPU list
+    :return The CPUs in the list, in order
+    """
+    cpus: List[int] = []
+    for part in cpu_list.strip().split(","):
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        cpus.extend(range(int(first), int(last or first) + 1))
+    return cpus
+
+
+def format_cpu_list(cpus: List[int]) -> str:
+    """Format CPUs as a kernel CPU list, e.g. "0-3,8".
+
+    :param cpus The CPUs
+    :return The CPU list
+    """
+    ranges: List[str] = []
+    start: Optional[int] = None
+    prev: Optional[int] = None
+    for cpu in sorted(cpus) + [-1]:
+        if prev is not None and cpu == prev + 1:
+            prev = cpu
+            continue
+        if start is not None and prev is not None:
+            ranges.append(str(start) if start == prev else f"{start}-{prev}")
+        start = prev = cpu
+    return ",".join(ranges)
+
+
+def numa_nodes() -> Dict[int, List[int]]:
+    """Get the NUMA nodes of this host, and the CPUs this process may use
+    in each.
+
+    :return The usable CPUs of each node. Hosts without NUMA information
+            are treated as a single node 0.
+    """
+    usable: Final[Set[int]] = os.sched_getaffinity(0)
+    nodes: Dict[int, List[int]] = {}
+    try:
+        for entry in NODE_DIR.glob("node[0-9]*"):
+            cpus: List[int] = [
+                cpu
+                for cpu in parse_cpu_list((entry / "cpulist").read_text())
+                if cpu in usable
+            ]
+            if cpus:
+                nodes[int(entry.name[len("node") :])] = cpus
+    except OSError:
+        nodes = {}
+    return nodes or {0: sorted(usable)}
+
+
+def _sibling_rank(cpu: int) -> int:
+    """Get the position of a CPU among its core's hardware threads.
+
+    :param cpu The CPU
+    :return 0 for a core's first hardware thread, 1 for its second, ...
+    """
+    try:
+        siblings: List[int] = parse_cpu_list(
+            (CPU_DIR / f"cpu{cpu}" / "topology" / "thread_siblings_list").read_text()
+        )
+        return siblings.index(cpu)
+    except (OSError, ValueError):
+        return 0
+
+
+def core_order(cpus: List[int]) -> List[int]:
+    """Order CPUs so that each physical core's first hardware thread
+    comes before any core's second one.
+
+    Handing out CPUs in this order keeps jobs off each other's SMT
+    siblings until every physical core is in use.
+
+    :param cpus The CPUs
+    :return The CPUs, reordered
+    """
+    # sorted() is stable, so CPUs keep their order within a rank
+    return sorted(cpus, key=_sibling_rank)
+
+
+def numactl_available() -> bool:
+    """Check whether numactl is installed.
+
+    :return True if numactl is on the PATH
+    """
+    return shutil.which("numactl") is not None
+
+
+class Placement:
+    """The cores and NUMA node a job was given."""
+
+    def __init__(self, node: int, cpus: List[int]) -> None:
+        """Initialize the placement.
+
+        :param node The NUMA node of the cores
+        :param cpus The cores
+        """
+        self.node: Final[int] = node
+        self.cpus: Final[List[int]] = cpus
+
+    def wrap(self, cmd: str) -> str:
+        """Wrap a shell command so its memory is bound to the node.
+
+        :param cmd The command
+        :return The command, run under numactl
+        """
+        return f"numactl --membind={self.node} -- /bin/sh -c {shlex.quote(cmd)}"
+
+    def __str__(self) -> str:
+        return f"CPU(s) {format_cpu_list(self.cpus)}, node {self.node}"
+
+
+class CorePool:
+    """The cores of this host, handed out to jobs for exclusive use."""
+
+    def __init__(self, nodes: Optional[Dict[int, List[int]]] = None) -> None:
+        """Initialize the pool.
+
+        :param nodes The usable CPUs of each NUMA node (default: read
+                     from /sys)
+        """
+        self._free: Final[Dict[int, List[int]]] = {
+            node: core_order(cpus) for node, cpus in (nodes or numa_nodes()).items()
+        }
+        self.num_cpus: Final[int] = sum(len(cpus) for cpus in self._free.values())
+
+        # job id -> placement
+        self._placements: Dict[str, Placement] = {}
+
+        # To be created in wait(), inside the event loop
+        self._lock: Optional[asyncio.Lock] = None
+        self._released: Optional[asyncio.Event] = None
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self._free)
+
+    def acquire(self, job_id: str, num_cpus: int = 1) -> Optional[Placement]:
+        """Give a job cores of its own, all on one node.
+
+        Jobs are spread over the nodes, each going to the node with the
+        most free cores, so that they share caches and memory bandwidth
+        as little as possible.
+
+        :param job_id The ID of the job
+        :param num_cpus The number of cores the job needs
+        :return The job's placement, or None if no node has enough free
+                cores
+        """
+        node: Final[int] = max(self._free, key=lambda n: len(self._free[n]))
+        if len(self._free[node]) < num_cpus:
+            return None
+
+        cpus: Final[List[int]] = self._free[node][:num_cpus]
+        del self._free[node][:num_cpus]
+        placement = Placement(node, cpus)
+        self._placements[job_id] = placement
+        return placement
+
+    async def wait(self, job_id: str, num_cpus: int = 1) -> Optional[Placement]:
+        """Wait until a node has enough free cores for a job, then give
+        them to it.
+
+        A job is never left waiting while no job holds cores, so a job
+        needing more cores than any node has still runs (unpinned).
+
+        :param job_id The ID of the job
+        :param num_cpus The number of cores the job needs
+        :return The job's placement, or None if no node could ever fit it
+        """
+        if self._lock is None or self._released is None:
+            self._lock = asyncio.Lock()
+            self._released = asyncio.Event()
+
+        async with self._lock:
+            waiting: bool = False
+            while True:
+                placement: Optional[Placement] = self.acquire(job_id, num_cpus)
+                if placement is not None or not self._placements:
+                    return placement
+                if not waiting:
+                    print(
+                        f"Waiting for {num_cpus} free core(s) on one node to "
+                        f"start {job_id}"
+                    )
+                    waiting = True
+                self._released.clear()
+                await self._released.wait()
+
+    def release(self, job_id: str) -> None:
+        """Return a finished job's cores to the pool.
+
+        :param job_id The ID of the job
+        """
+        placement: Optional[Placement] = self._placements.pop(job_id, None)
+        if placement is not None:
+            free: List[int] = self._free[placement.node] + placement.cpus
+            self._free[placement.node] = core_order(sorted(free))
+            if self._released is not None:
+                self._released.set()
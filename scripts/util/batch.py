@@ -0,0 +1,387 @@
+"""Turn a list of commands into SLURM or HTCondor job arrays.
+
+A job array directory holds everything a cluster needs to run the
+commands, one array task per command:
+
+    manifest.json         The tasks, and where each one is listed
+    task.sh               Runs one task: task.sh <task list> <line>
+    tasks/<class>.txt     "<task id>\t<command>" per line, per class
+    slurm/<class>-<n>.sbatch, submit-slurm.sh
+    condor.sub, condor-queue.txt
+    logs/<task id>.out    The stdout/stderr of each task
+    exit/<task id>        The exit code of each finished task
+
+SLURM requests the same resources for every task of an array, so tasks
+are grouped into classes by CPUs and memory (rounded up to a power of
+two) and each class gets its own arrays. HTCondor takes the resources
+of each task from its line in condor-queue.txt.
+"""
+
+import json
+import shlex
+import stat
+from pathlib import Path
+from typing import Any, Dict, Final, List, Optional, Tuple
+
+from util.affinity import format_cpu_list
+from util.history import JobHistory
+from util.runner import Job, estimate_memory
+
+MANIFEST_FILE: Final[str] = "manifest.json"
+TASK_SCRIPT: Final[str] = "task.sh"
+
+# SLURM's default MaxArraySize is 1001, so indices go up to 1000
+DEFAULT_MAX_ARRAY_SIZE: Final[int] = 1000
+
+# Array tasks never ask for less memory than this
+MIN_MEMORY_CLASS: Final[int] = 1024**3
+
+TASK_SCRIPT_TEMPLATE: Final[str] = """\
+#!/bin/bash
+# Run one task of a job array: {task_script} <task list> <line>
+# Each line of a task list is "<task id><TAB><command>".
+
+array_dir={array_dir}
+line=$(sed -n "$(($2 + 1))p" "$1")
+[ -n "$line" ] || exit 2
+id=${{line%%$'\\t'*}}
+cmd=${{line#*$'\\t'}}
+
+cd {cwd} || exit 1
+bash -c "$cmd" > "$array_dir/logs/$id.out" 2> "$array_dir/logs/$id.err"
+rc=$?
+
+# Record the exit code atomically, for "collect"
+echo "$rc" > "$array_dir/exit/.$id.tmp"
+mv "$array_dir/exit/.$id.tmp" "$array_dir/exit/$id"
+exit "$rc"
+"""
+
+
+def memory_class(mem: int) -> int:
+    """Round a memory request up to its class.
+
+    :param mem The memory request, in bytes
+    :return The smallest power of two bytes (of at least 1 GiB) that fits
+    """
+    mem_class: int = MIN_MEMORY_CLASS
+    while mem_class < mem:
+        mem_class *= 2
+    return mem_class
+
+
+def format_slurm_time(seconds: float) -> str:
+    """Format a duration as a SLURM time limit.
+
+    :param seconds The duration in seconds
+    :return The time limit, as days-hours:minutes:seconds
+    """
+    total: int = int(seconds + 0.999)
+    days, total = divmod(total, 24 * 60 * 60)
+    hours, total = divmod(total, 60 * 60)
+    minutes, secs = divmod(total, 60)
+    return f"{days}-{hours:02d}:{minutes:02d}:{secs:02d}"
+
+
+class BatchTask:
+    """One command of a job array, with the resources it requests."""
+
+    def __init__(self, task_id: int, job: Job, mem: int) -> None:
+        """Initialize the task.
+
+        :param task_id The ID of the task (its position in the campaign)
+        :param job The job the task runs
+        :param mem The memory the task requests, in bytes
+        """
+        self.id: Final[int] = task_id
+        self.job: Final[Job] = job
+        self.mem: Final[int] = mem
+
+    @property
+    def resource_class(self) -> Tuple[int, int]:
+        """The (memory class, CPUs) the task is grouped by."""
+        return memory_class(self.mem), self.job.cpus
+
+    @property
+    def class_name(self) -> str:
+        """The name of the task's resource class, e.g. "mem4G-cpus1"."""
+        mem_class, cpus = self.resource_class
+        return f"mem{mem_class // 1024**3}G-cpus{cpus}"
+
+
+def make_tasks(
+    lines: List[str],
+    history: Optional[JobHistory] = None,
+    default_mem: Optional[int] = None,
+) -> List[BatchTask]:
+    """Make array tasks out of command file lines.
+
+    Each task's memory is estimated as for the host runner: from its
+    "mem" annotation, its history, or its gem5 memory config.
+
+    :param lines The (optionally annotated) command lines
+    :param history The history to estimate memory use from
+    :param default_mem The memory of tasks nothing is known about
+    :return The tasks, in order
+    """
+    tasks: List[BatchTask] = []
+    for index, line in enumerate(lines):
+        job: Job = Job.from_line(line, index)
+        if job.after or job.foreach is not None:
+            raise ValueError(f"Job arrays do not support dependencies: {line}")
+        tasks.append(BatchTask(index, job, estimate_memory(job, history, default_mem)))
+    return tasks
+
+
+class JobArray:
+    """A job array directory (see the module documentation)."""
+
+    def __init__(self, path: Path) -> None:
+        """Initialize the job array.
+
+        :param path The job array directory
+        """
+        self.path: Final[Path] = path.absolute()
+
+    @property
+    def task_script(self) -> Path:
+        return self.path / TASK_SCRIPT
+
+    def _write(self, name: str, text: str, executable: bool = False) -> Path:
+        """Write a file of the job array.
+
+        :param name The path of the file, relative to the job array
+        :param text The contents of the file
+        :param executable Whether to make the file executable
+        :return The path of the file
+        """
+        path: Final[Path] = self.path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+        if executable:
+            path.chmod(path.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP)
+        return path
+
+    def generate(
+        self,
+        tasks: List[BatchTask],
+        cwd: Path,
+        name: str = "gem5",
+        max_array_size: int = DEFAULT_MAX_ARRAY_SIZE,
+        throttle: Optional[int] = None,
+    ) -> List[Path]:
+        """Write the job array's files.
+
+        :param tasks The tasks to run
+        :param cwd The directory to run the commands from
+        :param name The name of the job arrays
+        :param max_array_size The largest number of tasks in one SLURM array
+        :param throttle The most tasks of one array to run at once
+        :return The SLURM batch scripts written, in submission order
+        """
+        for subdir in ["tasks", "slurm", "logs", "exit"]:
+            (self.path / subdir).mkdir(parents=True, exist_ok=True)
+
+        self._write(
+            TASK_SCRIPT,
+            TASK_SCRIPT_TEMPLATE.format(
+                task_script=TASK_SCRIPT,
+                array_dir=shlex.quote(str(self.path)),
+                cwd=shlex.quote(str(cwd.absolute())),
+            ),
+            executable=True,
+        )
+
+        classes: Dict[str, List[BatchTask]] = {}
+        for task in tasks:
+            classes.setdefault(task.class_name, []).append(task)
+
+        manifest: List[Dict[str, Any]] = []
+        condor_queue: List[str] = []
+        sbatch_files: List[Path] = []
+        for class_name, class_tasks in classes.items():
+            task_list: Path = self._write(
+                f"tasks/{class_name}.txt",
+                "".join(f"{task.id}\t{task.job.cmd}\n" for task in class_tasks),
+            )
+            for line, task in enumerate(class_tasks):
+                manifest.append(
+                    {
+                        "id": task.id,
+                        "line": line,
+                        "task_list": task_list.name,
+                        "command": task.job.cmd,
+                        "annotations": task.job.annotations,
+                        "mem": task.mem,
+                        "cpus": task.job.cpus,
+                    }
+                )
+                condor_queue.append(
+                    f"{task_list} {line} {task.job.cpus} "
+                    f"{(task.mem + 1024**2 - 1) // 1024**2}"
+                )
+            sbatch_files.extend(
+                self._write_slurm_arrays(
+                    name, class_name, task_list, class_tasks, max_array_size, throttle
+                )
+            )
+
+        self._write(
+            "submit-slurm.sh",
+            "#!/bin/bash\nset -e\n"
+            + "".join(f"sbatch {shlex.quote(str(f))}\n" for f in sbatch_files),
+            executable=True,
+        )
+        self._write("condor-queue.txt", "".join(f"{q}\n" for q in condor_queue))
+        self._write_condor_submit(name, tasks)
+        self._write(
+            MANIFEST_FILE,
+            json.dumps(
+                {
+                    "name": name,
+                    "cwd": str(cwd.absolute()),
+                    "tasks": sorted(manifest, key=lambda entry: entry["id"]),
+                },
+                indent=1,
+            ),
+        )
+        return sbatch_files
+
+    def _write_slurm_arrays(
+        self,
+        name: str,
+        class_name: str,
+        task_list: Path,
+        tasks: List[BatchTask],
+        max_array_size: int,
+        throttle: Optional[int],
+    ) -> List[Path]:
+        """Write the SLURM batch scripts of one resource class.
+
+        A class with more tasks than fit in one array is split over
+        several, each starting at an offset into the class' task list.
+
+        :param name The name of the job arrays
+        :param class_name The name of the class
+        :param task_list The task list of the class
+        :param tasks The tasks of the class
+        :param max_array_size The largest number of tasks in one array
+        :param throttle The most tasks of one array to run at once
+        :return The batch scripts
+        """
+        mem_class, cpus = tasks[0].resource_class
+        timeouts: Final[List[Optional[float]]] = [task.job.timeout for task in tasks]
+
+        sbatch_files: List[Path] = []
+        for offset in range(0, len(tasks), max_array_size):
+            size: int = min(max_array_size, len(tasks) - offset)
+            # SLURM array specs use the same syntax as kernel CPU lists
+            array: str = format_cpu_list(list(range(size)))
+            if throttle is not None:
+                array += f"%{throttle}"
+
+            directives: List[str] = [
+                f"--job-name={name}-{class_name}",
+                f"--array={array}",
+                "--ntasks=1",
+                f"--cpus-per-task={cpus}",
+                f"--mem={mem_class // 1024**2}M",
+                f"--output={self.path}/logs/slurm-%A_%a.out",
+            ]
+            # Only limit the time if every task of the class has a limit
+            if all(timeout is not None for timeout in timeouts):
+                longest: float = max(t for t in timeouts if t is not None)
+                directives.append(f"--time={format_slurm_time(longest)}")
+
+            sbatch_files.append(
+                self._write(
+                    f"slurm/{class_name}-{offset // max_array_size}.sbatch",
+                    "#!/bin/bash\n"
+                    + "".join(f"#SBATCH {d}\n" for d in directives)
+                    + "\n"
+                    + f"exec {shlex.quote(str(self.task_script))} "
+                    + f"{shlex.quote(str(task_list))} "
+                    + f"$((SLURM_ARRAY_TASK_ID + {offset}))\n",
+                )
+            )
+        return sbatch_files
+
+    def _write_condor_submit(self, name: str, tasks: List[BatchTask]) -> Path:
+        """Write the HTCondor submit file.
+
+        All tasks are queued by one submit file, each with the resources
+        on its line of condor-queue.txt.
+
+        :param name The name of the job array
+        :param tasks The tasks
+        :return The submit file
+        """
+        lines: List[str] = [
+            f"# {name}: {len(tasks)} task(s)",
+            f"executable     = {self.task_script}",
+            "arguments      = $(task_list) $(line)",
+            "request_cpus   = $(cpus)",
+            "request_memory = $(mem_mb)",
+            f"output         = {self.path}/logs/condor-$(Cluster)_$(Process).out",
+            f"error          = {self.path}/logs/condor-$(Cluster)_$(Process).err",
+            f"log            = {self.path}/logs/condor-$(Cluster).log",
+            "getenv         = True",
+        ]
+        timeouts: Final[List[Optional[float]]] = [task.job.timeout for task in tasks]
+        if tasks and all(timeout is not None for timeout in timeouts):
+            longest: float = max(t for t in timeouts if t is not None)
+            lines.append(f"allowed_execute_duration = {int(longest + 0.999)}")
+        lines.append(
+            f"queue task_list, line, cpus, mem_mb from {self.path}/condor-queue.txt"
+        )
+        return self._write("condor.sub", "\n".join(lines) + "\n")
+
+    def manifest(self) -> Dict[str, Any]:
+        """Load the job array's manifest.
+
+        :return The manifest
+        :raise ValueError If the directory is not a generated job array
+        """
+        try:
+            manifest: Any = json.loads((self.path / MANIFEST_FILE).read_text())
+        except (OSError, ValueError):
+            manifest = None
+        if not isinstance(manifest, dict) or "tasks" not in manifest:
+            raise ValueError(f"{self.path} is not a job array directory")
+        return manifest
+
+    def exit_codes(self) -> Dict[int, Optional[int]]:
+        """Collect the exit code of each task.
+
+        :return The exit code of each task ID, or None if the task has
+                not finished (or was killed before it could record one)
+        """
+        codes: Dict[int, Optional[int]] = {}
+        for entry in self.manifest()["tasks"]:
+            exit_file: Path = self.path / "exit" / str(entry["id"])
+            try:
+                codes[entry["id"]] = int(exit_file.read_text().strip())
+            except (OSError, ValueError):
+                codes[entry["id"]] = None
+        return codes
+
+    def unfinished_lines(self) -> List[str]:
+        """Get the command file lines of the tasks that did not succeed.
+
+        :return The (annotated) lines, to run again
+        """
+        codes: Final[Dict[int, Optional[int]]] = self.exit_codes()
+        lines: List[str] = []
+        for entry in self.manifest()["tasks"]:
+            if codes[entry["id"]] == 0:
+                continue
+            annotations: Dict[str, str] = entry["annotations"]
+            lines.append(
+                entry["command"]
+                + (
+                    "  #@ " + " ".join(f"{k}={v}" for k, v in annotations.items())
+                    if annotations
+                    else ""
+                )
+            )
+        return lines
@@ -0,0 +1,522 @@
+"""Declarative sweep campaigns, expanded into simulation jobs.
+
+A campaign spec (a TOML file, or YAML with PyYAML installed) lists the
+benchmarks to simulate, the gem5 config script, its fixed arguments and
+the dimensions to sweep, e.g.
+
+    name = "cache-bpred"
+    script = "se_custom_binary_periodic.py"
+    benchmarks = ["429.mcf", "470.lbm"]  # or ["all"], or none for FS scripts
+    outdir = "m5out/cache-bpred"
+
+    [args]
+    num-rois = 10
+
+    [dimensions]
+    l1d_size = ["32KiB", "48KiB", "64KiB"]
+    l2_assoc = [4, 8, 16]
+    llc_pref = ["stride", "spp", "no"]
+    bpred = ["tage", "perceptron", "tournament"]
+    roi-interval = {min = 1, max = 100, log = true, integer = true}  # in M insts
+
+    [design]
+    method = "lhs"  # "factorial" (the default), "random" or "lhs"
+    samples = 200
+    seed = 1
+
+    [annotations]
+    timeout = "12h"
+
+Option names are passed to the config script as they are spelled (see
+util.simulation.format_script_args). A dimension is either a list of
+levels, or a range from "min" to "max" (optionally "log"-spaced and
+"integer"); a full-factorial design needs a range's number of "levels".
+Random and Latin-hypercube designs draw "samples" points from a seeded
+generator, so expanding a spec again gives the same jobs.
+
+Every point is simulated on every benchmark, and duplicate jobs (e.g.
+from integer rounding) are dropped. A job's ID, <name>-<benchmark>-<hash>,
+hashes its config script and arguments, so it stays the same when the
+spec is reordered or extended, and its outdir is
+<outdir>/<benchmark>/<option>-<value>_... (layout = "label", as with
+job-array.py) or <outdir>/<benchmark>/<hash> (layout = "id").
+"""
+
+import hashlib
+import itertools
+import json
+import math
+import random
+import re
+from pathlib import Path
+from typing import Any, Dict, Final, List, Optional
+
+from util.runner import JOB_ID_PATTERN
+from util.simulation import simulation_command
+from util.spec import (
+    DEFAULT_GEM5_BINARY,
+    DEFAULT_SPEC06_DIR,
+    SPEC06_BENCHMARKS,
+    SpecCommand,
+)
+
+# How to lay out the jobs' outdirs under the campaign's outdir
+LAYOUTS: Final[List[str]] = ["label", "id"]
+
+# How to choose the points of the design space to simulate
+DESIGN_METHODS: Final[List[str]] = ["factorial", "random", "lhs"]
+
+# Annotations a campaign may give all of its jobs (see util.runner)
+CAMPAIGN_ANNOTATIONS: Final[List[str]] = ["mem", "cpus", "timeout"]
+
+# Hex digits of a job's hash used in its ID and outdir
+HASH_LENGTH: Final[int] = 8
+
+# Significant digits kept of values sampled from a real-valued range
+FLOAT_DIGITS: Final[int] = 6
+
+# Characters of a value that aren't kept in an outdir label
+LABEL_NOISE: Final[re.Pattern] = re.compile(r"[^A-Za-z0-9_.+-]")
+
+
+class Dimension:
+    """A swept config script option: a list of levels."""
+
+    def __init__(self, name: str, levels: List[Any]) -> None:
+        """Initialize the dimension.
+
+        :param name The name of the option
+        :param levels The option's values
+        """
+        if not levels:
+            raise ValueError(f"Dimension {name} has no levels")
+        self.name: Final[str] = name
+        self._levels: Final[List[Any]] = levels
+
+    def levels(self) -> List[Any]:
+        """Get the values a full-factorial design takes.
+
+        :return The values
+        """
+        return self._levels
+
+    def value(self, u: float) -> Any:
+        """Map a point of [0, 1) onto the dimension, uniformly.
+
+        :param u The point
+        :return The value
+        """
+        return self._levels[min(int(u * len(self._levels)), len(self._levels) - 1)]
+
+
+class RangeDimension(Dimension):
+    """A swept config script option: a range of numbers."""
+
+    def __init__(
+        self,
+        name: str,
+        low: float,
+        high: float,
+        log: bool = False,
+        integer: bool = False,
+        num_levels: Optional[int] = None,
+    ) -> None:
+        """Initialize the dimension.
+
+        :param name The name of the option
+        :param low The smallest value
+        :param high The largest value
+        :param log Whether to space values evenly on a log scale
+        :param integer Whether to round values to integers
+        :param num_levels The number of values a full-factorial design takes
+        """
+        if not low < high:
+            raise ValueError(f"Dimension {name} needs min < max")
+        if log and low <= 0:
+            raise ValueError(f"Dimension {name} needs min > 0 to be log-spaced")
+        self.name = name
+        self.low: Final[float] = low
+        self.high: Final[float] = high
+        self.log: Final[bool] = log
+        self.integer: Final[bool] = integer
+        self.num_levels: Final[Optional[int]] = num_levels
+
+    def levels(self) -> List[Any]:
+        if self.num_levels is None:
+            raise ValueError(
+                f"Dimension {self.name} needs a number of levels for a "
+                "full-factorial design"
+            )
+        if self.num_levels == 1:
+            return [self._interpolate(0.5)]
+        return [
+            self._interpolate(level / (self.num_levels - 1))
+            for level in range(self.num_levels)
+        ]
+
+    def value(self, u: float) -> Any:
+        return self._interpolate(u)
+
+    def _interpolate(self, u: float) -> Any:
+        """Get the value a fraction of the way from min to max.
+
+        :param u The fraction
+        :return The value
+        """
+        if self.log:
+            value: float = math.exp(
+                math.log(self.low) + u * (math.log(self.high) - math.log(self.low))
+            )
+        else:
+            value = self.low + u * (self.high - self.low)
+        if self.integer:
+            return round(value)
+        return float(f"{value:.{FLOAT_DIGITS}g}")
+
+
+def parse_dimension(name: str, spec: Any) -> Dimension:
+    """Parse a dimension of a campaign spec.
+
+    :param name The name of the option
+    :param spec A list of levels, or a table with min, max and optionally
+                log, integer and levels
+    :return The dimension
+    :raise ValueError If the dimension is malformed
+    """
+    if isinstance(spec, list):
+        return Dimension(name, spec)
+    if isinstance(spec, dict) and "min" in spec and "max" in spec:
+        unknown: List[str] = sorted(
+            set(spec) - {"min", "max", "log", "integer", "levels"}
+        )
+        if unknown:
+            raise ValueError(f"Unknown keys of dimension {name}: {', '.join(unknown)}")
+        return RangeDimension(
+            name,
+            spec["min"],
+            spec["max"],
+            log=spec.get("log", False),
+            integer=spec.get("integer", False),
+            num_levels=spec.get("levels"),
+        )
+    raise ValueError(
+        f"Dimension {name} must be a list of levels or a table with min and max"
+    )
+
+
+def factorial_design(dimensions: List[Dimension]) -> List[Dict[str, Any]]:
+    """Take every combination of the dimensions' levels.
+
+    :param dimensions The dimensions
+    :return The points
+    """
+    return [
+        {dimension.name: value for dimension, value in zip(dimensions, values)}
+        for values in itertools.product(*(d.levels() for d in dimensions))
+    ]
+
+
+def random_design(
+    dimensions: List[Dimension], samples: int, rng: random.Random
+) -> List[Dict[str, Any]]:
+    """Draw points uniformly at random.
+
+    :param dimensions The dimensions
+    :param samples The number of points
+    :param rng The random number generator
+    :return The points
+    """
+    return [
+        {dimension.name: dimension.value(rng.random()) for dimension in dimensions}
+        for _ in range(samples)
+    ]
+
+
+def latin_hypercube_design(
+    dimensions: List[Dimension], samples: int, rng: random.Random
+) -> List[Dict[str, Any]]:
+    """Draw a Latin hypercube sample: each dimension is cut into <samples>
+    equal strata, and each stratum is drawn from exactly once.
+
+    :param dimensions The dimensions
+    :param samples The number of points
+    :param rng The random number generator
+    :return The points
+    """
+    points: List[Dict[str, Any]] = [{} for _ in range(samples)]
+    for dimension in dimensions:
+        strata: List[int] = list(range(samples))
+        rng.shuffle(strata)
+        for point, stratum in zip(points, strata):
+            point[dimension.name] = dimension.value((stratum + rng.random()) / samples)
+    return points
+
+
+def load_spec(path: Path) -> Dict[str, Any]:
+    """Load a campaign spec file.
+
+    :param path The path to the spec (.toml, .yaml or .yml)
+    :return The spec
+    :raise ValueError If the spec can't be parsed
+    """
+    if path.suffix in [".yaml", ".yml"]:
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError(
+                f"Reading {path} needs PyYAML (pip install pyyaml); or write the "
+                "spec in TOML"
+            )
+        spec: Any = yaml.safe_load(path.read_text())
+    else:
+        try:
+            import tomllib
+        except ImportError:
+            # Python < 3.11 has no TOML parser; tomli is the same module
+            try:
+                import tomli as tomllib
+            except ImportError:
+                raise ValueError(
+                    f"Reading {path} needs Python 3.11 or tomli (pip install "
+                    "tomli); or write the spec in YAML"
+                )
+        spec = tomllib.loads(path.read_text())
+    if not isinstance(spec, dict):
+        raise ValueError(f"{path} is not a campaign spec")
+    return spec
+
+
+class CampaignJob:
+    """One simulation of a campaign: a benchmark at a point of the design."""
+
+    def __init__(
+        self,
+        job_id: str,
+        benchmark: Optional[str],
+        args: Dict[str, Any],
+        point: Dict[str, Any],
+        outdir: Path,
+        command: str,
+    ) -> None:
+        """Initialize the job.
+
+        :param job_id The job's stable ID
+        :param benchmark The benchmark simulated, if any
+        :param args All of the config script's arguments
+        :param point The swept arguments
+        :param outdir The job's outdir
+        :param command The job's shell command
+        """
+        self.id: Final[str] = job_id
+        self.benchmark: Final[Optional[str]] = benchmark
+        self.args: Final[Dict[str, Any]] = args
+        self.point: Final[Dict[str, Any]] = point
+        self.outdir: Final[Path] = outdir
+        self.command: Final[str] = command
+
+    def line(self, annotations: Dict[str, str]) -> str:
+        """Make the job's line of a command file.
+
+        :param annotations Annotations to add to the job's ID
+        :return The line
+        """
+        annotation_str: Final[str] = " ".join(
+            f"{key}={value}" for key, value in {"id": self.id, **annotations}.items()
+        )
+        return f"{self.command}  #@ {annotation_str}"
+
+    def manifest_entry(self) -> Dict[str, Any]:
+        """Describe the job, for the campaign's manifest.
+
+        :return The description
+        """
+        return {
+            "id": self.id,
+            "benchmark": self.benchmark,
+            "point": self.point,
+            "args": self.args,
+            "outdir": str(self.outdir),
+        }
+
+
+class Campaign:
+    """A sweep of a config script's arguments over benchmarks."""
+
+    def __init__(self, spec: Dict[str, Any]) -> None:
+        """Initialize the campaign.
+
+        :param spec The campaign spec (see the module docstring)
+        :raise ValueError If the spec is malformed
+        """
+        for key in ["name", "script"]:
+            if key not in spec:
+                raise ValueError(f"Campaign spec has no {key}")
+        self.name: Final[str] = str(spec["name"])
+        if not JOB_ID_PATTERN.fullmatch(self.name):
+            raise ValueError(f"Invalid campaign name: {self.name}")
+        self.script: Final[Path] = Path(spec["script"])
+        self.gem5_binary: Final[Path] = Path(
+            spec.get("gem5_binary", DEFAULT_GEM5_BINARY)
+        )
+        self.spec_dir: Final[Path] = Path(spec.get("spec_dir", DEFAULT_SPEC06_DIR))
+        self.outdir: Final[Path] = Path(spec.get("outdir", Path("m5out") / self.name))
+        self.binary_args: Final[List[str]] = list(spec.get("binary_args", []))
+
+        benchmarks: List[str] = list(spec.get("benchmarks", []))
+        self.benchmarks: Final[List[str]] = (
+            SPEC06_BENCHMARKS if "all" in benchmarks else benchmarks
+        )
+
+        self.layout: Final[str] = spec.get("layout", "label")
+        if self.layout not in LAYOUTS:
+            raise ValueError(
+                f"Invalid layout {self.layout}, expected one of {', '.join(LAYOUTS)}"
+            )
+
+        self.args: Final[Dict[str, Any]] = dict(spec.get("args", {}))
+        self.dimensions: Final[List[Dimension]] = [
+            parse_dimension(name, dimension)
+            for name, dimension in spec.get("dimensions", {}).items()
+        ]
+        fixed_and_swept: Final[List[str]] = sorted(
+            set(self.args) & {dimension.name for dimension in self.dimensions}
+        )
+        if fixed_and_swept:
+            raise ValueError(
+                f"Options both fixed and swept: {', '.join(fixed_and_swept)}"
+            )
+
+        design: Final[Dict[str, Any]] = spec.get("design", {})
+        self.method: Final[str] = design.get("method", "factorial")
+        if self.method not in DESIGN_METHODS:
+            raise ValueError(
+                f"Invalid design method {self.method}, expected one of "
+                f"{', '.join(DESIGN_METHODS)}"
+            )
+        self.samples: Final[Optional[int]] = design.get("samples")
+        if self.method != "factorial" and (self.samples is None or self.samples < 1):
+            raise ValueError(f"A {self.method} design needs a number of samples")
+        self.seed: Final[int] = design.get("seed", 0)
+
+        self.annotations: Final[Dict[str, str]] = {
+            key: str(value) for key, value in spec.get("annotations", {}).items()
+        }
+        unknown: Final[List[str]] = sorted(
+            set(self.annotations) - set(CAMPAIGN_ANNOTATIONS)
+        )
+        if unknown:
+            raise ValueError(f"Unsupported annotations: {', '.join(unknown)}")
+
+    @classmethod
+    def load(cls, path: Path) -> "Campaign":
+        """Load a campaign from a spec file.
+
+        :param path The path to the spec
+        :return The campaign
+        :raise ValueError If the spec is malformed
+        """
+        return cls(load_spec(path))
+
+    def points(self) -> List[Dict[str, Any]]:
+        """Choose the points of the design space to simulate.
+
+        :return The points (which may repeat)
+        """
+        if not self.dimensions:
+            return [{}]
+        if self.method == "factorial":
+            return factorial_design(self.dimensions)
+        rng: Final[random.Random] = random.Random(self.seed)
+        assert self.samples is not None
+        if self.method == "random":
+            return random_design(self.dimensions, self.samples, rng)
+        return latin_hypercube_design(self.dimensions, self.samples, rng)
+
+    def jobs(self) -> List[CampaignJob]:
+        """Expand the campaign into its jobs, without duplicates.
+
+        :return The jobs, benchmark by benchmark
+        :raise FileNotFoundError If a benchmark can't be found
+        """
+        jobs: List[CampaignJob] = []
+        job_ids: Dict[str, Dict[str, Any]] = {}
+        points: Final[List[Dict[str, Any]]] = self.points()
+        for benchmark in self.benchmarks or [None]:
+            spec_command: Optional[SpecCommand] = (
+                SpecCommand(benchmark, self.spec_dir.absolute())
+                if benchmark is not None
+                else None
+            )
+            for point in points:
+                args: Dict[str, Any] = {**self.args, **point}
+                digest: str = self.hash(benchmark, args)
+                job_id: str = "-".join(
+                    part for part in [self.name, benchmark, digest] if part
+                )
+                if job_id in job_ids:
+                    if job_ids[job_id] != args:
+                        raise ValueError(f"Hash collision between jobs: {job_id}")
+                    continue
+                job_ids[job_id] = args
+
+                outdir: Path = self.job_outdir(benchmark, point)
+                jobs.append(
+                    CampaignJob(
+                        job_id,
+                        benchmark,
+                        args,
+                        point,
+                        outdir,
+                        simulation_command(
+                            self.gem5_binary,
+                            self.script,
+                            args,
+                            outdir,
+                            spec_command,
+                            self.binary_args,
+                        ),
+                    )
+                )
+        return jobs
+
+    def job_outdir(self, benchmark: Optional[str], point: Dict[str, Any]) -> Path:
+        """Get the outdir of a job, following the campaign's layout.
+
+        :param benchmark The job's benchmark, if any
+        :param point The job's swept arguments
+        :return The outdir
+        """
+        outdir: Path = self.outdir.absolute()
+        if benchmark is not None:
+            outdir = outdir / benchmark
+        label: Final[str] = (
+            self.hash(benchmark, {**self.args, **point})
+            if self.layout == "id"
+            else self.label(point)
+        )
+        return outdir / label if label else outdir
+
+    def hash(self, benchmark: Optional[str], args: Dict[str, Any]) -> str:
+        """Hash what makes a job unique: its benchmark, config script and
+        arguments (but not where it writes its output).
+
+        :param benchmark The benchmark, if any
+        :param args The config script's arguments
+        :return The hash, in hex
+        """
+        key: Final[str] = json.dumps(
+            {"benchmark": benchmark, "script": self.script.name, "args": args},
+            sort_keys=True,
+        )
+        return hashlib.sha1(key.encode()).hexdigest()[:HASH_LENGTH]
+
+    @staticmethod
+    def label(point: Dict[str, Any]) -> str:
+        """Name an outdir after the swept arguments, e.g. l2_assoc-8_bpred-tage.
+
+        :param point The swept arguments
+        :return The label
+        """
+        return "_".join(
+            LABEL_NOISE.sub("-", f"{name}-{value}") for name, value in point.items()
+        )
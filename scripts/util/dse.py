@@ -0,0 +1,505 @@
+"""Design-space exploration over the configurations of a sweep campaign.
+
+Rather than simulating every configuration of a campaign (see
+util.campaign) for the full ROI budget, successive halving simulates
+them all with a small budget of a few short ROIs, ranks them by a
+metric, and promotes only the best fraction to the next, larger budget,
+until the last rung is simulated with the full budget:
+
+    rung 0: 243 configs x 2 ROIs of  50M instructions
+    rung 1:  81 configs x 4 ROIs of 200M instructions
+    rung 2:  27 configs x 10 ROIs of 800M instructions
+
+Most configurations that are clearly bad after a short ROI never cost
+more than that. A configuration's score at each rung is the (geometric)
+mean of its metric over the campaign's benchmarks.
+"""
+
+import asyncio
+import json
+import math
+import random
+import re
+from pathlib import Path
+from typing import Any, Dict, Final, List, Optional, Set, Tuple
+
+from util.campaign import Campaign
+from util.gem5_command import parse_size
+from util.metrics import Metric, geometric_mean
+from util.runner import parse_duration
+from util.screening import Design, Factor, design_points, fold_over, plackett_burman
+from util.simulation import SimulationError, SimulationPool, SimulationResult
+from util.stats import load_roi_blocks
+from util.surrogate import Encoder, GaussianProcess, select_batch
+
+# The budgets of successive halving's rungs: <num-rois>x<roi-interval>,
+# with the ROI interval in millions of instructions
+DEFAULT_RUNGS: Final[str] = "2x50,4x200,10x800"
+
+# The fraction of configurations promoted to the next rung
+DEFAULT_KEEP: Final[float] = 1 / 3
+
+# How many configurations a surrogate-guided search simulates before it
+# fits its first surrogate
+DEFAULT_INITIAL_SAMPLES: Final[int] = 10
+
+# A surrogate-guided search stops once no configuration is expected to
+# improve on the best one by more than this fraction of it
+DEFAULT_IMPROVEMENT_THRESHOLD: Final[float] = 0.005
+
+
+class Rung:
+    """The ROI budget every configuration gets at one rung."""
+
+    def __init__(self, num_rois: int, roi_interval: float) -> None:
+        """Initialize the rung.
+
+        :param num_rois The number of ROIs to simulate
+        :param roi_interval The length of each ROI, in M instructions
+        """
+        self.num_rois: Final[int] = num_rois
+        self.roi_interval: Final[float] = roi_interval
+
+    @property
+    def budget(self) -> float:
+        """The detailed instructions simulated per benchmark, in millions."""
+        return self.num_rois * self.roi_interval
+
+    def args(self) -> Dict[str, Any]:
+        """Get the PeriodicROIManager arguments for the rung's budget.
+
+        :return The arguments
+        """
+        return {"num-rois": self.num_rois, "roi-interval": self.roi_interval}
+
+    def __str__(self) -> str:
+        return f"{self.num_rois} ROI(s) of {self.roi_interval:g}M instructions"
+
+
+def parse_rungs(rungs: str) -> List[Rung]:
+    """Parse rung budgets, e.g. "2x50,4x200,10x800".
+
+    :param rungs The budgets, smallest first
+    :return The rungs
+    :raise ValueError If the budgets are malformed
+    """
+    parsed: List[Rung] = []
+    for rung in rungs.split(","):
+        match = re.fullmatch(r"\s*(\d+)\s*x\s*([0-9.]+)\s*", rung)
+        if match is None:
+            raise ValueError(f"Invalid rung '{rung}', expected <num-rois>x<interval>")
+        parsed.append(Rung(int(match.group(1)), float(match.group(2))))
+    return parsed
+
+
+def score(values: List[float]) -> float:
+    """Combine a configuration's metric over benchmarks into one score.
+
+    :param values The metric of each benchmark
+    :return The geometric mean, or the arithmetic mean if a value is zero
+    """
+    mean: Final[Optional[float]] = geometric_mean(values)
+    return mean if mean is not None else sum(values) / len(values)
+
+
+class Evaluation:
+    """The outcome of simulating one configuration with one budget."""
+
+    def __init__(self, point: Dict[str, Any]) -> None:
+        """Initialize the evaluation.
+
+        :param point The configuration's swept arguments
+        """
+        self.point: Final[Dict[str, Any]] = point
+        # The metric of each benchmark, None if it couldn't be computed
+        self.values: Dict[str, Optional[float]] = {}
+        # Why a benchmark's simulation failed
+        self.errors: Dict[str, str] = {}
+
+    @property
+    def score(self) -> Optional[float]:
+        """The configuration's score, if all of its benchmarks have one."""
+        values: Final[List[Optional[float]]] = list(self.values.values())
+        if not values or any(value is None for value in values):
+            return None
+        return score([value for value in values if value is not None])
+
+    def record(self) -> Dict[str, Any]:
+        """Describe the evaluation, for a report.
+
+        :return The description
+        """
+        return {
+            "point": self.point,
+            "score": self.score,
+            "values": self.values,
+            "errors": self.errors,
+        }
+
+
+def rank(evaluations: List[Evaluation], metric: Metric) -> List[Evaluation]:
+    """Rank evaluations best first, with the ones without a score last.
+
+    :param evaluations The evaluations
+    :param metric The metric they were scored by
+    :return The ranked evaluations
+    """
+    sign: Final[float] = -1.0 if metric.higher_is_better else 1.0
+    return sorted(
+        evaluations,
+        key=lambda e: (e.score is None, sign * e.score if e.score is not None else 0),
+    )
+
+
+async def evaluate(
+    pool: SimulationPool,
+    campaign: Campaign,
+    points: List[Dict[str, Any]],
+    extra_args: Dict[str, Any],
+    metric: Metric,
+    outdir: Path,
+) -> List[Evaluation]:
+    """Simulate configurations on all of a campaign's benchmarks.
+
+    :param pool The pool to simulate in
+    :param campaign The campaign the configurations are from
+    :param points The configurations' swept arguments
+    :param extra_args Arguments to add to every simulation (e.g. a budget)
+    :param metric The metric to compute
+    :param outdir The directory to write the simulations' outdirs under,
+                  as <outdir>/<benchmark>/<hash>
+    :return The evaluation of each configuration, in order
+    """
+    mem: Final[Optional[int]] = (
+        parse_size(campaign.annotations["mem"])
+        if "mem" in campaign.annotations
+        else None
+    )
+    timeout: Final[Optional[float]] = (
+        parse_duration(campaign.annotations["timeout"])
+        if "timeout" in campaign.annotations
+        else None
+    )
+
+    evaluations: Final[List[Evaluation]] = [Evaluation(point) for point in points]
+    futures: List[Tuple[Evaluation, str, asyncio.Future]] = []
+    for evaluation in evaluations:
+        for benchmark in campaign.benchmarks or [""]:
+            args: Dict[str, Any] = {**campaign.args, **evaluation.point, **extra_args}
+            sim_outdir: Path = (
+                outdir / benchmark / campaign.hash(benchmark or None, args)
+            )
+            futures.append(
+                (
+                    evaluation,
+                    benchmark,
+                    pool.submit(
+                        campaign.script,
+                        args,
+                        sim_outdir,
+                        benchmark=benchmark or None,
+                        binary_args=campaign.binary_args,
+                        mem=mem,
+                        timeout=timeout,
+                    ),
+                )
+            )
+
+    for evaluation, benchmark, future in futures:
+        try:
+            result: SimulationResult = await future
+        except SimulationError as error:
+            evaluation.values[benchmark] = None
+            evaluation.errors[benchmark] = str(error)
+            continue
+        evaluation.values[benchmark] = metric.value(result.rois)
+        if evaluation.values[benchmark] is None:
+            evaluation.errors[benchmark] = f"no {metric.name} in {result.outdir}"
+    return evaluations
+
+
+def unique_points(campaign: Campaign) -> List[Dict[str, Any]]:
+    """Get a campaign's configurations, without duplicates.
+
+    :param campaign The campaign
+    :return The configurations' swept arguments, in order
+    """
+    points: List[Dict[str, Any]] = []
+    seen: Set[str] = set()
+    for point in campaign.points():
+        key: str = json.dumps(point, sort_keys=True)
+        if key not in seen:
+            seen.add(key)
+            points.append(point)
+    return points
+
+
+async def successive_halving(
+    pool: SimulationPool,
+    campaign: Campaign,
+    metric: Metric,
+    rungs: List[Rung],
+    keep: float = DEFAULT_KEEP,
+    outdir: Optional[Path] = None,
+) -> List[List[Evaluation]]:
+    """Find a campaign's best configurations by successive halving.
+
+    :param pool The pool to simulate in
+    :param campaign The campaign whose points are the candidates
+    :param metric The metric to rank configurations by
+    :param rungs The budgets to simulate with, smallest first
+    :param keep The fraction of configurations promoted to the next rung
+                (at least one always is)
+    :param outdir The directory to write the rungs' outdirs under
+                  (default: <campaign outdir>/halving)
+    :return The ranked evaluations of each rung
+    :raise ValueError If the campaign sweeps the rungs' arguments
+    """
+    swept_budget: Final[List[str]] = [
+        d.name for d in campaign.dimensions if d.name in rungs[0].args()
+    ]
+    if swept_budget:
+        raise ValueError(
+            f"Successive halving sets {', '.join(swept_budget)} itself, so "
+            "the campaign can't sweep them"
+        )
+    base_outdir: Final[Path] = outdir or campaign.outdir / "halving"
+    points: List[Dict[str, Any]] = unique_points(campaign)
+
+    history: List[List[Evaluation]] = []
+    for index, rung in enumerate(rungs):
+        print(
+            f"Rung {index}: simulating {len(points)} configuration(s) x "
+            f"{max(len(campaign.benchmarks), 1)} benchmark(s) with {rung}."
+        )
+        ranked: List[Evaluation] = rank(
+            await evaluate(
+                pool,
+                campaign,
+                points,
+                rung.args(),
+                metric,
+                base_outdir / f"rung{index}",
+            ),
+            metric,
+        )
+        history.append(ranked)
+
+        scored: List[Evaluation] = [e for e in ranked if e.score is not None]
+        if not scored:
+            print(f"Rung {index}: no configuration could be scored, stopping.")
+            break
+        if index + 1 < len(rungs):
+            num_promoted: int = max(1, math.ceil(len(points) * keep))
+            points = [e.point for e in scored[:num_promoted]]
+    return history
+
+
+def sweep_cost(history: List[List[Evaluation]], rungs: List[Rung]) -> float:
+    """Compare the detailed instructions successive halving simulated to a
+    full sweep with the last rung's budget.
+
+    :param history The evaluations of each rung
+    :param rungs The rungs
+    :return The fraction of the full sweep's detailed instructions
+    """
+    if not history:
+        return 0.0
+    spent: Final[float] = sum(
+        len(evaluations) * rung.budget for evaluations, rung in zip(history, rungs)
+    )
+    return spent / (len(history[0]) * rungs[-1].budget)
+
+
+def completed_evaluations(
+    campaign: Campaign,
+    points: List[Dict[str, Any]],
+    metric: Metric,
+    outdir: Path,
+) -> Dict[int, Evaluation]:
+    """Find the configurations that were simulated on all benchmarks
+    before, either by running the campaign's command file or by an
+    earlier search writing to the same outdir.
+
+    :param campaign The campaign
+    :param points The configurations
+    :param metric The metric to compute
+    :param outdir The search's outdir (see evaluate())
+    :return The evaluations of the configurations found, by index
+    """
+    completed: Dict[int, Evaluation] = {}
+    for index, point in enumerate(points):
+        evaluation = Evaluation(point)
+        for benchmark in campaign.benchmarks or [None]:
+            args: Dict[str, Any] = {**campaign.args, **point}
+            for sim_outdir in [
+                campaign.job_outdir(benchmark, point),
+                outdir / (benchmark or "") / campaign.hash(benchmark, args),
+            ]:
+                value: Optional[float] = metric.value(load_roi_blocks(sim_outdir))
+                if value is not None:
+                    evaluation.values[benchmark or ""] = value
+                    break
+        if len(evaluation.values) == max(len(campaign.benchmarks), 1):
+            completed[index] = evaluation
+    return completed
+
+
+async def surrogate_search(
+    pool: SimulationPool,
+    campaign: Campaign,
+    metric: Metric,
+    batch_size: int,
+    initial_samples: int = DEFAULT_INITIAL_SAMPLES,
+    threshold: float = DEFAULT_IMPROVEMENT_THRESHOLD,
+    max_simulations: Optional[int] = None,
+    outdir: Optional[Path] = None,
+) -> Tuple[List[Evaluation], str]:
+    """Search a campaign's configurations for the best one, guided by a
+    Gaussian-process surrogate of the metric (see util.surrogate).
+
+    Configurations simulated before are reused. Further random ones are
+    simulated until there are <initial_samples>. Then, in each round,
+    the surrogate is fitted to all simulated configurations, and the
+    batch with the highest expected improvement is simulated, until the
+    expected improvement drops below <threshold> of the best value.
+
+    :param pool The pool to simulate in
+    :param campaign The campaign whose points are the candidates
+    :param metric The metric to optimize
+    :param batch_size The most configurations to simulate per round
+    :param initial_samples How many configurations to simulate before
+                           fitting the first surrogate
+    :param threshold The relative expected improvement to stop below
+    :param max_simulations The most configurations to simulate (None =
+                           no limit)
+    :param outdir The directory to write the simulations' outdirs under
+                  (default: <campaign outdir>/surrogate)
+    :return The ranked evaluations, and why the search stopped
+    """
+    base_outdir: Final[Path] = outdir or campaign.outdir / "surrogate"
+    points: Final[List[Dict[str, Any]]] = unique_points(campaign)
+    encoder: Final[Encoder] = Encoder(campaign.dimensions)
+    vectors: Final[List[List[float]]] = [encoder.encode(point) for point in points]
+    sign: Final[float] = 1.0 if metric.higher_is_better else -1.0
+
+    evaluated: Final[Dict[int, Evaluation]] = completed_evaluations(
+        campaign, points, metric, base_outdir
+    )
+    if evaluated:
+        print(f"Found {len(evaluated)} configuration(s) simulated before.")
+
+    async def simulate(indices: List[int]) -> None:
+        for index, evaluation in zip(
+            indices,
+            await evaluate(
+                pool, campaign, [points[i] for i in indices], {}, metric, base_outdir
+            ),
+        ):
+            evaluated[index] = evaluation
+
+    num_simulated: int = 0
+    budget: Final[float] = max_simulations if max_simulations is not None else math.inf
+    untried: List[int] = [i for i in range(len(points)) if i not in evaluated]
+    num_initial: Final[int] = int(
+        min(max(initial_samples - len(evaluated), 0), len(untried), budget)
+    )
+    if num_initial:
+        print(f"Simulating {num_initial} random configuration(s) to start with.")
+        initial: List[int] = random.Random(campaign.seed).sample(untried, num_initial)
+        await simulate(initial)
+        num_simulated += num_initial
+
+    process = GaussianProcess()
+    round_index: int = 0
+    while True:
+        scored: List[int] = [i for i, e in evaluated.items() if e.score is not None]
+        untried = [i for i in range(len(points)) if i not in evaluated]
+        if not scored:
+            reason: str = "no configuration could be scored"
+            break
+        if not untried:
+            reason = "all configurations were simulated"
+            break
+        if num_simulated >= budget:
+            reason = f"{num_simulated} configuration(s) were simulated"
+            break
+
+        ys: List[float] = [sign * (evaluated[i].score or 0.0) for i in scored]
+        process.fit([vectors[i] for i in scored], ys)
+        best: float = max(ys)
+        picks: List[Tuple[int, float]] = select_batch(
+            process,
+            [vectors[i] for i in untried],
+            best,
+            int(min(batch_size, budget - num_simulated)),
+        )
+        if not picks or picks[0][1] < threshold * abs(best):
+            reason = (
+                f"the expected improvement fell below {100 * threshold:g}% of "
+                f"the best {metric.name}"
+            )
+            break
+
+        print(
+            f"Round {round_index}: best {metric.name} {sign * best:.4f} of "
+            f"{len(scored)} configuration(s); simulating {len(picks)} more "
+            f"(expected improvement up to {picks[0][1]:.4f})."
+        )
+        await simulate([untried[index] for index, _ in picks])
+        num_simulated += len(picks)
+        round_index += 1
+
+    return rank(list(evaluated.values()), metric), reason
+
+
+async def screen_dimensions(
+    pool: SimulationPool,
+    campaign: Campaign,
+    metric: Metric,
+    foldover: bool = False,
+    outdir: Optional[Path] = None,
+) -> Tuple[List[Factor], Design, List[Evaluation]]:
+    """Screen a campaign's dimensions with a Plackett-Burman design.
+
+    Each dimension is screened between its first and its last level (or
+    its min and max); ones with a single level are fixed.
+
+    :param pool The pool to simulate in
+    :param campaign The campaign whose dimensions to screen
+    :param metric The metric to compute
+    :param foldover Whether to fold the design over, so that main effects
+                    aren't aliased with two-factor interactions
+    :param outdir The directory to write the runs' outdirs under
+                  (default: <campaign outdir>/screening)
+    :return The factors, the design (whose first columns are the
+            factors') and the evaluation of each of its runs
+    :raise ValueError If no dimension has two levels
+    """
+    factors: Final[List[Factor]] = [
+        Factor(d) for d in campaign.dimensions if d.value(0.0) != d.value(1.0)
+    ]
+    if not factors:
+        raise ValueError("The campaign has no dimension with two levels to screen")
+    fixed: Final[Dict[str, Any]] = {
+        d.name: d.value(0.0)
+        for d in campaign.dimensions
+        if d.name not in {factor.name for factor in factors}
+    }
+    design: Design = plackett_burman(len(factors))
+    if foldover:
+        design = fold_over(design)
+
+    print(
+        f"Screening {len(factors)} option(s) in {len(design)} run(s) x "
+        f"{max(len(campaign.benchmarks), 1)} benchmark(s)."
+    )
+    evaluations: Final[List[Evaluation]] = await evaluate(
+        pool,
+        campaign,
+        [{**fixed, **point} for point in design_points(factors, design)],
+        {},
+        metric,
+        outdir or campaign.outdir / "screening",
+    )
+    return factors, design, evaluations
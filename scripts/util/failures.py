@@ -0,0 +1,237 @@
+"""Classify why a job failed, from its exit status and the tail of its logs.
+
+A gem5 panic, a fatal configuration error, an out-of-memory kill and an
+NFS hiccup all end with a non-zero exit code. Telling them apart decides
+what to do next: transient failures are worth retrying, deterministic
+ones are not, and many jobs failing with the same fatal error usually
+mean one value of a sweep is broken.
+"""
+
+import re
+import signal
+from enum import Enum
+from pathlib import Path
+from typing import Dict, Final, List, Optional, Tuple
+
+# How much of the end of each log to look at, in bytes
+LOG_TAIL_BYTES: Final[int] = 64 * 1024
+
+# Files gem5 writes its stderr and stdout to in its outdir, when run
+# with -e and -r
+GEM5_ERROR_FILES: Final[List[str]] = ["simerr"]
+GEM5_OUTPUT_FILES: Final[List[str]] = ["simout"]
+
+# Exit codes a shell returns for a child killed by a signal
+SHELL_SIGNAL_BASE: Final[int] = 128
+
+
+class FailureClass(Enum):
+    """Why a job failed."""
+
+    OOM = "oom"  # killed for using too much memory
+    TRANSIENT = "transient"  # a hiccup of the host or filesystem
+    PANIC = "panic"  # gem5 panic: a bug in gem5 or the model
+    FATAL = "fatal"  # gem5 fatal: a bad configuration
+    CRASH = "crash"  # killed by a signal, e.g. a segfault
+    ERROR = "error"  # any other non-zero exit
+
+    @property
+    def transient(self) -> bool:
+        """Whether running the job again may succeed."""
+        return self in [FailureClass.OOM, FailureClass.TRANSIENT]
+
+
+# Log lines that identify a failure class, checked in order, and whether
+# to only look for them in stderr. The first group of each pattern is the
+# failure's message. gem5's own panic and fatal lines come first: their
+# message often quotes an OS error (e.g. a fatal "Could not mmap ...:
+# Cannot allocate memory" for a bad memory size), which must not make a
+# deterministic failure look transient. The OOM and transient messages
+# are plain substrings, which the simulated program may well print to
+# stdout itself, so only stderr is searched for them.
+LOG_PATTERNS: Final[List[Tuple[FailureClass, re.Pattern, bool]]] = [
+    # gem5 prefixes these with the source location, e.g.
+    #   build/X86/sim/process.cc:185: fatal: ...
+    (
+        FailureClass.PANIC,
+        re.compile(r"^(?:\S+: )?panic: (.*)$", re.MULTILINE),
+        False,
+    ),
+    (
+        FailureClass.FATAL,
+        re.compile(r"^(?:\S+: )?fatal: (.*)$", re.MULTILINE),
+        False,
+    ),
+    (
+        FailureClass.OOM,
+        re.compile(
+            r"(std::bad_alloc|MemoryError|Cannot allocate memory|"
+            r"Out of memory|out of memory)"
+        ),
+        True,
+    ),
+    (
+        FailureClass.TRANSIENT,
+        re.compile(
+            r"(Stale file handle|Input/output error|Resource temporarily "
+            r"unavailable|Transport endpoint is not connected|Connection "
+            r"timed out|Connection reset by peer|Too many open files)"
+        ),
+        True,
+    ),
+    (FailureClass.ERROR, re.compile(r"^(\w*Error: .*)$", re.MULTILINE), False),
+]
+
+# Parts of a message that differ between jobs failing for the same reason
+MESSAGE_NOISE: Final[List[Tuple[re.Pattern, str]]] = [
+    (re.compile(r"(/[^\s/:'\"]+)+"), "<path>"),
+    (re.compile(r"\b0x[0-9a-fA-F]+\b"), "<hex>"),
+    (re.compile(r"\d+"), "<n>"),
+]
+
+
+class Failure:
+    """The class and message of a job's failure."""
+
+    def __init__(self, failure_class: FailureClass, message: str) -> None:
+        """Initialize the failure.
+
+        :param failure_class The class of the failure
+        :param message What went wrong
+        """
+        self.failure_class: Final[FailureClass] = failure_class
+        self.message: Final[str] = message.strip()
+
+    @property
+    def group(self) -> Tuple[FailureClass, str]:
+        """What jobs failing for the same reason have in common."""
+        message: str = self.message
+        for pattern, replacement in MESSAGE_NOISE:
+            message = pattern.sub(replacement, message)
+        return self.failure_class, message
+
+    def __str__(self) -> str:
+        return f"{self.failure_class.value}: {self.message}"
+
+
+def read_tail(path: Path, num_bytes: int = LOG_TAIL_BYTES) -> str:
+    """Read the end of a file.
+
+    :param path The path to the file
+    :param num_bytes How much of the end of the file to read
+    :return The end of the file (empty if it can't be read)
+    """
+    try:
+        with path.open("rb") as file:
+            file.seek(0, 2)
+            file.seek(max(file.tell() - num_bytes, 0))
+            return file.read().decode(errors="replace")
+    except OSError:
+        return ""
+
+
+def exit_signal(returncode: int) -> Optional[signal.Signals]:
+    """Get the signal that killed a job, if it was killed by one.
+
+    :param returncode The return code of the job's shell
+    :return The signal, or None if the job exited normally
+    """
+    signum: int = 0
+    if returncode < 0:
+        signum = -returncode
+    elif SHELL_SIGNAL_BASE < returncode < SHELL_SIGNAL_BASE + signal.NSIG:
+        signum = returncode - SHELL_SIGNAL_BASE
+    try:
+        return signal.Signals(signum) if signum else None
+    except ValueError:
+        return None
+
+
+def classify(
+    returncode: int, error_paths: List[Path], output_paths: List[Path]
+) -> Failure:
+    """Classify a failed job.
+
+    The tails of its logs are searched for known messages first, since
+    they say the most. Failing that, a SIGKILL nobody asked for is taken
+    to be the kernel's OOM killer, and other signals to be crashes.
+
+    :param returncode The return code of the job's shell
+    :param error_paths The job's stderr logs
+    :param output_paths The job's stdout logs
+    :return The failure
+    """
+    error_tails: Final[List[str]] = [read_tail(path) for path in error_paths]
+    output_tails: Final[List[str]] = [read_tail(path) for path in output_paths]
+    for failure_class, pattern, errors_only in LOG_PATTERNS:
+        for tail in error_tails if errors_only else error_tails + output_tails:
+            matches: List[re.Match] = list(pattern.finditer(tail))
+            if matches:
+                # The last match is the one closest to the failure
+                return Failure(failure_class, matches[-1].group(1))
+
+    sig: Final[Optional[signal.Signals]] = exit_signal(returncode)
+    if sig == signal.SIGKILL:
+        return Failure(FailureClass.OOM, "killed by SIGKILL")
+    if sig == signal.SIGBUS:
+        # Usually a memory-mapped file on a flaky network filesystem
+        return Failure(FailureClass.TRANSIENT, "killed by SIGBUS")
+    if sig is not None:
+        return Failure(FailureClass.CRASH, f"killed by {sig.name}")
+    return Failure(FailureClass.ERROR, f"exited with error code {returncode}")
+
+
+def gem5_log_paths(outdir: Optional[Path], names: List[str]) -> List[Path]:
+    """Get the files gem5 redirects its output to in an outdir.
+
+    :param outdir The gem5 outdir
+    :param names The files' names, e.g. GEM5_ERROR_FILES
+    :return The files that exist
+    """
+    if outdir is None:
+        return []
+    return [outdir / name for name in names if (outdir / name).exists()]
+
+
+class FailureGroups:
+    """Failures counted by group, to spot many jobs failing the same way."""
+
+    def __init__(self) -> None:
+        # group -> the IDs of the jobs that failed that way
+        self._groups: Dict[Tuple[FailureClass, str], List[str]] = {}
+
+    def add(self, job_id: str, failure: Failure) -> int:
+        """Count a job's failure.
+
+        :param job_id The ID of the job
+        :param failure The failure
+        :return The number of jobs that have failed the same way
+        """
+        job_ids: List[str] = self._groups.setdefault(failure.group, [])
+        job_ids.append(job_id)
+        return len(job_ids)
+
+    def job_ids(self, failure: Failure) -> List[str]:
+        """Get the jobs that failed the same way as a failure.
+
+        :param failure The failure
+        :return The IDs of the jobs
+        """
+        return self._groups.get(failure.group, [])
+
+    def summary(self) -> List[str]:
+        """Describe the groups, largest first.
+
+        :return One line per group
+        """
+        lines: List[str] = []
+        for (failure_class, message), job_ids in sorted(
+            self._groups.items(), key=lambda group: -len(group[1])
+        ):
+            examples: str = ", ".join(job_ids[:3]) + (
+                ", ..." if len(job_ids) > 3 else ""
+            )
+            lines.append(
+                f"{len(job_ids)} x {failure_class.value}: {message} ({examples})"
+            )
+        return lines
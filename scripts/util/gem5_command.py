@@ -0,0 +1,382 @@
+"""Utilities for picking apart gem5 command lines.
+
+A gem5 command line has the form
+
+    [prefix...] <gem5 binary> [binary args...] [--] <config.py> [script args...]
+
+where the prefix may be anything that runs before the binary (e.g.,
+"cd dir &&" or environment variables). Commands that do not contain a
+gem5 binary are not parsed.
+"""
+
+import re
+import shlex
+from pathlib import Path
+from typing import Dict, Final, List, Optional, Tuple
+
+# Binary options that take a value as the next token
+BINARY_OPTIONS_WITH_VALUE: Final[List[str]] = [
+    "-d",
+    "--outdir",
+    "--stdout-file",
+    "--stderr-file",
+    "--debug-flags",
+    "--debug-file",
+    "--debug-start",
+    "--debug-end",
+]
+
+# Short aliases of binary options
+BINARY_OPTION_ALIASES: Final[Dict[str, str]] = {
+    "-d": "--outdir",
+}
+
+# Script arguments that name where outputs go, rather than configuring
+# the simulation. They are left out of a command's signature.
+OUTPUT_ARGS: Final[List[str]] = [
+    "checkpoint_dir",
+    "checkpoints_dir",
+]
+
+# Tokens that end the gem5 command itself (redirections, command lists)
+SHELL_OPERATOR_PATTERN: Final[re.Pattern] = re.compile(r"^(\d?>|<|&&|\|\|?|;|&$)")
+
+# Matches a SPEC benchmark directory name, e.g. 403.gcc
+SPEC_BENCHMARK_PATTERN: Final[re.Pattern] = re.compile(r"^\d{3}\.\w+$")
+
+# Matches the size of a gem5 memory object in a config script,
+# e.g. DualChannelDDR4_2400(size="3GiB")
+MEMORY_SIZE_PATTERN: Final[re.Pattern] = re.compile(
+    r"\w*(?:DDR|HBM|LPDDR|Memory)\w*\(\s*size\s*=\s*[\"']([^\"']+)[\"']"
+)
+
+# Binary size units, the same way gem5 interprets them (so "3GB" is 3 GiB)
+SIZE_UNITS: Final[Dict[str, int]] = {
+    "": 1,
+    "b": 1,
+    "k": 1024,
+    "kb": 1024,
+    "kib": 1024,
+    "m": 1024**2,
+    "mb": 1024**2,
+    "mib": 1024**2,
+    "g": 1024**3,
+    "gb": 1024**3,
+    "gib": 1024**3,
+    "t": 1024**4,
+    "tb": 1024**4,
+    "tib": 1024**4,
+}
+
+
+def parse_size(size: str) -> int:
+    """Parse a memory size such as "3GiB" or "512M" into bytes.
+
+    Like gem5, decimal-looking units (KB, MB, GB, ...) are treated as
+    powers of 1024.
+
+    :param size The size string
+    :return The size in bytes
+    :raise ValueError If the size cannot be parsed
+    """
+    match = re.fullmatch(r"\s*([0-9.]+)\s*([a-zA-Z]*)\s*", size)
+    if match is None or match.group(2).lower() not in SIZE_UNITS:
+        raise ValueError(f"Invalid size: {size}")
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).lower()])
+
+
+def format_size(size: int) -> str:
+    """Format a number of bytes for humans.
+
+    :param size The size in bytes
+    :return The formatted size
+    """
+    value: float = float(size)
+    for unit in ["B", "KiB", "MiB", "GiB"]:
+        if abs(value) < 1024:
+            return f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} TiB"
+
+
+def _normalize_key(option: str) -> str:
+    """Normalize an option name, e.g. "--l1d-size" -> "l1d_size".
+
+    :param option The option name
+    :return The normalized name
+    """
+    return option.lstrip("-").replace("-", "_")
+
+
+class Gem5Command:
+    """A parsed gem5 command line."""
+
+    def __init__(self, tokens: List[str], binary_index: int) -> None:
+        """Initialize the command from its tokens.
+
+        :param tokens The shell tokens of the command
+        :param binary_index The index of the gem5 binary in tokens
+        """
+        self.tokens: Final[List[str]] = tokens
+        self.prefix: Final[List[str]] = tokens[:binary_index]
+        self.binary: Final[Path] = Path(tokens[binary_index])
+        self._binary_index: Final[int] = binary_index
+        self._script_index: Optional[int] = None
+
+        # Split the remaining tokens into binary and script args
+        rest: Final[List[str]] = tokens[binary_index + 1 :]
+        self.binary_args: List[str] = []
+        self.script: Optional[Path] = None
+        self.script_args: List[str] = []
+
+        i: int = 0
+        while i < len(rest):
+            token: str = rest[i]
+            if token == "--":
+                i += 1
+                continue
+            if token.endswith(".py") and not token.startswith("-"):
+                self.script = Path(token)
+                self._script_index = binary_index + 1 + i
+                for arg in rest[i + 1 :]:
+                    if SHELL_OPERATOR_PATTERN.match(arg):
+                        break
+                    self.script_args.append(arg)
+                break
+            self.binary_args.append(token)
+            if token in BINARY_OPTIONS_WITH_VALUE and i + 1 < len(rest):
+                self.binary_args.append(rest[i + 1])
+                i += 1
+            i += 1
+
+    @classmethod
+    def parse(cls, cmd: str) -> Optional["Gem5Command"]:
+        """Parse a shell command into a Gem5Command.
+
+        :param cmd The command to parse
+        :return The parsed command, or None if it does not run gem5
+        """
+        try:
+            tokens: List[str] = shlex.split(cmd)
+        except ValueError:
+            return None
+
+        for index, token in enumerate(tokens):
+            if Path(token).name.startswith("gem5.") and not token.endswith(".py"):
+                return cls(tokens, index)
+        return None
+
+    def binary_option(self, long_name: str, short_name: Optional[str] = None):
+        """Get the value of one of the gem5 binary's options.
+
+        :param long_name The option's long name, e.g. "--outdir"
+        :param short_name The option's short name, e.g. "-d"
+        :return The value of the option, or None if it is not set
+        """
+        names: Final[List[str]] = [long_name] + ([short_name] if short_name else [])
+        for i, token in enumerate(self.binary_args):
+            if token.startswith(f"{long_name}="):
+                return token.split("=", 1)[1]
+            if token in names and i + 1 < len(self.binary_args):
+                return self.binary_args[i + 1]
+        return None
+
+    def with_options(
+        self,
+        binary_options: Optional[Dict[str, str]] = None,
+        script_options: Optional[Dict[str, str]] = None,
+    ) -> str:
+        """Rewrite the command with some options set to new values.
+
+        Options that are already set have their values replaced. Missing
+        binary options are added, and missing script options appended.
+
+        The command is put back together from its tokens, so quoting may
+        change, and any shell variables or globs are no longer expanded.
+
+        :param binary_options Values of binary options, by long name (e.g.
+                              "--outdir")
+        :param script_options Values of script options, by simarglib name
+                              (e.g. "start_from")
+        :return The rewritten shell command
+        """
+        binary_options = binary_options or {}
+        script_options = dict(script_options or {})
+        script_index: Final[int] = (
+            self._script_index if self._script_index is not None else len(self.tokens)
+        )
+        tokens: List[str] = self.tokens[: self._binary_index + 1]
+
+        # The binary's options, without the ones being replaced
+        i: int = self._binary_index + 1
+        while i < script_index:
+            token: str = self.tokens[i]
+            name: str = BINARY_OPTION_ALIASES.get(token, token.split("=", 1)[0])
+            if name in binary_options:
+                if "=" not in token and token in BINARY_OPTIONS_WITH_VALUE:
+                    i += 1
+            elif token == "--":
+                pass
+            else:
+                tokens.append(token)
+            i += 1
+        tokens.extend(f"{name}={value}" for name, value in binary_options.items())
+
+        # The script and its options
+        end: int = script_index + 1 + len(self.script_args)
+        tokens.extend(self.tokens[script_index : script_index + 1])
+        i = script_index + 1
+        while i < end:
+            token = self.tokens[i]
+            key: str = _normalize_key(token.split("=", 1)[0])
+            if token.startswith("-") and key in script_options:
+                tokens.append(f"{token.split('=', 1)[0]}={script_options.pop(key)}")
+                has_next_value: bool = i + 1 < end and not self.tokens[
+                    i + 1
+                ].startswith("-")
+                if "=" not in token and has_next_value:
+                    i += 1
+            else:
+                tokens.append(token)
+            i += 1
+        tokens.extend(f"--{key}={value}" for key, value in script_options.items())
+
+        # Whatever follows the gem5 command (redirections, ...)
+        tokens.extend(self.tokens[end:])
+        return " ".join(
+            token if SHELL_OPERATOR_PATTERN.match(token) else shlex.quote(token)
+            for token in tokens
+        )
+
+    @property
+    def cwd(self) -> Optional[Path]:
+        """The directory the prefix changes into before running gem5."""
+        cwd: Optional[Path] = None
+        for i, token in enumerate(self.prefix[:-1]):
+            if token == "cd":
+                cwd = Path(self.prefix[i + 1])
+        return cwd
+
+    @property
+    def outdir(self) -> Path:
+        """The directory gem5 writes its output to."""
+        outdir = Path(self.binary_option("--outdir", "-d") or "m5out")
+        return self.cwd / outdir if self.cwd else outdir
+
+    def script_options(self) -> List[Tuple[str, Optional[str]]]:
+        """Get the config script's options as (name, value) pairs.
+
+        Names are normalized to their simarglib form (e.g. "l1d_size").
+        Flags without a value have a value of None.
+
+        :return The script options, in command-line order
+        """
+        options: List[Tuple[str, Optional[str]]] = []
+        i: int = 0
+        while i < len(self.script_args):
+            token: str = self.script_args[i]
+            if token.startswith("-") and "=" in token:
+                key, value = token.split("=", 1)
+                options.append((_normalize_key(key), value))
+            elif token.startswith("-"):
+                if i + 1 < len(self.script_args) and not self.script_args[
+                    i + 1
+                ].startswith("-"):
+                    options.append((_normalize_key(token), self.script_args[i + 1]))
+                    i += 1
+                else:
+                    options.append((_normalize_key(token), None))
+            else:
+                options.append(("", token))
+            i += 1
+        return options
+
+    def script_option(self, name: str) -> Optional[str]:
+        """Get the value of one of the config script's options.
+
+        :param name The option's simarglib name, e.g. "input_bin"
+        :return The value of the last occurrence of the option, if any
+        """
+        value: Optional[str] = None
+        for key, option_value in self.script_options():
+            if key == name:
+                value = option_value
+        return value
+
+    @property
+    def benchmark(self) -> Optional[str]:
+        """The benchmark this command simulates, if it can be told."""
+        benchmark: Optional[str] = self.script_option("benchmark")
+        if benchmark:
+            return benchmark
+
+        input_bin: Optional[str] = self.script_option("input_bin")
+        if input_bin:
+            # SPEC binaries live inside a directory named after the
+            # benchmark, e.g. .../403.gcc/gcc_base.x86
+            for part in reversed(Path(input_bin).parts):
+                if SPEC_BENCHMARK_PATTERN.match(part):
+                    return part
+            return Path(input_bin).name
+        return None
+
+    def config_options(self) -> List[str]:
+        """Get the config script's options that configure the simulation.
+
+        :return The options as "name=value" (or "name" for flags), sorted,
+                leaving out the ones that name where outputs go
+        """
+        return sorted(
+            f"{key}={value}" if value is not None else key
+            for key, value in self.script_options()
+            if key not in OUTPUT_ARGS
+        )
+
+    @property
+    def signature(self) -> str:
+        """A string identifying this command's configuration.
+
+        Two commands have the same signature if they run the same config
+        script on the same benchmark with the same options, regardless of
+        where they write their output.
+        """
+        script: str = self.script.name if self.script else ""
+        return " ".join([script, self.benchmark or "", *self.config_options()]).strip()
+
+    def simulated_memory_size(self) -> Optional[int]:
+        """Get the size of the simulated memory from the config script.
+
+        :return The size of the simulated memory in bytes, or None if the
+                config script cannot be read or does not define a memory
+                of a fixed size
+        """
+        if self.script is None:
+            return None
+        script: Final[Path] = self.cwd / self.script if self.cwd else self.script
+        try:
+            source: str = script.read_text()
+        except OSError:
+            return None
+
+        sizes: List[int] = []
+        for match in MEMORY_SIZE_PATTERN.finditer(source):
+            try:
+                sizes.append(parse_size(match.group(1)))
+            except ValueError:
+                pass
+        return max(sizes) if sizes else None
+
+
+def command_signature(cmd: str) -> str:
+    """Get the signature of any shell command.
+
+    gem5 commands are identified by their Gem5Command signature; other
+    commands are identified by their text.
+
+    :param cmd The command
+    :return The command's signature
+    """
+    gem5_command: Final[Optional[Gem5Command]] = Gem5Command.parse(cmd)
+    if gem5_command is not None:
+        return gem5_command.signature
+    return " ".join(cmd.split())
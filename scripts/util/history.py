@@ -0,0 +1,97 @@
+"""A persistent record of how earlier jobs behaved.
+
+The history is a JSON file mapping each command signature (see
+util.gem5_command.command_signature) to what was observed the last
+times a command with that signature ran. It is shared between
+campaigns, so that what one campaign learns helps the next.
+"""
+
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Final, Optional
+
+DEFAULT_HISTORY_FILE: Final[Path] = (
+    Path.home() / ".cache" / "gem5-runner" / "history.json"
+)
+
+
+class JobHistory:
+    """Observations of earlier jobs, keyed by command signature."""
+
+    def __init__(self, path: Path = DEFAULT_HISTORY_FILE) -> None:
+        """Initialize the history, loading it from disk if it exists.
+
+        :param path The path to the history file
+        """
+        self.path: Final[Path] = path
+        self._entries: Dict[str, Dict[str, Any]] = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """Load the history file.
+
+        :return The entries in the file (empty if it can't be read)
+        """
+        try:
+            with self.path.open("rt") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def save(self) -> None:
+        """Write the history to disk.
+
+        Entries written by other runners since this history was loaded
+        are kept, and the file is replaced atomically.
+        """
+        entries: Dict[str, Dict[str, Any]] = self._load()
+        for signature, entry in self._entries.items():
+            entries.setdefault(signature, {}).update(entry)
+        self._entries = entries
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        with os.fdopen(fd, "wt") as file:
+            json.dump(self._entries, file, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def peak_rss(self, signature: str) -> Optional[int]:
+        """Get the largest peak RSS seen for a signature.
+
+        :param signature The command signature
+        :return The peak RSS in bytes, or None if never seen
+        """
+        return self._entries.get(signature, {}).get("peak_rss")
+
+    def expected_runtime(self, signature: str) -> Optional[float]:
+        """Get the mean wall-clock time of earlier runs of a signature.
+
+        :param signature The command signature
+        :return The mean wall time in seconds, or None if never timed
+        """
+        return self._entries.get(signature, {}).get("wall_time")
+
+    def record(
+        self,
+        signature: str,
+        peak_rss: Optional[int] = None,
+        wall_time: Optional[float] = None,
+    ) -> None:
+        """Record a finished job and save the history.
+
+        :param signature The job's command signature
+        :param peak_rss The job's peak RSS, in bytes
+        :param wall_time The job's wall-clock time, in seconds
+        """
+        entry: Dict[str, Any] = self._entries.setdefault(signature, {})
+        entry["runs"] = entry.get("runs", 0) + 1
+        if peak_rss is not None:
+            entry["peak_rss"] = max(peak_rss, entry.get("peak_rss", 0))
+        if wall_time is not None:
+            # Keep a running mean of the wall time
+            timed_runs: int = entry.get("timed_runs", 0) + 1
+            mean: float = entry.get("wall_time", 0.0)
+            entry["wall_time"] = mean + (wall_time - mean) / timed_runs
+            entry["timed_runs"] = timed_runs
+        self.save()
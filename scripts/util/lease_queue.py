@@ -0,0 +1,305 @@
+"""A job queue shared between hosts through a common filesystem.
+
+Any number of runners, one per host, can pull jobs from the same queue
+directory (e.g., on NFS) without a central service. The queue directory
+holds one file per job, in one of four subdirectories:
+
+    pending/<name>              Waiting to be claimed
+    leased/<name>@<host>:<pid>  Claimed by a runner, which holds a lease
+    done/<name>                 Finished successfully
+    failed/<name>               Finished unsuccessfully
+
+A job is claimed by atomically renaming it from pending/ to leased/, so
+only one runner can win it. While the job runs, its runner keeps
+touching the leased file as a heartbeat. A lease whose heartbeat is
+older than the lease timeout belongs to a dead runner, and any runner
+may rename it back to pending/ for someone else to claim.
+
+A job that is retried (e.g., with a longer timeout) goes back to
+pending/ as <name>~<retry>, which sorts after every job that has not
+been retried yet. It carries the state of its earlier attempts along.
+"""
+
+import json
+import os
+import socket
+from pathlib import Path
+from typing import Any, Dict, Final, List, Optional, Tuple
+
+from util.ledger import command_hash
+
+DEFAULT_LEASE_TIMEOUT: Final[float] = 300.0  # seconds
+DEFAULT_HEARTBEAT_INTERVAL: Final[float] = 30.0  # seconds
+
+QUEUE_STATES: Final[List[str]] = ["pending", "leased", "done", "failed"]
+
+# Separates a job's name from the owner of its lease
+OWNER_SEPARATOR: Final[str] = "@"
+
+# Separates a job's name from the number of times it was retried
+RETRY_SEPARATOR: Final[str] = "~"
+
+
+def _base_name(name: str) -> str:
+    """Strip the lease owner and retry count from a job's file name.
+
+    :param name The file name
+    :return The name the job was enqueued with
+    """
+    return name.split(OWNER_SEPARATOR, 1)[0].split(RETRY_SEPARATOR, 1)[0]
+
+
+def _queue_order(name: str) -> Tuple[int, str]:
+    """Get the sort key that puts retried jobs after all others.
+
+    :param name The job's name (without lease owner)
+    :return The sort key
+    """
+    base, _, retry = name.partition(RETRY_SEPARATOR)
+    return int(retry or 0), base
+
+
+class Lease:
+    """A runner's claim on one job of the queue."""
+
+    def __init__(
+        self,
+        name: str,
+        path: Path,
+        line: str,
+        index: int,
+        retries: int = 0,
+        state: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Initialize the lease.
+
+        :param name The name of the job in the queue
+        :param path The path of the leased file
+        :param line The job's (optionally annotated) command line
+        :param index The position of the line in its command file
+        :param retries The number of times the job was retried
+        :param state What the job's earlier attempts left for this one
+                     (e.g., a longer timeout), if it was retried
+        """
+        self.name: Final[str] = name
+        self.path: Final[Path] = path
+        self.line: Final[str] = line
+        self.index: Final[int] = index
+        self.retries: Final[int] = retries
+        self.state: Final[Dict[str, Any]] = state or {}
+
+
+class LeaseQueue:
+    """A directory of jobs that runners on many hosts claim with leases."""
+
+    def __init__(
+        self,
+        path: Path,
+        lease_timeout: float = DEFAULT_LEASE_TIMEOUT,
+    ) -> None:
+        """Open the queue, creating its directories if needed.
+
+        :param path The queue directory
+        :param lease_timeout Seconds without a heartbeat after which a
+                             lease is considered dead
+        """
+        self.path: Final[Path] = path
+        self._lease_timeout: Final[float] = lease_timeout
+        self._owner: Final[str] = f"{socket.gethostname()}:{os.getpid()}"
+        self._leases: Dict[str, Lease] = {}
+
+        for state in QUEUE_STATES:
+            (path / state).mkdir(parents=True, exist_ok=True)
+
+    def _dir(self, state: str) -> Path:
+        return self.path / state
+
+    def _names(self, state: str) -> List[str]:
+        """List the names of the jobs in a state, in queue order.
+
+        :param state The state
+        :return The job names (without lease owners)
+        """
+        return sorted(
+            (
+                entry.name.split(OWNER_SEPARATOR, 1)[0]
+                for entry in self._dir(state).iterdir()
+                if not entry.name.startswith(".")
+            ),
+            key=_queue_order,
+        )
+
+    def _fs_now(self) -> float:
+        """Get the current time according to the queue's filesystem.
+
+        Lease ages are measured against file modification times, which
+        the file server sets, so compare them with the server's clock
+        rather than this host's.
+
+        :return The filesystem's current time, in seconds since the epoch
+        """
+        clock: Final[Path] = self.path / f".clock.{self._owner}"
+        clock.touch()
+        now: Final[float] = clock.stat().st_mtime
+        clock.unlink()
+        return now
+
+    def enqueue(self, lines: List[str]) -> int:
+        """Add command file lines to the queue.
+
+        Lines that are already in the queue, in any state, are skipped.
+
+        :param lines The (optionally annotated) command lines
+        :return The number of lines added
+        """
+        known: Final[set] = set()
+        for state in QUEUE_STATES:
+            known.update(_base_name(name) for name in self._names(state))
+
+        added: int = 0
+        for index, line in enumerate(lines):
+            name: str = f"{index:06d}-{command_hash(line)}"
+            if name in known:
+                continue
+
+            tmp_path: Path = self.path / f".{name}.{self._owner}.tmp"
+            tmp_path.write_text(json.dumps({"line": line, "index": index}))
+            os.rename(tmp_path, self._dir("pending") / name)
+            added += 1
+        return added
+
+    def claim(self) -> Optional[Lease]:
+        """Claim the next pending job.
+
+        :return The lease on the claimed job, or None if none is pending
+        """
+        for name in self._names("pending"):
+            pending_path: Path = self._dir("pending") / name
+            leased_path: Path = (
+                self._dir("leased") / f"{name}{OWNER_SEPARATOR}{self._owner}"
+            )
+            try:
+                # Refresh the file's mtime first, so the lease does not
+                # look expired the moment it is taken
+                os.utime(pending_path)
+                os.rename(pending_path, leased_path)
+            except FileNotFoundError:
+                # Another runner got there first
+                continue
+
+            entry: Dict[str, Any] = json.loads(leased_path.read_text())
+            lease = Lease(
+                name,
+                leased_path,
+                entry["line"],
+                entry["index"],
+                entry.get("retries", 0),
+                entry.get("state"),
+            )
+            self._leases[name] = lease
+            return lease
+        return None
+
+    def heartbeat(self) -> None:
+        """Renew all of this runner's leases."""
+        for lease in list(self._leases.values()):
+            try:
+                os.utime(lease.path)
+            except FileNotFoundError:
+                print(
+                    f"Lost the lease on {lease.name} (it expired and was "
+                    "requeued); another runner may run it again."
+                )
+                self._leases.pop(lease.name, None)
+
+    def complete(self, lease: Lease, succeeded: bool, record: Dict[str, Any]) -> None:
+        """Finish a leased job, recording its outcome.
+
+        :param lease The lease on the job
+        :param succeeded Whether the job succeeded
+        :param record Details of the outcome to store with the job
+        """
+        self._leases.pop(lease.name, None)
+        state: Final[str] = "done" if succeeded else "failed"
+
+        entry: Dict[str, Any] = {
+            "line": lease.line,
+            "index": lease.index,
+            "owner": self._owner,
+            **record,
+        }
+        tmp_path: Final[Path] = self.path / f".{lease.name}.{self._owner}.tmp"
+        tmp_path.write_text(json.dumps(entry))
+        os.rename(tmp_path, self._dir(state) / _base_name(lease.name))
+        try:
+            lease.path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def release(self, lease: Lease) -> None:
+        """Give a leased job back to the queue, unfinished.
+
+        :param lease The lease on the job
+        """
+        self._leases.pop(lease.name, None)
+        try:
+            os.rename(lease.path, self._dir("pending") / lease.name)
+        except FileNotFoundError:
+            pass
+
+    def retry(self, lease: Lease, state: Optional[Dict[str, Any]] = None) -> None:
+        """Put a leased job back at the end of the queue, to run again.
+
+        :param lease The lease on the job
+        :param state What to pass on to the job's next attempt
+        """
+        self._leases.pop(lease.name, None)
+        retries: Final[int] = lease.retries + 1
+        entry: Dict[str, Any] = {
+            "line": lease.line,
+            "index": lease.index,
+            "retries": retries,
+            "state": state or {},
+        }
+        name: Final[str] = f"{_base_name(lease.name)}{RETRY_SEPARATOR}{retries}"
+        tmp_path: Final[Path] = self.path / f".{name}.{self._owner}.tmp"
+        tmp_path.write_text(json.dumps(entry))
+        os.rename(tmp_path, self._dir("pending") / name)
+        try:
+            lease.path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def requeue_expired(self) -> int:
+        """Return jobs whose leases have expired to the queue.
+
+        :return The number of jobs requeued
+        """
+        now: Final[float] = self._fs_now()
+        requeued: int = 0
+        for entry in self._dir("leased").iterdir():
+            try:
+                if now - entry.stat().st_mtime <= self._lease_timeout:
+                    continue
+                name: str = entry.name.split(OWNER_SEPARATOR, 1)[0]
+                os.rename(entry, self._dir("pending") / name)
+            except FileNotFoundError:
+                # Finished, or requeued by another runner
+                continue
+            print(f"Requeued {entry.name}: its lease expired.")
+            requeued += 1
+        return requeued
+
+    def counts(self) -> Dict[str, int]:
+        """Count the jobs in each state.
+
+        :return The number of jobs in each state
+        """
+        return {state: len(self._names(state)) for state in QUEUE_STATES}
+
+    def drained(self) -> bool:
+        """Check whether every job in the queue has finished.
+
+        :return True if no job is pending or leased
+        """
+        return not self._names("pending") and not self._names("leased")
@@ -0,0 +1,186 @@
+"""A persistent, SQLite-backed ledger of the jobs in a command file.
+
+The ledger records the state, return code, wall time, and outdir of
+each command, keyed by a hash of the command. It lets an interrupted
+run of a command file resume where it left off: commands that already
+succeeded are skipped, and failed or interrupted ones are run again.
+"""
+
+import hashlib
+import os
+import socket
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Final, List, Optional
+
+SCHEMA: Final[str] = """
+CREATE TABLE IF NOT EXISTS jobs (
+    hash        TEXT PRIMARY KEY,
+    command     TEXT NOT NULL,
+    state       TEXT NOT NULL,
+    returncode  INTEGER,
+    wall_time   REAL,
+    outdir      TEXT,
+    host        TEXT,
+    pid         INTEGER,
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    updated_at  REAL NOT NULL
+)
+"""
+
+# Ledger states. Jobs in the remaining states are (re)run on resume.
+PENDING: Final[str] = "pending"
+RUNNING: Final[str] = "running"
+SUCCEEDED: Final[str] = "succeeded"
+INTERRUPTED: Final[str] = "interrupted"
+
+
+def command_hash(cmd: str) -> str:
+    """Hash a command, ignoring differences in whitespace.
+
+    :param cmd The command
+    :return The hex digest of the command
+    """
+    return hashlib.sha256(" ".join(cmd.split()).encode()).hexdigest()[:16]
+
+
+def _pid_alive(pid: int) -> bool:
+    """Check whether a process exists on this host.
+
+    :param pid The process ID
+    :return True if the process exists
+    """
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobLedger:
+    """The states of the commands in a command file, kept in SQLite."""
+
+    def __init__(self, path: Path) -> None:
+        """Open the ledger, creating it if needed.
+
+        Jobs left "running" by a runner on this host that no longer
+        exists are marked as interrupted.
+
+        :param path The path to the SQLite database
+        """
+        self.path: Final[Path] = path
+        self._host: Final[str] = socket.gethostname()
+        self._connection = sqlite3.connect(str(path), timeout=60.0)
+        self._connection.execute(SCHEMA)
+        self._connection.commit()
+        self._recover()
+
+    def _recover(self) -> None:
+        """Mark jobs orphaned by a dead runner on this host as interrupted."""
+        rows = self._connection.execute(
+            "SELECT hash, pid FROM jobs WHERE state = ? AND host = ?",
+            (RUNNING, self._host),
+        ).fetchall()
+        for cmd_hash, pid in rows:
+            if pid is None or not _pid_alive(pid):
+                self._update(cmd_hash, state=INTERRUPTED)
+
+    def _update(self, cmd_hash: str, **columns) -> None:
+        """Update some of a job's columns.
+
+        :param cmd_hash The hash of the job's command
+        :param columns The columns to set
+        """
+        columns["updated_at"] = time.time()
+        assignments: str = ", ".join(f"{name} = ?" for name in columns)
+        self._connection.execute(
+            f"UPDATE jobs SET {assignments} WHERE hash = ?",
+            (*columns.values(), cmd_hash),
+        )
+        self._connection.commit()
+
+    def add(self, cmd: str) -> str:
+        """Add a command to the ledger, if it isn't there already.
+
+        :param cmd The command
+        :return The hash of the command
+        """
+        cmd_hash: Final[str] = command_hash(cmd)
+        self._connection.execute(
+            "INSERT OR IGNORE INTO jobs (hash, command, state, updated_at) "
+            "VALUES (?, ?, ?, ?)",
+            (cmd_hash, cmd, PENDING, time.time()),
+        )
+        self._connection.commit()
+        return cmd_hash
+
+    def state(self, cmd: str) -> Optional[str]:
+        """Get the state of a command.
+
+        :param cmd The command
+        :return The state of the command, or None if it isn't in the ledger
+        """
+        row = self._connection.execute(
+            "SELECT state FROM jobs WHERE hash = ?", (command_hash(cmd),)
+        ).fetchone()
+        return row[0] if row else None
+
+    def start(self, cmd: str, outdir: Optional[Path] = None) -> None:
+        """Record that a command has started running on this host.
+
+        :param cmd The command
+        :param outdir The directory the command writes its output to
+        """
+        cmd_hash: Final[str] = self.add(cmd)
+        self._connection.execute(
+            "UPDATE jobs SET attempts = attempts + 1 WHERE hash = ?", (cmd_hash,)
+        )
+        self._update(
+            cmd_hash,
+            state=RUNNING,
+            outdir=str(outdir) if outdir is not None else None,
+            host=self._host,
+            pid=os.getpid(),
+            returncode=None,
+            wall_time=None,
+        )
+
+    def finish(
+        self,
+        cmd: str,
+        state: str,
+        returncode: Optional[int] = None,
+        wall_time: Optional[float] = None,
+    ) -> None:
+        """Record that a command has stopped running.
+
+        :param cmd The command
+        :param state The final state of the command
+        :param returncode The return code of the command
+        :param wall_time The wall-clock time the command took, in seconds
+        """
+        self._update(
+            command_hash(cmd),
+            state=state,
+            returncode=returncode,
+            wall_time=wall_time,
+        )
+
+    def counts(self, cmds: List[str]) -> Dict[str, int]:
+        """Count the states of a list of commands.
+
+        :param cmds The commands
+        :return The number of commands in each state
+        """
+        counts: Dict[str, int] = {}
+        for cmd in cmds:
+            state: str = self.state(cmd) or PENDING
+            counts[state] = counts.get(state, 0) + 1
+        return counts
+
+    def close(self) -> None:
+        """Close the ledger."""
+        self._connection.close()
@@ -0,0 +1,172 @@
+"""Performance metrics computed from gem5 ROI stats blocks.
+
+Each metric is a ratio of two counts (e.g. IPC is instructions over
+cycles), so a metric over several ROIs is the ratio of the counts summed
+over the ROIs, which weighs each ROI by its length. The counts are found
+by stat name patterns, so that they work whichever core was switched in
+and however many caches each level has.
+"""
+
+import math
+import re
+from typing import Callable, Dict, Final, List, Optional
+
+from util.stats import StatsBlock
+
+# Committed instructions
+INSTS_STAT: Final[str] = "simInsts"
+
+# Cycles of the cores. Only the core that was switched in during an ROI
+# has cycles (stats are reset when it starts), so the largest is taken.
+CYCLES_PATTERN: Final[re.Pattern] = re.compile(r"^board\.processor\..*\.numCycles$")
+
+# Demand misses of each cache level (one stat per cache, e.g. l1dcaches0)
+CACHE_MISS_PATTERNS: Final[Dict[str, re.Pattern]] = {
+    level: re.compile(rf"^board\.cache_hierarchy\.{name}\d*\.demandMisses::total$")
+    for level, name in [
+        ("l1d", "l1dcaches"),
+        ("l1i", "l1icaches"),
+        ("l2", "l2caches"),
+        ("llc", "llcache"),
+    ]
+}
+
+# Branches mispredicted by the cores
+BRANCH_MISS_PATTERN: Final[re.Pattern] = re.compile(
+    r"^board\.processor\..*\.commit\.branchMispredicts$"
+)
+
+# A count taken from a stats block
+Count = Callable[[StatsBlock], float]
+
+
+def _sum(pattern: re.Pattern) -> Count:
+    """Count the sum of the stats matching a pattern.
+
+    :param pattern The pattern
+    :return The count
+    """
+    return lambda block: sum(
+        value
+        for name, value in block.items()
+        if pattern.match(name) and not math.isnan(value)
+    )
+
+
+def _max(pattern: re.Pattern) -> Count:
+    """Count the largest of the stats matching a pattern.
+
+    :param pattern The pattern
+    :return The count
+    """
+    return lambda block: max(
+        (
+            value
+            for name, value in block.items()
+            if pattern.match(name) and not math.isnan(value)
+        ),
+        default=0.0,
+    )
+
+
+def _insts(block: StatsBlock) -> float:
+    return block.get(INSTS_STAT, 0.0)
+
+
+class Metric:
+    """A ratio of two counts of a stats block, scaled."""
+
+    def __init__(
+        self,
+        name: str,
+        numerator: Count,
+        denominator: Count,
+        scale: float = 1.0,
+        higher_is_better: bool = False,
+    ) -> None:
+        """Initialize the metric.
+
+        :param name The metric's name
+        :param numerator The count to divide
+        :param denominator The count to divide by
+        :param scale What to multiply the ratio by (e.g. 1000 for MPKI)
+        :param higher_is_better Whether larger values are better
+        """
+        self.name: Final[str] = name
+        self.numerator: Final[Count] = numerator
+        self.denominator: Final[Count] = denominator
+        self.scale: Final[float] = scale
+        self.higher_is_better: Final[bool] = higher_is_better
+
+    def value(self, blocks: List[StatsBlock]) -> Optional[float]:
+        """Compute the metric over some ROIs.
+
+        :param blocks The ROIs' stats blocks
+        :return The metric, or None if its denominator is zero
+        """
+        denominator: Final[float] = sum(self.denominator(b) for b in blocks)
+        if denominator <= 0:
+            return None
+        return self.scale * sum(self.numerator(b) for b in blocks) / denominator
+
+    def weighted_value(
+        self, blocks: List[StatsBlock], weights: List[float]
+    ) -> Optional[float]:
+        """Estimate the metric of a whole run from weighted samples of it
+        (e.g. SimPoint simulation points).
+
+        Each sample's counts are taken per instruction, and weighted by
+        the fraction of the run's instructions it stands for, so that e.g.
+        IPC is the weighted harmonic mean of the samples' IPCs.
+
+        :param blocks Each sample's stats block
+        :param weights Each sample's weight (normalized here)
+        :return The metric, or None if its denominator is zero
+        """
+        numerator: float = 0.0
+        denominator: float = 0.0
+        for block, weight in zip(blocks, weights):
+            insts: float = _insts(block)
+            if insts <= 0:
+                continue
+            numerator += weight * self.numerator(block) / insts
+            denominator += weight * self.denominator(block) / insts
+        if denominator <= 0:
+            return None
+        return self.scale * numerator / denominator
+
+    def roi_values(self, blocks: List[StatsBlock]) -> List[float]:
+        """Compute the metric of each ROI.
+
+        :param blocks The ROIs' stats blocks
+        :return The metric of each ROI it is defined for
+        """
+        values: List[float] = []
+        for block in blocks:
+            value: Optional[float] = self.value([block])
+            if value is not None:
+                values.append(value)
+        return values
+
+
+METRICS: Final[Dict[str, Metric]] = {
+    "ipc": Metric("ipc", _insts, _max(CYCLES_PATTERN), higher_is_better=True),
+    "cpi": Metric("cpi", _max(CYCLES_PATTERN), _insts),
+    **{
+        f"{level}_mpki": Metric(f"{level}_mpki", _sum(pattern), _insts, 1000.0)
+        for level, pattern in CACHE_MISS_PATTERNS.items()
+    },
+    "branch_mpki": Metric("branch_mpki", _sum(BRANCH_MISS_PATTERN), _insts, 1000.0),
+}
+
+
+def geometric_mean(values: List[float]) -> Optional[float]:
+    """Compute the geometric mean of some positive values.
+
+    :param values The values
+    :return The geometric mean, or None if there are no values or one is
+            not positive
+    """
+    if not values or any(value <= 0 for value in values):
+        return None
+    return math.exp(sum(math.log(value) for value in values) / len(values))
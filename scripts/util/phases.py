@@ -0,0 +1,52 @@
+"""Weigh the ROIs of a run sampled by phase.
+
+The phase ROI manager (see util/event_managers/roi/phase.py) classifies
+each fast-forward window of a benchmark into a phase, simulates an ROI of
+each phase when it first appears, and writes phases.json: each phase's
+share of the run's instructions ("weight"), and the indices of its ROIs'
+stats blocks. Each ROI then stands for its share of its phase, and the
+benchmark's metrics are estimated as with SimPoint simulation points.
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, Final, List, Tuple
+
+from util.stats import StatsBlock
+
+# The summary of the phases, in the outdir (as in
+# util/event_managers/roi/phase.py, which can't be imported here)
+PHASES_FILE_NAME: Final[str] = "phases.json"
+
+
+def load_phases(outdir: Path) -> Dict[str, Any]:
+    """Load the summary of a run's phases.
+
+    :param outdir The gem5 output directory
+    :return The summary, with the weight and ROIs of each of its "phases"
+    :raise OSError If there is no summary
+    """
+    return json.loads((outdir / PHASES_FILE_NAME).read_text())
+
+
+def phase_samples(
+    phases: List[Dict[str, Any]], blocks: List[StatsBlock]
+) -> Tuple[List[StatsBlock], List[float]]:
+    """Pair each ROI with the weight it stands for.
+
+    A phase's weight is split evenly between its ROIs. Phases without
+    ROIs (e.g. once --num-rois was reached) are left out, so the weights
+    sum to the fraction of the run that was sampled.
+
+    :param phases The phases of the summary
+    :param blocks The run's ROI stats blocks, in order
+    :return Each ROI's stats block, and its weight
+    """
+    samples: List[StatsBlock] = []
+    weights: List[float] = []
+    for phase in phases:
+        rois: List[int] = [roi for roi in phase["rois"] if roi < len(blocks)]
+        for roi in rois:
+            samples.append(blocks[roi])
+            weights.append(phase["weight"] / len(rois))
+    return samples, weights
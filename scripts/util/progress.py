@@ -0,0 +1,612 @@
+"""Live progress of a campaign's gem5 jobs, from the lines they print.
+
+PeriodicROIManager prints a line at every phase transition, e.g.
+
+    ***Instruction 1,000,000,000: End of fast-forward phase. Switching ...
+    ***Instruction 1,200,000,000: End of warmup phase. Entering ROI #1.
+
+A ProgressTracker tails each running job's output for these lines (its
+stdout log, or simout in its outdir when gem5 runs with -r), and follows
+the phase the job is in. Instruction counts are only printed at phase
+transitions, so the progress within a phase is estimated from the rate
+the job simulated at in earlier phases of the same mode (fast-forward or
+detailed), or else from the rate of the other jobs of the campaign.
+
+From a job's --num-rois and interval options, the tracker knows how many
+instructions of each mode it has left, and so estimates when it will be
+done. A snapshot of all jobs is written to a JSON file periodically,
+which watch-progress.py shows as a live view.
+"""
+
+import json
+import os
+import re
+import socket
+import statistics
+import tempfile
+import time
+from enum import Enum
+from pathlib import Path
+from typing import Any, Dict, Final, List, Optional, Tuple
+
+from util.gem5_command import Gem5Command
+
+# How often the runner polls job output and writes a snapshot, in seconds
+DEFAULT_PROGRESS_INTERVAL: Final[float] = 10.0
+
+# A job simulating slower than this fraction of the campaign's median
+# rate (in the same mode) is flagged as a straggler
+STRAGGLER_FACTOR: Final[float] = 0.5
+
+# How many jobs' rates are needed before stragglers are flagged
+MIN_JOBS_FOR_MEDIAN: Final[int] = 3
+
+# The defaults of PeriodicROIManager's options, in millions of instructions
+# (see util/event_managers/roi/periodic.py)
+DEFAULT_INTERVALS: Final[Dict[str, float]] = {
+    "init_ff_interval": 0.0,
+    "ff_interval": 1000.0,
+    "warmup_interval": 200.0,
+    "roi_interval": 800.0,
+}
+
+# A phase transition line, e.g. "***Instruction 1,000: End of ..." or, at
+# m5.workbegin, "***1,000: Beginning benchmark execution ..."
+TRANSITION_PATTERN: Final[re.Pattern] = re.compile(
+    r"\*\*\*(?:Instruction )?([\d,]+):\s*(.*)"
+)
+
+# Terminal color codes, which termcolor may add to the lines
+ANSI_PATTERN: Final[re.Pattern] = re.compile(r"\x1b\[[0-9;]*m")
+
+ROI_NUMBER_PATTERN: Final[re.Pattern] = re.compile(r"ROI #(\d+)")
+
+
+class Phase(Enum):
+    """The phase a job is in."""
+
+    FF = "ff"  # fast-forwarding
+    WARMUP = "warmup"  # warming up on the detailed CPU
+    ROI = "roi"  # collecting stats on the detailed CPU
+    DONE = "done"  # past its last ROI, or its benchmark ended
+
+    @property
+    def mode(self) -> str:
+        """How the phase is simulated, "ff" or "detailed"."""
+        return "detailed" if self in [Phase.WARMUP, Phase.ROI] else "ff"
+
+
+class RoiPlan:
+    """The phases a periodic ROI job goes through, from its options."""
+
+    def __init__(
+        self,
+        num_rois: int,
+        init_ff_interval: int,
+        ff_interval: int,
+        warmup_interval: int,
+        roi_interval: int,
+    ) -> None:
+        """Initialize the plan.
+
+        :param num_rois The number of ROIs
+        :param init_ff_interval The initial fast-forward, in instructions
+        :param ff_interval The fast-forward before each ROI, in instructions
+        :param warmup_interval The warmup before each ROI, in instructions
+        :param roi_interval The length of each ROI, in instructions
+        """
+        self.num_rois: Final[int] = num_rois
+        self.init_ff_interval: Final[int] = init_ff_interval
+        self.ff_interval: Final[int] = ff_interval
+        self.warmup_interval: Final[int] = warmup_interval
+        self.roi_interval: Final[int] = roi_interval
+
+    @classmethod
+    def from_command(cls, gem5_command: Optional[Gem5Command]) -> Optional["RoiPlan"]:
+        """Make the plan of a gem5 command's periodic ROIs.
+
+        :param gem5_command The command
+        :return The plan, or None if the command sets no --num-rois (so
+                it has no end that can be told in advance)
+        """
+        if gem5_command is None:
+            return None
+        num_rois: Final[Optional[str]] = gem5_command.script_option("num_rois")
+        if not num_rois or gem5_command.script_option("continue_sim") is not None:
+            return None
+
+        intervals: Dict[str, int] = {}
+        for name, default in DEFAULT_INTERVALS.items():
+            value: Optional[str] = gem5_command.script_option(name)
+            try:
+                intervals[name] = int(float(value or default) * 1_000_000)
+            except ValueError:
+                return None
+        try:
+            return cls(int(num_rois), **intervals)
+        except ValueError:
+            return None
+
+    def length(self, phase: Phase, init: bool = False) -> int:
+        """Get the length of a phase.
+
+        :param phase The phase
+        :param init Whether the phase is the initial fast-forward
+        :return The number of instructions in the phase
+        """
+        if phase == Phase.FF:
+            return self.init_ff_interval if init else self.ff_interval
+        if phase == Phase.WARMUP:
+            return self.warmup_interval
+        if phase == Phase.ROI:
+            return self.roi_interval
+        return 0
+
+    def remaining(
+        self, phase: Phase, init: bool, completed_rois: int, done_in_phase: int
+    ) -> Dict[str, int]:
+        """Count the instructions a job has left, by mode.
+
+        :param phase The phase the job is in
+        :param init Whether it is in the initial fast-forward
+        :param completed_rois The number of ROIs it has completed
+        :param done_in_phase The instructions it has done in its phase
+        :return The instructions left in fast-forward ("ff") and detailed
+                ("detailed") mode
+        """
+        remaining: Dict[str, int] = {"ff": 0, "detailed": 0}
+        if phase == Phase.DONE:
+            return remaining
+        remaining[phase.mode] += max(self.length(phase, init) - done_in_phase, 0)
+
+        # The rest of the current ROI's cycle
+        if phase == Phase.FF:
+            if init:
+                remaining["ff"] += self.ff_interval
+            remaining["detailed"] += self.warmup_interval + self.roi_interval
+        elif phase == Phase.WARMUP:
+            remaining["detailed"] += self.roi_interval
+
+        # The cycles of the ROIs after it
+        later_rois: Final[int] = max(self.num_rois - completed_rois - 1, 0)
+        remaining["ff"] += later_rois * self.ff_interval
+        remaining["detailed"] += later_rois * (self.warmup_interval + self.roi_interval)
+        return remaining
+
+
+def median_rates(jobs: List["JobProgress"], min_jobs: int = 1) -> Dict[str, float]:
+    """Get the median simulation rate of some jobs, by mode.
+
+    :param jobs The jobs
+    :param min_jobs How many jobs must have a rate for a mode
+    :return The median instructions per second in each mode, for the modes
+            with enough measured jobs
+    """
+    medians: Dict[str, float] = {}
+    for mode in ["ff", "detailed"]:
+        rates: List[float] = [
+            rate for rate in (job.rate(mode) for job in jobs) if rate is not None
+        ]
+        if rates and len(rates) >= min_jobs:
+            medians[mode] = statistics.median(rates)
+    return medians
+
+
+class JobProgress:
+    """The progress of one job, followed through its output."""
+
+    def __init__(
+        self,
+        job_id: str,
+        command: str,
+        signature: str,
+        paths: List[Path],
+        plan: Optional[RoiPlan],
+    ) -> None:
+        """Initialize the progress of a job that just started.
+
+        :param job_id The job's ID
+        :param command The job's command
+        :param signature The job's signature
+        :param paths The files the job prints its output to
+        :param plan The job's ROI plan, if it has one
+        """
+        self.job_id: Final[str] = job_id
+        self.command: Final[str] = command
+        self.signature: Final[str] = signature
+        self.plan: Final[Optional[RoiPlan]] = plan
+        self.start_time: Final[float] = time.time()
+        self.end_time: Optional[float] = None
+        self.status: Optional[str] = None
+
+        # The phase the job is in, and where and when it started
+        self.phase: Phase = Phase.FF
+        self.init: bool = plan is not None and plan.init_ff_interval > 0
+        self.completed_rois: int = 0
+        self.phase_instruction: int = 0
+        self.phase_time: float = self.start_time
+
+        # mode -> (instructions, seconds) simulated in completed phases
+        self._simulated: Dict[str, Tuple[int, float]] = {
+            "ff": (0, 0.0),
+            "detailed": (0, 0.0),
+        }
+
+        # path -> how far it has been read
+        self._offsets: Dict[Path, int] = {path: 0 for path in paths}
+        self._partial: Dict[Path, str] = {path: "" for path in paths}
+
+    def poll(self) -> None:
+        """Read what the job printed since the last poll."""
+        now: Final[float] = time.time()
+        for path in self._offsets:
+            try:
+                with path.open("rb") as file:
+                    file.seek(0, os.SEEK_END)
+                    if file.tell() < self._offsets[path]:
+                        # The log was rotated
+                        self._offsets[path] = 0
+                        self._partial[path] = ""
+                    file.seek(self._offsets[path])
+                    data: str = file.read().decode(errors="replace")
+                    self._offsets[path] = file.tell()
+            except OSError:
+                continue
+
+            lines: List[str] = (self._partial[path] + data).split("\n")
+            self._partial[path] = lines.pop()
+            for line in lines:
+                self.parse(line, now)
+
+    def parse(self, line: str, now: float) -> None:
+        """Follow a phase transition line.
+
+        :param line A line of the job's output
+        :param now When the line was seen
+        """
+        match = TRANSITION_PATTERN.search(ANSI_PATTERN.sub("", line))
+        if match is None:
+            return
+        instruction: Final[int] = int(match.group(1).replace(",", ""))
+        message: Final[str] = match.group(2)
+        roi_match = ROI_NUMBER_PATTERN.search(message)
+        roi: Final[int] = int(roi_match.group(1)) if roi_match else 0
+
+        if message.startswith("Beginning benchmark execution"):
+            # The schedule starts over at m5.workbegin
+            self._enter(Phase.FF, instruction, now, count=False)
+            self.completed_rois = 0
+        elif message.startswith("Entering initial fast-forward"):
+            self._enter(Phase.FF, instruction, now, count=False)
+            self.init = True
+        elif message.startswith("End of initial fast-forward"):
+            self._enter(Phase.FF, instruction, now)
+            self.init = False
+        elif "Forked ROI" in message:
+            # With --fork-rois, a child simulates the ROI while the job
+            # fast-forwards on past it (older runs print this after "End
+            # of fast-forward phase.", so it is checked first)
+            self.completed_rois = max(self.completed_rois, roi)
+            self._enter(Phase.FF, instruction, now)
+        elif message.startswith("End of fast-forward"):
+            self._enter(Phase.WARMUP, instruction, now)
+            self.init = False
+        elif message.startswith("End of warmup"):
+            self._enter(Phase.ROI, instruction, now)
+        elif message.startswith("Exiting ROI"):
+            self.completed_rois = max(self.completed_rois, roi)
+            if "at benchmark end" not in message:
+                self._enter(Phase.FF, instruction, now)
+        elif message.startswith("Maximum number of ROIs reached, ending"):
+            self._enter(Phase.DONE, instruction, now, count=False)
+        elif message.startswith("Ending benchmark execution"):
+            self._enter(Phase.DONE, instruction, now)
+
+    def _enter(
+        self, phase: Phase, instruction: int, now: float, count: bool = True
+    ) -> None:
+        """Move the job to a new phase.
+
+        :param phase The new phase
+        :param instruction The instruction the new phase starts at
+        :param now When the new phase started
+        :param count Whether to count the last phase towards the job's rate
+        """
+        if count and self.phase != Phase.DONE:
+            instructions, seconds = self._simulated[self.phase.mode]
+            self._simulated[self.phase.mode] = (
+                instructions + max(instruction - self.phase_instruction, 0),
+                seconds + max(now - self.phase_time, 0.0),
+            )
+        self.phase = phase
+        self.phase_instruction = instruction
+        self.phase_time = now
+
+    def rate(self, mode: str) -> Optional[float]:
+        """Get the rate the job simulated at in completed phases of a mode.
+
+        :param mode "ff" or "detailed"
+        :return Instructions per second, or None if not measured yet
+        """
+        instructions, seconds = self._simulated[mode]
+        return instructions / seconds if instructions and seconds > 0 else None
+
+    def expected_rate(self, mode: str, fallback: Dict[str, float]) -> Optional[float]:
+        """Get the rate the job is expected to simulate at in a mode.
+
+        :param mode "ff" or "detailed"
+        :param fallback Rates to use for modes the job has no rate for
+        :return Instructions per second, or None if nothing is known
+        """
+        rate: Optional[float] = self.rate(mode)
+        return rate if rate is not None else fallback.get(mode)
+
+    def done_in_phase(self, now: float, fallback: Dict[str, float]) -> int:
+        """Estimate the instructions done since the job's phase started.
+
+        :param now The current time
+        :param fallback Rates to use for modes the job has no rate for
+        :return The estimated instructions
+        """
+        rate: Final[Optional[float]] = self.expected_rate(self.phase.mode, fallback)
+        if rate is None or self.phase == Phase.DONE:
+            return 0
+        done: int = int((now - self.phase_time) * rate)
+        if self.plan is not None:
+            done = min(done, self.plan.length(self.phase, self.init))
+        return done
+
+    def eta(self, now: float, fallback: Dict[str, float]) -> Optional[float]:
+        """Estimate how long the job has left.
+
+        :param now The current time
+        :param fallback Rates to use for modes the job has no rate for
+        :return The estimated seconds left, or None if it can't be told
+        """
+        if self.plan is None:
+            return None
+        remaining: Final[Dict[str, int]] = self.plan.remaining(
+            self.phase,
+            self.init,
+            self.completed_rois,
+            self.done_in_phase(now, fallback),
+        )
+        seconds: float = 0.0
+        for mode, instructions in remaining.items():
+            if not instructions:
+                continue
+            rate: Optional[float] = self.expected_rate(mode, fallback)
+            if rate is None:
+                return None
+            seconds += instructions / rate
+        return seconds
+
+    def record(
+        self, now: float, fallback: Dict[str, float], medians: Dict[str, float]
+    ) -> Dict[str, Any]:
+        """Summarize the job's progress.
+
+        :param now The current time
+        :param fallback Rates to use for modes the job has no rate for
+        :param medians The campaign's median rates, to flag stragglers by
+        :return The summary
+        """
+        slow_modes: Final[List[str]] = [
+            mode
+            for mode, median in medians.items()
+            if (self.rate(mode) or median) < STRAGGLER_FACTOR * median
+        ]
+        end: Final[float] = self.end_time or now
+        return {
+            "job": self.job_id,
+            "command": self.command,
+            "signature": self.signature,
+            "status": self.status or "running",
+            "phase": self.phase.value,
+            "completed_rois": self.completed_rois,
+            "num_rois": self.plan.num_rois if self.plan else None,
+            "instructions": self.phase_instruction
+            + (self.done_in_phase(now, fallback) if self.end_time is None else 0),
+            "ff_rate": self.rate("ff"),
+            "detailed_rate": self.rate("detailed"),
+            "elapsed": end - self.start_time,
+            "eta": self.eta(now, fallback) if self.end_time is None else None,
+            "straggler": bool(slow_modes),
+        }
+
+
+class ProgressTracker:
+    """The progress of every job a runner has started."""
+
+    def __init__(self, path: Optional[Path] = None) -> None:
+        """Initialize the tracker.
+
+        :param path The file to write snapshots to, if any
+        """
+        self.path: Final[Optional[Path]] = path
+        self._host: Final[str] = socket.gethostname()
+        self._running: Dict[str, JobProgress] = {}
+        self._finished: List[JobProgress] = []
+
+    @property
+    def num_running(self) -> int:
+        """The number of jobs being followed."""
+        return len(self._running)
+
+    def start(
+        self,
+        job_id: str,
+        command: str,
+        signature: str,
+        paths: List[Path],
+        plan: Optional[RoiPlan],
+    ) -> None:
+        """Start following a job.
+
+        :param job_id The job's ID
+        :param command The job's command
+        :param signature The job's signature
+        :param paths The files the job prints its output to
+        :param plan The job's ROI plan, if it has one
+        """
+        self._running[job_id] = JobProgress(job_id, command, signature, paths, plan)
+
+    def finish(self, job_id: str, status: str) -> None:
+        """Stop following a job, reading the rest of its output first.
+
+        :param job_id The job's ID
+        :param status How the job ended
+        """
+        progress: Optional[JobProgress] = self._running.pop(job_id, None)
+        if progress is None:
+            return
+        progress.poll()
+        progress.end_time = time.time()
+        progress.status = status
+        self._finished.append(progress)
+
+    def poll(self) -> None:
+        """Read what the running jobs printed since the last poll."""
+        for progress in self._running.values():
+            progress.poll()
+
+    def snapshot(self, num_pending: int, num_workers: int) -> Dict[str, Any]:
+        """Summarize the progress of the campaign.
+
+        The campaign's ETA assumes each pending job takes as long as the
+        finished ones did on average (or else the running ones will), and
+        that the runner's workers stay busy.
+
+        :param num_pending The number of jobs that haven't started yet
+        :param num_workers The number of jobs the runner runs at once
+        :return The summary
+        """
+        now: Final[float] = time.time()
+        running: Final[List[JobProgress]] = list(self._running.values())
+        every_job: Final[List[JobProgress]] = running + self._finished
+        fallback: Final[Dict[str, float]] = median_rates(every_job)
+        medians: Final[Dict[str, float]] = median_rates(every_job, MIN_JOBS_FOR_MEDIAN)
+        records: Final[List[Dict[str, Any]]] = [
+            progress.record(now, fallback, medians) for progress in every_job
+        ]
+        running_records: Final[List[Dict[str, Any]]] = records[: len(running)]
+
+        # The rate each running job is simulating at right now
+        rate: float = 0.0
+        for progress in running:
+            mode_rate: Optional[float] = progress.expected_rate(
+                progress.phase.mode, fallback
+            )
+            if progress.phase != Phase.DONE and mode_rate is not None:
+                rate += mode_rate
+
+        etas: Final[List[float]] = [
+            record["eta"] for record in running_records if record["eta"] is not None
+        ]
+        durations: List[float] = [
+            progress.end_time - progress.start_time
+            for progress in self._finished
+            if progress.end_time is not None and progress.status == "succeeded"
+        ] or [
+            record["elapsed"] + record["eta"]
+            for record in running_records
+            if record["eta"] is not None
+        ]
+        mean_duration: Final[Optional[float]] = (
+            statistics.mean(durations) if durations else None
+        )
+        campaign_eta: Optional[float] = None
+        if (etas or not running) and (mean_duration is not None or not num_pending):
+            campaign_eta = max(
+                (sum(etas) + num_pending * (mean_duration or 0.0))
+                / max(num_workers, 1),
+                max(etas, default=0.0),
+            )
+
+        return {
+            "host": self._host,
+            "time": now,
+            "num_running": len(running),
+            "num_pending": num_pending,
+            "num_finished": len(self._finished),
+            "num_workers": num_workers,
+            "instructions_per_second": rate,
+            "median_ff_rate": fallback.get("ff"),
+            "median_detailed_rate": fallback.get("detailed"),
+            "mean_duration": mean_duration,
+            "eta": campaign_eta,
+            "jobs": records,
+        }
+
+    def write(self, snapshot: Dict[str, Any]) -> None:
+        """Write a snapshot to the tracker's file, replacing the last one.
+
+        :param snapshot The snapshot
+        """
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(
+            prefix=f".{self.path.name}.", dir=self.path.parent
+        )
+        with os.fdopen(fd, "wt") as file:
+            json.dump(snapshot, file)
+        os.replace(tmp_name, self.path)
+
+
+def merge_snapshots(snapshots: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine the snapshots of runners sharing a campaign (e.g., a queue).
+
+    Pending jobs are assumed to be shared by all of the runners, so the
+    largest pending count is taken rather than their sum.
+
+    :param snapshots The snapshots, one per runner
+    :return The campaign's snapshot, with a "hosts" list
+    """
+    jobs: Final[List[Dict[str, Any]]] = [
+        {"host": snapshot["host"], **job}
+        for snapshot in snapshots
+        for job in snapshot["jobs"]
+    ]
+    num_pending: Final[int] = max(
+        (snapshot["num_pending"] for snapshot in snapshots), default=0
+    )
+    num_workers: Final[int] = sum(snapshot["num_workers"] for snapshot in snapshots)
+    durations: Final[List[float]] = [
+        snapshot["mean_duration"]
+        for snapshot in snapshots
+        if snapshot["mean_duration"] is not None
+    ]
+    etas: Final[List[float]] = [
+        job["eta"]
+        for job in jobs
+        if job["status"] == "running" and job["eta"] is not None
+    ]
+
+    eta: Optional[float] = None
+    if durations or not num_pending:
+        mean_duration: float = statistics.mean(durations) if durations else 0.0
+        eta = max(
+            (sum(etas) + num_pending * mean_duration) / max(num_workers, 1),
+            max(etas, default=0.0),
+        )
+
+    def median(key: str) -> Optional[float]:
+        rates: List[float] = [job[key] for job in jobs if job[key] is not None]
+        return statistics.median(rates) if rates else None
+
+    return {
+        "hosts": [snapshot["host"] for snapshot in snapshots],
+        "time": max((snapshot["time"] for snapshot in snapshots), default=0.0),
+        "num_running": sum(snapshot["num_running"] for snapshot in snapshots),
+        "num_pending": num_pending,
+        "num_finished": sum(snapshot["num_finished"] for snapshot in snapshots),
+        "num_workers": num_workers,
+        "instructions_per_second": sum(
+            snapshot["instructions_per_second"] for snapshot in snapshots
+        ),
+        "median_ff_rate": median("ff_rate"),
+        "median_detailed_rate": median("detailed_rate"),
+        "eta": eta,
+        "jobs": jobs,
+    }
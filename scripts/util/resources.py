@@ -0,0 +1,224 @@
+"""Utilities for watching this host's memory and CPUs.
+
+Provides readers for /proc (free memory, load, per-process RSS) and a
+ResourceGate that admits jobs only when the host has room for them.
+"""
+
+import asyncio
+import os
+from pathlib import Path
+from typing import Dict, Final, List, Optional
+
+from util.gem5_command import format_size
+
+PROC_DIR: Final[Path] = Path("/proc")
+
+# How often to re-check the host when a job is waiting for resources
+DEFAULT_POLL_INTERVAL: Final[float] = 5.0
+
+# Memory to always leave free for the OS and everything else
+DEFAULT_MEM_HEADROOM: Final[int] = 2 * 1024**3
+
+
+def read_meminfo() -> Dict[str, int]:
+    """Read /proc/meminfo.
+
+    :return Each meminfo field, in bytes
+    """
+    meminfo: Dict[str, int] = {}
+    with (PROC_DIR / "meminfo").open("rt") as file:
+        for line in file:
+            name, _, value = line.partition(":")
+            tokens: List[str] = value.split()
+            if not tokens:
+                continue
+            scale: int = 1024 if len(tokens) > 1 and tokens[1] == "kB" else 1
+            meminfo[name] = int(tokens[0]) * scale
+    return meminfo
+
+
+def available_memory() -> int:
+    """Get the memory available for new processes without swapping.
+
+    :return The available memory, in bytes
+    """
+    meminfo: Final[Dict[str, int]] = read_meminfo()
+    if "MemAvailable" in meminfo:
+        return meminfo["MemAvailable"]
+    # Kernels before 3.14 don't report MemAvailable
+    return meminfo["MemFree"] + meminfo.get("Cached", 0)
+
+
+def cpu_count() -> int:
+    """Get the number of CPUs this process may run on.
+
+    :return The number of usable CPUs
+    """
+    return len(os.sched_getaffinity(0))
+
+
+def load_average() -> float:
+    """Get the host's 1-minute load average.
+
+    :return The load average
+    """
+    return os.getloadavg()[0]
+
+
+def child_pids(pid: int) -> List[int]:
+    """Get the direct children of a process.
+
+    :param pid The process ID
+    :return The process IDs of its children
+    """
+    children: List[int] = []
+    try:
+        for task in (PROC_DIR / str(pid) / "task").iterdir():
+            children.extend(int(c) for c in (task / "children").read_text().split())
+    except OSError:
+        pass
+    return children
+
+
+def process_tree(pid: int) -> List[int]:
+    """Get a process and all of its descendants.
+
+    :param pid The process ID of the root of the tree
+    :return The process IDs in the tree, root first
+    """
+    tree: List[int] = [pid]
+    i: int = 0
+    while i < len(tree):
+        tree.extend(child_pids(tree[i]))
+        i += 1
+    return tree
+
+
+def process_rss(pid: int) -> int:
+    """Get the resident set size of a process.
+
+    :param pid The process ID
+    :return The RSS in bytes (0 if the process is gone)
+    """
+    try:
+        with (PROC_DIR / str(pid) / "status").open("rt") as file:
+            for line in file:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def tree_rss(pid: int) -> int:
+    """Get the total resident set size of a process and its descendants.
+
+    :param pid The process ID of the root of the tree
+    :return The total RSS in bytes
+    """
+    return sum(process_rss(p) for p in process_tree(pid))
+
+
+class ResourceGate:
+    """Admit jobs only when the host has enough free memory and CPUs.
+
+    Free memory comes from /proc/meminfo, less what admitted jobs are
+    still expected to grow into. Free CPUs are the usable CPUs less the
+    larger of the load average and the CPUs of admitted jobs, since the
+    load average lags behind jobs that have just started.
+
+    Jobs are admitted one at a time, in the order they ask.
+    """
+
+    def __init__(
+        self,
+        mem_headroom: int = DEFAULT_MEM_HEADROOM,
+        num_cpus: Optional[int] = None,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+    ) -> None:
+        """Initialize the gate.
+
+        :param mem_headroom Memory to always leave free, in bytes
+        :param num_cpus The number of CPUs jobs may use (default: all)
+        :param poll_interval Seconds between checks while a job waits
+        """
+        self._mem_headroom: Final[int] = mem_headroom
+        self._num_cpus: Final[int] = num_cpus or cpu_count()
+        self._poll_interval: Final[float] = poll_interval
+
+        # job id -> [memory estimate, current RSS, CPUs]
+        self._admitted: Dict[str, List[int]] = {}
+
+        # To be created in admit(), inside the event loop
+        self._lock: Optional[asyncio.Lock] = None
+        self._released: Optional[asyncio.Event] = None
+
+    def free_memory(self) -> int:
+        """Get the memory free for a new job.
+
+        :return The free memory, in bytes
+        """
+        reserved: int = sum(
+            max(mem - rss, 0) for mem, rss, _ in self._admitted.values()
+        )
+        return available_memory() - self._mem_headroom - reserved
+
+    def free_cpus(self) -> float:
+        """Get the CPUs free for a new job.
+
+        :return The number of free CPUs
+        """
+        admitted_cpus: int = sum(cpus for _, _, cpus in self._admitted.values())
+        return self._num_cpus - max(load_average(), admitted_cpus)
+
+    async def admit(self, job_id: str, mem: int, cpus: int) -> None:
+        """Wait until a job fits on the host, then admit it.
+
+        A job is always admitted when nothing else is running, so jobs
+        bigger than the whole host still run (alone).
+
+        :param job_id The ID of the job
+        :param mem The job's estimated peak memory use, in bytes
+        :param cpus The number of CPUs the job uses
+        """
+        if self._lock is None or self._released is None:
+            self._lock = asyncio.Lock()
+            self._released = asyncio.Event()
+
+        async with self._lock:
+            waiting: bool = False
+            while self._admitted and (
+                self.free_memory() < mem or self.free_cpus() < cpus
+            ):
+                if not waiting:
+                    print(
+                        f"Waiting for resources to start {job_id} "
+                        f"(needs {format_size(mem)}, {cpus} CPU(s); "
+                        f"free: {format_size(max(self.free_memory(), 0))}, "
+                        f"{max(self.free_cpus(), 0):.1f} CPU(s))"
+                    )
+                    waiting = True
+                self._released.clear()
+                try:
+                    await asyncio.wait_for(self._released.wait(), self._poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+            self._admitted[job_id] = [mem, 0, cpus]
+
+    def update(self, job_id: str, rss: int) -> None:
+        """Update the memory an admitted job is currently using.
+
+        :param job_id The ID of the job
+        :param rss The job's current RSS, in bytes
+        """
+        if job_id in self._admitted:
+            self._admitted[job_id][1] = rss
+
+    def release(self, job_id: str) -> None:
+        """Release the resources of a finished job.
+
+        :param job_id The ID of the job
+        """
+        self._admitted.pop(job_id, None)
+        if self._released is not None:
+            self._released.set()
@@ -0,0 +1,359 @@
+"""A content-addressed cache of gem5 simulation results.
+
+A simulation's results are determined by what goes into it: the gem5
+binary, the config script and the Python sources it imports, the
+script's options, and its inputs (the simulated binary, its input files,
+and any checkpoint or disk image it starts from). The cache keys each
+simulation by a hash of all of these, so an identical simulation, even
+one written to another outdir or run from another campaign, gets the
+stats.txt and config.json (and a SMARTS run's smarts.json, and the
+stats of each ROI forked with --fork-rois) of the earlier run at once.
+
+Entries live in <cache-dir>/objects/, indexed by an SQLite database that
+also remembers the digests of input files (by path, size and mtime), so
+large binaries and checkpoints are only read again when they change.
+The least recently used entries are evicted once the cache grows larger
+than its size cap.
+"""
+
+import ast
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Final, List, Optional
+
+from util.gem5_command import Gem5Command
+from util.stats import FORK_STATS_GLOB
+
+# Default location and size cap of the cache
+DEFAULT_CACHE_DIR: Final[Path] = Path.home() / ".cache" / "gem5-runner" / "results"
+DEFAULT_CACHE_SIZE: Final[int] = 20 * 1024**3
+
+# Files of a simulation's outdir that are cached
+CACHED_FILES: Final[List[str]] = ["stats.txt", "config.json", "smarts.json"]
+
+# Globs of further files of a simulation's outdir that are cached, e.g.
+# the stats of forked ROIs in their own outdirs
+CACHED_GLOBS: Final[List[str]] = [FORK_STATS_GLOB]
+
+# Script options that name an input file or directory. Their values are
+# replaced by the digests of what they name, so moving an input doesn't
+# miss the cache.
+INPUT_OPTIONS: Final[List[str]] = [
+    "input_bin",
+    "start_from",
+    "disk_image",
+]
+
+# Size of each read when hashing a file
+HASH_CHUNK_SIZE: Final[int] = 1024 * 1024
+
+SCHEMA: Final[str] = """
+CREATE TABLE IF NOT EXISTS entries (
+    key         TEXT PRIMARY KEY,
+    size        INTEGER NOT NULL,
+    signature   TEXT,
+    created_at  REAL NOT NULL,
+    last_used   REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS digests (
+    path        TEXT PRIMARY KEY,
+    size        INTEGER NOT NULL,
+    mtime_ns    INTEGER NOT NULL,
+    digest      TEXT NOT NULL
+)
+"""
+
+
+def _module_files(root: Path, module: str) -> List[Path]:
+    """Find the sources of a module under a directory, if it is there.
+
+    :param root The directory imports are resolved against
+    :param module The module's dotted name, e.g. "util.simarglib"
+    :return The module's file, and the __init__.py of each package
+            containing it (which importing it runs)
+    """
+    parts: Final[List[str]] = module.split(".")
+    files: List[Path] = [
+        root.joinpath(*parts[:i], "__init__.py") for i in range(1, len(parts))
+    ]
+    path: Final[Path] = root.joinpath(*parts)
+    files += [path.with_suffix(".py"), path / "__init__.py"]
+    return [file for file in files if file.is_file()]
+
+
+def script_sources(script: Path) -> List[Path]:
+    """Find the Python sources a config script imports from its directory.
+
+    Imports are followed transitively. Modules from elsewhere (gem5's
+    own, or installed packages) are part of the gem5 binary or the
+    environment, and are not included.
+
+    :param script The config script
+    :return The script and the sources it imports, sorted
+    """
+    root: Final[Path] = script.parent
+    seen: Dict[Path, None] = {}
+    todo: List[Path] = [script]
+    while todo:
+        path: Path = todo.pop()
+        if path in seen:
+            continue
+        seen[path] = None
+        try:
+            tree: ast.Module = ast.parse(path.read_text(), str(path))
+        except (OSError, SyntaxError, ValueError):
+            continue
+
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                for alias in node.names:
+                    todo += _module_files(root, alias.name)
+            elif isinstance(node, ast.ImportFrom):
+                base: Path = root
+                module: str = node.module or ""
+                if node.level > 0:
+                    # Relative to the importing module's package
+                    base = path.parents[node.level - 1]
+                if module:
+                    todo += _module_files(base, module)
+                # "from package import module" imports a module too
+                for alias in node.names:
+                    name: str = f"{module}.{alias.name}" if module else alias.name
+                    todo += _module_files(base, name)
+    return sorted(seen)
+
+
+class ResultCache:
+    """Results of earlier simulations, keyed by what went into them."""
+
+    def __init__(
+        self, path: Path = DEFAULT_CACHE_DIR, max_size: int = DEFAULT_CACHE_SIZE
+    ) -> None:
+        """Open the cache, creating it if needed.
+
+        :param path The cache directory
+        :param max_size The most bytes of results to keep
+        """
+        self.path: Final[Path] = path
+        self.max_size: Final[int] = max_size
+        (path / "objects").mkdir(parents=True, exist_ok=True)
+
+        # The runner hashes and copies in worker threads
+        self._lock: Final[threading.Lock] = threading.Lock()
+        self._connection = sqlite3.connect(
+            str(path / "index.sqlite"), timeout=60.0, check_same_thread=False
+        )
+        self._connection.executescript(SCHEMA)
+        self._connection.commit()
+
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def _object_dir(self, key: str) -> Path:
+        """Get the directory an entry's files are kept in.
+
+        :param key The entry's key
+        :return The directory
+        """
+        return self.path / "objects" / key[:2] / key
+
+    def file_digest(self, path: Path) -> str:
+        """Hash a file's contents, reusing its digest if it hasn't changed.
+
+        :param path The file
+        :return The hex digest
+        :raise OSError If the file can't be read
+        """
+        path = path.resolve()
+        stat: Final[os.stat_result] = path.stat()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT digest FROM digests WHERE path = ? AND size = ? AND "
+                "mtime_ns = ?",
+                (str(path), stat.st_size, stat.st_mtime_ns),
+            ).fetchone()
+        if row is not None:
+            return row[0]
+
+        sha: Final = hashlib.sha256()
+        with path.open("rb") as file:
+            while chunk := file.read(HASH_CHUNK_SIZE):
+                sha.update(chunk)
+        digest: Final[str] = sha.hexdigest()
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO digests VALUES (?, ?, ?, ?)",
+                (str(path), stat.st_size, stat.st_mtime_ns, digest),
+            )
+            self._connection.commit()
+        return digest
+
+    def path_digest(self, path: Path) -> str:
+        """Hash a file, or a directory's files and their names.
+
+        :param path The file or directory
+        :return The hex digest
+        :raise OSError If the path can't be read
+        """
+        if not path.is_dir():
+            return self.file_digest(path)
+        sha: Final = hashlib.sha256()
+        for child in sorted(path.rglob("*")):
+            if child.is_file():
+                sha.update(f"{child.relative_to(path)}\0".encode())
+                sha.update(self.file_digest(child).encode())
+        return sha.hexdigest()
+
+    def key(self, gem5_command: Gem5Command) -> Optional[str]:
+        """Compute the cache key of a gem5 command.
+
+        :param gem5_command The command
+        :return The key, or None if the command's inputs can't all be
+                found (so it can't be cached)
+        """
+        if gem5_command.script is None:
+            return None
+        cwd: Final[Path] = gem5_command.cwd or Path.cwd()
+        script: Final[Path] = cwd / gem5_command.script
+
+        try:
+            options: List[str] = []
+            inputs: Dict[str, str] = {}
+            for name, value in gem5_command.script_options():
+                if name in INPUT_OPTIONS and value is not None:
+                    value = self.path_digest(cwd / value)
+                elif name == "input_args" and value is not None:
+                    # The benchmark's input files, e.g. "inp.in"
+                    for token in value.split():
+                        if (cwd / token).is_file():
+                            inputs[token] = self.file_digest(cwd / token)
+                options.append(f"{name}={value}" if value is not None else name)
+
+            key_parts: Final[Dict[str, Any]] = {
+                "gem5": self.file_digest(cwd / gem5_command.binary),
+                "sources": {
+                    str(source.relative_to(script.parent)): self.file_digest(source)
+                    for source in script_sources(script)
+                },
+                "options": sorted(options),
+                "inputs": inputs,
+            }
+        except OSError:
+            return None
+        return hashlib.sha256(
+            json.dumps(key_parts, sort_keys=True).encode()
+        ).hexdigest()
+
+    def restore(self, key: str, outdir: Path) -> bool:
+        """Copy an entry's files into an outdir, if the cache has it.
+
+        :param key The entry's key
+        :param outdir The outdir to copy to
+        :return True on a hit
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT key FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+        object_dir: Final[Path] = self._object_dir(key)
+        if row is None or not object_dir.is_dir():
+            self.misses += 1
+            return False
+
+        outdir.mkdir(parents=True, exist_ok=True)
+        try:
+            for name in CACHED_FILES:
+                if (object_dir / name).exists():
+                    shutil.copyfile(object_dir / name, outdir / name)
+            for pattern in CACHED_GLOBS:
+                for path in object_dir.glob(pattern):
+                    target: Path = outdir / path.relative_to(object_dir)
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    shutil.copyfile(path, target)
+        except OSError:
+            # Evicted while being copied
+            self.misses += 1
+            return False
+
+        with self._lock:
+            self._connection.execute(
+                "UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key)
+            )
+            self._connection.commit()
+        self.hits += 1
+        return True
+
+    def store(
+        self, key: str, files: Dict[str, bytes], signature: Optional[str] = None
+    ) -> None:
+        """Add an entry, then evict entries until the cache fits its cap.
+
+        :param key The entry's key
+        :param files The contents of the files to keep, by their paths in
+                     the outdir
+        :param signature The command's signature, to tell entries apart
+        """
+        object_dir: Final[Path] = self._object_dir(key)
+        object_dir.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary directory and rename it, so that a
+        # concurrent restore never sees half an entry
+        tmp_dir: Final[Path] = Path(
+            tempfile.mkdtemp(dir=object_dir.parent, prefix=".tmp")
+        )
+        for name, contents in files.items():
+            (tmp_dir / name).parent.mkdir(parents=True, exist_ok=True)
+            (tmp_dir / name).write_bytes(contents)
+        try:
+            tmp_dir.rename(object_dir)
+        except OSError:
+            # Another runner stored it first
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        now: Final[float] = time.time()
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                (
+                    key,
+                    sum(len(contents) for contents in files.values()),
+                    signature,
+                    now,
+                    now,
+                ),
+            )
+            self._connection.commit()
+        self.evict()
+
+    def evict(self) -> List[str]:
+        """Remove the least recently used entries until the cache fits its cap.
+
+        :return The keys of the removed entries
+        """
+        evicted: List[str] = []
+        with self._lock:
+            total: int = self._connection.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()[0]
+            for key, size in self._connection.execute(
+                "SELECT key, size FROM entries ORDER BY last_used"
+            ).fetchall():
+                if total <= self.max_size:
+                    break
+                self._connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+                evicted.append(key)
+                total -= size
+            self._connection.commit()
+        for key in evicted:
+            shutil.rmtree(self._object_dir(key), ignore_errors=True)
+        return evicted
+
+    def close(self) -> None:
+        """Close the cache's index."""
+        self._connection.close()
@@ -0,0 +1,260 @@
+"""Allocate a suite's ROI budget across its benchmarks.
+
+Giving every benchmark the same number of ROIs wastes most of them on
+benchmarks whose ROIs barely differ, and leaves the ones that swing
+between phases under-sampled. A short pilot run (with periodic ROIs over
+the whole benchmark) estimates the spread S_h of the metric between the
+ROIs of each benchmark h, and Neyman allocation then gives it
+
+    n_h = N * S_h / sum(S)
+
+of the N ROIs the budget affords, which minimizes the standard error of
+the suite's mean metric, sum_h S_h^2 / n_h / H^2 (with a finite population
+correction for benchmarks short enough to have few ROIs at all). For the
+suite's geometric mean, the spreads are relative (coefficients of
+variation) instead.
+
+Each benchmark's ROIs are then spread over its whole run, by setting its
+fast-forward interval from its length: the instructions its pilot spanned.
+"""
+
+import math
+from pathlib import Path
+from typing import Dict, Final, List, Optional
+
+from util.metrics import Metric
+from util.stats import load_roi_blocks
+
+# The objectives: the suite's arithmetic or geometric mean of the metric
+OBJECTIVES: Final[List[str]] = ["mean", "geomean"]
+
+# The fewest ROIs a benchmark gets, so that its spread can be estimated
+DEFAULT_MIN_ROIS: Final[int] = 2
+
+# PeriodicROIManager's default intervals, in M instructions
+DEFAULT_FF_INTERVAL: Final[float] = 1000.0
+DEFAULT_WARMUP_INTERVAL: Final[float] = 200.0
+DEFAULT_ROI_INTERVAL: Final[float] = 800.0
+DEFAULT_INIT_FF_INTERVAL: Final[float] = 0.0
+
+
+class Schedule:
+    """The intervals of PeriodicROIManager, in M instructions."""
+
+    def __init__(
+        self,
+        ff_interval: float = DEFAULT_FF_INTERVAL,
+        warmup_interval: float = DEFAULT_WARMUP_INTERVAL,
+        roi_interval: float = DEFAULT_ROI_INTERVAL,
+        init_ff_interval: float = DEFAULT_INIT_FF_INTERVAL,
+    ) -> None:
+        """Initialize the schedule.
+
+        :param ff_interval The fast-forward interval between ROIs
+        :param warmup_interval The warmup interval before each ROI
+        :param roi_interval The ROI interval
+        :param init_ff_interval The initial fast-forward interval
+        """
+        self.ff_interval: Final[float] = ff_interval
+        self.warmup_interval: Final[float] = warmup_interval
+        self.roi_interval: Final[float] = roi_interval
+        self.init_ff_interval: Final[float] = init_ff_interval
+
+    @property
+    def period(self) -> float:
+        """The instructions from the start of one ROI's fast-forward to the
+        next's."""
+        return self.ff_interval + self.warmup_interval + self.roi_interval
+
+    @property
+    def detailed(self) -> float:
+        """The instructions simulated in detail per ROI (warmup included)."""
+        return self.warmup_interval + self.roi_interval
+
+    def args(self, num_rois: int) -> List[str]:
+        """Get the run-spec06-se-periodic.py arguments for the schedule.
+
+        :param num_rois The number of ROIs
+        :return The arguments
+        """
+        return [
+            f"--num-rois={num_rois}",
+            f"--ff-interval={self.ff_interval:g}",
+            f"--warmup-interval={self.warmup_interval:g}",
+            f"--roi-interval={self.roi_interval:g}",
+            f"--init-ff-interval={self.init_ff_interval:g}",
+        ]
+
+
+class Pilot:
+    """The per-ROI metric of a benchmark's pilot run."""
+
+    def __init__(self, benchmark: str, values: List[float], schedule: Schedule) -> None:
+        """Initialize the pilot.
+
+        :param benchmark The benchmark
+        :param values The metric of each of the pilot's ROIs
+        :param schedule The pilot's schedule
+        :raise ValueError If the pilot has fewer than two ROIs
+        """
+        if len(values) < 2:
+            raise ValueError(
+                f"The pilot of {benchmark} has {len(values)} ROI(s), at least "
+                "2 are needed to estimate their spread"
+            )
+        self.benchmark: Final[str] = benchmark
+        self.values: Final[List[float]] = values
+        self.schedule: Final[Schedule] = schedule
+
+    @classmethod
+    def load(
+        cls, benchmark: str, outdir: Path, metric: Metric, schedule: Schedule
+    ) -> "Pilot":
+        """Load a pilot from its gem5 output directory.
+
+        :param benchmark The benchmark
+        :param outdir The pilot's outdir
+        :param metric The metric
+        :param schedule The pilot's schedule
+        :return The pilot
+        :raise ValueError If the pilot has fewer than two ROIs
+        """
+        return cls(benchmark, metric.roi_values(load_roi_blocks(outdir)), schedule)
+
+    @property
+    def mean(self) -> float:
+        """The mean of the metric over the ROIs."""
+        return sum(self.values) / len(self.values)
+
+    @property
+    def std(self) -> float:
+        """The sample standard deviation of the metric over the ROIs."""
+        mean: Final[float] = self.mean
+        return math.sqrt(
+            sum((value - mean) ** 2 for value in self.values) / (len(self.values) - 1)
+        )
+
+    @property
+    def length(self) -> float:
+        """The instructions the pilot spanned, in M: the benchmark's length,
+        if the pilot ran until it ended."""
+        return self.schedule.init_ff_interval + len(self.values) * self.schedule.period
+
+    def spread(self, objective: str) -> float:
+        """Get the spread of the metric between ROIs for an objective.
+
+        :param objective One of OBJECTIVES
+        :return The standard deviation, relative to the mean for "geomean"
+        """
+        if objective == "geomean":
+            return self.std / self.mean if self.mean > 0 else 0.0
+        return self.std
+
+    def capacity(self, schedule: Schedule) -> int:
+        """Get the most ROIs of a schedule that fit in the benchmark.
+
+        :param schedule The schedule
+        :return The number of ROIs, back to back
+        """
+        return max(
+            int((self.length - schedule.init_ff_interval) // schedule.detailed), 1
+        )
+
+    def schedule_for(self, num_rois: int, schedule: Schedule) -> Schedule:
+        """Spread ROIs over the whole benchmark.
+
+        :param num_rois The number of ROIs
+        :param schedule The schedule to take the other intervals from
+        :return The schedule, with the fast-forward interval that spreads
+                the ROIs evenly
+        """
+        span: Final[float] = (
+            self.length - schedule.init_ff_interval
+        ) / num_rois - schedule.detailed
+        return Schedule(
+            max(float(f"{span:.6g}"), 0.0),
+            schedule.warmup_interval,
+            schedule.roi_interval,
+            schedule.init_ff_interval,
+        )
+
+
+def neyman_allocation(
+    spreads: List[float], total: int, lower: List[int], upper: List[int]
+) -> List[int]:
+    """Allocate samples across strata in proportion to their spreads.
+
+    Strata whose share falls outside their bounds get the bound, and the
+    rest of the samples are allocated across the others. Shares are
+    rounded by largest remainder.
+
+    :param spreads The spread of each stratum
+    :param total The number of samples to allocate
+    :param lower The fewest samples of each stratum
+    :param upper The most samples of each stratum
+    :return The samples of each stratum, summing to the total unless
+            that is more than all of the upper bounds
+    :raise ValueError If the total is less than the lower bounds
+    """
+    if sum(lower) > total:
+        raise ValueError(
+            f"{total} sample(s) are fewer than the minimum of {sum(lower)}"
+        )
+    shares: List[Optional[float]] = [None] * len(spreads)
+    remaining: float = total
+    while True:
+        free: List[int] = [i for i, share in enumerate(shares) if share is None]
+        if not free:
+            break
+        weight: float = sum(spreads[i] for i in free)
+        ideal: Dict[int, float] = {
+            i: remaining * (spreads[i] / weight if weight > 0 else 1 / len(free))
+            for i in free
+        }
+        above: List[int] = [i for i in free if ideal[i] > upper[i]]
+        below: List[int] = [i for i in free if ideal[i] < lower[i]]
+        if above:
+            for i in above:
+                shares[i] = float(upper[i])
+                remaining -= upper[i]
+        elif below:
+            for i in below:
+                shares[i] = float(lower[i])
+                remaining -= lower[i]
+        else:
+            for i in free:
+                shares[i] = ideal[i]
+            break
+
+    counts: List[int] = [math.floor(share or 0.0) for share in shares]
+    by_remainder: Final[List[int]] = sorted(
+        range(len(counts)), key=lambda i: counts[i] - (shares[i] or 0.0)
+    )
+    for i in by_remainder:
+        if sum(counts) >= total:
+            break
+        if counts[i] < upper[i]:
+            counts[i] += 1
+    return counts
+
+
+def predicted_error(
+    pilots: List[Pilot], counts: List[int], schedule: Schedule, objective: str
+) -> float:
+    """Predict the relative standard error of the suite's mean metric.
+
+    :param pilots The benchmarks' pilots
+    :param counts The ROIs of each benchmark
+    :param schedule The schedule of the ROIs
+    :param objective One of OBJECTIVES
+    :return The standard error, relative to the suite's mean
+    """
+    variance: float = 0.0
+    for pilot, count in zip(pilots, counts):
+        correction: float = max(1 - count / pilot.capacity(schedule), 0.0)
+        variance += pilot.spread(objective) ** 2 / count * correction
+    error: Final[float] = math.sqrt(variance) / len(pilots)
+    if objective == "geomean":
+        return error
+    mean: Final[float] = sum(pilot.mean for pilot in pilots) / len(pilots)
+    return error / mean if mean > 0 else math.inf
@@ -0,0 +1,1519 @@
+"""Asynchronous engine for running shell commands in parallel.
+
+Each command is spawned directly as a child process (rather than inside
+a pool worker), and its stdout/stderr are streamed to rotating per-job
+log files while it runs. The runner's memory use therefore stays flat
+no matter how much output a job produces, and completions are reported
+as soon as they happen.
+"""
+
+import asyncio
+import glob
+import os
+import re
+import signal
+import time
+from enum import Enum
+from pathlib import Path
+from typing import Any, Callable, Dict, FrozenSet, Final, List, Optional, Set, Tuple
+
+from util.affinity import CorePool, Placement
+from util.failures import (
+    Failure,
+    FailureClass,
+    FailureGroups,
+    GEM5_ERROR_FILES,
+    GEM5_OUTPUT_FILES,
+    classify,
+    gem5_log_paths,
+)
+from util.gem5_command import Gem5Command, command_signature, format_size, parse_size
+from util.history import JobHistory
+from util.lease_queue import DEFAULT_HEARTBEAT_INTERVAL, Lease, LeaseQueue
+from util.ledger import JobLedger
+from util.progress import DEFAULT_PROGRESS_INTERVAL, ProgressTracker, RoiPlan
+from util.resources import ResourceGate
+from util.result_cache import CACHED_FILES, CACHED_GLOBS, ResultCache
+from util.staging import StagedRun, read_archived_file, read_archived_files
+from util.stats import load_roi_blocks
+from util.telemetry import JobTelemetry, TelemetryLog
+
+# Per-job log rotation defaults
+DEFAULT_LOG_MAX_BYTES: Final[int] = 64 * 1024 * 1024
+DEFAULT_LOG_BACKUPS: Final[int] = 2
+
+# How long to wait after SIGINT before escalating to SIGKILL
+DEFAULT_KILL_GRACE: Final[float] = 30.0
+
+# Size of each read from a job's stdout/stderr pipe
+READ_CHUNK_SIZE: Final[int] = 64 * 1024
+
+# How often to look for new or requeued work in a lease queue, in seconds
+QUEUE_POLL_INTERVAL: Final[float] = 10.0
+
+# How often to sample a running job's processes, in seconds
+SAMPLE_INTERVAL: Final[float] = 5.0
+
+# Memory a gem5 process uses on top of its simulated memory
+GEM5_BASE_MEMORY: Final[int] = 512 * 1024**2
+
+# Margin added to a job's memory use learned from earlier runs
+LEARNED_MEMORY_MARGIN: Final[float] = 1.1
+
+# By how much a timed-out job's timeout grows when it is requeued
+DEFAULT_TIMEOUT_SCALE: Final[float] = 2.0
+
+# How often to retry a job that failed transiently (e.g., an OOM kill or
+# an NFS error), and how long to wait before the first retry, in seconds.
+# The wait doubles with every retry.
+DEFAULT_MAX_RETRIES: Final[int] = 2
+DEFAULT_RETRY_BACKOFF: Final[float] = 60.0
+
+# By how much an OOM-killed job's memory estimate grows when it is retried
+OOM_MEMORY_SCALE: Final[float] = 2.0
+
+# How many jobs may fail with the same fatal error before jobs configured
+# like them are no longer started
+DEFAULT_FATAL_THRESHOLD: Final[int] = 5
+
+# Separates a command from its annotations in a command file, e.g.
+#   <command>  #@ mem=4GiB cpus=1 timeout=12h
+ANNOTATION_MARKER: Final[re.Pattern] = re.compile(r"\s#@\s*")
+
+# Annotations a command may carry
+ANNOTATION_KEYS: Final[List[str]] = [
+    "mem",  # Estimated peak memory use, e.g. 4GiB
+    "cpus",  # Number of CPUs the command keeps busy
+    "timeout",  # Wall-clock limit, e.g. 90m or 12h
+    "id",  # Name other commands can depend on
+    "after",  # Comma-separated IDs of the commands to wait for
+    "foreach",  # Glob pattern to run the command once per match of
+]
+
+# What a job ID may consist of
+JOB_ID_PATTERN: Final[re.Pattern] = re.compile(r"[A-Za-z0-9_.-]+")
+
+# Placeholders replaced in the commands fanned out by "foreach"
+ITEM_PLACEHOLDER: Final[str] = "{item}"  # The matching path
+NAME_PLACEHOLDER: Final[str] = "{name}"  # Its last component
+
+DURATION_UNITS: Final[Dict[str, int]] = {
+    "": 1,
+    "s": 1,
+    "m": 60,
+    "h": 60 * 60,
+    "d": 24 * 60 * 60,
+}
+
+
+def parse_duration(duration: str) -> float:
+    """Parse a duration such as "90m", "12h" or "3600" into seconds.
+
+    :param duration The duration string (a bare number is in seconds)
+    :return The duration in seconds
+    :raise ValueError If the duration cannot be parsed
+    """
+    match = re.fullmatch(r"\s*([0-9.]+)\s*([a-zA-Z]*)\s*", duration)
+    if match is None or match.group(2).lower() not in DURATION_UNITS:
+        raise ValueError(f"Invalid duration: {duration}")
+    return float(match.group(1)) * DURATION_UNITS[match.group(2).lower()]
+
+
+def format_duration(seconds: float) -> str:
+    """Format a number of seconds for humans.
+
+    :param seconds The duration in seconds
+    :return The formatted duration
+    """
+    for unit in ["d", "h", "m"]:
+        if seconds >= DURATION_UNITS[unit]:
+            return f"{seconds / DURATION_UNITS[unit]:.1f}{unit}"
+    return f"{seconds:.1f}s"
+
+
+def read_command_file(command_file: Path) -> List[str]:
+    """Read the commands from a command .txt file
+
+    :param command_file The path to the command file
+    :return The list of commands
+    :raise FileNotFoundError If the file does not exist
+    """
+    # Read the file
+    if not command_file.exists():
+        raise FileNotFoundError(f"Command file {command_file} does not exist.")
+
+    commands: List[str] = []
+    with command_file.open("rt") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                commands.append(line)
+    return commands
+
+
+class Job:
+    """A single command to be run by the ParallelRunner."""
+
+    def __init__(
+        self, cmd: str, index: int, annotations: Optional[Dict[str, str]] = None
+    ) -> None:
+        """Initialize the job.
+
+        :param cmd The shell command to run
+        :param index The position of the command in its command file
+        :param annotations The command's annotations (see ANNOTATION_KEYS)
+        :raise ValueError If an annotation is unknown or invalid
+        """
+        self.cmd: Final[str] = cmd.strip()
+        self.index: Final[int] = index
+        self.annotations: Final[Dict[str, str]] = annotations or {}
+
+        for key in self.annotations:
+            if key not in ANNOTATION_KEYS:
+                raise ValueError(f"Unknown annotation '{key}' on command: {cmd}")
+
+        self.id: str = self.annotations.get("id", f"job{index:04d}")
+        if not JOB_ID_PATTERN.fullmatch(self.id):
+            raise ValueError(f"Invalid job ID '{self.id}' on command: {cmd}")
+        self.after: Final[List[str]] = [
+            dep for dep in self.annotations.get("after", "").split(",") if dep
+        ]
+        self.foreach: Final[Optional[str]] = self.annotations.get("foreach")
+
+        self.mem: Optional[int] = (
+            parse_size(self.annotations["mem"]) if "mem" in self.annotations else None
+        )
+        self.cpus: Final[int] = int(self.annotations.get("cpus", 1))
+        self.timeout: Optional[float] = (
+            parse_duration(self.annotations["timeout"])
+            if "timeout" in self.annotations
+            else None
+        )
+
+        # The number of earlier attempts of the job, and of those, the
+        # number that timed out and that failed transiently
+        self.retries: int = 0
+        self.timeouts: int = 0
+        self.failures: int = 0
+
+        # Parsed lazily
+        self._signature: Optional[str] = None
+        self._gem5_command: Optional[Gem5Command] = None
+        self._parsed: bool = False
+
+    @classmethod
+    def from_line(cls, line: str, index: int) -> "Job":
+        """Create a job from a command file line.
+
+        Annotations follow the command after a "#@" marker, as
+        whitespace-separated key=value pairs. To the shell they are just
+        a comment, so annotated lines can still be run by hand.
+
+        :param line The line of the command file
+        :param index The position of the command in its command file
+        :return The job
+        :raise ValueError If an annotation is malformed
+        """
+        parts: List[str] = ANNOTATION_MARKER.split(line, maxsplit=1)
+        annotations: Dict[str, str] = {}
+        if len(parts) > 1:
+            for token in parts[1].split():
+                key, sep, value = token.partition("=")
+                if not sep:
+                    raise ValueError(f"Malformed annotation '{token}' in: {line}")
+                annotations[key] = value
+        return cls(parts[0], index, annotations)
+
+    @property
+    def gem5_command(self) -> Optional[Gem5Command]:
+        """The job's command parsed as a gem5 command, if it is one."""
+        if not self._parsed:
+            self._gem5_command = Gem5Command.parse(self.cmd)
+            self._parsed = True
+        return self._gem5_command
+
+    @property
+    def outdir(self) -> Optional[Path]:
+        """The gem5 output directory of the job, if it runs gem5."""
+        return self.gem5_command.outdir if self.gem5_command else None
+
+    @property
+    def signature(self) -> str:
+        """The signature of the job's command."""
+        if self._signature is None:
+            self._signature = command_signature(self.cmd)
+        return self._signature
+
+    @property
+    def config(self) -> FrozenSet[str]:
+        """The options configuring the job's simulation, if it runs gem5."""
+        if self.gem5_command is None:
+            return frozenset()
+        return frozenset(self.gem5_command.config_options())
+
+    def retry_state(self) -> Dict[str, Any]:
+        """Get what the job's next attempt needs to know about this one.
+
+        :return The job's timeout, memory estimate and attempt counts
+        """
+        return {
+            "timeout": self.timeout,
+            "mem": self.mem,
+            "timeouts": self.timeouts,
+            "failures": self.failures,
+        }
+
+    def restore_retry_state(self, state: Dict[str, Any]) -> None:
+        """Pick up where the job's last attempt left off.
+
+        :param state The state from retry_state()
+        """
+        self.timeout = state.get("timeout", self.timeout)
+        self.mem = state.get("mem", self.mem)
+        self.timeouts = state.get("timeouts", 0)
+        self.failures = state.get("failures", 0)
+
+    def expand(self) -> List["Job"]:
+        """Fan a "foreach" job out into one job per matching path.
+
+        Each job runs the command with {item} replaced by the path and
+        {name} by its last component, and keeps the other annotations.
+        The jobs' IDs are <id>-000, <id>-001, ... in path order.
+
+        :return The jobs (empty if nothing matches)
+        """
+        assert self.foreach is not None
+        annotations: Final[Dict[str, str]] = {
+            key: value
+            for key, value in self.annotations.items()
+            if key not in ["id", "after", "foreach"]
+        }
+        jobs: List[Job] = []
+        for i, item in enumerate(sorted(glob.glob(self.foreach))):
+            cmd: str = self.cmd.replace(ITEM_PLACEHOLDER, item).replace(
+                NAME_PLACEHOLDER, Path(item).name
+            )
+            job = Job(cmd, self.index, annotations)
+            job.id = f"{self.id}-{i:03d}"
+            jobs.append(job)
+        return jobs
+
+    def __str__(self) -> str:
+        return f"Job(id={self.id}, cmd={self.cmd})"
+
+
+class JobStatus(Enum):
+    """How a job ended. The values are also the job's ledger state."""
+
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    INTERRUPTED = "interrupted"
+    SKIPPED = "skipped"  # already succeeded in an earlier run
+    TIMEOUT = "timeout"  # stopped after running out of time
+    BLOCKED = "blocked"  # not run, because a job it depends on failed
+    CACHED = "cached"  # not run, its results were copied from the cache
+
+
+class JobResult:
+    """The outcome of running a Job."""
+
+    def __init__(
+        self,
+        job: Job,
+        returncode: int,
+        wall_time: float,
+        status: Optional[JobStatus] = None,
+        telemetry: Optional[JobTelemetry] = None,
+        reason: Optional[str] = None,
+    ) -> None:
+        """Initialize the result.
+
+        :param job The job that was run
+        :param returncode The return code of the job's process
+        :param wall_time The wall-clock time the job took, in seconds
+        :param status How the job ended (default: from the return code)
+        :param telemetry The job's telemetry, if it was sampled
+        :param reason Why the job did not run, if it didn't
+        """
+        self.job: Final[Job] = job
+        self.returncode: Final[int] = returncode
+        self.wall_time: Final[float] = wall_time
+        self.telemetry: Final[Optional[JobTelemetry]] = telemetry
+        self.reason: Final[Optional[str]] = reason
+        self.status: JobStatus = status or (
+            JobStatus.SUCCEEDED if returncode == 0 else JobStatus.FAILED
+        )
+
+        # Why the job failed, if it did
+        self.failure: Optional[Failure] = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.status in [
+            JobStatus.SUCCEEDED,
+            JobStatus.SKIPPED,
+            JobStatus.CACHED,
+        ]
+
+    @property
+    def peak_rss(self) -> Optional[int]:
+        """The job's peak RSS in bytes, if it was sampled."""
+        if self.telemetry is None or not self.telemetry.peak_rss:
+            return None
+        return self.telemetry.peak_rss
+
+    def __str__(self) -> str:
+        return (
+            f"JobResult(job={self.job.id}, status={self.status.value}, "
+            f"returncode={self.returncode}, wall_time={self.wall_time:.2f})"
+        )
+
+
+def estimate_memory(
+    job: Job,
+    history: Optional[JobHistory] = None,
+    default_mem: Optional[int] = None,
+) -> int:
+    """Estimate a job's peak memory use.
+
+    In order of preference, the estimate is the job's annotation, the
+    peak seen for its signature in the history, the size of the memory
+    simulated by its gem5 config script, or the default.
+
+    :param job The job
+    :param history The history to look the job's signature up in
+    :param default_mem The estimate for jobs nothing is known about
+    :return The estimated peak memory use, in bytes
+    """
+    if job.mem is not None:
+        return job.mem
+
+    if history is not None:
+        peak_rss: Optional[int] = history.peak_rss(job.signature)
+        if peak_rss is not None:
+            return int(peak_rss * LEARNED_MEMORY_MARGIN)
+
+    if job.gem5_command is not None:
+        simulated_memory: Optional[int] = job.gem5_command.simulated_memory_size()
+        if simulated_memory is not None:
+            return simulated_memory + GEM5_BASE_MEMORY
+
+    return default_mem or GEM5_BASE_MEMORY
+
+
+def check_dependencies(jobs: List[Job]) -> None:
+    """Check that the dependencies between jobs form a DAG.
+
+    :param jobs The jobs
+    :raise ValueError If job IDs are repeated, a job depends on an unknown
+                      job, or the dependencies have a cycle
+    """
+    by_id: Final[Dict[str, Job]] = {}
+    for job in jobs:
+        if job.id in by_id:
+            raise ValueError(f"Job ID '{job.id}' is used by more than one command")
+        by_id[job.id] = job
+    for job in jobs:
+        for dep in job.after:
+            if dep not in by_id:
+                raise ValueError(f"Job {job.id} depends on unknown job '{dep}'")
+
+    # Depth-first search, looking for a job that is still on the stack
+    visiting: Set[str] = set()
+    done: Set[str] = set()
+
+    def visit(job_id: str, path: List[str]) -> None:
+        if job_id in done:
+            return
+        if job_id in visiting:
+            cycle: List[str] = path[path.index(job_id) :] + [job_id]
+            raise ValueError(f"Dependency cycle: {' -> '.join(cycle)}")
+        visiting.add(job_id)
+        for dep in by_id[job_id].after:
+            visit(dep, path + [job_id])
+        visiting.discard(job_id)
+        done.add(job_id)
+
+    for job in jobs:
+        visit(job.id, [])
+
+
+def schedule_longest_first(jobs: List[Job], history: JobHistory) -> List[Job]:
+    """Order jobs longest-expected-first (LPT), to shrink the makespan.
+
+    Each job's expected runtime is the mean wall time of earlier runs
+    with the same signature. Jobs that have never been timed keep their
+    file order and go first: their runtime is unknown, so starting them
+    early keeps a long one from ending up in the tail.
+
+    :param jobs The jobs, in file order
+    :param history The history to take runtimes from
+    :return The jobs in the order to start them
+    """
+    unknown: List[Job] = []
+    known: List[Tuple[float, Job]] = []
+    for job in jobs:
+        runtime: Optional[float] = history.expected_runtime(job.signature)
+        if runtime is None:
+            unknown.append(job)
+        else:
+            known.append((runtime, job))
+
+    # sorted() is stable, so equally long jobs keep their file order
+    known = sorted(known, key=lambda runtime_job: -runtime_job[0])
+    return unknown + [job for _, job in known]
+
+
+class RotatingLog:
+    """A byte-oriented log file that rotates once it grows too large.
+
+    When the log exceeds max_bytes, <path> is renamed to <path>.1,
+    <path>.1 to <path>.2, and so on, keeping at most <backups> old
+    files around.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        max_bytes: int = DEFAULT_LOG_MAX_BYTES,
+        backups: int = DEFAULT_LOG_BACKUPS,
+    ) -> None:
+        """Initialize the log, truncating any existing file at path.
+
+        :param path The path to the log file
+        :param max_bytes The size at which to rotate the log (0 = never)
+        :param backups The number of rotated files to keep
+        """
+        self.path: Final[Path] = path
+        self._max_bytes: Final[int] = max_bytes
+        self._backups: Final[int] = backups
+        self._file = path.open("wb")
+        self._size: int = 0
+
+    def write(self, data: bytes) -> None:
+        """Append data to the log, rotating it if needed.
+
+        :param data The bytes to append
+        """
+        if self._max_bytes > 0 and self._size + len(data) > self._max_bytes:
+            self._rotate()
+        self._file.write(data)
+        self._file.flush()
+        self._size += len(data)
+
+    def close(self) -> None:
+        """Close the log."""
+        self._file.close()
+
+    def _rotate(self) -> None:
+        """Shift the current and old log files down by one."""
+        self._file.close()
+        if self._backups > 0:
+            for i in range(self._backups - 1, 0, -1):
+                older = Path(f"{self.path}.{i}")
+                if older.exists():
+                    older.replace(f"{self.path}.{i + 1}")
+            self.path.replace(f"{self.path}.1")
+        self._file = self.path.open("wb")
+        self._size = 0
+
+
+async def _pump(stream: Optional[asyncio.StreamReader], log: RotatingLog) -> None:
+    """Copy a child process' output stream to a log until EOF.
+
+    :param stream The stream to read from
+    :param log The log to write to
+    """
+    if stream is None:
+        return
+    while True:
+        chunk: bytes = await stream.read(READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        log.write(chunk)
+
+
+async def stop_process(
+    process: asyncio.subprocess.Process, grace: float = DEFAULT_KILL_GRACE
+) -> None:
+    """Stop a job's process group, politely at first.
+
+    SIGINT is sent first so that gem5 can flush its current stats block.
+    If the process has not exited after <grace> seconds, it is killed.
+
+    :param process The process to stop (must lead its own process group)
+    :param grace Seconds to wait between SIGINT and SIGKILL
+    """
+    for sig in (signal.SIGINT, signal.SIGKILL):
+        try:
+            os.killpg(process.pid, sig)
+        except ProcessLookupError:
+            return
+        try:
+            await asyncio.wait_for(process.wait(), grace)
+            return
+        except asyncio.TimeoutError:
+            pass
+
+
+def _pin(cpus: List[int]) -> Callable[[], None]:
+    """Make a function that pins the calling process to some CPUs.
+
+    It runs in the child between fork and exec, so the job and all of
+    its descendants inherit the affinity from the start.
+
+    :param cpus The CPUs
+    :return The function
+    """
+    return lambda: os.sched_setaffinity(0, cpus)
+
+
+class ParallelRunner:
+    """Run jobs concurrently, with at most <num_workers> at once."""
+
+    def __init__(
+        self,
+        num_workers: int = 1,
+        log_dir: Optional[Path] = None,
+        log_max_bytes: int = DEFAULT_LOG_MAX_BYTES,
+        log_backups: int = DEFAULT_LOG_BACKUPS,
+        kill_grace: float = DEFAULT_KILL_GRACE,
+        gate: Optional[ResourceGate] = None,
+        history: Optional[JobHistory] = None,
+        default_mem: Optional[int] = None,
+        ledger: Optional[JobLedger] = None,
+        resume: bool = True,
+        verify_stats: bool = False,
+        longest_first: bool = False,
+        core_pool: Optional[CorePool] = None,
+        numa_bind: bool = False,
+        stage_dir: Optional[Path] = None,
+        telemetry_log: Optional[TelemetryLog] = None,
+        default_timeout: Optional[float] = None,
+        requeue_timeouts: int = 0,
+        timeout_scale: float = DEFAULT_TIMEOUT_SCALE,
+        max_retries: int = 0,
+        retry_backoff: float = DEFAULT_RETRY_BACKOFF,
+        fatal_threshold: int = 0,
+        progress: Optional[ProgressTracker] = None,
+        progress_interval: float = DEFAULT_PROGRESS_INTERVAL,
+        cache: Optional[ResultCache] = None,
+    ) -> None:
+        """Initialize the runner.
+
+        :param num_workers The maximum number of jobs to run at once
+        :param log_dir The directory to write per-job logs to. If None,
+                       job output is discarded.
+        :param log_max_bytes The size at which to rotate each log
+        :param log_backups The number of rotated logs to keep per job
+        :param kill_grace Seconds to wait between SIGINT and SIGKILL
+                          when stopping a job
+        :param gate If set, only start jobs when the gate admits them
+        :param history If set, estimate jobs' memory use and runtime from
+                       this history, and record what they use in it
+        :param default_mem The memory estimate for jobs nothing is known
+                           about, in bytes
+        :param ledger If set, record each job's state in this ledger
+        :param resume If True, skip jobs the ledger says already succeeded
+        :param verify_stats If True, only count a gem5 job as succeeded if
+                            its outdir has a stats.txt with ROI blocks
+        :param longest_first If True (and a history is set), start jobs
+                             longest-expected-first instead of in order
+        :param core_pool If set, pin each job to cores of its own from
+                         this pool, waiting for them to be free
+        :param numa_bind If True (and a core pool is set), also bind each
+                         job's memory to its cores' NUMA node
+        :param stage_dir If set, run gem5 jobs with their input checkpoint
+                         and outdir in this local scratch directory, and
+                         move each outdir back as <outdir>.tar.gz
+        :param telemetry_log If set, sample each job's processes and
+                             append a summary of them to this log
+        :param default_timeout The timeout of jobs without a timeout
+                               annotation, in seconds (None = no limit)
+        :param requeue_timeouts How many times to requeue a job that timed
+                                out, at the back of the queue
+        :param timeout_scale What to multiply a requeued job's timeout by
+        :param max_retries How many times to retry a job that failed
+                           transiently (see util.failures)
+        :param retry_backoff Seconds to wait before a job's first retry,
+                             doubled for every further retry
+        :param fatal_threshold Once this many jobs have failed with the
+                               same fatal error, don't start jobs with
+                               the configuration options they all share
+                               (0 = never)
+        :param progress If set, follow the progress of jobs through their
+                        output, and write a snapshot of it periodically
+        :param progress_interval Seconds between progress snapshots
+        :param cache If set, copy the results of gem5 jobs simulated before
+                     from this cache instead of running them, and add the
+                     results of the ones that succeed to it
+        """
+        if num_workers < 1:
+            raise ValueError(f"num_workers must be positive, was {num_workers}")
+
+        self.num_workers: Final[int] = num_workers
+        self.log_dir: Final[Optional[Path]] = log_dir
+        self._log_max_bytes: Final[int] = log_max_bytes
+        self._log_backups: Final[int] = log_backups
+        self._kill_grace: Final[float] = kill_grace
+        self._gate: Final[Optional[ResourceGate]] = gate
+        self._history: Final[Optional[JobHistory]] = history
+        self._default_mem: Final[Optional[int]] = default_mem
+        self._ledger: Final[Optional[JobLedger]] = ledger
+        self._resume: Final[bool] = resume
+        self._verify_stats: Final[bool] = verify_stats
+        self._longest_first: Final[bool] = longest_first
+        self._core_pool: Final[Optional[CorePool]] = core_pool
+        self._numa_bind: Final[bool] = numa_bind
+        self._stage_dir: Final[Optional[Path]] = stage_dir
+        self._telemetry_log: Final[Optional[TelemetryLog]] = telemetry_log
+        self._default_timeout: Final[Optional[float]] = default_timeout
+        self._requeue_timeouts: Final[int] = requeue_timeouts
+        self._timeout_scale: Final[float] = timeout_scale
+        self._max_retries: Final[int] = max_retries
+        self._retry_backoff: Final[float] = retry_backoff
+        self._fatal_threshold: Final[int] = fatal_threshold
+        self._progress: Final[Optional[ProgressTracker]] = progress
+        self._progress_interval: Final[float] = progress_interval
+        self._cache: Final[Optional[ResultCache]] = cache
+
+        # The failures seen so far, the configurations of the jobs that
+        # failed and succeeded, and the configurations not to start
+        # (with the failure that condemned them)
+        self._failures: Final[FailureGroups] = FailureGroups()
+        self._failed_configs: Final[Dict[str, FrozenSet[str]]] = {}
+        self._succeeded_configs: Final[Set[FrozenSet[str]]] = set()
+        self._quarantine: Final[List[Tuple[FrozenSet[str], Failure]]] = []
+
+        # To be set in run()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._num_jobs: int = 0
+        self._num_finished: int = 0
+
+    def log_paths(self, job: Job) -> List[Path]:
+        """Get the paths of a job's stdout and stderr logs.
+
+        :param job The job
+        :return The [stdout, stderr] log paths (empty if not logging)
+        """
+        if self.log_dir is None:
+            return []
+        # Keep the logs of earlier attempts
+        name: Final[str] = job.id + (f".retry{job.retries}" if job.retries else "")
+        return [self.log_dir / f"{name}.out", self.log_dir / f"{name}.err"]
+
+    def estimate_memory(self, job: Job) -> int:
+        """Estimate a job's peak memory use (see estimate_memory()).
+
+        :param job The job
+        :return The estimated peak memory use, in bytes
+        """
+        return estimate_memory(job, self._history, self._default_mem)
+
+    def timeout(self, job: Job) -> Optional[float]:
+        """Get a job's wall-clock limit.
+
+        :param job The job
+        :return The timeout in seconds, or None if there is no limit
+        """
+        return job.timeout if job.timeout is not None else self._default_timeout
+
+    def _requeue_timeout(self, result: JobResult) -> Optional[float]:
+        """Decide whether to requeue a job, and with what timeout.
+
+        :param result The result of the job's last attempt
+        :return The job's timeout for its next attempt, or None if it is
+                not to be requeued
+        """
+        timeout: Final[Optional[float]] = self.timeout(result.job)
+        if (
+            result.status != JobStatus.TIMEOUT
+            or timeout is None
+            or result.job.timeouts >= self._requeue_timeouts
+        ):
+            return None
+        return timeout * self._timeout_scale
+
+    def _plan_retry(self, result: JobResult) -> Optional[float]:
+        """Decide whether to run a job again, and prepare it if so.
+
+        A job that timed out is requeued with a longer timeout (see
+        _requeue_timeout()). A job that failed transiently is retried
+        after a backoff that doubles with every retry, and if it was
+        OOM-killed, with a larger memory estimate.
+
+        :param result The result of the job's last attempt
+        :return Seconds to wait before the job's next attempt, or None if
+                it is not to run again
+        """
+        job: Final[Job] = result.job
+        new_timeout: Final[Optional[float]] = self._requeue_timeout(result)
+        if new_timeout is not None:
+            self._report_requeue(result, new_timeout)
+            job.timeout = new_timeout
+            job.timeouts += 1
+            job.retries += 1
+            return 0.0
+
+        failure: Final[Optional[Failure]] = result.failure
+        if (
+            failure is None
+            or not failure.failure_class.transient
+            or job.failures >= self._max_retries
+        ):
+            return None
+
+        if failure.failure_class == FailureClass.OOM:
+            job.mem = int(
+                max(self.estimate_memory(job), result.peak_rss or 0) * OOM_MEMORY_SCALE
+            )
+        delay: Final[float] = self._retry_backoff * 2**job.failures
+        self._report_retry(result, delay)
+        job.failures += 1
+        job.retries += 1
+        return delay
+
+    def _quarantined(self, job: Job) -> Optional[str]:
+        """Check whether a job is configured like jobs that failed fatally.
+
+        :param job The job
+        :return Why the job is not to be started, or None if it may be
+        """
+        for config, failure in self._quarantine:
+            if config <= job.config:
+                return (
+                    f"{len(self._failures.job_ids(failure))} commands "
+                    f"configured like it failed with {failure}"
+                )
+        return None
+
+    def _track_failure(self, result: JobResult) -> None:
+        """Count a finished job's failure, and quarantine its configuration
+        if too many jobs have failed with the same fatal error.
+
+        The quarantined configuration is the set of options shared by all
+        of the jobs that failed that way (empty if they share none, which
+        stops all further jobs), unless a job with those options succeeded.
+
+        :param result The result of the job
+        """
+        job: Final[Job] = result.job
+        if result.succeeded:
+            self._succeeded_configs.add(job.config)
+            return
+        if result.failure is None:
+            return
+
+        count: Final[int] = self._failures.add(job.id, result.failure)
+        self._failed_configs[job.id] = job.config
+        if (
+            result.failure.failure_class != FailureClass.FATAL
+            or self._fatal_threshold < 1
+            or count < self._fatal_threshold
+        ):
+            return
+
+        config: Final[FrozenSet[str]] = frozenset.intersection(
+            *(
+                self._failed_configs[job_id]
+                for job_id in self._failures.job_ids(result.failure)
+            )
+        )
+        if any(config <= succeeded for succeeded in self._succeeded_configs):
+            return
+        if any(quarantined <= config for quarantined, _ in self._quarantine):
+            return
+
+        self._quarantine.append((config, result.failure))
+        print(
+            f"{count} commands failed with {result.failure}; not starting "
+            + (
+                f"commands with {' '.join(sorted(config))}"
+                if config
+                else "any more commands"
+            )
+            + "."
+        )
+
+    async def run(self, jobs: List[Job]) -> List[JobResult]:
+        """Run a list of jobs until all have finished.
+
+        Jobs start in order, or longest-expected-first if enabled.
+
+        :param jobs The jobs to run
+        :return The result of each job, in the same order as jobs
+        """
+        if self.log_dir is not None:
+            self.log_dir.mkdir(parents=True, exist_ok=True)
+
+        self._semaphore = asyncio.Semaphore(self.num_workers)
+        self._num_jobs = len(jobs)
+        self._num_finished = 0
+
+        check_dependencies(jobs)
+
+        start_order: List[Job] = jobs
+        if self._longest_first and self._history is not None:
+            start_order = schedule_longest_first(jobs, self._history)
+
+        # asyncio.Semaphore wakes waiters in FIFO order, so jobs start
+        # in the order their tasks are created, or in the order their
+        # dependencies finish.
+        tasks: Dict[str, asyncio.Task] = {}
+        for job in start_order:
+            tasks[job.id] = asyncio.create_task(self._run_node(job, tasks))
+        tracker: Final[Optional[asyncio.Task]] = (
+            asyncio.create_task(self._track_progress())
+            if self._progress is not None
+            else None
+        )
+        try:
+            results: List[List[JobResult]] = await asyncio.gather(
+                *(tasks[job.id] for job in jobs)
+            )
+            return [result for job_results in results for result in job_results]
+        finally:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            if tracker is not None:
+                tracker.cancel()
+                self._write_progress()
+
+    async def submit(self, job: Job) -> JobResult:
+        """Run one more job, once a worker slot is free.
+
+        Unlike run(), jobs can be submitted one at a time while others
+        are running (see util.simulation). Cancelling the call stops the
+        job, or withdraws it if it hasn't started.
+
+        :param job The job to run (without dependencies)
+        :return The result of the job
+        :raise ValueError If the job has dependencies or fans out
+        """
+        if job.after or job.foreach is not None:
+            raise ValueError(f"Job {job.id} has dependencies, which submit() ignores")
+        if self._semaphore is None:
+            if self.log_dir is not None:
+                self.log_dir.mkdir(parents=True, exist_ok=True)
+            self._semaphore = asyncio.Semaphore(self.num_workers)
+
+        self._num_jobs += 1
+        return await self._run_job(job)
+
+    async def _run_node(
+        self, job: Job, tasks: Dict[str, asyncio.Task]
+    ) -> List[JobResult]:
+        """Run a job once the jobs it depends on have succeeded.
+
+        :param job The job
+        :param tasks The task running each job, by job ID
+        :return The result of the job, or of each job it fanned out into
+        """
+        for dep in job.after:
+            dep_results: List[JobResult] = await asyncio.shield(tasks[dep])
+            failed: List[JobResult] = [r for r in dep_results if not r.succeeded]
+            if failed:
+                return [self._block(job, failed[0].job)]
+
+        if job.foreach is None:
+            return [await self._run_job(job)]
+
+        fanned_out: Final[List[Job]] = job.expand()
+        if not fanned_out:
+            print(f"Command {job.id} failed: nothing matches {job.foreach}")
+            result = JobResult(job, 1, 0.0)
+            self._finish(job, result)
+            return [result]
+
+        print(f"Command {job.id} fans out into {len(fanned_out)} job(s).")
+        self._num_jobs += len(fanned_out) - 1
+        return list(await asyncio.gather(*(self._run_job(j) for j in fanned_out)))
+
+    def _block(self, job: Job, failed: Job) -> JobResult:
+        """Record that a job can't run because a dependency failed.
+
+        :param job The job
+        :param failed The dependency that failed
+        :return The result of the job
+        """
+        result: Final[JobResult] = JobResult(
+            job, 0, 0.0, status=JobStatus.BLOCKED, reason=f"{failed.id} failed"
+        )
+        if self._ledger is not None:
+            self._ledger.add(job.cmd)
+            self._ledger.finish(job.cmd, result.status.value)
+        self._num_finished += 1
+        self._report(result)
+        return result
+
+    async def run_queue(
+        self,
+        queue: LeaseQueue,
+        heartbeat_interval: float = DEFAULT_HEARTBEAT_INTERVAL,
+        poll_interval: float = QUEUE_POLL_INTERVAL,
+    ) -> List[JobResult]:
+        """Claim and run jobs from a shared lease queue until it drains.
+
+        A job is only claimed once a worker slot is free, so the other
+        runners sharing the queue can take what this one can't start.
+
+        :param queue The queue to take jobs from
+        :param heartbeat_interval Seconds between lease renewals
+        :param poll_interval Seconds between checks for new work
+        :return The results of the jobs this runner ran
+        """
+        if self.log_dir is not None:
+            self.log_dir.mkdir(parents=True, exist_ok=True)
+
+        self._semaphore = asyncio.Semaphore(self.num_workers)
+        self._num_jobs = 0
+        self._num_finished = 0
+
+        results: List[JobResult] = []
+        running: Set[asyncio.Task] = set()
+        heartbeat: Final[asyncio.Task] = asyncio.create_task(
+            self._heartbeat(queue, heartbeat_interval)
+        )
+        tracker: Final[Optional[asyncio.Task]] = (
+            asyncio.create_task(self._track_progress(queue))
+            if self._progress is not None
+            else None
+        )
+        try:
+            while True:
+                await self._semaphore.acquire()
+                queue.requeue_expired()
+                lease: Optional[Lease] = queue.claim()
+
+                if lease is None:
+                    self._semaphore.release()
+                    if not running and queue.drained():
+                        break
+                    # Wait for a job to finish, or for work to appear
+                    if running:
+                        await asyncio.wait(
+                            running,
+                            timeout=poll_interval,
+                            return_when=asyncio.FIRST_COMPLETED,
+                        )
+                    else:
+                        await asyncio.sleep(poll_interval)
+                    continue
+
+                self._num_jobs += 1
+                task = asyncio.create_task(self._run_lease(queue, lease, results))
+                running.add(task)
+                task.add_done_callback(running.discard)
+        finally:
+            heartbeat.cancel()
+            for task in list(running):
+                task.cancel()
+            await asyncio.gather(heartbeat, *running, return_exceptions=True)
+            if tracker is not None:
+                tracker.cancel()
+                self._write_progress(queue)
+
+        return results
+
+    async def _heartbeat(self, queue: LeaseQueue, interval: float) -> None:
+        """Renew this runner's leases until cancelled.
+
+        :param queue The queue holding the leases
+        :param interval Seconds between renewals
+        """
+        while True:
+            await asyncio.sleep(interval)
+            queue.heartbeat()
+
+    async def _track_progress(self, queue: Optional[LeaseQueue] = None) -> None:
+        """Write a progress snapshot periodically, until cancelled.
+
+        :param queue The queue jobs are claimed from, if any
+        """
+        while True:
+            await asyncio.sleep(self._progress_interval)
+            self._write_progress(queue)
+
+    def _write_progress(self, queue: Optional[LeaseQueue] = None) -> None:
+        """Read the running jobs' new output, and write a progress snapshot.
+
+        :param queue The queue jobs are claimed from, if any (its pending
+                     jobs are counted as this runner's)
+        """
+        assert self._progress is not None
+        self._progress.poll()
+        num_pending: int = (
+            queue.counts()["pending"]
+            if queue is not None
+            else self._num_jobs - self._num_finished - self._progress.num_running
+        )
+        self._progress.write(
+            self._progress.snapshot(max(num_pending, 0), self.num_workers)
+        )
+
+    async def _run_lease(
+        self, queue: LeaseQueue, lease: Lease, results: List[JobResult]
+    ) -> None:
+        """Run a claimed job in an already acquired worker slot.
+
+        :param queue The queue the job was claimed from
+        :param lease The lease on the job
+        :param results The list to append the job's result to
+        """
+        assert self._semaphore is not None
+        job: Final[Job] = Job.from_line(lease.line, lease.index)
+        job.retries = lease.retries
+        job.restore_retry_state(lease.state)
+        try:
+            result: JobResult = await self._run_in_slot(job)
+        except asyncio.CancelledError:
+            # Let another runner have it
+            queue.release(lease)
+            raise
+        finally:
+            self._semaphore.release()
+
+        delay: Optional[float] = self._plan_retry(result)
+        if delay is not None:
+            # Keep the lease through the backoff, so no other runner
+            # retries the job sooner
+            self._num_jobs -= 1
+            try:
+                await asyncio.sleep(delay)
+            finally:
+                queue.retry(lease, job.retry_state())
+            return
+
+        queue.complete(
+            lease,
+            result.succeeded,
+            {
+                "status": result.status.value,
+                "returncode": result.returncode,
+                "wall_time": result.wall_time,
+                "failure": str(result.failure) if result.failure else None,
+            },
+        )
+        self._finish(job, result)
+        results.append(result)
+
+    async def _run_job(self, job: Job) -> JobResult:
+        """Wait for a free worker slot, then run a job.
+
+        :param job The job to run
+        :return The result of the job
+        """
+        assert self._semaphore is not None
+
+        if self._ledger is not None:
+            self._ledger.add(job.cmd)
+            if (
+                self._resume
+                and self._ledger.state(job.cmd) == JobStatus.SUCCEEDED.value
+            ):
+                result = JobResult(job, 0, 0.0, status=JobStatus.SKIPPED)
+                self._num_finished += 1
+                self._report(result)
+                return result
+
+        while True:
+            async with self._semaphore:
+                result = await self._run_in_slot(job)
+
+            delay: Optional[float] = self._plan_retry(result)
+            if delay is None:
+                break
+
+            # Waiting for the semaphore again puts the job at the back
+            # of the queue
+            if self._ledger is not None:
+                self._ledger.finish(
+                    job.cmd, result.status.value, result.returncode, result.wall_time
+                )
+            await asyncio.sleep(delay)
+
+        self._finish(job, result)
+        return result
+
+    async def _run_in_slot(self, job: Job) -> JobResult:
+        """Run a job in a worker slot the caller holds.
+
+        :param job The job to run
+        :return The result of the job
+        """
+        reason: Final[Optional[str]] = self._quarantined(job)
+        if reason is not None:
+            return JobResult(job, 0, 0.0, status=JobStatus.BLOCKED, reason=reason)
+
+        # Hashing the inputs may read large files, so it runs in a thread
+        loop: Final[asyncio.AbstractEventLoop] = asyncio.get_running_loop()
+        cache_key: Optional[str] = None
+        if (
+            self._cache is not None
+            and job.gem5_command is not None
+            and job.outdir is not None
+        ):
+            cache_key = await loop.run_in_executor(
+                None, self._cache.key, job.gem5_command
+            )
+            if cache_key is not None and await loop.run_in_executor(
+                None, self._cache.restore, cache_key, job.outdir
+            ):
+                return JobResult(job, 0, 0.0, status=JobStatus.CACHED)
+
+        if self._gate is not None:
+            await self._gate.admit(job.id, self.estimate_memory(job), job.cpus)
+        if self._ledger is not None:
+            self._ledger.start(job.cmd, job.outdir)
+        try:
+            result: JobResult = await self._execute(job)
+        except asyncio.CancelledError:
+            if self._ledger is not None:
+                self._ledger.finish(job.cmd, JobStatus.INTERRUPTED.value)
+            raise
+        finally:
+            if self._gate is not None:
+                self._gate.release(job.id)
+
+        if self._verify_stats and result.succeeded and job.outdir is not None:
+            if not load_roi_blocks(job.outdir):
+                print(
+                    f"Command {job.id} exited cleanly but {job.outdir} has no ROI stats."
+                )
+                result.status = JobStatus.FAILED
+
+        if result.status == JobStatus.FAILED:
+            result.failure = self._classify(result)
+        elif result.status == JobStatus.SUCCEEDED and cache_key is not None:
+            await loop.run_in_executor(None, self._cache_results, job, cache_key)
+        return result
+
+    def _cache_results(self, job: Job, cache_key: str) -> None:
+        """Add a succeeded job's results to the cache.
+
+        :param job The job
+        :param cache_key The job's cache key
+        """
+        assert self._cache is not None and job.outdir is not None
+        files: Dict[str, bytes] = {}
+        for name in CACHED_FILES:
+            if self._stage_dir is not None:
+                # Moved back as an archive
+                contents: Optional[str] = read_archived_file(job.outdir, name)
+                if contents is not None:
+                    files[name] = contents.encode()
+            elif (job.outdir / name).is_file():
+                files[name] = (job.outdir / name).read_bytes()
+        for pattern in CACHED_GLOBS:
+            if self._stage_dir is not None:
+                for name, text in read_archived_files(job.outdir, pattern).items():
+                    files[name] = text.encode()
+            else:
+                for path in job.outdir.glob(pattern):
+                    files[str(path.relative_to(job.outdir))] = path.read_bytes()
+        if "stats.txt" not in files:
+            return
+        try:
+            self._cache.store(cache_key, files, job.signature)
+        except OSError as error:
+            print(f"Could not cache the results of {job.id}: {error}")
+
+    def _classify(self, result: JobResult) -> Failure:
+        """Work out why a job failed, from its exit status and logs.
+
+        :param result The result of the job
+        :return The failure
+        """
+        job: Final[Job] = result.job
+        if result.returncode == 0:
+            return Failure(FailureClass.ERROR, f"no ROI stats in {job.outdir}")
+        # gem5 prints panics and fatal errors to stderr
+        logs: Final[List[Path]] = self.log_paths(job)
+        return classify(
+            result.returncode,
+            logs[1:] + gem5_log_paths(job.outdir, GEM5_ERROR_FILES),
+            logs[:1] + gem5_log_paths(job.outdir, GEM5_OUTPUT_FILES),
+        )
+
+    def _finish(self, job: Job, result: JobResult) -> None:
+        """Record and report a finished job.
+
+        :param job The job
+        :param result The result of the job
+        """
+        if self._ledger is not None:
+            self._ledger.finish(
+                job.cmd, result.status.value, result.returncode, result.wall_time
+            )
+
+        if self._history is not None and result.status == JobStatus.SUCCEEDED:
+            self._history.record(
+                job.signature, peak_rss=result.peak_rss, wall_time=result.wall_time
+            )
+
+        if self._telemetry_log is not None and result.telemetry is not None:
+            self._telemetry_log.append(
+                {
+                    "job": job.id,
+                    "command": job.cmd,
+                    "signature": job.signature,
+                    "status": result.status.value,
+                    "returncode": result.returncode,
+                    "failure": str(result.failure) if result.failure else None,
+                    "wall_time": result.wall_time,
+                    **result.telemetry.record(),
+                }
+            )
+
+        self._num_finished += 1
+        self._report(result)
+        self._track_failure(result)
+
+    async def _sample(self, job: Job, telemetry: JobTelemetry) -> None:
+        """Sample a running job's processes until it is cancelled.
+
+        :param job The job
+        :param telemetry The job's telemetry
+        """
+        while True:
+            rss: int = telemetry.sample()
+            if self._gate is not None:
+                self._gate.update(job.id, rss)
+            await asyncio.sleep(SAMPLE_INTERVAL)
+
+    async def _execute(self, job: Job) -> JobResult:
+        """Spawn a job and stream its output to its logs until it exits.
+
+        :param job The job to run
+        :return The result of the job
+        """
+        loop: Final[asyncio.AbstractEventLoop] = asyncio.get_running_loop()
+        cmd: str = job.cmd
+
+        # Wait for cores before staging, so no scratch directory is held
+        # while waiting
+        placement: Optional[Placement] = None
+        if self._core_pool is not None:
+            placement = await self._core_pool.wait(job.id, job.cpus)
+
+        # Copy inputs to scratch, and point the outdir there (file
+        # copies run in a thread, so other jobs' logs keep flowing)
+        staged: Optional[StagedRun] = None
+        if self._stage_dir is not None and job.gem5_command is not None:
+            staged = StagedRun(job.gem5_command, self._stage_dir, job.id)
+            try:
+                cmd = await loop.run_in_executor(None, staged.stage_in)
+            except OSError as error:
+                print(f"Could not stage the inputs of {job.id}: {error}")
+                await loop.run_in_executor(None, staged.stage_out)
+                if self._core_pool is not None:
+                    self._core_pool.release(job.id)
+                return JobResult(job, 1, 0.0)
+
+        if placement is not None and self._numa_bind:
+            cmd = placement.wrap(cmd)
+
+        details: List[str] = []
+        if self._gate is not None:
+            details.append(
+                f"estimated {format_size(self.estimate_memory(job))}, "
+                f"{job.cpus} CPU(s)"
+            )
+        if placement is not None:
+            details.append(f"pinned to {placement}")
+        elif self._core_pool is not None:
+            details.append("not pinned, more cores than any NUMA node has")
+        if staged is not None:
+            details.append(f"staged in {staged.path}")
+        print(
+            f'Running command: "{job.cmd}"'
+            + (f" ({'; '.join(details)})" if details else "")
+        )
+
+        log_paths: Final[List[Path]] = self.log_paths(job)
+        logs: List[RotatingLog] = [
+            RotatingLog(path, self._log_max_bytes, self._log_backups)
+            for path in log_paths
+        ]
+        pipe = asyncio.subprocess.PIPE if logs else asyncio.subprocess.DEVNULL
+
+        start_time: Final[float] = time.monotonic()
+        try:
+            # Give each job its own process group, so signals reach
+            # gem5 even when it runs underneath a shell.
+            process = await asyncio.create_subprocess_shell(
+                cmd,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=pipe,
+                stderr=pipe,
+                start_new_session=True,
+                preexec_fn=_pin(placement.cpus) if placement is not None else None,
+            )
+            # Stop the job if it runs out of time
+            timed_out: List[bool] = [False]
+            timeout: Final[Optional[float]] = self.timeout(job)
+            timer: Optional[asyncio.Task] = None
+            if timeout is not None:
+                timer = asyncio.create_task(
+                    self._expire(job, process, timeout, timed_out)
+                )
+
+            # Follow the job's phases through its output
+            if self._progress is not None:
+                outdir: Optional[Path] = (
+                    staged.scratch_outdir if staged is not None else job.outdir
+                )
+                self._progress.start(
+                    job.id,
+                    job.cmd,
+                    job.signature,
+                    log_paths[:1] + ([outdir / "simout"] if outdir else []),
+                    RoiPlan.from_command(job.gem5_command),
+                )
+
+            # Sample the job's processes if anything needs it
+            telemetry: Optional[JobTelemetry] = None
+            sampler: Optional[asyncio.Task] = None
+            if (
+                self._gate is not None
+                or self._history is not None
+                or self._telemetry_log is not None
+            ):
+                telemetry = JobTelemetry(process.pid)
+                sampler = asyncio.create_task(self._sample(job, telemetry))
+
+            try:
+                if logs:
+                    await asyncio.gather(
+                        _pump(process.stdout, logs[0]),
+                        _pump(process.stderr, logs[1]),
+                    )
+                returncode: int = await process.wait()
+            except asyncio.CancelledError:
+                await stop_process(process, self._kill_grace)
+                if self._progress is not None:
+                    self._progress.finish(job.id, JobStatus.INTERRUPTED.value)
+                raise
+            finally:
+                if timer is not None:
+                    timer.cancel()
+                if sampler is not None:
+                    sampler.cancel()
+
+            result: JobResult = JobResult(
+                job,
+                returncode,
+                time.monotonic() - start_time,
+                status=JobStatus.TIMEOUT if timed_out[0] else None,
+                telemetry=telemetry,
+            )
+            # Before staging out, which removes the scratch simout
+            if self._progress is not None:
+                self._progress.finish(job.id, result.status.value)
+        finally:
+            for log in logs:
+                log.close()
+            if self._core_pool is not None:
+                self._core_pool.release(job.id)
+            if staged is not None:
+                await loop.run_in_executor(None, staged.stage_out)
+
+        return result
+
+    async def _expire(
+        self,
+        job: Job,
+        process: asyncio.subprocess.Process,
+        timeout: float,
+        timed_out: List[bool],
+    ) -> None:
+        """Stop a job once it has run for too long.
+
+        The job's output keeps being logged while it stops, so whatever
+        gem5 prints on SIGINT (e.g., its last stats dump) is not lost.
+
+        :param job The job
+        :param process The job's process
+        :param timeout Seconds the job may run for
+        :param timed_out A one-element list to set to True on timeout
+        """
+        await asyncio.sleep(timeout)
+        timed_out[0] = True
+        print(
+            f"Command {job.id} ran out of time ({format_duration(timeout)}), "
+            "stopping it."
+        )
+        await stop_process(process, self._kill_grace)
+
+    def _report(self, result: JobResult) -> None:
+        """Print a job's completion.
+
+        :param result The result of the job
+        """
+        progress: Final[str] = f"[{self._num_finished}/{self._num_jobs}]"
+        if result.status == JobStatus.SKIPPED:
+            print(f'{progress} Skipping already completed command: "{result.job.cmd}"')
+        elif result.status == JobStatus.CACHED:
+            print(
+                f"{progress} Copied the cached results of command to "
+                f'{result.job.outdir}: "{result.job.cmd}"'
+            )
+        elif result.status == JobStatus.BLOCKED:
+            print(
+                f'{progress} Not running command ({result.reason}): "{result.job.cmd}"'
+            )
+        elif result.status == JobStatus.TIMEOUT:
+            print(
+                f'{progress} Command timed out: "{result.job.cmd}" '
+                f"(after {format_duration(result.wall_time)})"
+            )
+        elif result.succeeded:
+            print(
+                f'{progress} Command completed: "{result.job.cmd}" '
+                f"({result.wall_time:.1f} s)"
+            )
+        else:
+            log_note: str = ""
+            if self.log_dir is not None:
+                log_note = f", see {self.log_paths(result.job)[1]}"
+            code_note: str = f"error code {result.returncode}"
+            failure_note: str = code_note
+            if result.failure is not None:
+                # An unclassified failure's message is already the exit code
+                failure_note = str(result.failure)
+                if code_note not in result.failure.message:
+                    failure_note += f"; {code_note}"
+            print(
+                f'{progress} Command failed: "{result.job.cmd}" '
+                f"({failure_note}{log_note})"
+            )
+
+    def _report_requeue(self, result: JobResult, timeout: float) -> None:
+        """Print that a timed-out job was requeued.
+
+        :param result The result of the job's last attempt
+        :param timeout The job's new timeout
+        """
+        print(
+            f"Command timed out, requeued with a {format_duration(timeout)} "
+            f'timeout: "{result.job.cmd}" (retry {result.job.timeouts + 1} of '
+            f"{self._requeue_timeouts})"
+        )
+
+    def _report_retry(self, result: JobResult, delay: float) -> None:
+        """Print that a job that failed transiently will be retried.
+
+        :param result The result of the job's last attempt
+        :param delay Seconds until the job is retried
+        """
+        mem_note: Final[str] = (
+            f", with {format_size(result.job.mem)}"
+            if self._gate is not None and result.job.mem is not None
+            else ""
+        )
+        print(
+            f"Command failed ({result.failure}), retrying in "
+            f'{format_duration(delay)}{mem_note}: "{result.job.cmd}" (retry '
+            f"{result.job.failures + 1} of {self._max_retries})"
+        )
@@ -0,0 +1,163 @@
+"""Two-level screening designs and their main effects.
+
+A Plackett-Burman design screens k factors (config script options, each
+at a low and a high level) in the smallest multiple of four runs above
+k, rather than the 2^k runs of a full factorial: 11 factors take 12
+runs. Every column of the design is balanced and orthogonal to every
+other, so the main effect of a factor (the mean response of the runs at
+its high level minus that of the runs at its low level) is estimated
+free of the other factors' main effects, although it is aliased with
+their two-factor interactions. Folding the design over (appending its
+mirror image) doubles the runs and frees main effects from those, too.
+
+Columns no factor was assigned to estimate nothing but noise, so their
+"effects" give the standard error of the factors' effects.
+"""
+
+from typing import Any, Dict, Final, List, Optional
+
+from util.campaign import Dimension
+
+# The first row of each Plackett-Burman design; the others are its cyclic
+# shifts, and a last row of all low levels (Plackett and Burman, 1946)
+PLACKETT_BURMAN_GENERATORS: Final[Dict[int, str]] = {
+    4: "++-",
+    8: "+++-+--",
+    12: "++-+++---+-",
+    16: "++++-+-++--+---",
+    20: "++--++++-+-+----++-",
+    24: "+++++-+-++--++--+-+----",
+}
+
+# A design: the level of each column in each run, -1 (low) or +1 (high)
+Design = List[List[int]]
+
+
+def _sylvester(num_runs: int) -> Design:
+    """Build a Sylvester Hadamard design, without its constant column.
+
+    :param num_runs The number of runs, a power of two
+    :return The design
+    """
+    matrix: Design = [[1]]
+    while len(matrix) < num_runs:
+        matrix = [row + row for row in matrix] + [
+            row + [-level for level in row] for row in matrix
+        ]
+    return [row[1:] for row in matrix]
+
+
+def plackett_burman(num_factors: int) -> Design:
+    """Build the smallest Plackett-Burman design for some factors.
+
+    Designs of up to 24 runs are the published ones; larger designs are
+    Sylvester's, whose run count is a power of two.
+
+    :param num_factors The number of factors
+    :return The design, with a column per factor followed by unassigned
+            columns (if any)
+    :raise ValueError If there are no factors
+    """
+    if num_factors < 1:
+        raise ValueError("A screening design needs at least one factor")
+    for num_runs, generator in sorted(PLACKETT_BURMAN_GENERATORS.items()):
+        if num_factors < num_runs:
+            first: List[int] = [1 if sign == "+" else -1 for sign in generator]
+            return [
+                first[-shift:] + first[:-shift] for shift in range(num_runs - 1)
+            ] + [[-1] * (num_runs - 1)]
+    num_runs: int = 2
+    while num_runs <= num_factors:
+        num_runs *= 2
+    return _sylvester(num_runs)
+
+
+def fold_over(design: Design) -> Design:
+    """Append a design's mirror image (every level flipped) to it.
+
+    :param design The design
+    :return The folded-over design
+    """
+    return design + [[-level for level in row] for row in design]
+
+
+class Factor:
+    """A screened config script option, at two levels."""
+
+    def __init__(self, dimension: Dimension) -> None:
+        """Initialize the factor from a campaign dimension: its first (or
+        smallest) level is the low level, its last (or largest) the high.
+
+        :param dimension The dimension
+        """
+        self.name: Final[str] = dimension.name
+        self.low: Final[Any] = dimension.value(0.0)
+        self.high: Final[Any] = dimension.value(1.0)
+
+    def level(self, sign: int) -> Any:
+        """Get the value of a level.
+
+        :param sign -1 for the low level, +1 for the high one
+        :return The value
+        """
+        return self.high if sign > 0 else self.low
+
+
+def design_points(factors: List[Factor], design: Design) -> List[Dict[str, Any]]:
+    """Get the config script options of each run of a design.
+
+    :param factors The factors, assigned to the design's first columns
+    :param design The design
+    :return The options of each run
+    """
+    return [
+        {
+            factor.name: factor.level(row[column])
+            for column, factor in enumerate(factors)
+        }
+        for row in design
+    ]
+
+
+def main_effects(design: Design, responses: List[Optional[float]]) -> List[float]:
+    """Compute the main effect of every column of a design.
+
+    Runs without a response (e.g. failed simulations) are left out, which
+    makes the effects only approximately orthogonal.
+
+    :param design The design
+    :param responses The response of each run, if any
+    :return The effect of each column: the mean response at its high
+            level minus the mean response at its low level
+    :raise ValueError If a column has no response at one of its levels
+    """
+    effects: List[float] = []
+    for column in range(len(design[0])):
+        high: List[float] = [
+            response
+            for row, response in zip(design, responses)
+            if response is not None and row[column] > 0
+        ]
+        low: List[float] = [
+            response
+            for row, response in zip(design, responses)
+            if response is not None and row[column] < 0
+        ]
+        if not high or not low:
+            raise ValueError(f"Column {column} has no response at one of its levels")
+        effects.append(sum(high) / len(high) - sum(low) / len(low))
+    return effects
+
+
+def standard_error(effects: List[float], num_factors: int) -> Optional[float]:
+    """Estimate the standard error of the factors' effects from the
+    effects of the unassigned columns.
+
+    :param effects The effect of every column
+    :param num_factors The number of factors (assigned to the first columns)
+    :return The standard error, or None if every column was assigned
+    """
+    dummies: Final[List[float]] = effects[num_factors:]
+    if not dummies:
+        return None
+    return (sum(effect**2 for effect in dummies) / len(dummies)) ** 0.5
@@ -0,0 +1,337 @@
+"""Pick SimPoint simulation points from basic-block vectors, and aggregate
+their stats.
+
+A benchmark's profile (see util/event_managers/simpoint/profile.py) has a
+basic-block vector (BBV) per fixed-length interval: how many instructions
+each basic block executed in it. Intervals with similar BBVs run the same
+code, and so behave alike. As in SimPoint 3 (Hamerly et al., 2005), the
+BBVs are normalized, randomly projected down to a few dimensions, and
+clustered by k-means for a range of k; the smallest k whose Bayesian
+information criterion (BIC) score is within a fraction of the best is
+kept. Each cluster's interval nearest its centroid is its simulation
+point, weighted by the fraction of the intervals in the cluster.
+
+A metric of the benchmark is then estimated from the points' stats alone
+(see Metric.weighted_value), so that a handful of detailed simulations
+stand in for the whole run.
+
+Profiles have at most tens of thousands of intervals, few enough for
+plain Python (with a sample of them clustered, when there are more than
+max_samples).
+"""
+
+import gzip
+import json
+import math
+import random
+from pathlib import Path
+from typing import Any, Dict, Final, List, Tuple
+
+# The number of dimensions BBVs are projected down to
+DEFAULT_DIMENSIONS: Final[int] = 15
+
+# The largest number of clusters tried
+DEFAULT_MAX_K: Final[int] = 30
+
+# The smallest k is kept whose BIC score is at least this fraction of the
+# way from the worst score to the best
+DEFAULT_BIC_THRESHOLD: Final[float] = 0.9
+
+# How many random seedings of k-means to try for each k
+DEFAULT_NUM_SEEDS: Final[int] = 5
+
+# The most intervals k-means is run on; the rest are only assigned to the
+# nearest cluster
+DEFAULT_MAX_SAMPLES: Final[int] = 5000
+
+# The most iterations of k-means
+MAX_ITERATIONS: Final[int] = 100
+
+# The names of the files gem5 and util/event_managers/simpoint write
+BBV_FILE_NAME: Final[str] = "simpoint.bb.gz"
+MANIFEST_FILE_NAME: Final[str] = "simpoints.json"
+
+# A sparse basic-block vector: the count of each basic block
+BBV = Dict[int, int]
+
+# A dense, projected vector
+Vector = List[float]
+
+
+def parse_bbvs(path: Path) -> List[BBV]:
+    """Parse the BBVs of gem5's SimPoint probe (or of Valgrind's exp-bbv).
+
+    Each interval is a line "T:<block>:<count> :<block>:<count> ...".
+
+    :param path The file, optionally gzipped
+    :return The BBV of each interval
+    """
+    opener = gzip.open if path.suffix == ".gz" else open
+    bbvs: List[BBV] = []
+    with opener(path, "rt") as file:  # type: ignore
+        for line in file:
+            if not line.startswith("T"):
+                continue
+            bbv: BBV = {}
+            for token in line[1:].split():
+                _, block, count = token.split(":")
+                bbv[int(block)] = bbv.get(int(block), 0) + int(count)
+            bbvs.append(bbv)
+    return bbvs
+
+
+def project(bbvs: List[BBV], dimensions: int, seed: int) -> List[Vector]:
+    """Normalize BBVs and randomly project them to a few dimensions.
+
+    Each block is projected onto a vector of uniform values in [-1, 1),
+    drawn from a generator seeded by the block, so that a projection
+    doesn't depend on which blocks the other intervals executed.
+
+    :param bbvs The BBVs
+    :param dimensions The number of dimensions to project to
+    :param seed The seed of the projection
+    :return The projected vectors
+    """
+    projections: Dict[int, Vector] = {}
+    vectors: List[Vector] = []
+    for bbv in bbvs:
+        total: float = sum(bbv.values()) or 1.0
+        vector: Vector = [0.0] * dimensions
+        for block, count in bbv.items():
+            if block not in projections:
+                rng: random.Random = random.Random(f"{seed}:{block}")
+                projections[block] = [rng.uniform(-1, 1) for _ in range(dimensions)]
+            weight: float = count / total
+            for d, value in enumerate(projections[block]):
+                vector[d] += weight * value
+        vectors.append(vector)
+    return vectors
+
+
+def _squared_distance(a: Vector, b: Vector) -> float:
+    return math.dist(a, b) ** 2
+
+
+def _nearest(vector: Vector, centroids: List[Vector]) -> Tuple[int, float]:
+    """Find the centroid nearest a vector.
+
+    :param vector The vector
+    :param centroids The centroids
+    :return The index of the nearest centroid, and its squared distance
+    """
+    distances: Final[List[float]] = [math.dist(vector, c) for c in centroids]
+    best: Final[int] = min(range(len(centroids)), key=distances.__getitem__)
+    return best, distances[best] ** 2
+
+
+class Clustering:
+    """A k-means clustering of vectors."""
+
+    def __init__(self, centroids: List[Vector], labels: List[int], sse: float) -> None:
+        """Initialize the clustering.
+
+        :param centroids The centroid of each cluster
+        :param labels The cluster of each vector
+        :param sse The sum of the squared distances of vectors to their
+                   centroids
+        """
+        self.centroids: Final[List[Vector]] = centroids
+        self.labels: Final[List[int]] = labels
+        self.sse: Final[float] = sse
+
+    @property
+    def k(self) -> int:
+        return len(self.centroids)
+
+    def bic(self, vectors: List[Vector]) -> float:
+        """Score the clustering by the Bayesian information criterion of
+        spherical Gaussian clusters (Pelleg and Moore, 2000).
+
+        :param vectors The vectors clustered
+        :return The score (higher is better)
+        """
+        r: Final[int] = len(vectors)
+        m: Final[int] = len(vectors[0])
+        k: Final[int] = self.k
+        if r <= k:
+            return -math.inf
+        variance: Final[float] = max(self.sse / (r - k), 1e-300) / m
+        sizes: Final[List[int]] = [self.labels.count(c) for c in range(k)]
+        likelihood: float = 0.0
+        for size in sizes:
+            if size == 0:
+                continue
+            likelihood += (
+                size * math.log(size)
+                - size * math.log(r)
+                - size * m / 2 * math.log(2 * math.pi * variance)
+                - m * (size - 1) / 2
+            )
+        num_parameters: Final[int] = (k - 1) + m * k + 1
+        return likelihood - num_parameters / 2 * math.log(r)
+
+
+def kmeans(vectors: List[Vector], k: int, rng: random.Random) -> Clustering:
+    """Cluster vectors by k-means, seeded by k-means++.
+
+    :param vectors The vectors
+    :param k The number of clusters
+    :param rng The random number generator
+    :return The clustering
+    """
+    centroids: List[Vector] = [list(rng.choice(vectors))]
+    distances: List[float] = [_squared_distance(v, centroids[0]) for v in vectors]
+    while len(centroids) < min(k, len(vectors)):
+        total: float = sum(distances)
+        if total <= 0:
+            break
+        target: float = rng.uniform(0, total)
+        index: int = 0
+        while index < len(vectors) - 1 and target > distances[index]:
+            target -= distances[index]
+            index += 1
+        centroids.append(list(vectors[index]))
+        distances = [
+            min(d, _squared_distance(v, centroids[-1]))
+            for v, d in zip(vectors, distances)
+        ]
+
+    labels: List[int] = [-1] * len(vectors)
+    for _ in range(MAX_ITERATIONS):
+        nearest: List[Tuple[int, float]] = [_nearest(v, centroids) for v in vectors]
+        new_labels: List[int] = [label for label, _ in nearest]
+        if new_labels == labels:
+            break
+        labels = new_labels
+        members: List[List[Vector]] = [[] for _ in centroids]
+        for vector, label in zip(vectors, labels):
+            members[label].append(vector)
+        centroids = [
+            [sum(values) / len(group) for values in zip(*group)] if group else centroid
+            for group, centroid in zip(members, centroids)
+        ]
+    sse: Final[float] = sum(
+        _squared_distance(v, centroids[label]) for v, label in zip(vectors, labels)
+    )
+    return Clustering(centroids, labels, sse)
+
+
+class SimPoint:
+    """A simulation point: a cluster's representative interval."""
+
+    def __init__(self, cluster: int, interval: int, weight: float) -> None:
+        """Initialize the simulation point.
+
+        :param cluster The cluster
+        :param interval The index of the representative interval
+        :param weight The fraction of the intervals in the cluster
+        """
+        self.cluster: Final[int] = cluster
+        self.interval: Final[int] = interval
+        self.weight: Final[float] = weight
+
+
+def pick_simpoints(
+    vectors: List[Vector],
+    max_k: int = DEFAULT_MAX_K,
+    threshold: float = DEFAULT_BIC_THRESHOLD,
+    num_seeds: int = DEFAULT_NUM_SEEDS,
+    max_samples: int = DEFAULT_MAX_SAMPLES,
+    seed: int = 0,
+) -> Tuple[List[SimPoint], Dict[int, float]]:
+    """Cluster projected BBVs and pick a simulation point per cluster.
+
+    Rather than clustering for every k up to max_k, k is binary searched
+    for the smallest one that scores above the threshold (as SimPoint's
+    -k search does), which assumes the score mostly grows with k.
+
+    :param vectors The projected BBV of each interval
+    :param max_k The largest number of clusters to try
+    :param threshold The fraction of the way from the worst BIC score to
+                     the best that the kept clustering must score
+    :param num_seeds How many seedings of k-means to try for each k (the
+                     one with the least SSE is kept)
+    :param max_samples The most intervals to cluster; others are assigned
+                       to the nearest cluster afterwards
+    :param seed The seed of the random number generator
+    :return The simulation points, and the BIC score of each k tried
+    :raise ValueError If there are no intervals
+    """
+    if not vectors:
+        raise ValueError("No intervals to cluster")
+    rng: Final[random.Random] = random.Random(seed)
+    sample: Final[List[Vector]] = (
+        rng.sample(vectors, max_samples) if len(vectors) > max_samples else vectors
+    )
+
+    clusterings: Dict[int, Clustering] = {}
+    scores: Dict[int, float] = {}
+
+    def score(k: int) -> float:
+        if k not in clusterings:
+            clusterings[k] = min(
+                (kmeans(sample, k, rng) for _ in range(num_seeds)),
+                key=lambda clustering: clustering.sse,
+            )
+            scores[k] = clusterings[k].bic(sample)
+        return scores[k]
+
+    high: int = max(1, min(max_k, len(sample)))
+    low: int = 1
+    score(low)
+    score(high)
+    cutoff: Final[float] = min(scores.values()) + threshold * (
+        max(scores.values()) - min(scores.values())
+    )
+    if scores[low] >= cutoff:
+        high = low
+    while high - low > 1:
+        middle: int = (low + high) // 2
+        if score(middle) >= cutoff:
+            high = middle
+        else:
+            low = middle
+    centroids: Final[List[Vector]] = clusterings[high].centroids
+
+    # Assign every interval, and pick each cluster's nearest to its centroid
+    members: Dict[int, List[int]] = {}
+    representative: Dict[int, Tuple[float, int]] = {}
+    for index, vector in enumerate(vectors):
+        label, distance = _nearest(vector, centroids)
+        members.setdefault(label, []).append(index)
+        if label not in representative or distance < representative[label][0]:
+            representative[label] = (distance, index)
+    simpoints: List[SimPoint] = [
+        SimPoint(cluster, representative[label][1], len(members[label]) / len(vectors))
+        for cluster, label in enumerate(sorted(members))
+    ]
+    return simpoints, scores
+
+
+def write_simpoints(
+    simpoints: List[SimPoint], simpoints_file: Path, weights_file: Path
+) -> None:
+    """Write simulation points in SimPoint's format, which gem5's
+    SimPoint resources read too.
+
+    :param simpoints The simulation points
+    :param simpoints_file The file of "<interval> <cluster>" lines
+    :param weights_file The file of "<weight> <cluster>" lines
+    """
+    simpoints_file.write_text(
+        "".join(f"{point.interval} {point.cluster}\n" for point in simpoints)
+    )
+    weights_file.write_text(
+        "".join(f"{point.weight:.6f} {point.cluster}\n" for point in simpoints)
+    )
+
+
+def load_manifest(checkpoints_dir: Path) -> List[Dict[str, Any]]:
+    """Load the description of a benchmark's simulation point checkpoints.
+
+    :param checkpoints_dir The checkpoints directory
+    :return Each checkpoint's name ("checkpoint"), weight, interval index,
+            and warmup and length in instructions
+    :raise OSError If there is no description
+    """
+    return json.loads((checkpoints_dir / MANIFEST_FILE_NAME).read_text())
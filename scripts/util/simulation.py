@@ -0,0 +1,278 @@
+"""Submit gem5 simulations from Python, and get their ROI stats back.
+
+A SimulationPool runs simulations on this host with the same engine as
+run-cmds-host.py, at most <num_workers> at once. Each call to submit()
+returns an asyncio future that resolves to the simulation's parsed ROI
+stats blocks once it is done, so sweeps can be driven (and pipelined)
+from Python without writing command files or scraping stats.txt:
+
+    async def sweep() -> None:
+        async with SimulationPool(num_workers=8, log_dir=Path("logs")) as pool:
+            futures = {
+                size: pool.submit(
+                    Path("se_custom_binary_periodic.py"),
+                    {"l1d_size": size, "num-rois": 5},
+                    Path("out") / size,
+                    benchmark="429.mcf",
+                )
+                for size in ["32KiB", "64KiB"]
+            }
+            for size, future in futures.items():
+                result = await future
+                print(size, [roi["simInsts"] for roi in result.rois])
+
+    asyncio.run(sweep())
+
+Cancelling a future stops its simulation (SIGINT, then SIGKILL), or
+withdraws it if it hasn't started. A simulation that fails raises a
+SimulationError from its future.
+"""
+
+import asyncio
+import shlex
+from pathlib import Path
+from typing import Any, Dict, Final, List, Optional, Set, Union
+
+from util.runner import Job, JobResult, ParallelRunner
+from util.spec import DEFAULT_GEM5_BINARY, DEFAULT_SPEC06_DIR, SpecCommand
+from util.stats import StatsBlock, load_roi_blocks
+
+# Config script arguments, as options (e.g. {"roi_interval": 10}) or tokens
+ScriptArgs = Union[Dict[str, Any], List[str]]
+
+
+def format_script_args(args: ScriptArgs) -> List[str]:
+    """Turn config script arguments into shell tokens.
+
+    Options are passed as --<name>=<value>, so names must be spelled the
+    way the config script expects them (e.g. "l1d_size" for simarglib's
+    cache options, but "roi-interval" for the ROI managers'). A value of
+    True passes the option as a flag, and None or False leaves it out.
+    Tokens are passed on as they are.
+
+    :param args The arguments
+    :return The shell tokens
+    """
+    if isinstance(args, list):
+        return args
+    tokens: List[str] = []
+    for name, value in args.items():
+        option: str = f"--{name}"
+        if value is True:
+            tokens.append(option)
+        elif value is not None and value is not False:
+            tokens.append(shlex.quote(f"{option}={value}"))
+    return tokens
+
+
+def simulation_command(
+    gem5_binary: Path,
+    script: Path,
+    args: ScriptArgs,
+    outdir: Path,
+    spec_command: Optional[SpecCommand] = None,
+    binary_args: Optional[List[str]] = None,
+) -> str:
+    """Make the shell command of a simulation, e.g. for a command file.
+
+    :param gem5_binary The gem5 binary
+    :param script The gem5 config script
+    :param args The config script's arguments
+    :param outdir The directory for gem5 to write its output to
+    :param spec_command A SPEC '06 benchmark to simulate with the config
+                        script (e.g. se_custom_binary_periodic.py), if any
+    :param binary_args Further arguments to the gem5 binary
+    :return The command
+    """
+    gem5_binary_args: Final[List[str]] = [
+        shlex.quote(f"--outdir={outdir.absolute()}"),
+        *(binary_args or []),
+    ]
+    script_args: Final[List[str]] = format_script_args(args)
+    if spec_command is not None:
+        return spec_command.shell_command(
+            gem5_binary,
+            gem5_binary_args,
+            script,
+            spec_command.script_args() + script_args,
+        )
+    return " ".join(
+        [
+            str(gem5_binary.absolute()),
+            *gem5_binary_args,
+            "--",
+            str(script.absolute()),
+            *script_args,
+        ]
+    )
+
+
+class SimulationError(Exception):
+    """A simulation that did not succeed."""
+
+    def __init__(self, result: JobResult) -> None:
+        """Initialize the error.
+
+        :param result The result of the simulation's job
+        """
+        reason: Final[str] = (
+            str(result.failure) if result.failure else result.status.value
+        )
+        super().__init__(f"Simulation {result.job.id} failed ({reason})")
+        self.result: Final[JobResult] = result
+
+
+class SimulationResult:
+    """The outcome of a simulation that succeeded."""
+
+    def __init__(self, job_result: JobResult, outdir: Path) -> None:
+        """Initialize the result, loading the ROI stats from the outdir.
+
+        :param job_result The result of the simulation's job
+        :param outdir The simulation's outdir
+        """
+        self.job_result: Final[JobResult] = job_result
+        self.outdir: Final[Path] = outdir
+        self.rois: Final[List[StatsBlock]] = load_roi_blocks(outdir)
+
+    def __str__(self) -> str:
+        return (
+            f"SimulationResult(outdir={self.outdir}, rois={len(self.rois)}, "
+            f"wall_time={self.job_result.wall_time:.2f})"
+        )
+
+
+class SimulationPool:
+    """Run gem5 simulations concurrently, with at most <num_workers> at once."""
+
+    def __init__(
+        self,
+        num_workers: int = 1,
+        gem5_binary: Path = DEFAULT_GEM5_BINARY,
+        spec_dir: Path = DEFAULT_SPEC06_DIR,
+        **runner_options: Any,
+    ) -> None:
+        """Initialize the pool.
+
+        :param num_workers The maximum number of simulations to run at once
+        :param gem5_binary The gem5 binary to simulate with
+        :param spec_dir The directory containing the SPEC '06 benchmarks
+        :param runner_options Further options for util.runner.ParallelRunner
+                              (e.g., log_dir, gate, max_retries, cache)
+        """
+        self.gem5_binary: Final[Path] = gem5_binary
+        self.spec_dir: Final[Path] = spec_dir
+        self.runner: Final[ParallelRunner] = ParallelRunner(
+            num_workers=num_workers, **runner_options
+        )
+        self._num_submitted: int = 0
+        self._futures: Set[asyncio.Future] = set()
+
+    def command(
+        self,
+        script: Path,
+        args: ScriptArgs,
+        outdir: Path,
+        benchmark: Optional[str] = None,
+        binary_args: Optional[List[str]] = None,
+    ) -> str:
+        """Make the shell command of a simulation with the pool's gem5 binary.
+
+        :param script The gem5 config script
+        :param args The config script's arguments
+        :param outdir The directory for gem5 to write its output to
+        :param benchmark A SPEC '06 benchmark to simulate, if any
+        :param binary_args Further arguments to the gem5 binary
+        :return The command
+        """
+        return simulation_command(
+            self.gem5_binary,
+            script,
+            args,
+            outdir,
+            SpecCommand(benchmark, self.spec_dir.absolute()) if benchmark else None,
+            binary_args,
+        )
+
+    def submit(
+        self,
+        script: Path,
+        args: ScriptArgs,
+        outdir: Path,
+        benchmark: Optional[str] = None,
+        binary_args: Optional[List[str]] = None,
+        mem: Optional[int] = None,
+        timeout: Optional[float] = None,
+        cpus: Optional[int] = None,
+    ) -> "asyncio.Future[SimulationResult]":
+        """Submit a simulation. Must be called from a running event loop.
+
+        :param script The gem5 config script
+        :param args The config script's arguments
+        :param outdir The directory for gem5 to write its output to
+        :param benchmark A SPEC '06 benchmark to simulate, if any
+        :param binary_args Further arguments to the gem5 binary
+        :param mem The simulation's peak memory use in bytes, if known
+        :param timeout The simulation's wall-clock limit in seconds, if any
+        :param cpus The number of CPUs the simulation keeps busy, if more
+                    than one (e.g. with forked ROIs)
+        :return A future resolving to the simulation's result
+        """
+        annotations: Dict[str, str] = {}
+        if mem is not None:
+            annotations["mem"] = str(mem)
+        if timeout is not None:
+            annotations["timeout"] = str(timeout)
+        if cpus is not None:
+            annotations["cpus"] = str(cpus)
+
+        job = Job(
+            self.command(script, args, outdir, benchmark, binary_args),
+            self._num_submitted,
+            annotations,
+        )
+        job.id = f"sim{self._num_submitted:05d}"
+        self._num_submitted += 1
+
+        future: Final[asyncio.Future] = asyncio.ensure_future(
+            self._simulate(job, outdir.absolute())
+        )
+        self._futures.add(future)
+        future.add_done_callback(self._futures.discard)
+        return future
+
+    async def _simulate(self, job: Job, outdir: Path) -> SimulationResult:
+        """Run a simulation's job, and load its stats.
+
+        :param job The job
+        :param outdir The simulation's outdir
+        :return The simulation's result
+        :raise SimulationError If the simulation failed
+        """
+        result: Final[JobResult] = await self.runner.submit(job)
+        if not result.succeeded:
+            raise SimulationError(result)
+        # Parsing a large stats.txt shouldn't hold up the other jobs' logs
+        return await asyncio.get_running_loop().run_in_executor(
+            None, SimulationResult, result, outdir
+        )
+
+    def cancel_all(self) -> None:
+        """Stop all submitted simulations that haven't finished."""
+        for future in list(self._futures):
+            future.cancel()
+
+    async def wait(self) -> None:
+        """Wait for all submitted simulations to finish (or fail)."""
+        while self._futures:
+            await asyncio.gather(*self._futures, return_exceptions=True)
+
+    async def __aenter__(self) -> "SimulationPool":
+        return self
+
+    async def __aexit__(self, exc_type, exc, traceback) -> None:
+        # On an error (or cancellation), stop the simulations; otherwise,
+        # let them finish
+        if exc_type is not None:
+            self.cancel_all()
+        await self.wait()
@@ -1,6 +1,7 @@
 """Utilities for working with SPEC06 benchmarks."""
 
 import os
+import shlex
 import subprocess
 from pathlib import Path
 from typing import Final, List, Optional
@@ -40,6 +41,9 @@ DEFAULT_SPEC06_DIR: Final[Path] = (
     / "spec06"
 )
 
+# Default gem5 binary to simulate the benchmarks with
+DEFAULT_GEM5_BINARY: Final[Path] = Path("../") / "gem5" / "build" / "X86" / "gem5.opt"
+
 
 def get_specrun_file(benchmark: str, spec_dir: Path) -> Optional[Path]:
     """Get the path to a benchmark's specrun script.
@@ -134,22 +138,34 @@ class SpecCommand:
 
         return spec_process.returncode
 
-    def simulate(
+    def script_args(self) -> List[str]:
+        """Get the arguments that make se_custom_binary*.py run the benchmark.
+
+        :return The config script arguments
+        """
+        return [
+            f"--input-bin={self.bin}",
+            f"--input-args=\"{' '.join(self.args)}\"",
+        ]
+
+    def gem5_command(
         self,
         gem5_binary: Path,
         gem5_binary_args: List[str],
         gem5_script: Path,
         gem5_script_args: List[str],
-    ):
-        """Run the benchmark in a gem5 simulation.
+    ) -> List[str]:
+        """Get the command that simulates the benchmark in gem5.
+
+        The command must be run from the benchmark's directory (cwd).
 
         :param gem5_binary The path to the gem5 binary
         :param gem5_binary_args Arguments to the gem5 binary
         :param gem5_script The path to the gem5 config script
         :param gem5_script_args Arguments to the gem5 config script
-        :return The return code of the launched process
+        :return The tokens of the command, ready for a shell
         """
-        gem5_command: Final[List[str]] = [
+        return [
             f"{gem5_binary.absolute()}",
             *gem5_binary_args,
             "--",
@@ -157,6 +173,46 @@ class SpecCommand:
             *gem5_script_args,
         ]
 
+    def shell_command(
+        self,
+        gem5_binary: Path,
+        gem5_binary_args: List[str],
+        gem5_script: Path,
+        gem5_script_args: List[str],
+    ) -> str:
+        """Get a shell command that simulates the benchmark in gem5 from
+        any directory, e.g. for a command file.
+
+        :param gem5_binary The path to the gem5 binary
+        :param gem5_binary_args Arguments to the gem5 binary
+        :param gem5_script The path to the gem5 config script
+        :param gem5_script_args Arguments to the gem5 config script
+        :return The shell command
+        """
+        gem5_command: Final[List[str]] = self.gem5_command(
+            gem5_binary, gem5_binary_args, gem5_script, gem5_script_args
+        )
+        return f"cd {shlex.quote(str(self.cwd))} && {' '.join(gem5_command)}"
+
+    def simulate(
+        self,
+        gem5_binary: Path,
+        gem5_binary_args: List[str],
+        gem5_script: Path,
+        gem5_script_args: List[str],
+    ):
+        """Run the benchmark in a gem5 simulation.
+
+        :param gem5_binary The path to the gem5 binary
+        :param gem5_binary_args Arguments to the gem5 binary
+        :param gem5_script The path to the gem5 config script
+        :param gem5_script_args Arguments to the gem5 config script
+        :return The return code of the launched process
+        """
+        gem5_command: Final[List[str]] = self.gem5_command(
+            gem5_binary, gem5_binary_args, gem5_script, gem5_script_args
+        )
+
         print(f"Using cwd: {self.cwd}")
         print(f"Running command: {' '.join(gem5_command)}")
 
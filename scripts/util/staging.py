@@ -0,0 +1,161 @@
+"""Stage gem5 jobs' inputs and outputs on local scratch disk.
+
+When outdirs and checkpoints live on NFS, thousands of gem5 processes
+writing stats.txt, config.json, simout and checkpoint files over NFS
+throttle the file server. A staged job instead
+
+1. copies its input checkpoint (--start_from) to local scratch,
+2. writes its outdir to local scratch, and
+3. moves its outdir back as one archive, <outdir>.tar.gz, on exit,
+
+so the file server sees a handful of large sequential transfers per job
+rather than many small writes.
+"""
+
+import os
+import shutil
+import tarfile
+import tempfile
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Dict, Final, List, Optional
+
+from util.gem5_command import Gem5Command
+
+# Suffix of the archive a staged outdir is moved back as
+ARCHIVE_SUFFIX: Final[str] = ".tar.gz"
+
+# Script options that name an input to copy to scratch
+INPUT_ARGS: Final[List[str]] = [
+    "start_from",
+]
+
+
+def archive_path(outdir: Path) -> Path:
+    """Get the path of the archive a staged outdir is moved back as.
+
+    :param outdir The outdir
+    :return The archive's path
+    """
+    return outdir.with_name(outdir.name + ARCHIVE_SUFFIX)
+
+
+def read_archived_file(outdir: Path, name: str) -> Optional[str]:
+    """Read a file from the archive of a staged outdir.
+
+    :param outdir The outdir
+    :param name The file's path inside the outdir, e.g. "stats.txt"
+    :return The file's contents, or None if there is no such file
+    """
+    try:
+        with tarfile.open(archive_path(outdir), "r:gz") as archive:
+            member = archive.extractfile(f"{outdir.name}/{name}")
+            if member is None:
+                return None
+            return member.read().decode(errors="replace")
+    except (OSError, KeyError, tarfile.TarError):
+        return None
+
+
+def read_archived_files(outdir: Path, pattern: str) -> Dict[str, str]:
+    """Read the files of a staged outdir's archive whose paths match a
+    glob.
+
+    :param outdir The outdir
+    :param pattern A glob of paths inside the outdir, e.g. "*/stats.txt"
+    :return The contents of each matching file, by its path inside the
+            outdir (empty if there is no archive)
+    """
+    files: Dict[str, str] = {}
+    prefix: Final[str] = f"{outdir.name}/"
+    try:
+        with tarfile.open(archive_path(outdir), "r:gz") as archive:
+            for info in archive:
+                name: str = info.name[len(prefix) :]
+                if not info.name.startswith(prefix) or not fnmatch(name, pattern):
+                    continue
+                member = archive.extractfile(info)
+                if member is not None:
+                    files[name] = member.read().decode(errors="replace")
+    except (OSError, tarfile.TarError):
+        return {}
+    return files
+
+
+class StagedRun:
+    """The scratch directory of one run of a gem5 command."""
+
+    def __init__(self, gem5_command: Gem5Command, stage_dir: Path, name: str) -> None:
+        """Create the scratch directory.
+
+        :param gem5_command The command to stage
+        :param stage_dir The local scratch directory
+        :param name A name for the run, to tell scratch directories apart
+        """
+        stage_dir.mkdir(parents=True, exist_ok=True)
+        # Absolute, since the command may change directories
+        self.path: Final[Path] = Path(
+            tempfile.mkdtemp(prefix=f"{name}-", dir=stage_dir)
+        ).absolute()
+        self._gem5_command: Final[Gem5Command] = gem5_command
+        self.scratch_outdir: Final[Path] = self.path / "out"
+        self.outdir: Final[Path] = gem5_command.outdir
+
+    def _resolve(self, path: str) -> Path:
+        """Resolve a path of the command, which is relative to its cwd.
+
+        :param path The path
+        :return The path, relative to this process' cwd
+        """
+        cwd: Final[Optional[Path]] = self._gem5_command.cwd
+        return cwd / path if cwd is not None else Path(path)
+
+    def stage_in(self) -> str:
+        """Copy the command's inputs to scratch.
+
+        :return The command, rewritten to use the copies and to write
+                its outdir to scratch
+        """
+        script_options: Dict[str, str] = {}
+        for name in INPUT_ARGS:
+            value: Optional[str] = self._gem5_command.script_option(name)
+            if not value:
+                continue
+            source: Path = self._resolve(value)
+            target: Path = self.path / "in" / name / source.name
+            target.parent.mkdir(parents=True, exist_ok=True)
+            if source.is_dir():
+                shutil.copytree(source, target)
+            else:
+                shutil.copy2(source, target)
+            script_options[name] = str(target)
+
+        return self._gem5_command.with_options(
+            binary_options={"--outdir": str(self.scratch_outdir)},
+            script_options=script_options,
+        )
+
+    def stage_out(self) -> Optional[Path]:
+        """Move the outdir back as an archive, and remove the scratch files.
+
+        :return The archive, or None if the command wrote no outdir
+        """
+        try:
+            if not self.scratch_outdir.is_dir():
+                return None
+
+            archive: Final[Path] = archive_path(self.outdir)
+            archive.parent.mkdir(parents=True, exist_ok=True)
+
+            # Write the archive next to its final path, then rename it
+            # into place, so readers never see a partial archive
+            fd, tmp_name = tempfile.mkstemp(
+                prefix=f".{archive.name}.", dir=archive.parent
+            )
+            os.close(fd)
+            with tarfile.open(tmp_name, "w:gz") as tar:
+                tar.add(self.scratch_outdir, arcname=self.outdir.name)
+            os.replace(tmp_name, archive)
+            return archive
+        finally:
+            shutil.rmtree(self.path, ignore_errors=True)
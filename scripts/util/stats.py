@@ -0,0 +1,155 @@
+"""Utilities for reading gem5 stats.txt files.
+
+Each call to m5.stats.dump() appends one block to stats.txt:
+
+    ---------- Begin Simulation Statistics ----------
+    simSeconds      0.266788    # Number of seconds simulated (Second)
+    ...
+    ---------- End Simulation Statistics   ----------
+
+With the periodic ROI manager, each block holds the stats of one ROI.
+With --fork-rois, each ROI is instead dumped to stats.txt in its own
+outdir, roi<N>, inside the run's. The SMARTS ROI manager dumps no block
+unless asked to, and writes its units' stats, summed, to smarts.json
+instead; they are read as the run's one ROI.
+"""
+
+import json
+import re
+from pathlib import Path
+from typing import Any, Dict, Final, List, Optional
+
+from util.staging import read_archived_file, read_archived_files
+
+BEGIN_MARKER: Final[str] = "---------- Begin Simulation Statistics ----------"
+END_MARKER: Final[str] = "---------- End Simulation Statistics   ----------"
+
+STATS_FILE_NAME: Final[str] = "stats.txt"
+
+# The stats of forked ROIs, inside the outdir (as in
+# util/event_managers/roi/periodic.py, which can't be imported here)
+FORK_STATS_GLOB: Final[str] = f"roi[0-9]*/{STATS_FILE_NAME}"
+
+# The summary of a run sampled by SMARTS, in the outdir (as in
+# util/event_managers/roi/smarts.py)
+SMARTS_FILE_NAME: Final[str] = "smarts.json"
+
+# A block of stats, mapping each stat name to its (first) value
+StatsBlock = Dict[str, float]
+
+
+def parse_stats_text(text: str) -> List[StatsBlock]:
+    """Parse the contents of a stats.txt file.
+
+    :param text The contents of the file
+    :return One dictionary of stats per dumped block, in order
+    """
+    blocks: List[StatsBlock] = []
+    block: StatsBlock = {}
+    in_block: bool = False
+
+    for line in text.splitlines():
+        if line.startswith(BEGIN_MARKER):
+            block = {}
+            in_block = True
+        elif line.startswith(END_MARKER):
+            if in_block:
+                blocks.append(block)
+            in_block = False
+        elif in_block:
+            tokens: List[str] = line.split("#", 1)[0].split()
+            if len(tokens) < 2:
+                continue
+            try:
+                block[tokens[0]] = float(tokens[1])
+            except ValueError:
+                pass
+
+    return blocks
+
+
+def parse_stats(stats_file: Path) -> List[StatsBlock]:
+    """Parse a stats.txt file.
+
+    :param stats_file The path to the stats file
+    :return One dictionary of stats per dumped block, in order
+    """
+    return parse_stats_text(stats_file.read_text(errors="replace"))
+
+
+def roi_blocks(blocks: List[StatsBlock]) -> List[StatsBlock]:
+    """Filter out blocks in which nothing was simulated.
+
+    gem5 dumps a final block on exit, which event managers zero out
+    with a stats reset when it is not wanted.
+
+    :param blocks The blocks of a stats file
+    :return The blocks that simulated at least one instruction
+    """
+    return [block for block in blocks if block.get("simInsts", 0) > 0]
+
+
+def _roi_number(path: str) -> int:
+    """Get the number of a forked ROI from the path of its stats.
+
+    :param path The path, e.g. "roi012/stats.txt"
+    :return The ROI's number
+    """
+    match: Final[Optional[re.Match]] = re.search(r"roi(\d+)", path)
+    return int(match.group(1)) if match else 0
+
+
+def load_smarts_block(outdir: Path) -> List[StatsBlock]:
+    """Load the summed stats of a run's SMARTS units, if it has any.
+
+    :param outdir The gem5 output directory (possibly staged)
+    :return The units' block (empty if the run wasn't sampled by SMARTS,
+            or measured nothing)
+    """
+    smarts_file: Final[Path] = outdir / SMARTS_FILE_NAME
+    text: Optional[str] = None
+    if smarts_file.exists():
+        text = smarts_file.read_text(errors="replace")
+    else:
+        text = read_archived_file(outdir, SMARTS_FILE_NAME)
+    if text is None:
+        return []
+    try:
+        stats: Any = json.loads(text).get("stats")
+    except (ValueError, AttributeError):
+        return []
+    if not isinstance(stats, dict):
+        return []
+    return roi_blocks([{name: float(value) for name, value in stats.items()}])
+
+
+def load_roi_blocks(outdir: Path) -> List[StatsBlock]:
+    """Load the ROI stats blocks from a gem5 output directory.
+
+    If the outdir was staged (see util.staging), the stats are read from
+    its archive. The blocks of forked ROIs follow the outdir's own, in
+    ROI order. A SMARTS run that dumped no blocks has its units' summed
+    stats as its one block.
+
+    :param outdir The gem5 output directory
+    :return The blocks that simulated at least one instruction (empty if
+            there is no stats file)
+    """
+    texts: List[str] = []
+    stats_file: Final[Path] = outdir / STATS_FILE_NAME
+    if stats_file.exists():
+        texts.append(stats_file.read_text(errors="replace"))
+        for fork_stats in sorted(
+            outdir.glob(FORK_STATS_GLOB), key=lambda p: _roi_number(p.parent.name)
+        ):
+            texts.append(fork_stats.read_text(errors="replace"))
+    else:
+        text: Final[Optional[str]] = read_archived_file(outdir, STATS_FILE_NAME)
+        if text is None:
+            return []
+        forks: Final[Dict[str, str]] = read_archived_files(outdir, FORK_STATS_GLOB)
+        texts = [text] + [forks[name] for name in sorted(forks, key=_roi_number)]
+    blocks: Final[List[StatsBlock]] = [
+        block for text in texts for block in roi_blocks(parse_stats_text(text))
+    ]
+    return blocks or load_smarts_block(outdir)
@@ -0,0 +1,284 @@
+"""A Gaussian-process surrogate of a metric over a campaign's design space.
+
+Configurations are encoded as vectors in [0, 1]^d: numeric and size
+levels (e.g. "32KiB") as their position between the smallest and
+largest level (on a log scale when they span a wide range), and other
+levels (e.g. prefetchers) one-hot. A Gaussian process with a squared
+exponential kernel is fitted to the configurations simulated so far,
+with its length scale and noise chosen by marginal likelihood, and
+predicts the metric of the others with an uncertainty. Expected
+improvement then trades off configurations predicted to be good against
+ones the surrogate knows little about.
+
+Campaigns are small enough (hundreds of simulations) for plain Python,
+so this needs no numerical libraries.
+"""
+
+import math
+from typing import Any, Dict, Final, List, Optional, Tuple
+
+from util.campaign import Dimension, RangeDimension
+from util.gem5_command import parse_size
+
+# A configuration, encoded
+Vector = List[float]
+
+# Length scales and noise levels (of the standardized metric) to choose from
+LENGTH_SCALES: Final[List[float]] = [0.1, 0.2, 0.4, 0.8, 1.6]
+NOISE_LEVELS: Final[List[float]] = [1e-4, 1e-2, 1e-1]
+
+# Numeric levels spanning more than this ratio are encoded on a log scale
+LOG_SCALE_RATIO: Final[float] = 4.0
+
+
+def _numeric(value: Any) -> Optional[float]:
+    """Interpret a level as a number, if it is one.
+
+    :param value The level, e.g. 8, 0.5 or "32KiB"
+    :return The number, or None if it isn't one
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(parse_size(str(value)))
+    except ValueError:
+        return None
+
+
+class Encoder:
+    """Encodes configurations as vectors in [0, 1]^d."""
+
+    def __init__(self, dimensions: List[Dimension]) -> None:
+        """Initialize the encoder.
+
+        :param dimensions The campaign's dimensions
+        """
+        # Per dimension: the (low, high, log) of a numeric one, or the
+        # levels of a one-hot one
+        self._numeric: Dict[str, Tuple[float, float, bool]] = {}
+        self._one_hot: Dict[str, List[Any]] = {}
+        self.dimensions: Final[List[Dimension]] = dimensions
+
+        for dimension in dimensions:
+            if isinstance(dimension, RangeDimension):
+                self._numeric[dimension.name] = (
+                    dimension.low,
+                    dimension.high,
+                    dimension.log,
+                )
+                continue
+            numbers: List[Optional[float]] = [
+                _numeric(level) for level in dimension.levels()
+            ]
+            if any(number is None for number in numbers) or len(numbers) < 2:
+                self._one_hot[dimension.name] = dimension.levels()
+                continue
+            low: float = min(n for n in numbers if n is not None)
+            high: float = max(n for n in numbers if n is not None)
+            self._numeric[dimension.name] = (
+                low,
+                high,
+                low > 0 and high / low > LOG_SCALE_RATIO,
+            )
+
+    def encode(self, point: Dict[str, Any]) -> Vector:
+        """Encode a configuration.
+
+        :param point The configuration's swept arguments
+        :return The vector
+        """
+        vector: Vector = []
+        for dimension in self.dimensions:
+            value: Any = point[dimension.name]
+            if dimension.name in self._one_hot:
+                vector += [
+                    1.0 if value == level else 0.0
+                    for level in self._one_hot[dimension.name]
+                ]
+                continue
+            low, high, log = self._numeric[dimension.name]
+            number: float = _numeric(value) or 0.0
+            if high <= low:
+                vector.append(0.0)
+            elif log:
+                vector.append(
+                    (math.log(number) - math.log(low))
+                    / (math.log(high) - math.log(low))
+                )
+            else:
+                vector.append((number - low) / (high - low))
+        return vector
+
+
+def _squared_distance(a: Vector, b: Vector) -> float:
+    return sum((x - y) ** 2 for x, y in zip(a, b))
+
+
+def _cholesky(matrix: List[List[float]]) -> Optional[List[List[float]]]:
+    """Decompose a symmetric positive-definite matrix as L L^T.
+
+    :param matrix The matrix
+    :return L (lower triangular), or None if the matrix isn't positive
+            definite
+    """
+    n: Final[int] = len(matrix)
+    lower: List[List[float]] = [[0.0] * n for _ in range(n)]
+    for i in range(n):
+        for j in range(i + 1):
+            total: float = matrix[i][j] - sum(
+                lower[i][k] * lower[j][k] for k in range(j)
+            )
+            if i == j:
+                if total <= 0:
+                    return None
+                lower[i][i] = math.sqrt(total)
+            else:
+                lower[i][j] = total / lower[j][j]
+    return lower
+
+
+def _solve_lower(lower: List[List[float]], b: List[float]) -> List[float]:
+    """Solve L x = b by forward substitution."""
+    x: List[float] = []
+    for i, row in enumerate(lower):
+        x.append((b[i] - sum(row[k] * x[k] for k in range(i))) / row[i])
+    return x
+
+
+def _solve_upper(lower: List[List[float]], b: List[float]) -> List[float]:
+    """Solve L^T x = b by back substitution."""
+    n: Final[int] = len(lower)
+    x: List[float] = [0.0] * n
+    for i in reversed(range(n)):
+        x[i] = (b[i] - sum(lower[k][i] * x[k] for k in range(i + 1, n))) / lower[i][i]
+    return x
+
+
+class GaussianProcess:
+    """A Gaussian process regression with a squared exponential kernel."""
+
+    def __init__(self) -> None:
+        self.length_scale: float = LENGTH_SCALES[0]
+        self.noise: float = NOISE_LEVELS[0]
+        self._xs: List[Vector] = []
+        self._lower: List[List[float]] = []
+        self._alpha: List[float] = []
+        self._mean: float = 0.0
+        self._scale: float = 1.0
+
+    def _kernel(self, a: Vector, b: Vector, length_scale: float) -> float:
+        return math.exp(-_squared_distance(a, b) / (2 * length_scale**2))
+
+    def fit(self, xs: List[Vector], ys: List[float]) -> None:
+        """Fit the process to observations, choosing the length scale and
+        noise that maximize the marginal likelihood.
+
+        :param xs The observed configurations
+        :param ys The metric of each
+        :raise ValueError If there are no observations
+        """
+        if not xs:
+            raise ValueError("Can't fit a Gaussian process without observations")
+        self._mean = sum(ys) / len(ys)
+        self._scale = math.sqrt(sum((y - self._mean) ** 2 for y in ys) / len(ys)) or 1.0
+        standardized: Final[List[float]] = [(y - self._mean) / self._scale for y in ys]
+
+        best_likelihood: float = -math.inf
+        for length_scale in LENGTH_SCALES:
+            for noise in NOISE_LEVELS:
+                matrix: List[List[float]] = [
+                    [
+                        self._kernel(a, b, length_scale) + (noise if i == j else 0.0)
+                        for j, b in enumerate(xs)
+                    ]
+                    for i, a in enumerate(xs)
+                ]
+                lower: Optional[List[List[float]]] = _cholesky(matrix)
+                if lower is None:
+                    continue
+                alpha: List[float] = _solve_upper(
+                    lower, _solve_lower(lower, standardized)
+                )
+                likelihood: float = (
+                    -0.5 * sum(y * a for y, a in zip(standardized, alpha))
+                    - sum(math.log(lower[i][i]) for i in range(len(xs)))
+                    - 0.5 * len(xs) * math.log(2 * math.pi)
+                )
+                if likelihood > best_likelihood:
+                    best_likelihood = likelihood
+                    self.length_scale, self.noise = length_scale, noise
+                    self._lower, self._alpha = lower, alpha
+        self._xs = xs
+
+    def predict(self, x: Vector) -> Tuple[float, float]:
+        """Predict the metric of a configuration.
+
+        :param x The configuration
+        :return The predicted mean and standard deviation
+        """
+        k: Final[List[float]] = [
+            self._kernel(x, xi, self.length_scale) for xi in self._xs
+        ]
+        mean: Final[float] = sum(ki * ai for ki, ai in zip(k, self._alpha))
+        v: Final[List[float]] = _solve_lower(self._lower, k)
+        variance: Final[float] = max(1.0 - sum(vi * vi for vi in v), 0.0)
+        return (
+            self._mean + self._scale * mean,
+            self._scale * math.sqrt(variance),
+        )
+
+
+def expected_improvement(mean: float, std: float, best: float) -> float:
+    """Compute the expected improvement over the best value (maximizing).
+
+    :param mean The predicted mean
+    :param std The predicted standard deviation
+    :param best The best value observed so far
+    :return The expected improvement
+    """
+    if std <= 0:
+        return max(mean - best, 0.0)
+    z: Final[float] = (mean - best) / std
+    cdf: Final[float] = 0.5 * (1 + math.erf(z / math.sqrt(2)))
+    pdf: Final[float] = math.exp(-0.5 * z * z) / math.sqrt(2 * math.pi)
+    return (mean - best) * cdf + std * pdf
+
+
+def select_batch(
+    process: GaussianProcess,
+    candidates: List[Vector],
+    best: float,
+    batch_size: int,
+) -> List[Tuple[int, float]]:
+    """Pick the candidates to simulate next, by expected improvement.
+
+    Each pick damps the expected improvement of candidates near it, so
+    that a batch doesn't spend all of its simulations on one region.
+
+    :param process The fitted surrogate (of a metric to maximize)
+    :param candidates The configurations not simulated yet
+    :param best The best value observed so far
+    :param batch_size The most candidates to pick
+    :return The picked candidates' indices and expected improvements
+    """
+    improvements: List[float] = [
+        expected_improvement(*process.predict(x), best) for x in candidates
+    ]
+    picked: List[Tuple[int, float]] = []
+    penalties: List[float] = [1.0] * len(candidates)
+    while len(picked) < min(batch_size, len(candidates)):
+        index: int = max(
+            (i for i in range(len(candidates)) if penalties[i] > 0),
+            key=lambda i: improvements[i] * penalties[i],
+            default=-1,
+        )
+        if index < 0:
+            break
+        picked.append((index, improvements[index]))
+        for i, x in enumerate(candidates):
+            penalties[i] *= 1 - math.exp(
+                -_squared_distance(x, candidates[index]) / (2 * process.length_scale**2)
+            )
+    return picked
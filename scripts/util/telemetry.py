@@ -0,0 +1,163 @@
+"""Per-job telemetry, sampled from /proc.
+
+While a job runs, its process tree is sampled periodically from
+/proc/<pid>/{stat,status,io}. Each process' counters (CPU time, I/O
+bytes, context switches) only grow, so a job's totals are the sums of
+the last values seen for every process that was ever in its tree. This
+keeps the counters of processes that exit between samples, at the cost
+of up to one sample interval of activity per process.
+
+When the job finishes, one JSON line summarizing it is appended to the
+campaign's telemetry file.
+"""
+
+import json
+import os
+import socket
+import time
+from pathlib import Path
+from typing import Any, Dict, Final, List, Optional
+
+from util.resources import PROC_DIR, process_tree
+
+# Seconds per clock tick, the unit of CPU times in /proc/<pid>/stat
+CLOCK_TICK: Final[float] = 1.0 / os.sysconf("SC_CLK_TCK")
+
+# Counters summed over a job's processes
+COUNTERS: Final[List[str]] = [
+    "user_time",  # CPU time in user mode, in seconds
+    "system_time",  # CPU time in kernel mode, in seconds
+    "read_bytes",  # Bytes read from storage
+    "write_bytes",  # Bytes written to storage
+    "rchar",  # Bytes read by any read() (including pipes and page cache)
+    "wchar",  # Bytes written by any write()
+    "voluntary_ctxt_switches",
+    "nonvoluntary_ctxt_switches",
+]
+
+# Fields of /proc/<pid>/stat (0-based, after the command name)
+STAT_UTIME_FIELD: Final[int] = 11
+STAT_STIME_FIELD: Final[int] = 12
+
+
+def read_process_counters(pid: int) -> Optional[Dict[str, float]]:
+    """Read a process' counters and memory use from /proc.
+
+    :param pid The process ID
+    :return The process' COUNTERS, plus "rss" and "hwm" (its current and
+            peak RSS, in bytes), or None if the process is gone. /proc
+            files that can't be read (e.g., io of another user's
+            process) leave their counters out.
+    """
+    proc: Final[Path] = PROC_DIR / str(pid)
+    counters: Dict[str, float] = {}
+    try:
+        # The command name may contain spaces, so split after it
+        stat: List[str] = (proc / "stat").read_text().rsplit(")", 1)[1].split()
+        counters["user_time"] = int(stat[STAT_UTIME_FIELD]) * CLOCK_TICK
+        counters["system_time"] = int(stat[STAT_STIME_FIELD]) * CLOCK_TICK
+
+        for line in (proc / "status").read_text().splitlines():
+            name, _, value = line.partition(":")
+            if name == "VmRSS":
+                counters["rss"] = int(value.split()[0]) * 1024
+            elif name == "VmHWM":
+                counters["hwm"] = int(value.split()[0]) * 1024
+            elif name in COUNTERS:
+                counters[name] = int(value)
+    except (OSError, IndexError, ValueError):
+        return None
+
+    try:
+        for line in (proc / "io").read_text().splitlines():
+            name, _, value = line.partition(":")
+            if name in COUNTERS:
+                counters[name] = int(value)
+    except (OSError, ValueError):
+        pass
+    return counters
+
+
+class JobTelemetry:
+    """The telemetry of one running job's process tree."""
+
+    def __init__(self, pid: int) -> None:
+        """Initialize the telemetry.
+
+        :param pid The process ID of the root of the job's process tree
+        """
+        self.pid: Final[int] = pid
+        self.start_time: Final[float] = time.time()
+        self.peak_rss: int = 0
+        self.max_hwm: int = 0
+        self.num_samples: int = 0
+
+        # pid -> the last counters seen for the process
+        self._last: Dict[int, Dict[str, float]] = {}
+
+    def sample(self) -> int:
+        """Sample the job's process tree.
+
+        :return The tree's current total RSS, in bytes
+        """
+        rss: int = 0
+        for pid in process_tree(self.pid):
+            counters: Optional[Dict[str, float]] = read_process_counters(pid)
+            if counters is None:
+                continue
+            rss += int(counters.pop("rss", 0))
+            self.max_hwm = max(self.max_hwm, int(counters.pop("hwm", 0)))
+            self._last[pid] = counters
+
+        self.peak_rss = max(self.peak_rss, rss)
+        self.num_samples += 1
+        return rss
+
+    def totals(self) -> Dict[str, float]:
+        """Sum the counters of every process seen in the job's tree.
+
+        :return The total of each of COUNTERS
+        """
+        return {
+            name: sum(counters.get(name, 0) for counters in self._last.values())
+            for name in COUNTERS
+        }
+
+    def record(self) -> Dict[str, Any]:
+        """Summarize the telemetry.
+
+        :return The job's peak RSS (sampled, over its whole tree), the
+                largest peak RSS of any one of its processes, its CPU
+                time, and its counters
+        """
+        totals: Final[Dict[str, float]] = self.totals()
+        return {
+            "start_time": self.start_time,
+            "peak_rss": self.peak_rss,
+            "max_hwm": self.max_hwm,
+            "cpu_time": totals["user_time"] + totals["system_time"],
+            **totals,
+            "num_processes": len(self._last),
+            "num_samples": self.num_samples,
+        }
+
+
+class TelemetryLog:
+    """A JSONL file with one line per finished job."""
+
+    def __init__(self, path: Path) -> None:
+        """Initialize the log. Lines are appended to any existing file.
+
+        :param path The path to the log
+        """
+        self.path: Final[Path] = path
+        self._host: Final[str] = socket.gethostname()
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """Append a job's record to the log.
+
+        :param record The job's record
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("at") as file:
+            file.write(json.dumps({"host": self._host, **record}) + "\n")
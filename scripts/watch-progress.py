@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+
+"""Show the live progress of a campaign run by run-cmds-host.py.
+
+Reads the progress snapshots run-cmds-host.py writes (by default,
+<command-file>.progress.json, or one file per host in
+<queue-dir>/progress/), and shows every running command's phase, ROIs,
+simulation rate (in millions of instructions per second, MIPS) and ETA,
+slowest first, along with the campaign's overall rate and ETA.
+
+Commands simulating at less than half the campaign's median rate are
+marked with "!", and the configurations with the lowest detailed rates
+are listed, so stragglers and slow configurations stand out early.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Final, List, Optional
+
+from util.progress import merge_snapshots
+from util.runner import format_duration
+
+# How many of the slowest configurations to list
+NUM_SLOW_CONFIGS: Final[int] = 5
+
+# Clears the terminal and moves the cursor to its top left
+CLEAR_SCREEN: Final[str] = "\x1b[2J\x1b[H"
+
+
+def load_snapshots(paths: List[Path]) -> List[Dict[str, Any]]:
+    """Load progress snapshots.
+
+    :param paths Snapshot files, or directories of them
+    :return The snapshots that could be read
+    """
+    files: List[Path] = []
+    for path in paths:
+        files += sorted(path.glob("*.json")) if path.is_dir() else [path]
+
+    snapshots: List[Dict[str, Any]] = []
+    for file in files:
+        try:
+            snapshots.append(json.loads(file.read_text()))
+        except (OSError, ValueError):
+            continue
+    return snapshots
+
+
+def format_rate(rate: Optional[float]) -> str:
+    """Format an instructions-per-second rate in MIPS.
+
+    :param rate The rate, if known
+    :return The formatted rate
+    """
+    return f"{rate / 1e6:.2f}" if rate is not None else "-"
+
+
+def render(campaign: Dict[str, Any], top: int) -> List[str]:
+    """Render a campaign's snapshot.
+
+    :param campaign The merged snapshot
+    :param top The most running commands to list
+    :return The lines to print
+    """
+    eta: Final[Optional[float]] = campaign["eta"]
+    lines: List[str] = [
+        f"{campaign['num_running']} running, {campaign['num_pending']} pending, "
+        f"{campaign['num_finished']} finished on {len(campaign['hosts'])} host(s) "
+        f"with {campaign['num_workers']} worker(s)",
+        f"{format_rate(campaign['instructions_per_second'])} MIPS in total; "
+        f"median {format_rate(campaign['median_ff_rate'])} MIPS fast-forward, "
+        f"{format_rate(campaign['median_detailed_rate'])} MIPS detailed; "
+        f"ETA {format_duration(eta) if eta is not None else 'unknown'}",
+        "",
+    ]
+
+    running: List[Dict[str, Any]] = [
+        job for job in campaign["jobs"] if job["status"] == "running"
+    ]
+    # Slowest (longest ETA) first; unknown ETAs last
+    running.sort(key=lambda job: -job["eta"] if job["eta"] is not None else 0.0)
+
+    header: Final[str] = (
+        f"  {'JOB':<16} {'HOST':<12} {'PHASE':<7} {'ROIS':>7} {'FF':>8} "
+        f"{'DETAILED':>8} {'ELAPSED':>8} {'ETA':>8}"
+    )
+    lines.append(header)
+    for job in running[:top]:
+        rois: str = f"{job['completed_rois']}/{job['num_rois'] or '?'}"
+        job_eta: str = format_duration(job["eta"]) if job["eta"] is not None else "-"
+        lines.append(
+            f"{'!' if job['straggler'] else ' '} {job['job']:<16} "
+            f"{job['host']:<12} {job['phase']:<7} {rois:>7} "
+            f"{format_rate(job['ff_rate']):>8} {format_rate(job['detailed_rate']):>8} "
+            f"{format_duration(job['elapsed']):>8} {job_eta:>8}"
+        )
+    if len(running) > top:
+        lines.append(f"  ... and {len(running) - top} more")
+
+    # Configurations by their mean detailed rate
+    rates: Dict[str, List[float]] = {}
+    for job in campaign["jobs"]:
+        if job["detailed_rate"] is not None:
+            rates.setdefault(job["signature"], []).append(job["detailed_rate"])
+    if len(rates) > 1:
+        lines += ["", "Slowest configurations (mean detailed MIPS):"]
+        for signature, config_rates in sorted(
+            rates.items(), key=lambda item: statistics.mean(item[1])
+        )[:NUM_SLOW_CONFIGS]:
+            lines.append(
+                f"  {format_rate(statistics.mean(config_rates)):>8}  {signature} "
+                f"({len(config_rates)} job(s))"
+            )
+    return lines
+
+
+def get_args() -> argparse.Namespace:
+    """Get the arguments to this script.
+
+    :return The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(
+        "Show the live progress of a campaign run by run-cmds-host.py."
+    )
+    parser.add_argument(
+        "snapshots",
+        type=Path,
+        nargs="+",
+        help=(
+            "Progress snapshot files, or directories of them (e.g., "
+            "<queue-dir>/progress)"
+        ),
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=5.0,
+        help="Seconds between refreshes (default: 5.0)",
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=30,
+        help="The most running commands to list (default: 30)",
+    )
+    parser.add_argument(
+        "--once",
+        action="store_true",
+        help="Print the progress once, rather than refreshing it.",
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Print the campaign's merged snapshot as JSON, once.",
+    )
+    return parser.parse_args()
+
+
+def main():
+    """Run this script."""
+    args = get_args()
+    while True:
+        snapshots: List[Dict[str, Any]] = load_snapshots(args.snapshots)
+        if not snapshots:
+            print("No progress snapshots found.", file=sys.stderr)
+            sys.exit(1)
+        campaign: Dict[str, Any] = merge_snapshots(snapshots)
+
+        if args.json:
+            print(json.dumps(campaign, indent=2))
+            return
+        lines: List[str] = render(campaign, args.top)
+        if args.once:
+            print("\n".join(lines))
+            return
+        print(CLEAR_SCREEN + "\n".join(lines), flush=True)
+        try:
+            time.sleep(args.interval)
+        except KeyboardInterrupt:
+            return
+
+
+if __name__ == "__main__":
+    main()
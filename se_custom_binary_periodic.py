@@ -124,6 +124,21 @@ print(
         color="blue",
     ),
 )
+print(
+    colored(
+        "***Forked ROIs          :",
+        color="blue",
+        attrs=["bold"],
+    ),
+    colored(
+        (
+            f"up to {roi_manager._max_forks} at once"
+            if roi_manager._fork_rois
+            else "No (serial)"
+        ),
+        color="blue",
+    ),
+)
 print(
     colored("***Continue simulation  :", color="blue", attrs=["bold"]),
     colored(
@@ -137,6 +152,9 @@ start_wall_time: Final[float] = time.time()
 cprint("***Beginning simulation!", color="blue", attrs=["bold"])
 simulator.run()
 
+# Let any forked ROIs finish
+roi_manager.wait_for_forks()
+
 elapsed_wall_time: Final[float] = time.time() - start_wall_time
 elapsed_instructions = coordinator.get_current_time().instruction or 0
 elapsed_ticks = simulator.get_current_tick()
@@ -0,0 +1,67 @@
+"""
+Sample SE config script to restore a checkpoint of an arbitrary program
+(e.g., a SimPoint simulation point) with a detailed O3 processor and a
+three-level classic cache hierarchy, and run for an optional number of
+warmup and ROI-length instructions
+
+The program and its arguments must be the ones the checkpoint was taken of.
+"""
+
+import time
+
+from gem5.components.memory import DualChannelDDR4_2400
+from gem5.isas import ISA
+from gem5.simulate.simulator import Simulator
+from gem5.utils.requires import requires
+
+import util.simarglib as simarglib
+from components.boards.custom_simple_board import CustomSimpleBoard
+from components.cache_hierarchies.three_level_classic import ThreeLevelClassicHierarchy
+from components.cpus.skylake_cpu import SkylakeCPU
+from components.processors.custom_x86_processor import CustomX86Processor
+from util.event_managers.checkpoint.restore import RestoreCheckpointManager
+from util.event_managers.event_manager import EventCoordinator
+from workloads.se.custom_binary import CustomBinarySE
+
+# Parse all command-line args
+simarglib.parse()
+
+# Create a processor
+requires(isa_required=ISA.X86)
+
+# O3 core type recommended
+processor = CustomX86Processor(CPUCls=SkylakeCPU)
+
+# Create a cache hierarchy
+cache_hierarchy = ThreeLevelClassicHierarchy()
+
+# Create some DRAM (as much as the checkpointing config script had)
+memory = DualChannelDDR4_2400(size="3GiB")
+
+# Create a board
+board = CustomSimpleBoard(
+    processor=processor, cache_hierarchy=cache_hierarchy, memory=memory
+)
+
+# Set up the workload (from the --start_from checkpoint)
+workload = CustomBinarySE()
+board.set_workload(workload)
+
+# Set up the simulator
+# (including any event management)
+manager = RestoreCheckpointManager()
+manager.initialize()
+coordinator = EventCoordinator([manager])
+simulator = Simulator(board=board, on_exit_event=coordinator.get_event_handlers())
+coordinator.register(simulator)
+
+# Run the simulation
+starttime = time.time()
+print("***Beginning simulation!")
+simulator.run()
+
+totaltime = time.time() - starttime
+print(
+    f"***Exiting @ tick {simulator.get_current_tick()} because {simulator.get_last_exit_event_cause()}."
+)
+print(f"Total wall clock time: {totaltime:.2f} s = {(totaltime/60):.2f} min")
@@ -0,0 +1,64 @@
+"""
+Sample SE config script to checkpoint an arbitrary program ahead of each of
+its SimPoint simulation points, on a fast ATOMIC CPU (pass --core-type
+atomic)
+
+Restore the checkpoints with se_custom_binary_restore_checkpoint.py.
+"""
+
+import time
+
+from gem5.components.cachehierarchies.classic.no_cache import NoCache
+from gem5.components.memory import DualChannelDDR4_2400
+from gem5.isas import ISA
+from gem5.simulate.simulator import Simulator
+from gem5.utils.requires import requires
+
+import util.simarglib as simarglib
+from components.boards.custom_simple_board import CustomSimpleBoard
+from components.processors.custom_x86_processor import CustomX86Processor
+from util.event_managers.event_manager import EventCoordinator
+from util.event_managers.simpoint.take import TakeSimPointCheckpointsManager
+from workloads.se.custom_binary import CustomBinarySE
+
+# Parse all command-line args
+simarglib.parse()
+
+# Create a processor (atomic for checkpointing)
+requires(isa_required=ISA.X86)
+
+# Atomic core type recommended
+processor = CustomX86Processor()
+
+# Create a cache hierarchy (none for checkpointing)
+cache_hierarchy = NoCache()
+
+# Create some DRAM (as much as the restoring config script has)
+memory = DualChannelDDR4_2400(size="3GiB")
+
+# Create a board
+board = CustomSimpleBoard(
+    processor=processor, cache_hierarchy=cache_hierarchy, memory=memory
+)
+
+# Set up the workload
+workload = CustomBinarySE()
+board.set_workload(workload)
+
+# Set up the simulator
+# (including any event management)
+manager = TakeSimPointCheckpointsManager()
+coordinator = EventCoordinator([manager])
+simulator = Simulator(board=board, on_exit_event=coordinator.get_event_handlers())
+coordinator.register(simulator)
+
+# Run the simulation
+starttime = time.time()
+print("***Beginning simulation!")
+simulator.run()
+
+totaltime = time.time() - starttime
+print(
+    f"***Exiting @ tick {simulator.get_current_tick()} because {simulator.get_last_exit_event_cause()}."
+)
+print(f"Total wall clock time: {totaltime:.2f} s = {(totaltime/60):.2f} min")
@@ -0,0 +1,65 @@
+"""
+Sample SE config script to collect the basic-block vectors of an arbitrary
+program for SimPoint, on a fast ATOMIC CPU (pass --core-type atomic)
+
+Writes <outdir>/simpoint.bb.gz, for scripts/simpoint.py to cluster.
+"""
+
+import time
+
+from gem5.components.cachehierarchies.classic.no_cache import NoCache
+from gem5.components.memory import DualChannelDDR4_2400
+from gem5.isas import ISA
+from gem5.simulate.simulator import Simulator
+from gem5.utils.requires import requires
+
+import util.simarglib as simarglib
+from components.boards.custom_simple_board import CustomSimpleBoard
+from components.processors.custom_x86_processor import CustomX86Processor
+from util.event_managers.event_manager import EventCoordinator
+from util.event_managers.simpoint.profile import SimPointProfileManager
+from workloads.se.custom_binary import CustomBinarySE
+
+# Parse all command-line args
+simarglib.parse()
+
+# Create a processor
+requires(isa_required=ISA.X86)
+
+# Atomic core type required
+processor = CustomX86Processor()
+
+# Create a cache hierarchy (none for profiling)
+cache_hierarchy = NoCache()
+
+# Create some DRAM
+memory = DualChannelDDR4_2400(size="3GiB")
+
+# Create a board
+board = CustomSimpleBoard(
+    processor=processor, cache_hierarchy=cache_hierarchy, memory=memory
+)
+
+# Collect BBVs on each core
+manager = SimPointProfileManager()
+manager.add_probes(processor)
+coordinator = EventCoordinator([manager])
+
+# Set up the workload
+workload = CustomBinarySE()
+board.set_workload(workload)
+
+# Set up the simulator
+simulator = Simulator(board=board, on_exit_event=coordinator.get_event_handlers())
+coordinator.register(simulator)
+
+# Run the simulation
+starttime = time.time()
+print("***Beginning simulation!")
+simulator.run()
+
+totaltime = time.time() - starttime
+print(
+    f"***Exiting @ tick {simulator.get_current_tick()} because {simulator.get_last_exit_event_cause()}."
+)
+print(f"Total wall clock time: {totaltime:.2f} s = {(totaltime/60):.2f} min")
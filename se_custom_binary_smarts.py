@@ -0,0 +1,177 @@
+"""se_custom_binary_smarts.py
+
+A sample SE config script to run custom binaries on a switchable CPU,
+which fast-forwards on an ATOMIC core (the default here) and measures
+many short units on O3 until CPI is known to a target confidence.
+
+Writes the estimate, each unit's CPI and the units' summed stats to
+<outdir>/smarts.json.
+"""
+
+import time
+from typing import Final
+
+from gem5.components.memory import DualChannelDDR4_2400
+from gem5.isas import ISA
+from gem5.simulate.simulator import Simulator
+from gem5.utils.requires import requires
+from termcolor import colored, cprint
+
+import util.simarglib as simarglib
+from components.boards.custom_simple_board import CustomSimpleBoard
+from components.cache_hierarchies.three_level_classic import ThreeLevelClassicHierarchy
+from components.cpus.skylake_cpu import SkylakeCPU
+from components.processors.custom_x86_switchable_processor import (
+    CustomX86SwitchableProcessor,
+)
+from util.event_managers.event_manager import EventCoordinator
+from util.event_managers.roi.smarts import SmartsROIManager
+from workloads.se.custom_binary import CustomBinarySE
+
+# Parse all command-line args, starting on an atomic core by default
+simarglib.parser.set_defaults(start_core_type="atomic")
+simarglib.parse()
+
+# Create a processor
+requires(isa_required=ISA.X86)
+
+# Start with an atomic CPU, which keeps the caches warm
+# Switch to a SkylakeCPU (O3)
+processor = CustomX86SwitchableProcessor(SwitchCPUCls=SkylakeCPU)
+
+# Create a cache hierarchy
+cache_hierarchy = ThreeLevelClassicHierarchy()
+
+# Create some DRAM
+memory = DualChannelDDR4_2400(size="3GiB")
+
+# Create a board
+board = CustomSimpleBoard(
+    processor=processor, cache_hierarchy=cache_hierarchy, memory=memory
+)
+
+# Create event manager and event coordinator
+#
+# This specific event manager, SmartsROIManager, alternates functional
+# warming with short detailed units until CPI's confidence interval is
+# tight enough.
+#
+# The coordinator manages one or more event managers to ensure multiple
+# event managers can work together smoothly.
+roi_manager = SmartsROIManager()
+coordinator = EventCoordinator([roi_manager])
+
+# Set up the workload
+workload = CustomBinarySE()
+
+# Configure the board
+board.set_workload(workload)
+
+# Set up the simulator
+simulator = Simulator(
+    board=board,
+    on_exit_event=coordinator.get_event_handlers(),
+)
+coordinator.register(simulator)
+
+# Print information
+print(
+    colored(
+        "***Fast-forward interval:",
+        color="blue",
+        attrs=["bold"],
+    ),
+    colored(
+        f"{roi_manager._ff_interval:,} instructions",
+        color="blue",
+    ),
+)
+print(
+    colored(
+        "***Warmup interval      :",
+        color="blue",
+        attrs=["bold"],
+    ),
+    colored(
+        f"{roi_manager._warmup_interval:,} instructions",
+        color="blue",
+    ),
+)
+print(
+    colored(
+        "***Unit interval        :",
+        color="blue",
+        attrs=["bold"],
+    ),
+    colored(
+        f"{roi_manager._unit_interval:,} instructions",
+        color="blue",
+    ),
+)
+print(
+    colored(
+        "***Initial fast-forward :",
+        color="blue",
+        attrs=["bold"],
+    ),
+    colored(
+        f"{roi_manager._init_ff_interval:,} instructions",
+        color="blue",
+    ),
+)
+print(
+    colored(
+        "***Target error         :",
+        color="blue",
+        attrs=["bold"],
+    ),
+    colored(
+        f"+/- {100 * roi_manager._target_error:g}% at z = {roi_manager._z:g}",
+        color="blue",
+    ),
+)
+print(
+    colored(
+        "***Maximum units        :",
+        color="blue",
+        attrs=["bold"],
+    ),
+    colored(
+        f"{roi_manager._max_units or 'Unlimited'}",
+        color="blue",
+    ),
+)
+
+# Run the simulation
+start_wall_time: Final[float] = time.time()
+cprint("***Beginning simulation!", color="blue", attrs=["bold"])
+simulator.run()
+
+# Write the CPI estimate
+roi_manager.finish()
+
+elapsed_wall_time: Final[float] = time.time() - start_wall_time
+elapsed_instructions = coordinator.get_current_time().instruction or 0
+elapsed_ticks = simulator.get_current_tick()
+print(
+    colored(
+        f"***Instruction {elapsed_instructions:,}, tick {elapsed_ticks:,}:",
+        color="blue",
+        attrs=["bold"],
+    ),
+    colored(
+        f"Exiting because {simulator.get_last_exit_event_cause()}.",
+        color="blue",
+    ),
+)
+print(
+    colored(
+        "***Total wall clock time:",
+        color="blue",
+        attrs=["bold"],
+    ),
+    colored(
+        f"{(elapsed_wall_time/60):.2f} min",
+        color="blue",
+    ),
+)
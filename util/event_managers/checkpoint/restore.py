@@ -50,8 +50,8 @@ class RestoreCheckpointManager(EventManager):
     def __init__(self) -> None:
         super().__init__()
 
-        warmup_interval: Optional[float] = simarglib.get("warmup")  # type: ignore
-        roi_interval: Optional[float] = simarglib.get("roi")  # type: ignore
+        warmup_interval: Optional[float] = simarglib.get("warmup_interval")  # type: ignore
+        roi_interval: Optional[float] = simarglib.get("roi_interval")  # type: ignore
 
         if warmup_interval:
             if warmup_interval < 0.0:
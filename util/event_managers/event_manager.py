@@ -3,8 +3,9 @@ Parent class for all event managers with some functions
 that must be overridden
 """
 
+import json
 from abc import ABC, abstractmethod
-from typing import Callable, Dict, Final, Generator, List, Optional, Union
+from typing import Any, Callable, Dict, Final, Generator, List, Optional, Union
 
 import m5
 from gem5.simulate.exit_event import ExitEvent
@@ -28,6 +29,32 @@ EventHandlerDict = Optional[
 ]
 
 
+def flatten_stats(node: Any, prefix: str = "") -> Dict[str, float]:
+    """Flatten the JSON of gem5's stats into a value per stat name.
+
+    Vectors' elements are named <vector>::<element>, as in stats.txt.
+
+    :param node The JSON of a group or stat
+    :param prefix The name of the group or stat
+    :return The value of each scalar, by its full name
+    """
+    values: Dict[str, float] = {}
+    if not isinstance(node, dict):
+        return values
+    value: Any = node.get("value")
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        values[prefix] = float(value)
+        return values
+    if isinstance(value, dict):
+        for name, child in value.items():
+            values.update(flatten_stats(child, f"{prefix}::{name}"))
+        return values
+    for name, child in node.items():
+        if isinstance(child, dict):
+            values.update(flatten_stats(child, f"{prefix}.{name}" if prefix else name))
+    return values
+
+
 class EventTime:
     """Represent the time of an event in gem5.
 
@@ -154,6 +181,15 @@ class EventCoordinator:
 
         m5.stats.reset()
 
+    def get_stats(self) -> Dict[str, float]:
+        """Get the simulator's stats since the last reset.
+
+        :return The value of each scalar stat, by its full name
+        """
+        if self._simulator is None:
+            return {}
+        return flatten_stats(json.loads(self._simulator.get_simstats().to_json()))
+
     def get_current_time(self) -> EventTime:
         """Get the current time for this coordinator's simulator.
 
@@ -7,11 +7,26 @@ Handle ROIs in a sampled, periodic manner.
     (b) Switch to the ROI CPU and warm up for <warmup-interval> instructions.
     (c) Collect stats for <roi-interval> instructions.
 (3) Repeat (2) until <num-rois> ROIs have been completed.
+
+With --fork-rois, (b) and (c) run in a child process forked with
+m5.fork, which dumps the ROI's stats to <outdir>/roi<N>/stats.txt and
+exits, while the parent fast-forwards on to the next ROI. At most
+<max-forks> children run at once, so that the ROIs of one benchmark
+keep that many host cores busy. The ROIs are the same instructions as
+in a serial run.
+
+A run with --fork-rois thus keeps up to <max-forks> + 1 host CPUs busy,
+not one. run-spec06-se-periodic.py --suite counts its simulations so;
+when running several otherwise (e.g. with run-cmds-host.py, whose
+--pin-cpus and resource gate take each job to need one CPU), lower
+<max-forks> or annotate each command with "#@ cpus=<max-forks + 1>".
 """
 
+import os
 from enum import Enum
-from typing import Any, Final, Optional
+from typing import Any, Final, List, Optional
 
+import m5
 import m5.stats
 from gem5.simulate.exit_event import ExitEvent
 from termcolor import colored
@@ -28,6 +43,11 @@ DEFAULT_FF_INTERVAL: Final[float] = 1000.0  # M instructions
 DEFAULT_WARMUP_INTERVAL: Final[float] = 200.0  # M instructions
 DEFAULT_ROI_INTERVAL: Final[float] = 800.0  # M instructions
 DEFAULT_INIT_FF_INTERVAL: Final[float] = 0.0  # M instructions
+# The CPUs this process may run on (fewer than the host's when pinned)
+DEFAULT_MAX_FORKS: Final[int] = len(os.sched_getaffinity(0))
+
+# The outdir of each forked ROI, in the parent's outdir
+FORK_OUTDIR_PREFIX: Final[str] = "roi"
 
 #
 # ~~~ Arguments ~~~
@@ -86,6 +106,26 @@ parser.add_argument(
         "execution. (Default: end simulation)"
     ),
 )
+parser.add_argument(
+    "--fork-rois",
+    action="store_true",
+    help=(
+        "Simulate each ROI in a forked child process, with its own outdir, "
+        "while fast-forwarding on to the next. (Default: simulate ROIs "
+        "serially)"
+    ),
+)
+parser.add_argument(
+    "--max-forks",
+    type=int,
+    default=DEFAULT_MAX_FORKS,
+    help=(
+        "With --fork-rois, the most ROIs to simulate at once, each on a "
+        "CPU of its own besides the fast-forward's. Lower it when running "
+        "several simulations at once. (Default: "
+        f"{DEFAULT_MAX_FORKS}, the number of CPUs this process may run on)"
+    ),
+)
 
 
 #
@@ -139,6 +179,8 @@ class PeriodicROIManager(EventManager):
         init_ff_interval: Optional[int] = None,
         num_rois: Optional[int] = None,
         continue_sim: Optional[bool] = None,
+        fork_rois: Optional[bool] = None,
+        max_forks: Optional[int] = None,
     ) -> None:
         """Initialize the PeriodicROIManager.
 
@@ -148,6 +190,8 @@ class PeriodicROIManager(EventManager):
         :param init_ff_interval The initial fast-forward interval, in instructions
         :param num_rois The number of ROIs to run
         :param continue_sim Whether to continue simulation after ROIs finish
+        :param fork_rois Whether to simulate each ROI in a forked process
+        :param max_forks The most forked ROIs to simulate at once
         """
         super().__init__()
 
@@ -177,6 +221,23 @@ class PeriodicROIManager(EventManager):
         self._continue_sim: Final[bool] = (
             continue_sim if continue_sim is not None else simarglib.get("continue_sim")  # type: ignore
         )
+        self._fork_rois: Final[bool] = (
+            fork_rois if fork_rois is not None else bool(simarglib.get("fork_rois"))
+        )
+        self._max_forks: Final[int] = (
+            max_forks if max_forks is not None else simarglib.get("max_forks") or 1  # type: ignore
+        )
+        if self._max_forks < 1:
+            raise ValueError(f"max_forks must be positive, was {self._max_forks}")
+
+        # The running children (in the parent), and whether this process
+        # is a child simulating one ROI
+        self._forks: List[int] = []
+        self._failed_forks: int = 0
+        self._is_fork: bool = False
+        if self._fork_rois:
+            # gem5 can't fork while listening for debuggers
+            m5.disableAllListeners()
 
         # Start with fast-forward processor, outside of benchmark.
         self._completed_rois: int = 0
@@ -192,6 +253,77 @@ class PeriodicROIManager(EventManager):
             )
         )
 
+    def _fork_roi(self) -> int:
+        """Fork a child process to simulate the next ROI, in its own
+        outdir.
+
+        If <max-forks> children are running, first waits for one to
+        finish.
+
+        :return The child's pid in the parent, or 0 in the child
+        """
+        self._reap_forks(self._max_forks - 1)
+        pid: Final[int] = m5.fork(
+            os.path.join(
+                "%(parent)s", f"{FORK_OUTDIR_PREFIX}{self._completed_rois + 1:03d}"
+            )
+        )
+        if pid == 0:
+            self._is_fork = True
+            self._forks.clear()
+        else:
+            self._forks.append(pid)
+        return pid
+
+    def _reap_forks(self, limit: int) -> None:
+        """Reap finished children, waiting for them while more than a
+        limit are running.
+
+        :param limit The most children to leave running
+        """
+        while self._forks:
+            pid, status = os.waitpid(-1, 0 if len(self._forks) > limit else os.WNOHANG)
+            if pid == 0:
+                return
+            if pid not in self._forks:
+                continue
+            self._forks.remove(pid)
+            exit_code: int = (
+                os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+            )
+            if exit_code != 0:
+                self._failed_forks += 1
+                print(
+                    colored(
+                        f"***Forked ROI simulation (pid {pid}) failed with exit "
+                        f"code {exit_code}.",
+                        color="red",
+                        attrs=["bold"],
+                    )
+                )
+
+    def wait_for_forks(self) -> None:
+        """Wait for every forked ROI simulation to finish.
+
+        Call after the simulation ends, so that the parent outlives its
+        children.
+
+        :raise RuntimeError If any of them failed
+        """
+        if self._is_fork:
+            return
+        if self._forks:
+            print(
+                colored(
+                    f"***Waiting for {len(self._forks)} forked ROI simulation(s).",
+                    color="blue",
+                    attrs=["bold"],
+                )
+            )
+        self._reap_forks(0)
+        if self._failed_forks:
+            raise RuntimeError(f"{self._failed_forks} forked ROI simulation(s) failed")
+
     def _handle_max_insts(self) -> EventHandler:
         """Handle max instructions event, by moving to the next phase.
 
@@ -207,6 +339,23 @@ class PeriodicROIManager(EventManager):
                 m5.stats.dump()  # type: ignore
                 self._completed_rois += 1
 
+                # A forked child's only ROI is done
+                if self._is_fork:
+                    print(
+                        colored(
+                            f"***Instruction {current_ins:,}:",
+                            color="blue",
+                            attrs=["bold"],
+                        ),
+                        colored(
+                            f"Exiting ROI #{self._completed_rois}. Ending forked simulation.",
+                            color="blue",
+                        ),
+                    )
+                    self._coordinator.reset_stats()  # type: ignore
+                    yield True
+                    continue
+
                 print(
                     colored(
                         f"***Instruction {current_ins:,}:",
@@ -281,24 +430,63 @@ class PeriodicROIManager(EventManager):
 
             # FF_WORK -> WARMUP
             # Switch to timing processor and start warmup
+            # (With forked ROIs, the parent instead fast-forwards past
+            # the ROI, which the child switches to simulate.)
             elif self._current_phase == Phase.FF_WORK:
-                print(
-                    colored(
-                        f"***Instruction {current_ins:,}:",
-                        color="blue",
-                        attrs=["bold"],
-                    ),
-                    colored(
-                        "End of fast-forward phase. Switching to timing processor "
-                        "and entering warmup phase.",
-                        color="blue",
-                    ),
-                )
-                self.switch_processor()
-
-                # Schedule end of WARMUP interval
-                self._current_phase = Phase.WARMUP
-                self.set_next_event(EventTime(instruction=self._warmup_interval))
+                if self._fork_rois and not self._is_fork and self._fork_roi() != 0:
+                    self._completed_rois += 1
+                    print(
+                        colored(
+                            f"***Instruction {current_ins:,}:",
+                            color="blue",
+                            attrs=["bold"],
+                        ),
+                        colored(
+                            f"Forked ROI #{self._completed_rois} "
+                            f"(pid {self._forks[-1]}); fast-forwarding past it.",
+                            color="blue",
+                        ),
+                    )
+
+                    # Schedule end of the next FF_WORK interval (if not
+                    # past MAX_ROIs)
+                    if self._num_rois and self._completed_rois >= self._num_rois:
+                        self.clear_next_event()
+                        if not self._continue_sim:
+                            self._reap_forks(0)
+
+                            # Clear unwanted final stats block
+                            self._coordinator.reset_stats()  # type: ignore
+
+                            # End simulation
+                            yield True
+                            continue
+                    else:
+                        self.set_next_event(
+                            EventTime(
+                                instruction=self._warmup_interval
+                                + self._roi_interval
+                                + self._ff_interval
+                            )
+                        )
+                else:
+                    print(
+                        colored(
+                            f"***Instruction {current_ins:,}:",
+                            color="blue",
+                            attrs=["bold"],
+                        ),
+                        colored(
+                            "End of fast-forward phase. Switching to timing processor "
+                            "and entering warmup phase.",
+                            color="blue",
+                        ),
+                    )
+                    self.switch_processor()
+
+                    # Schedule end of WARMUP interval
+                    self._current_phase = Phase.WARMUP
+                    self.set_next_event(EventTime(instruction=self._warmup_interval))
 
             # FF_INIT -> FF_WORK
             # Enter first fast-forward phase
@@ -440,7 +628,9 @@ class PeriodicROIManager(EventManager):
             # zero it anyway
             self._coordinator.reset_stats()  # type: ignore
             self._current_phase = Phase.NO_WORK
-            yield False  # Continue simulation
+
+            # A forked child has nothing left to simulate
+            yield self._is_fork
 
     # @override
     def get_event_handlers(self) -> EventHandlerDict:
@@ -0,0 +1,460 @@
+"""
+Sample one ROI per program phase, detecting phases online.
+
+(1) Fast-forward in windows of <window-interval> instructions.
+(2) At the end of each window, classify its execution signature: the
+    fraction of the window's instructions of each class (integer ALU,
+    memory read, float add, ...) and of each kind of control, read from
+    the fast-forward core's stats. A window within <phase-threshold>
+    (Manhattan distance) of a known phase's signature joins that phase;
+    otherwise it starts a new one.
+(3) If the phase has been sampled fewer than <samples-per-phase> times,
+    switch to the ROI CPU, warm up for <warmup-interval> instructions and
+    collect stats for <roi-interval> instructions, then switch back;
+    windows of phases already sampled reuse those ROIs.
+(4) Repeat (2) until the benchmark ends.
+
+Every window is counted toward its phase, so <outdir>/phases.json holds
+each phase's share of the run's instructions and the indices of the
+stats blocks of its ROIs, for scripts/phases.py to weigh the ROIs by.
+Detailed simulation thus scales with the number of phases, not with the
+length of the program.
+
+gem5's SimPoint probe writes basic-block vectors to a file only at exit,
+and probes can't be listened to from Python, so the signature uses the
+core's instruction mix instead: coarser than a BBV, but free to collect.
+It needs an atomic or timing fast-forward core; KVM cores don't count
+instruction classes.
+"""
+
+import json
+import re
+import sys
+from enum import Enum
+from pathlib import Path
+from typing import Any, Dict, Final, List, Optional, Pattern
+
+import m5
+import m5.stats
+from gem5.simulate.exit_event import ExitEvent
+from termcolor import colored
+
+import util.simarglib as simarglib
+from util.event_managers.event_manager import (
+    EventHandler,
+    EventHandlerDict,
+    EventManager,
+    EventTime,
+)
+
+DEFAULT_WINDOW_INTERVAL: Final[float] = 100.0  # M instructions
+DEFAULT_WARMUP_INTERVAL: Final[float] = 50.0  # M instructions
+DEFAULT_ROI_INTERVAL: Final[float] = 100.0  # M instructions
+DEFAULT_PHASE_THRESHOLD: Final[float] = 0.05
+DEFAULT_SAMPLES_PER_PHASE: Final[int] = 1
+
+# The stats making up a window's signature: the instruction classes
+# (committedInstType in gem5 v23.1+, statExecutedInstType before) and
+# control kinds counted by each core, without their totals
+DEFAULT_SIGNATURE_STATS: Final[str] = (
+    r"processor\..*(committedInstType|statExecutedInstType|committedControl)"
+    r"(_0)?::(?!total)"
+)
+
+# The summary of the phases, in the outdir
+PHASES_FILE_NAME: Final[str] = "phases.json"
+
+#
+# ~~~ Arguments ~~~
+#
+parser = simarglib.add_parser("Phase ROI Manager")
+parser.add_argument(
+    "--window-interval",
+    type=float,
+    default=DEFAULT_WINDOW_INTERVAL,
+    help=(
+        "The length of each fast-forward window classified into a phase, in "
+        f"millions of instructions. (Default: {DEFAULT_WINDOW_INTERVAL} M "
+        "instructions)"
+    ),
+)
+parser.add_argument(
+    "--warmup-interval",
+    type=float,
+    default=DEFAULT_WARMUP_INTERVAL,
+    help=(
+        "How long to warm up the simulator before each ROI, in millions of "
+        f"instructions. (Default: {DEFAULT_WARMUP_INTERVAL} M instructions)"
+    ),
+)
+parser.add_argument(
+    "--roi-interval",
+    type=float,
+    default=DEFAULT_ROI_INTERVAL,
+    help=(
+        "How long to collect ROI statistics for each sample of a phase, in "
+        f"millions of instructions. (Default: {DEFAULT_ROI_INTERVAL} M "
+        "instructions)"
+    ),
+)
+parser.add_argument(
+    "--phase-threshold",
+    type=float,
+    default=DEFAULT_PHASE_THRESHOLD,
+    help=(
+        "The largest Manhattan distance (0 to 2) between a window's signature "
+        "and a phase's for the window to join the phase. (Default: "
+        f"{DEFAULT_PHASE_THRESHOLD})"
+    ),
+)
+parser.add_argument(
+    "--samples-per-phase",
+    type=int,
+    default=DEFAULT_SAMPLES_PER_PHASE,
+    help=(
+        "How many ROIs to simulate of each phase. (Default: "
+        f"{DEFAULT_SAMPLES_PER_PHASE})"
+    ),
+)
+parser.add_argument(
+    "--num-rois",
+    type=int,
+    default=None,
+    help=(
+        "Stop sampling after <num-rois> ROIs, but keep classifying windows. "
+        "(Default: unlimited)"
+    ),
+)
+parser.add_argument(
+    "--signature-stats",
+    type=str,
+    default=DEFAULT_SIGNATURE_STATS,
+    help=(
+        "A regular expression matching the names of the counters making up a "
+        "window's signature. (Default: the cores' instruction classes and "
+        "control kinds)"
+    ),
+)
+
+
+#
+# ~~~ Signatures ~~~
+#
+def manhattan_distance(a: Dict[str, float], b: Dict[str, float]) -> float:
+    """Compute the Manhattan distance between two signatures.
+
+    :param a A signature
+    :param b Another signature
+    :return The sum of the absolute differences of their counters
+    """
+    return sum(abs(a.get(name, 0.0) - b.get(name, 0.0)) for name in a.keys() | b.keys())
+
+
+class ProgramPhase:
+    """A phase of the program: windows with similar signatures."""
+
+    def __init__(self, index: int, signature: Dict[str, float]) -> None:
+        """Initialize the phase.
+
+        :param index The index of the phase, in order of first appearance
+        :param signature The signature of its first window
+        """
+        self.index: Final[int] = index
+        self.signature: Dict[str, float] = dict(signature)
+        self.windows: int = 0
+        self.instructions: int = 0
+        self.rois: List[int] = []
+
+    def add_window(self, signature: Dict[str, float], instructions: int) -> None:
+        """Count a window toward the phase, moving its signature to the
+        mean of its windows'.
+
+        :param signature The window's signature
+        :param instructions The window's instructions
+        """
+        self.windows += 1
+        self.instructions += instructions
+        for name in self.signature.keys() | signature.keys():
+            self.signature[name] = (
+                self.signature.get(name, 0.0)
+                + (signature.get(name, 0.0) - self.signature.get(name, 0.0))
+                / self.windows
+            )
+
+
+#
+# ~~~ States ~~~
+#
+class State(Enum):
+    """Define states of the phase ROI manager."""
+
+    FF_WORK = 1  # classifying a fast-forward window
+    WARMUP = 2  # warming up to sample a phase
+    ROI = 3  # sampling a phase
+
+
+#
+# ~~~ Event Manager ~~~
+#
+class PhaseROIManager(EventManager):
+    def __init__(self) -> None:
+        """Initialize the PhaseROIManager."""
+        super().__init__()
+
+        self._window_interval: Final[int] = int(simarglib.get("window_interval") * 1_000_000)  # type: ignore
+        self._warmup_interval: Final[int] = int(simarglib.get("warmup_interval") * 1_000_000)  # type: ignore
+        self._roi_interval: Final[int] = int(simarglib.get("roi_interval") * 1_000_000)  # type: ignore
+        self._threshold: Final[float] = simarglib.get("phase_threshold")  # type: ignore
+        self._samples_per_phase: Final[int] = simarglib.get("samples_per_phase")  # type: ignore
+        self._num_rois: Final[Optional[int]] = simarglib.get("num_rois")  # type: ignore
+        self._signature_stats: Final[Pattern] = re.compile(
+            simarglib.get("signature_stats")  # type: ignore
+        )
+
+        if self._window_interval <= 0 or self._roi_interval <= 0:
+            raise ValueError("window_interval and roi_interval must be positive")
+        if self._warmup_interval < 0:
+            raise ValueError("warmup_interval cannot be negative")
+        if simarglib.get("start_core_type") == "kvm":
+            print(
+                "Phases can't be detected on a KVM core, which doesn't count "
+                "instruction classes (pass --start-core-type atomic)!"
+            )
+            sys.exit(1)
+
+        self._phases: List[ProgramPhase] = []
+        self._sampled_phase: Optional[ProgramPhase] = None
+        self._completed_rois: int = 0
+        self._window_start: int = 0
+
+        self._current_state: State = State.FF_WORK
+        self._next_event = EventTime(instruction=self._window_interval)
+
+    def _window_signature(self) -> Dict[str, float]:
+        """Get the signature of the window since the last stats reset.
+
+        :return The fraction of the signature counters' total that each
+                counter makes up
+        :raise ValueError If no stats match the signature's expression
+        """
+        stats: Final[Dict[str, float]] = self._coordinator.get_stats()  # type: ignore
+        counts: Final[Dict[str, float]] = {
+            name: value
+            for name, value in stats.items()
+            if self._signature_stats.search(name) and value > 0
+        }
+        if not any(self._signature_stats.search(name) for name in stats):
+            raise ValueError(
+                f"No stats match the signature expression {self._signature_stats.pattern}"
+            )
+        total: Final[float] = sum(counts.values()) or 1.0
+
+        # Name counters by the stat alone, so that the same counter of
+        # different cores adds up
+        signature: Dict[str, float] = {}
+        for name, value in counts.items():
+            key: str = name.rsplit(".", 1)[-1]
+            signature[key] = signature.get(key, 0.0) + value / total
+        return signature
+
+    def _classify_window(self) -> ProgramPhase:
+        """Count the window since the last stats reset toward its phase.
+
+        :return The phase, new if no known phase is within the threshold
+        """
+        current_ins: Final[int] = self.get_current_time().instruction or 0
+        signature: Final[Dict[str, float]] = self._window_signature()
+
+        phase: Optional[ProgramPhase] = None
+        if self._phases:
+            nearest: ProgramPhase = min(
+                self._phases,
+                key=lambda p: manhattan_distance(signature, p.signature),
+            )
+            if manhattan_distance(signature, nearest.signature) <= self._threshold:
+                phase = nearest
+        if phase is None:
+            phase = ProgramPhase(len(self._phases), signature)
+            self._phases.append(phase)
+
+        phase.add_window(signature, current_ins - self._window_start)
+        self._window_start = current_ins
+        return phase
+
+    def _should_sample(self, phase: ProgramPhase) -> bool:
+        """Decide whether to sample the phase of the window just classified.
+
+        :param phase The phase
+        :return True if it needs more ROIs, and the ROI limit isn't reached
+        """
+        if self._num_rois is not None and self._completed_rois >= self._num_rois:
+            return False
+        return len(phase.rois) < self._samples_per_phase
+
+    def write_summary(self) -> None:
+        """Write each phase's weight and ROIs to <outdir>/phases.json."""
+        total: Final[int] = sum(phase.instructions for phase in self._phases)
+        summary: Final[Dict[str, Any]] = {
+            "window_interval": self._window_interval,
+            "warmup_interval": self._warmup_interval,
+            "roi_interval": self._roi_interval,
+            "threshold": self._threshold,
+            "instructions": total,
+            "phases": [
+                {
+                    "phase": phase.index,
+                    "windows": phase.windows,
+                    "instructions": phase.instructions,
+                    "weight": phase.instructions / total if total else 0.0,
+                    "rois": phase.rois,
+                    "signature": phase.signature,
+                }
+                for phase in self._phases
+            ],
+        }
+        (Path(m5.options.outdir) / PHASES_FILE_NAME).write_text(
+            json.dumps(summary, indent=2)
+        )
+
+    def finish(self) -> None:
+        """Count the last, partial window, and write the summary.
+
+        Call after the simulation ends.
+        """
+        current_ins: Final[int] = self.get_current_time().instruction or 0
+        if self._current_state == State.FF_WORK and current_ins > self._window_start:
+            self._classify_window()
+        elif self._sampled_phase is not None:
+            # The benchmark ended mid-sample
+            self._sampled_phase.instructions += current_ins - self._window_start
+        self.write_summary()
+
+        print(
+            colored("***Phases:", color="blue", attrs=["bold"]),
+            colored(
+                f"{len(self._phases)} detected, "
+                f"{sum(1 for phase in self._phases if phase.rois)} sampled "
+                f"in {self._completed_rois} ROI(s).",
+                color="blue",
+            ),
+        )
+
+    def _handle_max_insts(self) -> EventHandler:
+        """Handle max instructions event, by moving to the next state.
+
+        :yield True if the simulation should end, False otherwise
+        """
+        while True:
+            current_time: EventTime = self.get_current_time()
+            current_ins: int = current_time.instruction or 0
+
+            # ROI -> FF_WORK
+            # Dump ROI stats, credit the sample to its phase, and switch to
+            # FF proc
+            if self._current_state == State.ROI:
+                m5.stats.dump()  # type: ignore
+                self._sampled_phase.rois.append(self._completed_rois)  # type: ignore
+                self._sampled_phase.instructions += current_ins - self._window_start  # type: ignore
+                self._completed_rois += 1
+
+                print(
+                    colored(
+                        f"***Instruction {current_ins:,}:",
+                        color="blue",
+                        attrs=["bold"],
+                    ),
+                    colored(
+                        f"Exiting ROI #{self._completed_rois} (phase "
+                        f"{self._sampled_phase.index}). Switching to "  # type: ignore
+                        "fast-forward processor.",
+                        color="blue",
+                    ),
+                )
+                self.switch_processor()
+                self._coordinator.reset_stats()  # type: ignore
+                self._window_start = current_ins
+                self._sampled_phase = None
+                self.write_summary()
+
+                # Schedule end of the next window
+                self._current_state = State.FF_WORK
+                self.set_next_event(EventTime(instruction=self._window_interval))
+
+            # WARMUP -> ROI
+            # Reset stats and start ROI
+            elif self._current_state == State.WARMUP:
+                print(
+                    colored(
+                        f"***Instruction {current_ins:,}:",
+                        color="blue",
+                        attrs=["bold"],
+                    ),
+                    colored(
+                        f"End of warmup phase. Entering ROI #{self._completed_rois + 1}.",
+                        color="blue",
+                    ),
+                )
+
+                # Reset stats for ROI
+                self._coordinator.reset_stats()  # type: ignore
+
+                # Schedule end of ROI interval
+                self._current_state = State.ROI
+                self.set_next_event(EventTime(instruction=self._roi_interval))
+
+            # FF_WORK -> WARMUP (or FF_WORK)
+            # Classify the window, and sample its phase if it's new
+            else:
+                known_phases: int = len(self._phases)
+                phase: ProgramPhase = self._classify_window()
+                self._coordinator.reset_stats()  # type: ignore
+
+                if self._should_sample(phase):
+                    print(
+                        colored(
+                            f"***Instruction {current_ins:,}:",
+                            color="blue",
+                            attrs=["bold"],
+                        ),
+                        colored(
+                            f"Window in {'new ' if len(self._phases) > known_phases else ''}"
+                            f"phase {phase.index}. Switching to timing processor "
+                            "and entering warmup phase.",
+                            color="blue",
+                        ),
+                    )
+                    self.switch_processor()
+                    self._sampled_phase = phase
+
+                    # Schedule end of WARMUP interval
+                    self._current_state = State.WARMUP
+                    self.set_next_event(EventTime(instruction=self._warmup_interval))
+                else:
+                    if len(self._phases) > known_phases:
+                        print(
+                            colored(
+                                f"***Instruction {current_ins:,}:",
+                                color="blue",
+                                attrs=["bold"],
+                            ),
+                            colored(
+                                f"Window in new phase {phase.index}, not sampled "
+                                "(maximum number of ROIs reached).",
+                                color="blue",
+                            ),
+                        )
+
+                    # Schedule end of the next window
+                    self.set_next_event(EventTime(instruction=self._window_interval))
+
+            yield False  # Continue simulation
+
+    # @override
+    def get_event_handlers(self) -> EventHandlerDict:
+        """Get dictionary of event types -> handlers.
+
+        :return A dictionary of this manager's event handlers
+        """
+        return {
+            ExitEvent.MAX_INSTS: self._handle_max_insts(),
+        }
@@ -0,0 +1,417 @@
+"""
+Sample many short ROIs until CPI is known to a target confidence, as in
+SMARTS (Wunderlich et al., 2003).
+
+(1) Fast-forward for <init-ff-interval> instructions.
+(2) For each measurement unit:
+    (a) Fast-forward for <ff-interval> instructions on the atomic core,
+        which keeps the caches functionally warm.
+    (b) Switch to the ROI CPU and warm up its pipeline and predictors for
+        <warmup-interval> instructions.
+    (c) Measure the CPI of the next <unit-interval> instructions.
+(3) Once at least <min-units> units are measured, end the simulation as
+    soon as the confidence interval of the mean CPI, mean +/- z * s /
+    sqrt(n), is within <target-error> of the mean.
+
+Units are far shorter than periodic ROIs (thousands of instructions, not
+hundreds of millions), so a run stops as soon as its CPI is pinned down
+rather than after a fixed number of ROIs, and reports how tight its
+estimate is. <outdir>/smarts.json holds each unit's CPI, the final
+estimate, and the units' stats summed, which the tools in scripts/ read
+as the run's one ROI; pass --dump-units to also dump each unit's stats
+block.
+
+Functional warming needs an atomic fast-forward core with the caches
+attached; KVM cores bypass them.
+"""
+
+import json
+import math
+import sys
+from enum import Enum
+from pathlib import Path
+from typing import Any, Dict, Final, List, Optional
+
+import m5
+import m5.stats
+from gem5.simulate.exit_event import ExitEvent
+from termcolor import colored
+
+import util.simarglib as simarglib
+from util.event_managers.event_manager import (
+    EventHandler,
+    EventHandlerDict,
+    EventManager,
+    EventTime,
+)
+
+DEFAULT_FF_INTERVAL: Final[float] = 1.0  # M instructions
+DEFAULT_WARMUP_INTERVAL: Final[float] = 0.02  # M instructions
+DEFAULT_UNIT_INTERVAL: Final[float] = 0.01  # M instructions
+DEFAULT_INIT_FF_INTERVAL: Final[float] = 0.0  # M instructions
+DEFAULT_TARGET_ERROR: Final[float] = 0.03
+DEFAULT_CONFIDENCE_Z: Final[float] = 3.0  # 99.7% confidence
+DEFAULT_MIN_UNITS: Final[int] = 30
+
+# How often to print the running estimate, in units
+REPORT_INTERVAL: Final[int] = 100
+
+# The summary of the units, in the outdir
+SMARTS_FILE_NAME: Final[str] = "smarts.json"
+
+#
+# ~~~ Arguments ~~~
+#
+parser = simarglib.add_parser("SMARTS ROI Manager")
+parser.add_argument(
+    "--ff-interval",
+    type=float,
+    default=DEFAULT_FF_INTERVAL,
+    help=(
+        "How long to fast-forward (with functional warming) between units, "
+        f"in millions of instructions. (Default: {DEFAULT_FF_INTERVAL} M "
+        "instructions)"
+    ),
+)
+parser.add_argument(
+    "--warmup-interval",
+    type=float,
+    default=DEFAULT_WARMUP_INTERVAL,
+    help=(
+        "How long to warm up the ROI CPU before each unit, in millions of "
+        f"instructions. (Default: {DEFAULT_WARMUP_INTERVAL} M instructions)"
+    ),
+)
+parser.add_argument(
+    "--unit-interval",
+    type=float,
+    default=DEFAULT_UNIT_INTERVAL,
+    help=(
+        "The length of each measurement unit, in millions of instructions. "
+        f"(Default: {DEFAULT_UNIT_INTERVAL} M instructions)"
+    ),
+)
+parser.add_argument(
+    "--init-ff-interval",
+    type=float,
+    default=DEFAULT_INIT_FF_INTERVAL,
+    help=(
+        "How long to fast-forward for after starting the benchmark, in "
+        f"millions of instructions. (Default: {DEFAULT_INIT_FF_INTERVAL} M "
+        "instructions)"
+    ),
+)
+parser.add_argument(
+    "--target-error",
+    type=float,
+    default=DEFAULT_TARGET_ERROR,
+    help=(
+        "End the simulation once the confidence interval of CPI is within "
+        f"this fraction of its mean. (Default: {DEFAULT_TARGET_ERROR})"
+    ),
+)
+parser.add_argument(
+    "--confidence-z",
+    type=float,
+    default=DEFAULT_CONFIDENCE_Z,
+    help=(
+        "The z-score of the confidence interval, e.g. 1.96 for 95% or 3 for "
+        f"99.7%. (Default: {DEFAULT_CONFIDENCE_Z})"
+    ),
+)
+parser.add_argument(
+    "--min-units",
+    type=int,
+    default=DEFAULT_MIN_UNITS,
+    help=(
+        "The fewest units to measure before stopping, for the interval to be "
+        f"trusted. (Default: {DEFAULT_MIN_UNITS})"
+    ),
+)
+parser.add_argument(
+    "--max-units",
+    type=int,
+    default=None,
+    help="Stop after <max-units> units, even short of the target. (Default: unlimited)",
+)
+parser.add_argument(
+    "--dump-units",
+    action="store_true",
+    help=(
+        "Dump a stats block for each unit. (Default: only write the units' "
+        "summed stats to smarts.json)"
+    ),
+)
+
+
+#
+# ~~~ Running estimate ~~~
+#
+class RunningMean:
+    """The running mean and variance of samples (Welford's algorithm)."""
+
+    def __init__(self) -> None:
+        """Initialize the estimate, with no samples."""
+        self.count: int = 0
+        self.mean: float = 0.0
+        self._squares: float = 0.0
+
+    def add(self, value: float) -> None:
+        """Add a sample.
+
+        :param value The sample
+        """
+        self.count += 1
+        delta: Final[float] = value - self.mean
+        self.mean += delta / self.count
+        self._squares += delta * (value - self.mean)
+
+    @property
+    def std(self) -> float:
+        """The samples' standard deviation (0 with fewer than two)."""
+        if self.count < 2:
+            return 0.0
+        return math.sqrt(self._squares / (self.count - 1))
+
+    def relative_error(self, z: float) -> float:
+        """Get the half-width of the mean's confidence interval, relative
+        to the mean.
+
+        :param z The z-score of the confidence interval
+        :return The relative half-width (infinite with fewer than two
+                samples)
+        """
+        if self.count < 2 or self.mean <= 0:
+            return math.inf
+        return z * self.std / math.sqrt(self.count) / self.mean
+
+
+#
+# ~~~ Phases ~~~
+#
+class Phase(Enum):
+    """Define phases of the SMARTS ROI manager."""
+
+    FF_INIT = 1  # initial FF window
+    FF_WORK = 2  # functional warming between units
+    WARMUP = 3  # detailed warmup before a unit
+    UNIT = 4  # measurement unit
+
+
+#
+# ~~~ Event Manager ~~~
+#
+class SmartsROIManager(EventManager):
+    def __init__(self) -> None:
+        """Initialize the SmartsROIManager."""
+        super().__init__()
+
+        self._ff_interval: Final[int] = int(simarglib.get("ff_interval") * 1_000_000)  # type: ignore
+        self._warmup_interval: Final[int] = int(simarglib.get("warmup_interval") * 1_000_000)  # type: ignore
+        self._unit_interval: Final[int] = int(simarglib.get("unit_interval") * 1_000_000)  # type: ignore
+        self._init_ff_interval: Final[int] = int(simarglib.get("init_ff_interval") * 1_000_000)  # type: ignore
+        self._target_error: Final[float] = simarglib.get("target_error")  # type: ignore
+        self._z: Final[float] = simarglib.get("confidence_z")  # type: ignore
+        self._min_units: Final[int] = max(simarglib.get("min_units"), 2)  # type: ignore
+        self._max_units: Final[Optional[int]] = simarglib.get("max_units")  # type: ignore
+        self._dump_units: Final[bool] = simarglib.get("dump_units")  # type: ignore
+
+        if self._ff_interval <= 0 or self._unit_interval <= 0:
+            raise ValueError("ff_interval and unit_interval must be positive")
+        if self._warmup_interval < 0 or self._init_ff_interval < 0:
+            raise ValueError("warmup_interval and init_ff_interval cannot be negative")
+        if simarglib.get("start_core_type") != "atomic":
+            print(
+                "Functional warming needs an atomic fast-forward core "
+                "(pass --start-core-type atomic)!"
+            )
+            sys.exit(1)
+
+        self._cpi: Final[RunningMean] = RunningMean()
+        self._unit_cpis: List[float] = []
+        # Each stat summed over the units. Counts add up across units;
+        # formulas (e.g. a rate) don't, but no metric is taken from them.
+        self._unit_stats: Final[Dict[str, float]] = {}
+
+        self._current_phase: Phase = (
+            Phase.FF_INIT if self._init_ff_interval > 0 else Phase.FF_WORK
+        )
+        self._next_event = EventTime(
+            instruction=self._init_ff_interval or self._ff_interval
+        )
+
+    def _measure_unit(self) -> None:
+        """Add the CPI and stats of the unit since the last stats reset."""
+        stats: Final[Dict[str, float]] = self._coordinator.get_stats()  # type: ignore
+        instructions: Final[float] = stats.get("simInsts", 0.0)
+        cycles: Final[float] = sum(
+            value
+            for name, value in stats.items()
+            if name.startswith("board.processor.") and name.endswith(".numCycles")
+        )
+        if instructions <= 0:
+            return
+        self._cpi.add(cycles / instructions)
+        self._unit_cpis.append(cycles / instructions)
+        for name, value in stats.items():
+            if math.isfinite(value):
+                self._unit_stats[name] = self._unit_stats.get(name, 0.0) + value
+
+    def _target_reached(self) -> bool:
+        """Check whether enough units are measured.
+
+        :return True if the confidence interval is tight enough, or the
+                most units have been measured
+        """
+        if self._max_units is not None and self._cpi.count >= self._max_units:
+            return True
+        return (
+            self._cpi.count >= self._min_units
+            and self._cpi.relative_error(self._z) <= self._target_error
+        )
+
+    def _estimate(self) -> str:
+        """Describe the running estimate of CPI.
+
+        :return The mean CPI, and its confidence interval
+        """
+        error: Final[float] = self._cpi.relative_error(self._z)
+        return (
+            f"CPI {self._cpi.mean:.4f} +/- {100 * error:.2f}% "
+            f"(z = {self._z:g}) over {self._cpi.count} unit(s)"
+        )
+
+    def write_summary(self) -> None:
+        """Write the estimate, the units' CPIs and their summed stats to
+        <outdir>/smarts.json.
+        """
+        error: Final[float] = self._cpi.relative_error(self._z)
+        summary: Final[Dict[str, Any]] = {
+            "ff_interval": self._ff_interval,
+            "warmup_interval": self._warmup_interval,
+            "unit_interval": self._unit_interval,
+            "init_ff_interval": self._init_ff_interval,
+            "target_error": self._target_error,
+            "confidence_z": self._z,
+            "units": self._cpi.count,
+            "cpi": self._cpi.mean,
+            "cpi_std": self._cpi.std,
+            "relative_error": error if math.isfinite(error) else None,
+            "target_reached": self._target_reached(),
+            "unit_cpis": self._unit_cpis,
+            "stats": self._unit_stats,
+        }
+        (Path(m5.options.outdir) / SMARTS_FILE_NAME).write_text(
+            json.dumps(summary, indent=2)
+        )
+
+    def finish(self) -> None:
+        """Write the summary, and report the estimate.
+
+        Call after the simulation ends.
+        """
+        self.write_summary()
+        print(
+            colored("***Estimate:", color="blue", attrs=["bold"]),
+            colored(
+                self._estimate()
+                + ("" if self._target_reached() else ", short of the target"),
+                color="blue",
+            ),
+        )
+
+    def _handle_max_insts(self) -> EventHandler:
+        """Handle max instructions event, by moving to the next phase.
+
+        :yield True if the simulation should end, False otherwise
+        """
+        while True:
+            current_time: EventTime = self.get_current_time()
+            current_ins: int = current_time.instruction or 0
+
+            # UNIT -> FF_WORK (or end simulation)
+            # Measure the unit and switch to FF proc
+            if self._current_phase == Phase.UNIT:
+                self._measure_unit()
+                if self._dump_units:
+                    m5.stats.dump()  # type: ignore
+                self.switch_processor()
+                self._current_phase = Phase.FF_WORK
+
+                if self._cpi.count % REPORT_INTERVAL == 0:
+                    print(
+                        colored(
+                            f"***Instruction {current_ins:,}:",
+                            color="blue",
+                            attrs=["bold"],
+                        ),
+                        colored(self._estimate(), color="blue"),
+                    )
+
+                if self._target_reached():
+                    print(
+                        colored(
+                            f"***Instruction {current_ins:,}:",
+                            color="blue",
+                            attrs=["bold"],
+                        ),
+                        colored(
+                            f"{self._estimate()}. Ending simulation.",
+                            color="blue",
+                        ),
+                    )
+
+                    # Clear unwanted final stats block
+                    self._coordinator.reset_stats()  # type: ignore
+                    yield True
+                else:
+                    self.set_next_event(EventTime(instruction=self._ff_interval))
+
+            # WARMUP -> UNIT
+            # Reset stats and start the unit
+            elif self._current_phase == Phase.WARMUP:
+                self._coordinator.reset_stats()  # type: ignore
+
+                # Schedule end of UNIT interval
+                self._current_phase = Phase.UNIT
+                self.set_next_event(EventTime(instruction=self._unit_interval))
+
+            # FF_WORK -> WARMUP
+            # Switch to timing processor and start warmup
+            elif self._current_phase == Phase.FF_WORK:
+                self.switch_processor()
+
+                # Schedule end of WARMUP interval
+                self._current_phase = Phase.WARMUP
+                self.set_next_event(EventTime(instruction=self._warmup_interval))
+
+            # FF_INIT -> FF_WORK
+            # Enter first fast-forward phase
+            else:
+                print(
+                    colored(
+                        f"***Instruction {current_ins:,}:",
+                        color="blue",
+                        attrs=["bold"],
+                    ),
+                    colored(
+                        "End of initial fast-forward phase.",
+                        color="blue",
+                    ),
+                )
+
+                # Schedule end of FF_WORK interval
+                self._current_phase = Phase.FF_WORK
+                self.set_next_event(EventTime(instruction=self._ff_interval))
+
+            yield False  # Continue simulation
+
+    # @override
+    def get_event_handlers(self) -> EventHandlerDict:
+        """Get dictionary of event types -> handlers.
+
+        :return A dictionary of this manager's event handlers
+        """
+        return {
+            ExitEvent.MAX_INSTS: self._handle_max_insts(),
+        }
@@ -0,0 +1,104 @@
+"""
+Collect the basic-block vectors (BBVs) of a benchmark for SimPoint.
+
+Every <simpoint-interval> instructions, gem5's SimPoint probe writes the
+execution count of each basic block over the interval to
+<outdir>/simpoint.bb.gz. The probe only works on atomic cores, which are
+also the fastest non-KVM cores, so the whole profile is one fast pass.
+scripts/simpoint.py then clusters the BBVs into representative intervals.
+"""
+
+import sys
+from typing import Final, Optional
+
+from gem5.simulate.exit_event import ExitEvent
+
+import util.simarglib as simarglib
+from util.event_managers.event_manager import (
+    EventHandler,
+    EventHandlerDict,
+    EventManager,
+    EventTime,
+)
+
+DEFAULT_SIMPOINT_INTERVAL: Final[float] = 100.0  # M instructions
+
+parser = simarglib.add_parser("SimPoint Profile Manager")
+parser.add_argument(
+    "--simpoint-interval",
+    type=float,
+    default=DEFAULT_SIMPOINT_INTERVAL,
+    help=(
+        "The length of each SimPoint interval, in millions of instructions. "
+        f"(Default: {DEFAULT_SIMPOINT_INTERVAL} M instructions)"
+    ),
+)
+parser.add_argument(
+    "--profile-length",
+    type=float,
+    default=None,
+    help=(
+        "Stop profiling after this many million instructions. "
+        "(Default: profile the whole benchmark)"
+    ),
+)
+
+
+def get_simpoint_interval() -> int:
+    """Get the SimPoint interval.
+
+    :return The interval, in instructions
+    :raise ValueError If the interval isn't positive
+    """
+    interval: Final[float] = simarglib.get("simpoint_interval")  # type: ignore
+    if interval <= 0:
+        raise ValueError(f"simpoint_interval must be positive, was {interval}")
+    return int(interval * 1_000_000)
+
+
+class SimPointProfileManager(EventManager):
+    def __init__(self) -> None:
+        """Initialize the SimPointProfileManager."""
+        super().__init__()
+
+        self._interval: Final[int] = get_simpoint_interval()
+        profile_length: Optional[float] = simarglib.get("profile_length")  # type: ignore
+        self._profile_length: Final[Optional[int]] = (
+            int(profile_length * 1_000_000) if profile_length else None
+        )
+
+        if simarglib.get("core_type") != "atomic":
+            print("BBVs can only be collected on an atomic core (--core-type atomic)!")
+            sys.exit(1)
+
+        if self._profile_length:
+            self.set_next_event(EventTime(instruction=self._profile_length))
+
+    def add_probes(self, processor) -> None:
+        """Attach a SimPoint probe to each of a processor's cores.
+
+        Must be called before the simulator is instantiated.
+
+        :param processor The processor, with atomic cores
+        """
+        for core in processor.get_cores():
+            core.core.addSimPointProbe(self._interval)
+
+    def get_event_handlers(self) -> EventHandlerDict:
+        """Get dictionary of event types -> handlers.
+
+        :return A dictionary of this manager's event handlers
+        """
+        return {
+            ExitEvent.MAX_INSTS: self._handle_max_insts(),
+        }
+
+    def _handle_max_insts(self) -> EventHandler:
+        """Handle max instructions event, by ending the profile.
+
+        :yield True if the simulation should end, False otherwise
+        """
+        while True:
+            current_ins: int = self.get_current_time().instruction or 0
+            print(f"***Instruction {current_ins:,}: End of profile.")
+            yield True
@@ -0,0 +1,168 @@
+"""
+Take a checkpoint ahead of each simulation point picked by SimPoint.
+
+Reads the SimPoint-format files written by scripts/simpoint.py (the
+interval of each cluster, and the weight of each cluster), and
+fast-forwards to <warmup-interval> instructions before each simulation
+point to checkpoint it. Next to the checkpoints, simpoints.json records
+each one's weight and actual warmup (less than <warmup-interval> for
+points near the start), for scripts/simpoint.py to restore and
+aggregate them.
+
+Checkpoints should be taken on a fast core (atomic, or KVM if its
+imprecise stops are acceptable), to be restored on a detailed one.
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, Final, List
+
+import m5
+from gem5.simulate.exit_event import ExitEvent
+
+import util.simarglib as simarglib
+from util.event_managers.event_manager import (
+    EventHandler,
+    EventHandlerDict,
+    EventManager,
+    EventTime,
+)
+from util.event_managers.simpoint.profile import get_simpoint_interval
+
+DEFAULT_CHECKPOINTS_DIR: Final[Path] = Path("checkpoints")
+DEFAULT_WARMUP_INTERVAL: Final[float] = 10.0  # M instructions
+
+# The description of the checkpoints, in the checkpoints directory
+MANIFEST_FILE_NAME: Final[str] = "simpoints.json"
+
+parser = simarglib.add_parser("SimPoint Checkpoint Manager")
+parser.add_argument(
+    "--simpoints",
+    required=True,
+    type=Path,
+    help="The SimPoint file of simulation points (<interval> <cluster> per line)",
+)
+parser.add_argument(
+    "--weights",
+    required=True,
+    type=Path,
+    help="The SimPoint file of weights (<weight> <cluster> per line)",
+)
+parser.add_argument(
+    "--warmup-interval",
+    type=float,
+    default=DEFAULT_WARMUP_INTERVAL,
+    help=(
+        "How long before each simulation point to checkpoint, to warm up "
+        f"after restoring, in millions of instructions. (Default: "
+        f"{DEFAULT_WARMUP_INTERVAL} M instructions)"
+    ),
+)
+parser.add_argument(
+    "--checkpoints-dir",
+    type=Path,
+    default=DEFAULT_CHECKPOINTS_DIR,
+    help=(
+        "The enclosing directory in which to store checkpoints inside "
+        f"(default: {DEFAULT_CHECKPOINTS_DIR})"
+    ),
+)
+
+
+def read_simpoint_file(path: Path) -> Dict[int, str]:
+    """Read a SimPoint-format file of "<value> <cluster>" lines.
+
+    :param path The file
+    :return The value of each cluster, as text
+    """
+    values: Dict[int, str] = {}
+    for line in path.read_text().splitlines():
+        if line.strip():
+            value, cluster = line.split()
+            values[int(cluster)] = value
+    return values
+
+
+class TakeSimPointCheckpointsManager(EventManager):
+    def __init__(self) -> None:
+        """Initialize the TakeSimPointCheckpointsManager."""
+        super().__init__()
+
+        interval: Final[int] = get_simpoint_interval()
+        warmup: Final[int] = int(simarglib.get("warmup_interval") * 1_000_000)  # type: ignore
+        self._checkpoints_dir: Final[Path] = simarglib.get("checkpoints_dir")  # type: ignore
+
+        intervals: Final[Dict[int, str]] = read_simpoint_file(simarglib.get("simpoints"))  # type: ignore
+        weights: Final[Dict[int, str]] = read_simpoint_file(simarglib.get("weights"))  # type: ignore
+
+        # The simulation points, in the order to checkpoint them. A
+        # checkpoint can't be taken before the first instruction.
+        self._points: List[Dict[str, Any]] = []
+        for cluster, index in intervals.items():
+            start: int = int(index) * interval
+            checkpoint: int = max(start - warmup, 1)
+            self._points.append(
+                {
+                    "checkpoint": f"simpoint{cluster:03d}",
+                    "cluster": cluster,
+                    "interval": int(index),
+                    "weight": float(weights[cluster]),
+                    "instruction": checkpoint,
+                    "warmup": max(start - checkpoint, 0),
+                    "length": interval,
+                }
+            )
+        self._points.sort(key=lambda point: point["instruction"])
+        self._num_taken: int = 0
+
+        # Create enclosing checkpoint directory
+        self._checkpoints_dir.mkdir(parents=True, exist_ok=True)
+        (self._checkpoints_dir / MANIFEST_FILE_NAME).write_text(
+            json.dumps(self._points, indent=2)
+        )
+
+        if self._points:
+            self.set_next_event(EventTime(instruction=self._points[0]["instruction"]))
+
+    def get_event_handlers(self) -> EventHandlerDict:
+        """Get a dictionary of event types -> handlers.
+
+        :return A dictionary of this manager's event handlers
+        """
+        return {
+            ExitEvent.MAX_INSTS: self._handle_max_insts(),
+        }
+
+    def _handle_max_insts(self) -> EventHandler:
+        """Handle max instructions event, by checkpointing the simulation
+        point(s) due.
+
+        :yield True if the simulation should end, false otherwise
+        """
+        while True:
+            current: int = self._points[self._num_taken]["instruction"]
+            while (
+                self._num_taken < len(self._points)
+                and self._points[self._num_taken]["instruction"] == current
+            ):
+                point: Dict[str, Any] = self._points[self._num_taken]
+                checkpoint_dir: Path = self._checkpoints_dir / point["checkpoint"]
+                print(
+                    f"###Checkpoint {self._num_taken + 1}/{len(self._points)} "
+                    f"(interval {point['interval']}, weight {point['weight']:.4f}): "
+                    f"{checkpoint_dir}"
+                )
+                m5.checkpoint(str(checkpoint_dir))
+                self._num_taken += 1
+
+            if self._num_taken < len(self._points):
+                self.set_next_event(
+                    EventTime(
+                        instruction=self._points[self._num_taken]["instruction"]
+                        - current
+                    )
+                )
+                yield False
+            else:
+                print("###All simulation points checkpointed")
+                yield True
@@ -4,7 +4,7 @@ Syscall emulation workload to run an arbitrary input binary and its arguments
 
 import sys
 from pathlib import Path
-from typing import Final
+from typing import Any, Dict, Final
 
 from gem5.resources.resource import BinaryResource
 
@@ -30,15 +30,23 @@ class CustomBinarySE(CustomSEWorkload):
         inbin: Final[Path] = simarglib.get("input_bin").absolute()  # type: ignore
         inargs: Final[str] = simarglib.get("input_args")  # type: ignore
 
-        if simarglib.get("start_from"):
-            print("--start_from not supported by CustomBinarySE Workload")
-            sys.exit(1)
-
         if not inbin.exists():
             print(f"Input binary {inbin} does not exist!")
             sys.exit(1)
 
+        # Restore from a checkpoint of the same binary and arguments, if given
+        parameters: Dict[str, Any] = {}
+        start_from = simarglib.get("start_from")
+        if start_from:
+            chkptDir = Path(start_from)
+            if not chkptDir.exists():
+                print(f"Checkpoint dir {start_from} does not exist!")
+                sys.exit(1)
+            print(f"###Restoring from checkpoint: {chkptDir}")
+            parameters["checkpoint"] = chkptDir
+
         super().__init__(
             binary=BinaryResource(str(inbin)),
             arguments=inargs.split() if inargs else [],
+            **parameters,
         )